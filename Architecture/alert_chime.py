@@ -0,0 +1,287 @@
+# trackie_app/alert_chime.py
+import threading
+import time
+import wave
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from .logger_config import get_logger
+
+logger = get_logger(__name__)
+
+
+def load_wav_as_pcm16(filepath: str, target_rate: int) -> np.ndarray:
+    """
+    Decodifica um arquivo WAV PCM para int16 mono na taxa `target_rate`.
+    Feito uma única vez na inicialização; a reprodução só copia amostras.
+
+    Args:
+        filepath (str): Caminho do WAV (PCM de 8, 16 ou 32 bits).
+        target_rate (int): Taxa de amostragem do stream de saída.
+
+    Returns:
+        np.ndarray: Amostras int16 mono.
+    """
+    with wave.open(filepath, "rb") as wav_file:
+        channels = wav_file.getnchannels()
+        sample_width = wav_file.getsampwidth()
+        source_rate = wav_file.getframerate()
+        raw = wav_file.readframes(wav_file.getnframes())
+
+    if sample_width == 1:
+        samples = (np.frombuffer(raw, dtype=np.uint8).astype(np.float32) - 128.0) / 128.0
+    elif sample_width == 2:
+        samples = np.frombuffer(raw, dtype="<i2").astype(np.float32) / 32768.0
+    elif sample_width == 4:
+        samples = np.frombuffer(raw, dtype="<i4").astype(np.float32) / 2147483648.0
+    else:
+        raise ValueError(f"Largura de amostra não suportada no WAV {filepath}: {sample_width} bytes.")
+
+    if channels > 1:
+        samples = samples.reshape(-1, channels).mean(axis=1)
+    if source_rate != target_rate and samples.size:
+        target_len = int(round(samples.size * target_rate / source_rate))
+        samples = np.interp(np.linspace(0, samples.size - 1, target_len), np.arange(samples.size), samples)
+
+    return np.clip(samples * 32767.0, -32768, 32767).astype(np.int16)
+
+
+class ChimeMixer:
+    """
+    Mistura um som de alerta pré-decodificado no stream de playback já aberto,
+    abaixando ("ducking") a fala do modelo enquanto o alerta toca.
+
+    `trigger` é chamado pelo detector; `mix_into` é chamado pelo loop de playback
+    antes de cada escrita no dispositivo. A latência detecção -> som é medida entre
+    o `trigger` e a primeira escrita que contém o alerta.
+    """
+
+    def __init__(self, chime_pcm: np.ndarray, sample_rate: int, duck_gain: float = 0.25,
+                 chime_gain: float = 1.0, cooldown_s: float = 3.0):
+        self.chime = chime_pcm.astype(np.float32) * chime_gain
+        self.sample_rate = sample_rate
+        self.duck_gain = duck_gain
+        self.cooldown_s = cooldown_s
+        self._lock = threading.Lock()
+        self._position: Optional[int] = None # None = nenhum alerta tocando
+        self._triggered_at: Optional[float] = None
+        self._last_trigger_at: Optional[float] = None
+
+        # Estatísticas
+        self.chimes_triggered: int = 0
+        self.latencies_ms: List[float] = []
+
+    @property
+    def active(self) -> bool:
+        return self._position is not None
+
+    def trigger(self, detected_at: Optional[float] = None, force: bool = False) -> bool:
+        """
+        Agenda o alerta para a próxima escrita no dispositivo (reinicia se já estiver tocando).
+
+        Args:
+            detected_at (Optional[float]): Instante (time.monotonic) da detecção.
+            force (bool): Ignora o cool-down (perigo mais grave que o último alertado).
+
+        Returns:
+            bool: False se ainda dentro do cool-down do último alerta.
+        """
+        now = time.monotonic()
+        with self._lock:
+            if not force and self._last_trigger_at is not None and now - self._last_trigger_at < self.cooldown_s:
+                return False
+            self._last_trigger_at = now
+            self._position = 0
+            self._triggered_at = detected_at if detected_at is not None else now
+            self.chimes_triggered += 1
+        return True
+
+    def mix_into(self, pcm: bytes, min_frames: int = 0) -> bytes:
+        """
+        Mistura o próximo trecho do alerta em um chunk PCM16 mono do modelo.
+
+        Args:
+            pcm (bytes): Áudio do modelo (pode ser vazio quando só o alerta deve tocar).
+            min_frames (int): Tamanho mínimo do chunk devolvido quando `pcm` é curto.
+
+        Returns:
+            bytes: O chunk pronto para escrita (o próprio `pcm` se não há alerta tocando).
+        """
+        if self._position is None:
+            return pcm
+        with self._lock:
+            position = self._position
+            if position is None:
+                return pcm
+            voice = np.frombuffer(pcm, dtype=np.int16)
+            num_frames = max(voice.size, min_frames)
+            segment = self.chime[position:position + num_frames]
+
+            mixed = np.zeros(num_frames, dtype=np.float32)
+            mixed[:voice.size] = voice
+            mixed[:segment.size] *= self.duck_gain # Abaixa a fala só onde o alerta toca
+            mixed[:segment.size] += segment
+
+            position += num_frames
+            self._position = position if position < self.chime.size else None
+            if position == num_frames and self._triggered_at is not None: # Primeira escrita do alerta
+                self.latencies_ms.append((time.monotonic() - self._triggered_at) * 1000.0)
+                if len(self.latencies_ms) > 256:
+                    del self.latencies_ms[:-256]
+        return np.clip(mixed, -32768, 32767).astype(np.int16).tobytes()
+
+    def stats(self) -> Dict[str, float]:
+        latencies = np.array(self.latencies_ms, dtype=np.float64)
+        return {
+            "chimes_triggered": self.chimes_triggered,
+            "latency_ms_avg": round(float(latencies.mean()), 1) if latencies.size else 0.0,
+            "latency_ms_p95": round(float(np.percentile(latencies, 95)), 1) if latencies.size else 0.0,
+            "latency_ms_max": round(float(latencies.max()), 1) if latencies.size else 0.0,
+        }
+
+
+class DangerChimeGate:
+    """
+    Decide quando um perigo visto pelo detector toca o som local: só quando ele é
+    novo ou mais grave, nunca a cada frame em que continua à vista.
+
+    - Confirmação: um rótulo fica ativo após `confirm_frames` frames seguidos com ele.
+    - Soltura (histerese): só deixa de estar ativo após `release_frames` frames
+      seguidos sem ele; até lá, reaparecer não conta como perigo novo.
+    - Dispara ("new") quando um rótulo fica ativo, ou ("escalated") quando o rótulo
+      que ficou ativo é mais grave que todos os já ativos.
+    """
+
+    def __init__(self, severity_by_label: Dict[str, int], default_severity: int = 1,
+                 confirm_frames: int = 1, release_frames: int = 10):
+        self.severity_by_label = severity_by_label
+        self.default_severity = default_severity
+        self.confirm_frames = max(1, confirm_frames)
+        self.release_frames = max(1, release_frames)
+        self._present_streak: Dict[str, int] = {}
+        self._absent_streak: Dict[str, int] = {}
+        self._active: Dict[str, int] = {} # Rótulo ativo -> severidade
+
+        # Estatísticas
+        self.fired_new: int = 0
+        self.fired_escalated: int = 0
+        self.frames_held: int = 0 # Frames com perigo já ativo (sem novo som)
+
+    def severity(self, label: str) -> int:
+        return self.severity_by_label.get(label, self.default_severity)
+
+    def observe(self, labels_present: Iterable[str]) -> Optional[str]:
+        """
+        Registra os rótulos de perigo de um frame processado pelo detector.
+
+        Returns:
+            Optional[str]: "new", "escalated" ou None (nada a tocar).
+        """
+        present = set(labels_present)
+        previous_max = max(self._active.values(), default=0)
+        newly_active: List[str] = []
+        for label in present | set(self._present_streak) | set(self._active):
+            if label in present:
+                self._present_streak[label] = self._present_streak.get(label, 0) + 1
+                self._absent_streak.pop(label, None)
+                if label not in self._active and self._present_streak[label] >= self.confirm_frames:
+                    self._active[label] = self.severity(label)
+                    newly_active.append(label)
+            else:
+                self._present_streak.pop(label, None)
+                if label in self._active:
+                    self._absent_streak[label] = self._absent_streak.get(label, 0) + 1
+                    if self._absent_streak[label] >= self.release_frames:
+                        del self._active[label]
+                        del self._absent_streak[label]
+
+        if not newly_active:
+            if present & set(self._active):
+                self.frames_held += 1
+            return None
+        if previous_max and max(self.severity(label) for label in newly_active) > previous_max:
+            self.fired_escalated += 1
+            return "escalated"
+        self.fired_new += 1
+        return "new"
+
+    def reset(self) -> None:
+        """Esquece os perigos ativos (ex.: câmera reaberta)."""
+        self._present_streak.clear()
+        self._absent_streak.clear()
+        self._active.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "fired_new": self.fired_new,
+            "fired_escalated": self.fired_escalated,
+            "frames_held": self.frames_held,
+            "active": len(self._active),
+        }
+
+
+def benchmark_detection_to_sound(filepath: str, sample_rate: int = 24000, chunk_frames: int = 1024,
+                                 trials: int = 20, use_device: bool = True) -> Dict[str, float]:
+    """
+    Mede a latência detecção -> som: um "detector" dispara o alerta em instantes
+    aleatórios enquanto o loop de playback escreve fala sintética no dispositivo.
+    Sem PyAudio (ou com `use_device=False`) a escrita é simulada em tempo real.
+    """
+    import random
+
+    mixer = ChimeMixer(load_wav_as_pcm16(filepath, sample_rate), sample_rate, cooldown_s=0.0)
+    voice_chunk = (np.sin(np.arange(chunk_frames) * 2 * np.pi * 220 / sample_rate) * 8000).astype(np.int16).tobytes()
+    chunk_s = chunk_frames / sample_rate
+
+    stream, pa = None, None
+    if use_device:
+        try:
+            import pyaudio
+            pa = pyaudio.PyAudio()
+            stream = pa.open(format=pyaudio.paInt16, channels=1, rate=sample_rate, output=True,
+                             frames_per_buffer=chunk_frames)
+        except Exception as e:
+            logger.warning(f"Sem dispositivo de saída ({e}); simulando escrita em tempo real.")
+            stream = None
+
+    def write(chunk: bytes) -> None:
+        if stream is not None:
+            stream.write(chunk)
+        else:
+            time.sleep(chunk_s)
+
+    stopping = threading.Event()
+
+    def detector() -> None:
+        for _ in range(trials):
+            time.sleep(random.uniform(0.2, 0.6) + mixer.chime.size / sample_rate)
+            mixer.trigger(time.monotonic())
+        stopping.set()
+
+    detector_thread = threading.Thread(target=detector, daemon=True)
+    detector_thread.start()
+    try:
+        while not stopping.is_set() or mixer.active:
+            write(mixer.mix_into(voice_chunk, chunk_frames))
+    finally:
+        if stream is not None:
+            stream.stop_stream()
+            stream.close()
+        if pa is not None:
+            pa.terminate()
+    return mixer.stats()
+
+
+if __name__ == "__main__":
+    import argparse
+    from .app_config import DANGER_SOUND_PATH, AUDIO_RECEIVE_SAMPLE_RATE, AUDIO_CHUNK_SIZE
+
+    parser = argparse.ArgumentParser(description="Benchmark de latência detecção -> som do alerta local.")
+    parser.add_argument("--wav", default=DANGER_SOUND_PATH)
+    parser.add_argument("--trials", type=int, default=20)
+    parser.add_argument("--chunk", type=int, default=AUDIO_CHUNK_SIZE, help="Frames por escrita no dispositivo.")
+    parser.add_argument("--no_device", action="store_true", help="Simula a escrita em vez de usar PyAudio.")
+    args = parser.parse_args()
+    print(benchmark_detection_to_sound(args.wav, AUDIO_RECEIVE_SAMPLE_RATE, args.chunk, args.trials,
+                                       use_device=not args.no_device))
@@ -0,0 +1,132 @@
+# trackie_app/alert_scheduler.py
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, Dict, Iterable, List, Optional
+
+from .logger_config import get_logger
+
+logger = get_logger(__name__)
+
+
+@dataclass
+class DangerAlert:
+    """Um alerta pronto para envio, possivelmente agrupando vários perigos simultâneos."""
+    labels: List[str] # Rótulos do modelo, do mais grave para o menos grave
+    severity: int # Maior severidade entre os rótulos
+
+
+class _ClassState:
+    """Estado de um rótulo de perigo: janela de presença (N-de-M) e último alerta enviado."""
+
+    def __init__(self, window_frames: int):
+        self.presence: Deque[bool] = deque(maxlen=window_frames)
+        self.last_alert_at: Optional[float] = None
+        self.pending = False
+
+
+class DangerAlertScheduler:
+    """
+    Decide quando um perigo detectado pelo YOLO vira uma mensagem para o Gemini.
+
+    - Histerese: um rótulo só é confirmado se aparecer em `confirm_frames` dos
+      últimos `window_frames` frames processados pelo detector.
+    - Cool-down: um rótulo já alertado não volta a ser alertado antes de `cooldown_s`.
+    - Agrupamento: perigos pendentes ao mesmo tempo saem numa única mensagem.
+    - Limite de taxa: no máximo uma mensagem a cada `min_send_interval_s`, exceto
+      quando há um rótulo com severidade >= `urgent_severity`.
+    """
+
+    def __init__(self, severity_by_label: Dict[str, int], default_severity: int = 1,
+                 confirm_frames: int = 3, window_frames: int = 5, cooldown_s: float = 20.0,
+                 min_send_interval_s: float = 3.0, urgent_severity: int = 3):
+        self.severity_by_label = severity_by_label
+        self.default_severity = default_severity
+        self.window_frames = max(1, window_frames)
+        self.confirm_frames = max(1, min(confirm_frames, self.window_frames))
+        self.cooldown_s = cooldown_s
+        self.min_send_interval_s = min_send_interval_s
+        self.urgent_severity = urgent_severity
+        self._states: Dict[str, _ClassState] = {}
+        self._last_send_at: Optional[float] = None
+
+        # Contadores
+        self.alerts_sent: int = 0 # Mensagens enviadas
+        self.alerts_merged: int = 0 # Rótulos que pegaram carona numa mensagem com outros
+        self.alerts_suppressed: int = 0 # Detecções de perigo que não geraram mensagem nova
+
+    def severity(self, label: str) -> int:
+        return self.severity_by_label.get(label, self.default_severity)
+
+    def observe(self, labels_present: Iterable[str], now: Optional[float] = None) -> None:
+        """
+        Registra os rótulos de perigo presentes em um frame processado pelo detector.
+
+        Args:
+            labels_present (Iterable[str]): Rótulos do modelo detectados no frame.
+            now (Optional[float]): Instante do frame (time.monotonic() por padrão).
+        """
+        now = time.monotonic() if now is None else now
+        present = set(labels_present)
+        for label in present:
+            if label not in self._states:
+                self._states[label] = _ClassState(self.window_frames)
+
+        for label, state in list(self._states.items()):
+            state.presence.append(label in present)
+            confirmed = sum(state.presence) >= self.confirm_frames
+            if not confirmed:
+                # Perigo sumiu antes de ser enviado: não vale mais a pena avisar
+                state.pending = False
+                if label in present:
+                    self.alerts_suppressed += 1
+                elif not any(state.presence) and not self._in_cooldown(state, now):
+                    del self._states[label] # Janela vazia e sem cool-down: esquece o rótulo
+                continue
+            if label not in present:
+                continue
+            if state.pending or self._in_cooldown(state, now):
+                self.alerts_suppressed += 1
+            else:
+                state.pending = True
+
+    def next_alert(self, now: Optional[float] = None) -> Optional[DangerAlert]:
+        """
+        Retorna o próximo alerta a enviar (agrupando todos os pendentes) ou None se não
+        há pendentes ou o limite de taxa ainda não permite.
+        """
+        now = time.monotonic() if now is None else now
+        pending = [label for label, state in self._states.items() if state.pending]
+        if not pending:
+            return None
+        pending.sort(key=lambda l: (-self.severity(l), l))
+        top_severity = self.severity(pending[0])
+        rate_limited = (self._last_send_at is not None
+                        and now - self._last_send_at < self.min_send_interval_s)
+        if rate_limited and top_severity < self.urgent_severity:
+            return None
+
+        for label in pending:
+            state = self._states[label]
+            state.pending = False
+            state.last_alert_at = now
+        self._last_send_at = now
+        self.alerts_sent += 1
+        self.alerts_merged += len(pending) - 1
+        return DangerAlert(labels=pending, severity=top_severity)
+
+    def reset(self) -> None:
+        """Esquece todo o estado (ex.: câmera reaberta); os contadores são mantidos."""
+        self._states.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "alerts_sent": self.alerts_sent,
+            "alerts_merged": self.alerts_merged,
+            "alerts_suppressed": self.alerts_suppressed,
+            "tracked_labels": len(self._states),
+            "pending": sum(1 for s in self._states.values() if s.pending),
+        }
+
+    def _in_cooldown(self, state: _ClassState, now: float) -> bool:
+        return state.last_alert_at is not None and now - state.last_alert_at < self.cooldown_s
@@ -43,6 +43,32 @@ except Exception as e:
 # YOLO
 YOLO_MODEL_PATH = os.path.join(BASE_DIR, "WorkTools", "yolov8n.pt")
 YOLO_CONFIDENCE_THRESHOLD = 0.40
+YOLO_INFERENCE_MAX_FPS = 5.0 # Limite de inferências por segundo do consumidor YOLO da câmera
+YOLO_BATCH_MAX_SIZE = 4 # Máximo de frames por lote no motor de inferência
+YOLO_BATCH_MAX_WAIT_MS = 10.0 # Prazo máximo para juntar frames de outros produtores num lote
+YOLO_BACKEND = "torch" # "torch", "onnxruntime" ou "openvino" (export ONNX em cache ao lado do .pt)
+YOLO_ONNX_INTRA_OP_THREADS = 0 # Threads intra-op do ONNX Runtime/OpenVINO (0 = padrão do runtime)
+YOLO_ONNX_INT8 = False # Usa a variante quantizada INT8 do modelo ONNX
+YOLO_DETECT_EVERY_N_FRAMES = 1 # Roda o detector a cada N frames; nos demais o rastreador propaga as caixas
+
+# Rastreador multi-objeto (IoU + Kalman, estilo SORT)
+TRACKER_IOU_THRESHOLD = 0.3
+TRACKER_MAX_AGE_FRAMES = 15 # Frames sem detecção antes de descartar um track
+TRACKER_MIN_HITS = 2 # Detecções necessárias para confirmar um track
+TRACKER_HISTORY_LEN = 30 # Entradas de histórico guardadas por track
+TRACKER_REPORT_MAX_MISSES = 0 # Rodadas do detector sem o objeto antes de deixar de relatá-lo às ferramentas
+
+# Câmera
+CAMERA_INDEX = 0
+CAMERA_RING_SLOTS = 6 # Slots pré-alocados do anel de frames (escritor + consumidores presos + folga)
+CAMERA_SEND_FPS = 1.0 # Taxa fixa de envio de frames para o Gemini (sem o portão de mudança de cena)
+CAMERA_SCENE_GATE_ENABLED = True # Pula frames quase iguais ao último enviado
+CAMERA_SEND_MAX_FPS = 2.0 # Taxa máxima de envio quando há movimento ou objetos novos
+CAMERA_KEEPALIVE_S = 5.0 # Intervalo máximo entre frames enviados numa cena parada
+CAMERA_SCENE_CHANGE_THRESHOLD = 0.04 # Diferença média (0..1) da miniatura que conta como mudança de cena
+# Escada de codificação JPEG: (maior lado em pixels, qualidade); o degrau 0 equivale ao caminho PIL original
+CAMERA_JPEG_LADDER = [(1024, 50), (768, 45), (512, 40), (384, 35)]
+CAMERA_JPEG_LEVEL = 0 # Degrau inicial da escada
 DANGER_CLASSES={
 	"faca": [ "knife" ],
 	"tesoura": [ "scissors" ],
@@ -187,6 +213,28 @@ YOLO_CLASS_MAP={
   "snowboard": [ "snowboard" ],
   "tesoura": [ "scissors" ]
 }
+# Chaves de YOLO_CLASS_MAP que representam superfícies de apoio (mesa, bancada, etc.)
+SURFACE_CLASS_KEYS = ["mesa", "mesa de jantar", "bancada", "prateleira", "escrivaninha", "cama"]
+
+# Alertas de perigo (histerese N-de-M, cool-down por classe, limite de taxa)
+DANGER_ALERT_CONFIRM_FRAMES = 3 # Frames com o perigo necessários...
+DANGER_ALERT_WINDOW_FRAMES = 5 # ...dentro desta janela de frames processados pelo detector
+DANGER_ALERT_COOLDOWN_S = 20.0 # Tempo mínimo entre dois alertas da mesma classe
+DANGER_ALERT_MIN_INTERVAL_S = 3.0 # Tempo mínimo entre duas mensagens de alerta quaisquer
+DANGER_ALERT_URGENT_SEVERITY = 3 # Severidade a partir da qual o limite de taxa é ignorado
+DANGER_DEFAULT_SEVERITY = 1
+DANGER_CHIME_DUCK_GAIN = 0.25 # Ganho da fala do modelo enquanto o som de perigo local toca
+DANGER_CHIME_COOLDOWN_S = 3.0 # Tempo mínimo entre dois sons de perigo locais (exceto perigo mais grave)
+DANGER_CHIME_CONFIRM_FRAMES = 1 # Frames seguidos com o perigo para o som local (1 = na primeira detecção)
+DANGER_CHIME_RELEASE_FRAMES = 10 # Frames seguidos sem o perigo antes de ele voltar a poder tocar o som
+# Severidade por rótulo do modelo (3 = urgente, 2 = alta); os demais usam DANGER_DEFAULT_SEVERITY
+DANGER_SEVERITY = {
+    "gun": 3, "pistol": 3, "rifle": 3, "shotgun": 3, "revolver": 3, "bomb": 3, "grenade": 3,
+    "fire": 3, "flame": 3, "chainsaw": 3, "car": 3, "motorcycle": 3, "truck": 3, "bus": 3,
+    "bear": 3, "alligator": 3, "cliff": 3, "live_wire": 3,
+    "knife": 2, "axe": 2, "hatchet": 2, "saw": 2, "smoke": 2, "stove": 2, "hot surface": 2,
+    "burner": 2, "broken_glass": 2, "snake": 2, "hole": 2, "stairs": 2, "bicycle": 2,
+}
 
 # DeepFace
 DB_PATH = os.path.join(BASE_DIR, "UserSettings", "known_faces")
@@ -204,10 +252,89 @@ AUDIO_CHANNELS = 1
 AUDIO_SEND_SAMPLE_RATE = 16000
 AUDIO_RECEIVE_SAMPLE_RATE = 24000
 AUDIO_CHUNK_SIZE = 1024
+MIC_PACKET_MS = 100.0 # Duração dos pacotes do microfone (20–200 ms): mais curto = menos latência, mais mensagens
+AUDIO_NATIVE_RATE_NEGOTIATION = True # Abre os dispositivos na taxa nativa e reamostra no pipeline
+AUDIO_RESAMPLER_PREFER_SOXR = True # Usa libsoxr (pacote `soxr`) se instalado; senão o polifásico em NumPy
+PLAYBACK_RING_MS = 200.0 # Anel do callback de playback; o excedente do modelo espera no buffer de jitter
+PLAYBACK_JITTER_TARGET_MS = 120.0 # Áudio acumulado antes de (re)começar a tocar
+PLAYBACK_JITTER_MAX_MS = 120000.0 # Limite de memória; o modelo adianta áudio, então a fila pode ter vários segundos
+PLAYBACK_JITTER_CATCHUP_LAG_MS = 300.0 # Atraso medido (faltas de áudio no meio do turno) a partir do qual os blocos são comprimidos
+PLAYBACK_JITTER_CATCHUP_RATE = 0.08 # Fração removida de cada bloco durante a recuperação
+PLAYBACK_JITTER_MAX_LAG_MS = 2000.0 # Atraso acima disso: o trecho atrasado é pulado de uma vez
+PLAYBACK_JITTER_NEW_STRETCH_GAP_MS = 1500.0 # Pausa sem áudio (fila vazia) que começa uma fala nova, sem atraso
+BARGE_IN_ENABLED = True # Fala do usuário (VAD local) durante o playback interrompe o modelo
+
+# Supressão de eco (áudio tocado como referência para o microfone)
+ECHO_SUPPRESSION_ENABLED = True
+ECHO_FILTER_MS = 32.0 # Comprimento do filtro NLMS (cobre o caminho alto-falante -> microfone)
+ECHO_BULK_DELAY_MS = 0.0 # Atraso extra se o driver informar latências erradas
+ECHO_DOUBLE_TALK_MARGIN_DB = 6.0 # Quanto o residual precisa superar o eco esperado para contar como fala local
+
+# Gravação de sessões (depuração e replay com --replay)
+SESSION_RECORDING_ENABLED = False # Também ativada com --record
+SESSION_RECORDING_DIR = os.path.join(BASE_DIR, "recordings")
+SESSION_RECORDING_CODEC = "opus" # "opus" ou "flac" (precisam do pacote `soundfile`); senão WAV
+SESSION_RECORDING_MAX_PENDING_MB = 16.0 # Memória máxima aguardando a thread de escrita; acima disso descarta
+
+# Portão de voz do microfone (VAD por energia + ZCR)
+MIC_VAD_ENABLED = True # Envia só trechos de fala e keep-alives ao Gemini
+MIC_VAD_THRESHOLD_DB = 9.0 # Quanto acima do piso de ruído a energia precisa estar para contar como voz
+MIC_VAD_MIN_DBFS = -50.0 # Energia mínima absoluta para voz
+MIC_VAD_PRE_ROLL_MS = 300.0 # Áudio anterior ao início da fala enviado junto (não corta o começo das palavras)
+MIC_VAD_HANGOVER_MS = 500.0 # Cauda enviada após a última detecção de voz
+MIC_VAD_KEEPALIVE_S = 2.0 # Intervalo máximo entre chunks enviados em silêncio
+
+# Faixas de subida para o Gemini (limite de itens por faixa)
+UPLINK_AUDIO_MAX_ITEMS = 200 # Áudio nunca é descartado; com a faixa cheia o microfone espera
+UPLINK_CONTROL_MAX_ITEMS = 32 # Texto e alertas; itens novos são recusados se cheia
+UPLINK_VIDEO_MAX_ITEMS = 1 # Só o frame mais novo é mantido
+UPLINK_METRICS_LOG_INTERVAL_S = 60.0 # Intervalo do log de métricas das faixas (0 desativa)
 
 # Gemini Model
 #GEMINI_MODEL_NAME = "models/gemini-2.5-flash-preview-native-audio-dialog"
 GEMINI_MODEL_NAME =  "models/gemini-2.0-flash-live-001"
+# Áudio/vídeo pelo canal de entrada em tempo real (sem fechar turno a cada chunk);
+# False volta ao envio legado com end_of_turn=True por item
+GEMINI_REALTIME_INPUT = True
+# Retomada de sessão: reconexões continuam a conversa no servidor em vez de começar do zero
+GEMINI_SESSION_RESUMPTION_ENABLED = True
+GEMINI_SESSION_HANDLE_PATH = os.path.join(BASE_DIR, "UserSettings", "live_session.json")
+GEMINI_SESSION_HANDLE_TTL_S = 7200.0 # Validade do handle no servidor após o fim da sessão
+GEMINI_SESSION_RESUME_ON_START = True # Retoma a última conversa ao abrir o app (se o handle ainda valer)
+GEMINI_SESSION_ROLLOVER_S = 540.0 # Troca proativa de conexão antes do limite do servidor (~10 min); 0 desativa
+GEMINI_SESSION_ROLLOVER_GRACE_S = 30.0 # Espera máxima por um momento quieto antes de forçar a troca
+GEMINI_GO_AWAY_MARGIN_S = 1.0 # Antecedência mínima em relação ao prazo do go_away
+# Sessão reserva: uma segunda conexão já aberta (com o handle atual) assume na hora quando a ativa cai
+GEMINI_STANDBY_SESSION_ENABLED = True
+GEMINI_STANDBY_MAX_AGE_S = 300.0 # Reserva mais velha que isso é reaberta
+GEMINI_STANDBY_REFRESH_MIN_S = 5.0 # Intervalo mínimo entre reaberturas quando o handle muda
+# Pipeline supervisionado: captura/playback que falham são reabertos sem derrubar o app nem a sessão
+PIPELINE_RESTART_MAX = 5 # Reinícios por tarefa dentro da janela antes de desistir
+PIPELINE_RESTART_WINDOW_S = 60.0
+PIPELINE_RESTART_BACKOFF_S = 1.0 # Atraso do primeiro reinício; dobra a cada falha seguida
+PIPELINE_RESTART_BACKOFF_MAX_S = 15.0
+# Contexto da sessão: compressão por janela deslizante no servidor e orçamento de tokens no cliente
+GEMINI_CONTEXT_COMPRESSION_ENABLED = True
+GEMINI_CONTEXT_WINDOW_TOKENS = 32768 # Janela de contexto do modelo Live
+GEMINI_CONTEXT_TRIGGER_TOKENS = 25600 # Ao passar disso, o servidor descarta o início do contexto...
+GEMINI_CONTEXT_TARGET_TOKENS = 12800 # ...até ficar com isso
+GEMINI_TOKENS_PER_FRAME = 258 # Custo de uma imagem em MEDIA_RESOLUTION_MEDIUM
+GEMINI_AUDIO_TOKENS_PER_S = 32.0
+TOKEN_BUDGET_ADAPTIVE = True # Espaça frames e reduz a resolução conforme o contexto enche
+TOKEN_BUDGET_LEVELS = [ # (pressão mínima, multiplicador do intervalo entre frames, degraus a descer no JPEG)
+    (0.0, 1.0, 0),
+    (0.6, 2.0, 1),
+    (0.8, 4.0, 2),
+    (0.95, 8.0, 3),
+]
+# Ferramentas (function calls) rodam como tarefas: o recebimento e a subida não param enquanto elas executam
+TOOL_DEFAULT_CONCURRENCY = 1 # Chamadas simultâneas da mesma ferramenta (ferramentas diferentes rodam em paralelo)
+TOOL_CONCURRENCY = {} # Por ferramenta, ex.: {"locate_object_and_estimate_distance": 2}
+TOOL_DEFAULT_TIMEOUT_S = 30.0 # Ao estourar, o Gemini recebe uma resposta de tempo esgotado
+TOOL_TIMEOUTS = {
+    "identify_person_in_front": 20.0,
+    "locate_object_and_estimate_distance": 15.0,
+}
 # --- Carregar Instrução do Sistema do Arquivo ---
 SYSTEM_INSTRUCTION_TEXT = "Você é um assistente prestativo." # Prompt padrão mínimo
 try:
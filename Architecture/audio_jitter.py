@@ -0,0 +1,353 @@
+# trackie_app/audio_jitter.py
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .logger_config import get_logger
+
+logger = get_logger(__name__)
+
+
+def time_compress(samples: np.ndarray, out_frames: int, crossfade_frames: int) -> np.ndarray:
+    """
+    Encurta `samples` (frames x canais, int16) para `out_frames` removendo um trecho do
+    meio com crossfade linear nas bordas, sem alterar o pitch.
+    """
+    remove = samples.shape[0] - out_frames
+    if remove <= 0:
+        return samples[:out_frames]
+    fade = max(1, min(crossfade_frames, out_frames // 2))
+    mid = (out_frames - fade) // 2
+    ramp = np.linspace(0.0, 1.0, fade, dtype=np.float32)[:, None]
+    fade_out = samples[mid:mid + fade].astype(np.float32)
+    fade_in = samples[mid + remove:mid + remove + fade].astype(np.float32)
+    mixed = fade_out * (1.0 - ramp) + fade_in * ramp
+    return np.concatenate((
+        samples[:mid],
+        np.clip(mixed, -32768, 32767).astype(np.int16),
+        samples[mid + remove + fade:],
+    ))
+
+
+class PlaybackJitterBuffer:
+    """
+    Buffer de jitter para o PCM16 do modelo (24 kHz), no lugar da fila sem limite.
+
+    - Latência alvo: após ficar vazio, só volta a tocar com `target_ms` acumulados
+      (ou quando o turno termina / o primeiro chunk já esperou `target_ms`).
+    - Atraso medido: desde que o trecho atual começou a tocar, o relógio de parede
+      é comparado com a duração do áudio já consumido. Faltas de áudio no meio do
+      turno (rede parada, produtor lento) abrem essa diferença; o modelo mandar
+      áudio mais rápido que o tempo real não a abre — áudio adiantado na fila
+      nunca é acelerado nem descartado.
+    - Recuperação: com atraso acima de `catchup_lag_ms` e sobra na fila além da
+      latência alvo, cada bloco é comprimido no tempo em `catchup_rate` (remoção
+      com crossfade). Acima de `max_lag_ms`, o trecho atrasado da sobra é pulado
+      de uma vez até o atraso voltar a `catchup_lag_ms`.
+    - Um intervalo sem chegada de áudio maior que `new_stretch_gap_ms` com a fila
+      vazia (ex.: fim de turno sem `turn_complete`) começa um trecho novo, sem atraso.
+    - Profundidade máxima: `max_depth_ms` é só um limite de memória; acima dele o
+      áudio mais antigo é descartado.
+    - Coalescência: `pop_block` sempre devolve blocos do tamanho do dispositivo.
+
+    Usado apenas no event loop.
+    """
+
+    def __init__(self, sample_rate: int, device_frames: int, target_ms: float = 120.0,
+                 max_depth_ms: float = 120000.0, catchup_lag_ms: float = 300.0, catchup_rate: float = 0.08,
+                 max_lag_ms: float = 2000.0, new_stretch_gap_ms: float = 1500.0,
+                 crossfade_ms: float = 5.0, sample_width: int = 2, channels: int = 1):
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.frame_bytes = sample_width * channels
+        self.device_frames = device_frames
+        self.block_bytes = device_frames * self.frame_bytes
+        self.target_bytes = self._ms_to_bytes(target_ms)
+        self.target_s = target_ms / 1000.0
+        self.max_depth_bytes = max(self._ms_to_bytes(max_depth_ms), self.block_bytes)
+        self.catchup_lag_s = catchup_lag_ms / 1000.0
+        self.max_lag_s = max(max_lag_ms, catchup_lag_ms) / 1000.0
+        self.new_stretch_gap_s = new_stretch_gap_ms / 1000.0
+        self.catchup_in_frames = device_frames + max(1, int(device_frames * catchup_rate))
+        self.crossfade_frames = max(1, int(sample_rate * crossfade_ms / 1000.0))
+
+        self._chunks: Deque[bytes] = deque()
+        self._head_offset = 0 # Bytes já consumidos do primeiro chunk
+        self._depth = 0
+        self._playing = False
+        self._starved = False
+        self._end_of_turn = False
+        self._waiting_since: Optional[float] = None
+        self._last_push_at: Optional[float] = None
+        self._stretch_started_at: Optional[float] = None # Início do trecho tocando (None: nenhum)
+        self._played_s: float = 0.0 # Áudio consumido no trecho (tocado, comprimido ou pulado)
+
+        # Estatísticas
+        self.bytes_in: int = 0
+        self.blocks_out: int = 0
+        self.underruns: int = 0
+        self.dropped_bytes: int = 0 # Descartado pelo limite de memória
+        self.skipped_bytes: int = 0 # Pulado por atraso acima de max_lag_ms
+        self.compressed_blocks: int = 0
+        self.compressed_bytes: int = 0 # Áudio removido pela compressão
+        self.cleared_bytes: int = 0
+        self.max_depth_seen: int = 0
+        self.max_lag_s_seen: float = 0.0
+        self._depth_sum: float = 0.0
+
+    def _ms_to_bytes(self, ms: float) -> int:
+        return int(self.sample_rate * ms / 1000.0) * self.frame_bytes
+
+    def _bytes_to_ms(self, size: float) -> float:
+        return size / self.frame_bytes * 1000.0 / self.sample_rate
+
+    def _bytes_to_s(self, size: float) -> float:
+        return size / self.frame_bytes / self.sample_rate
+
+    @property
+    def depth_ms(self) -> float:
+        return self._bytes_to_ms(self._depth)
+
+    @property
+    def is_empty(self) -> bool:
+        return self._depth == 0
+
+    def lag_s(self, now: Optional[float] = None) -> float:
+        """Atraso do trecho atual em relação ao tempo real (0 se nada está tocando)."""
+        if self._stretch_started_at is None:
+            return 0.0
+        now = time.monotonic() if now is None else now
+        return max(0.0, now - self._stretch_started_at - self._played_s)
+
+    def push(self, pcm: bytes, now: Optional[float] = None) -> None:
+        """Acrescenta um chunk do modelo (qualquer tamanho)."""
+        if not pcm:
+            return
+        now = time.monotonic() if now is None else now
+        pcm = pcm[:len(pcm) - len(pcm) % self.frame_bytes]
+        if (self._depth == 0 and self._last_push_at is not None
+                and now - self._last_push_at >= self.new_stretch_gap_s):
+            self._stretch_started_at = None # Pausa longa do produtor: é uma fala nova, não atraso
+        self._chunks.append(pcm)
+        self._depth += len(pcm)
+        self.bytes_in += len(pcm)
+        self._last_push_at = now
+        self._end_of_turn = False
+        if self._waiting_since is None:
+            self._waiting_since = now
+        if self._depth > self.max_depth_bytes:
+            excess = self._depth - self.max_depth_bytes
+            excess += (-excess) % self.frame_bytes
+            self._discard(excess)
+            self.dropped_bytes += excess
+            logger.warning(f"Buffer de jitter do playback acima do limite de memória; {self._bytes_to_ms(excess):.0f} ms descartados.")
+        self.max_depth_seen = max(self.max_depth_seen, self._depth)
+
+    def mark_end_of_turn(self) -> None:
+        """O servidor encerrou o turno: a cauda pode sair sem esperar mais áudio."""
+        self._end_of_turn = True
+
+    def pop_block(self, now: Optional[float] = None) -> Optional[bytes]:
+        """
+        Devolve o próximo bloco de `device_frames`, ou None se ainda não deve tocar
+        (prebuffer) ou não há áudio suficiente.
+        """
+        now = time.monotonic() if now is None else now
+        if self._depth == 0:
+            if self._playing and not self._end_of_turn:
+                self._mark_underrun(None)
+            elif self._end_of_turn:
+                self._stretch_started_at = None
+            self._playing = False
+            return None
+
+        if not self._playing:
+            waited = self._waiting_since is not None and now - self._waiting_since >= self.target_s
+            if self._depth < self.target_bytes and not self._end_of_turn and not waited:
+                return None
+            self._playing = True
+            if self._stretch_started_at is None:
+                self._stretch_started_at = now
+                self._played_s = 0.0
+
+        lag_s = self.lag_s(now)
+        self.max_lag_s_seen = max(self.max_lag_s_seen, lag_s)
+        surplus = self._depth - self.target_bytes # Áudio além da latência alvo: o que dá para recuperar
+        if lag_s > self.max_lag_s and surplus > self.block_bytes:
+            skip = self._ms_to_bytes((lag_s - self.catchup_lag_s) * 1000.0)
+            skip = min(skip, surplus - self.block_bytes)
+            skip -= skip % self.frame_bytes
+            self._discard(skip)
+            self.skipped_bytes += skip
+            self._played_s += self._bytes_to_s(skip)
+            surplus -= skip
+            lag_s = self.lag_s(now)
+            logger.info(f"Playback {lag_s * 1000.0 + self._bytes_to_ms(skip):.0f} ms atrasado: {self._bytes_to_ms(skip):.0f} ms pulados.")
+
+        if lag_s > self.catchup_lag_s and surplus >= self.catchup_in_frames * self.frame_bytes:
+            raw = self._take(self.catchup_in_frames * self.frame_bytes)
+            samples = np.frombuffer(raw, dtype=np.int16).reshape(-1, self.channels)
+            block = time_compress(samples, self.device_frames, self.crossfade_frames).tobytes()
+            self.compressed_blocks += 1
+            self.compressed_bytes += len(raw) - len(block)
+            self._played_s += self._bytes_to_s(len(raw))
+        elif self._depth >= self.block_bytes:
+            block = self._take(self.block_bytes)
+            self._played_s += self._bytes_to_s(len(block))
+        else:
+            # Cauda menor que um bloco: sai completada com silêncio no fim do turno ou
+            # se nada novo chegou dentro da latência alvo; senão espera mais áudio.
+            stale = self._last_push_at is not None and now - self._last_push_at >= self.target_s
+            if not self._end_of_turn and not stale:
+                self._mark_underrun(now)
+                return None
+            tail = self._depth
+            block = self._take(tail)
+            block += bytes(self.block_bytes - len(block))
+            self._played_s += self._bytes_to_s(tail)
+
+        self._starved = False
+        self.blocks_out += 1
+        self._depth_sum += self._depth
+        if self._depth == 0:
+            self._waiting_since = None
+            if self._end_of_turn:
+                self._playing = False
+                self._stretch_started_at = None
+        return block
+
+    def _mark_underrun(self, now: Optional[float]) -> None:
+        """Faltou áudio no meio do turno: volta a acumular até a latência alvo."""
+        if not self._starved:
+            self.underruns += 1
+            self._starved = True
+        self._playing = False
+        self._waiting_since = now
+
+    def clear(self) -> float:
+        """Descarta todo o áudio pendente (barge-in). Retorna os ms descartados."""
+        cleared = self._depth
+        self._discard(cleared)
+        self.cleared_bytes += cleared
+        self._playing = False
+        self._starved = False
+        self._waiting_since = None
+        self._stretch_started_at = None
+        return self._bytes_to_ms(cleared)
+
+    def _take(self, size: int) -> bytes:
+        parts: List[bytes] = []
+        remaining = size
+        while remaining > 0:
+            head = self._chunks[0]
+            piece = head[self._head_offset:self._head_offset + remaining]
+            parts.append(piece)
+            remaining -= len(piece)
+            self._head_offset += len(piece)
+            if self._head_offset >= len(head):
+                self._chunks.popleft()
+                self._head_offset = 0
+        self._depth -= size
+        return b"".join(parts)
+
+    def _discard(self, size: int) -> None:
+        remaining = min(size, self._depth)
+        self._depth -= remaining
+        while remaining > 0:
+            head_left = len(self._chunks[0]) - self._head_offset
+            if head_left <= remaining:
+                self._chunks.popleft()
+                self._head_offset = 0
+                remaining -= head_left
+            else:
+                self._head_offset += remaining
+                remaining = 0
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "depth_ms": round(self.depth_ms, 1),
+            "avg_depth_ms": round(self._bytes_to_ms(self._depth_sum / self.blocks_out), 1) if self.blocks_out else 0.0,
+            "max_depth_ms": round(self._bytes_to_ms(self.max_depth_seen), 1),
+            "blocks_out": self.blocks_out,
+            "underruns": self.underruns,
+            "dropped_ms": round(self._bytes_to_ms(self.dropped_bytes), 1),
+            "skipped_late_ms": round(self._bytes_to_ms(self.skipped_bytes), 1),
+            "max_lag_ms": round(self.max_lag_s_seen * 1000.0, 1),
+            "compressed_blocks": self.compressed_blocks,
+            "compressed_ms": round(self._bytes_to_ms(self.compressed_bytes), 1),
+            "cleared_ms": round(self._bytes_to_ms(self.cleared_bytes), 1),
+        }
+
+
+def simulate_arrivals(arrivals: List[Tuple[float, int]], duration_s: float, sample_rate: int = 24000,
+                      device_frames: int = 1024, **buffer_kwargs) -> Dict[str, float]:
+    """
+    Simula o buffer com chunks chegando em `arrivals` ((instante em s, frames), em ordem)
+    e o dispositivo puxando um bloco a cada `device_frames / sample_rate` segundos.
+    """
+    jitter = PlaybackJitterBuffer(sample_rate, device_frames, **buffer_kwargs)
+    block_s = device_frames / float(sample_rate)
+    silent_blocks, next_arrival, t = 0, 0, 0.0
+    while t < duration_s:
+        while next_arrival < len(arrivals) and arrivals[next_arrival][0] <= t:
+            jitter.push(bytes(arrivals[next_arrival][1] * 2), now=arrivals[next_arrival][0])
+            next_arrival += 1
+        if next_arrival == len(arrivals):
+            jitter.mark_end_of_turn()
+        if jitter.pop_block(now=t) is None:
+            silent_blocks += 1
+        t += block_s
+    result = jitter.stats()
+    result["silent_blocks"] = silent_blocks
+    return result
+
+
+def synthetic_patterns(sample_rate: int = 24000, seconds: float = 10.0,
+                       chunk_ms: float = 40.0, seed: int = 0) -> Dict[str, List[Tuple[float, int]]]:
+    """
+    Padrões de chegada sintéticos: tempo real com jitter, rajadas mais rápidas que o
+    tempo real (o normal do modelo), paradas da rede com e sem o acumulado chegando
+    de uma vez depois, produtor lento e pausa entre falas sem fim de turno.
+    """
+    rng = np.random.default_rng(seed)
+    chunk_frames = int(sample_rate * chunk_ms / 1000.0)
+    count = int(seconds * 1000.0 / chunk_ms)
+    nominal = np.arange(count) * chunk_ms / 1000.0
+    jittered = np.maximum.accumulate(nominal + np.abs(rng.normal(0.0, 0.03, count)))
+    stalled = nominal + np.where(nominal > seconds / 2, 0.6, 0.0)
+
+    def stall_then_backlog(stall_s: float) -> np.ndarray:
+        # A rede para em seconds/2 e, ao voltar, entrega de uma vez o que ficou retido
+        resume_at = seconds / 2 + stall_s
+        return np.where(nominal < seconds / 2, nominal, np.maximum(nominal, resume_at))
+
+    paused = nominal + np.where(nominal > seconds / 2, 2.5, 0.0)
+    return {
+        "realtime_jitter_30ms": [(float(t), chunk_frames) for t in jittered],
+        "burst_3x": [(float(t), chunk_frames) for t in nominal / 3.0],
+        "stall_600ms": [(float(t), chunk_frames) for t in stalled],
+        "stall_1s_backlog": [(float(t), chunk_frames) for t in stall_then_backlog(1.0)],
+        "stall_4s_backlog": [(float(t), chunk_frames) for t in stall_then_backlog(4.0)],
+        "slow_producer_0.9x": [(float(t), chunk_frames) for t in nominal / 0.9],
+        "very_long_burst_10x": [(float(t), chunk_frames) for t in np.arange(count * 4) * chunk_ms / 10000.0],
+        "pause_2.5s_no_turn_end": [(float(t), chunk_frames) for t in paused],
+    }
+
+
+if __name__ == "__main__":
+    from .app_config import (
+        AUDIO_RECEIVE_SAMPLE_RATE, AUDIO_CHUNK_SIZE, PLAYBACK_JITTER_TARGET_MS, PLAYBACK_JITTER_MAX_MS,
+        PLAYBACK_JITTER_CATCHUP_LAG_MS, PLAYBACK_JITTER_CATCHUP_RATE, PLAYBACK_JITTER_MAX_LAG_MS,
+        PLAYBACK_JITTER_NEW_STRETCH_GAP_MS
+    )
+
+    for name, arrivals in synthetic_patterns(AUDIO_RECEIVE_SAMPLE_RATE).items():
+        duration = arrivals[-1][0] + sum(frames for _, frames in arrivals) / AUDIO_RECEIVE_SAMPLE_RATE + 1.0
+        print(f"{name:>22}:", simulate_arrivals(
+            arrivals, duration, AUDIO_RECEIVE_SAMPLE_RATE, AUDIO_CHUNK_SIZE,
+            target_ms=PLAYBACK_JITTER_TARGET_MS, max_depth_ms=PLAYBACK_JITTER_MAX_MS,
+            catchup_lag_ms=PLAYBACK_JITTER_CATCHUP_LAG_MS, catchup_rate=PLAYBACK_JITTER_CATCHUP_RATE,
+            max_lag_ms=PLAYBACK_JITTER_MAX_LAG_MS, new_stretch_gap_ms=PLAYBACK_JITTER_NEW_STRETCH_GAP_MS
+        ))
@@ -8,7 +8,9 @@ import json
 import traceback
 import time
 import threading
-from typing import Dict, Any, Optional, List, Tuple, Union
+from collections import deque
+from dataclasses import replace
+from typing import Dict, Any, Deque, Optional, List, Tuple, Union, FrozenSet
 
 
 # Bibliotecas de Terceiros
@@ -22,6 +24,7 @@ from google.genai.types import Content, Part, GenerateContentConfig, LiveConnect
 from google.genai import errors as genai_errors
 from google.protobuf.struct_pb2 import Value
 import numpy as np
+import pyaudio
 import torch
 
 # Imports de módulos locais
@@ -31,13 +34,64 @@ from .app_config import (
     YOLO_CLASS_MAP, DANGER_CLASSES, DB_PATH, DEEPFACE_DETECTOR_BACKEND,
     DEEPFACE_DISTANCE_METRIC, DEEPFACE_MODEL_NAME, METERS_PER_STEP,
     AUDIO_CHANNELS, AUDIO_SEND_SAMPLE_RATE, AUDIO_CHUNK_SIZE, CONFIG_PATH,
-    GEMINI_MODEL_NAME, AUDIO_RECEIVE_SAMPLE_RATE
+    GEMINI_MODEL_NAME, AUDIO_RECEIVE_SAMPLE_RATE, CAMERA_INDEX, CAMERA_RING_SLOTS,
+    CAMERA_SEND_FPS, YOLO_INFERENCE_MAX_FPS, YOLO_BATCH_MAX_SIZE, YOLO_BATCH_MAX_WAIT_MS,
+    SURFACE_CLASS_KEYS, YOLO_DETECT_EVERY_N_FRAMES, TRACKER_IOU_THRESHOLD, TRACKER_MAX_AGE_FRAMES,
+    TRACKER_MIN_HITS, TRACKER_HISTORY_LEN, TRACKER_REPORT_MAX_MISSES, DANGER_SEVERITY, DANGER_DEFAULT_SEVERITY,
+    DANGER_ALERT_CONFIRM_FRAMES, DANGER_ALERT_WINDOW_FRAMES, DANGER_ALERT_COOLDOWN_S,
+    DANGER_ALERT_MIN_INTERVAL_S, DANGER_ALERT_URGENT_SEVERITY, DANGER_CHIME_DUCK_GAIN, DANGER_CHIME_COOLDOWN_S,
+    DANGER_CHIME_CONFIRM_FRAMES, DANGER_CHIME_RELEASE_FRAMES,
+    CAMERA_JPEG_LADDER, CAMERA_JPEG_LEVEL, CAMERA_SCENE_GATE_ENABLED, CAMERA_SEND_MAX_FPS,
+    CAMERA_KEEPALIVE_S, CAMERA_SCENE_CHANGE_THRESHOLD, MIC_VAD_ENABLED, MIC_VAD_THRESHOLD_DB,
+    MIC_VAD_MIN_DBFS, MIC_VAD_PRE_ROLL_MS, MIC_VAD_HANGOVER_MS, MIC_VAD_KEEPALIVE_S,
+    UPLINK_AUDIO_MAX_ITEMS, UPLINK_CONTROL_MAX_ITEMS, UPLINK_VIDEO_MAX_ITEMS, UPLINK_METRICS_LOG_INTERVAL_S,
+    GEMINI_REALTIME_INPUT, MIC_PACKET_MS, PLAYBACK_RING_MS, BARGE_IN_ENABLED,
+    PLAYBACK_JITTER_TARGET_MS, PLAYBACK_JITTER_MAX_MS, PLAYBACK_JITTER_CATCHUP_LAG_MS, PLAYBACK_JITTER_CATCHUP_RATE,
+    PLAYBACK_JITTER_MAX_LAG_MS, PLAYBACK_JITTER_NEW_STRETCH_GAP_MS,
+    ECHO_SUPPRESSION_ENABLED, ECHO_FILTER_MS, ECHO_BULK_DELAY_MS, ECHO_DOUBLE_TALK_MARGIN_DB,
+    AUDIO_NATIVE_RATE_NEGOTIATION, AUDIO_RESAMPLER_PREFER_SOXR, SESSION_RECORDING_ENABLED,
+    SESSION_RECORDING_DIR, SESSION_RECORDING_CODEC, SESSION_RECORDING_MAX_PENDING_MB,
+    GEMINI_SESSION_RESUMPTION_ENABLED, GEMINI_SESSION_HANDLE_PATH, GEMINI_SESSION_HANDLE_TTL_S,
+    GEMINI_SESSION_RESUME_ON_START, GEMINI_SESSION_ROLLOVER_S, GEMINI_SESSION_ROLLOVER_GRACE_S, GEMINI_GO_AWAY_MARGIN_S,
+    GEMINI_STANDBY_SESSION_ENABLED, GEMINI_STANDBY_MAX_AGE_S, GEMINI_STANDBY_REFRESH_MIN_S,
+    PIPELINE_RESTART_MAX, PIPELINE_RESTART_WINDOW_S, PIPELINE_RESTART_BACKOFF_S, PIPELINE_RESTART_BACKOFF_MAX_S,
+    GEMINI_CONTEXT_COMPRESSION_ENABLED, GEMINI_CONTEXT_WINDOW_TOKENS, GEMINI_CONTEXT_TRIGGER_TOKENS,
+    GEMINI_TOKENS_PER_FRAME, GEMINI_AUDIO_TOKENS_PER_S, TOKEN_BUDGET_ADAPTIVE, TOKEN_BUDGET_LEVELS,
+    TOOL_DEFAULT_CONCURRENCY, TOOL_CONCURRENCY, TOOL_DEFAULT_TIMEOUT_S, TOOL_TIMEOUTS
 )
 from .external_apis import PYAUDIO_INSTANCE, PYAUDIO_FORMAT, GEMINI_CLIENT # Supondo que este módulo exista e funcione
-from .gemini_settings import GEMINI_LIVE_CONNECT_CONFIG, GEMINI_TOOLS # Supondo que este módulo exista e funcione
+from .gemini_settings import GEMINI_LIVE_CONNECT_CONFIG, GEMINI_TOOLS, GEMINI_LOCAL_ACTIVITY_DETECTION # Supondo que este módulo exista e funcione
 from .utility_functions import play_wav_file_sync # Supondo que este módulo exista e funcione
 from .models import ( # Supondo que este módulo exista e funcione
-    load_yolo_model, preload_deepface_models, load_midas_model, ensure_deepface_db_path
+    load_yolo_model, load_yolo_backend, preload_deepface_models, load_midas_model, ensure_deepface_db_path
+)
+from .frame_buffer import FrameRingBuffer, FrameRef, CameraCaptureThread
+from .inference_engine import YoloInferenceEngine
+from .detections import FrameDetections
+from .class_lookup import ClassLookup
+from .tracker import MultiObjectTracker
+from .alert_scheduler import DangerAlertScheduler, DangerAlert
+from .alert_chime import ChimeMixer, DangerChimeGate, load_wav_as_pcm16
+from .frame_encoder import FrameEncoder, EncodeLevel
+from .scene_change import SceneChangeGate
+from .voice_activity import EnergyZcrVad, SpeechGate
+from .audio_packetizer import PcmPacketizer, log_packetization_tradeoff
+from .audio_playback import CallbackPlayer
+from .audio_jitter import PlaybackJitterBuffer
+from .echo_suppression import EchoSuppressor
+from .audio_resampler import create_resampler, negotiate_stream_rate
+from .connection_manager import LiveConnectionManager
+from .pipeline_supervisor import NEVER_RESTART, PipelineSupervisor, RestartPolicy
+from .token_budget import BudgetLevel, TokenBudget
+from .tool_executor import ToolExecutor
+from .function_call import Function_Calling
+from .session_recorder import SessionRecorder, SessionRecording
+from .session_resumption import (
+    SessionEnded, SessionResumptionStore, SessionRolloverTimer, duration_to_s, is_connection_lost
+)
+from .uplink_scheduler import (
+    UplinkScheduler, POLICY_BLOCK, POLICY_DROP_NEW, POLICY_LATEST,
+    UPLINK_LANE_AUDIO, UPLINK_LANE_CONTROL, UPLINK_LANE_VIDEO
 )
 
 # Importar DeepFace dinamicamente ou condicionalmente se for um problema
@@ -49,23 +103,29 @@ except ImportError:
 
 
 logger = get_logger(__name__)
-class AudioLoop:
+class AudioLoop(Function_Calling):
     """
     Gerencia o loop principal do assistente multimodal, com foco em robustez,
     modularidade interna e eficiência aprimoradas.
 
     Esta classe orquestra a captura de áudio e vídeo, processamento de dados,
     interação com a API Gemini e execução de funções locais baseadas em
-    comandos do modelo.
+    comandos do modelo. As ferramentas (tools) e o envio das FunctionResponses
+    vêm de `Function_Calling`.
     """
 
-    def __init__(self, video_mode: str = DEFAULT_MODE, show_preview: bool = False):
+    def __init__(self, video_mode: str = DEFAULT_MODE, show_preview: bool = False, live_client: Any = None,
+                 record_session: bool = SESSION_RECORDING_ENABLED, replay_path: Optional[str] = None):
         """
         Inicializa a instância AudioLoopRefactored.
 
         Args:
             video_mode (str): O modo de operação de vídeo ("camera", "screen", ou outro).
             show_preview (bool): Se True e video_mode for "camera", exibe uma janela de preview.
+            live_client (Any): Cliente com `aio.live.connect` (padrão: GEMINI_CLIENT; ex.: FakeLiveClient offline).
+            record_session (bool): Grava áudio, frames enviados e eventos em SESSION_RECORDING_DIR.
+            replay_path (Optional[str]): Diretório de uma gravação cujo microfone e frames substituem
+                a captura ao vivo (o resto do pipeline roda normalmente).
         """
         logger.info(f"Inicializando AudioLoopRefactored com video_mode='{video_mode}', show_preview={show_preview}")
         try:
@@ -84,11 +144,13 @@ class AudioLoop:
             self.trckuser = TRCKUSER
 
         self.video_mode: str = video_mode
+        self.live_client: Any = live_client if live_client is not None else GEMINI_CLIENT
         self.show_preview: bool = show_preview if video_mode == "camera" else False
         
         # Filas para comunicação entre tarefas assíncronas
-        self.audio_input_gemini_queue: Optional[asyncio.Queue[bytes]] = None # Áudio do Gemini para playback
-        self.multimedia_output_gemini_queue: Optional[asyncio.Queue[Dict[str, Any]]] = None # Áudio/Vídeo do usuário para Gemini
+        self.playback_buffer: Optional[PlaybackJitterBuffer] = None # Áudio do Gemini para playback (jitter buffer)
+        self.playback_ready: asyncio.Event = asyncio.Event() # Sinaliza áudio novo no playback_buffer
+        self.uplink_scheduler: Optional[UplinkScheduler] = None # Faixas de subida (áudio/controle/vídeo) do usuário para Gemini
         self.command_queue: asyncio.Queue[Dict[str, Any]] = asyncio.Queue(maxsize=50) # Para comandos internos, se necessário
 
         # Eventos de sincronização
@@ -97,19 +159,118 @@ class AudioLoop:
 
         # Estado da sessão e modelos
         self.gemini_session: Optional[genai_types.AsyncLiveSession] = None
+        self.session_store: Optional[SessionResumptionStore] = SessionResumptionStore(
+            GEMINI_SESSION_HANDLE_PATH,
+            handle_ttl_s=GEMINI_SESSION_HANDLE_TTL_S,
+            load_saved=GEMINI_SESSION_RESUME_ON_START
+        ) if GEMINI_SESSION_RESUMPTION_ENABLED else None
+        self.rollover_timer = SessionRolloverTimer(
+            max_age_s=GEMINI_SESSION_ROLLOVER_S if GEMINI_SESSION_RESUMPTION_ENABLED else 0.0, # Sem retomada a troca perderia o contexto
+            grace_s=GEMINI_SESSION_ROLLOVER_GRACE_S,
+            go_away_margin_s=GEMINI_GO_AWAY_MARGIN_S
+        )
+        self.connection_manager = LiveConnectionManager(
+            self.live_client, GEMINI_MODEL_NAME,
+            connect_config=self._live_connect_config,
+            current_handle=lambda: self.session_store.handle if self.session_store else None,
+            standby_enabled=GEMINI_STANDBY_SESSION_ENABLED,
+            standby_max_age_s=GEMINI_STANDBY_MAX_AGE_S,
+            standby_refresh_min_s=GEMINI_STANDBY_REFRESH_MIN_S
+        )
+        self.pipeline: Optional[PipelineSupervisor] = None # Tarefas de longa duração; criado em `run`
+        self.unsent_tool_responses: List[Tuple[str, str, Optional[str]]] = [] # (função, resultado, id) não entregues; reenviados na sessão retomada
+        self.tool_executor = ToolExecutor(
+            self._execute_function_call, self._send_tool_response,
+            busy_event=self.thinking_event, # Setado enquanto houver ferramenta em andamento
+            default_concurrency=TOOL_DEFAULT_CONCURRENCY,
+            concurrency=TOOL_CONCURRENCY,
+            default_timeout_s=TOOL_DEFAULT_TIMEOUT_S,
+            timeouts=TOOL_TIMEOUTS
+        )
+        self.session_switches: Deque[Dict[str, Any]] = deque(maxlen=50) # Tempo sem conexão e até o primeiro áudio
+        self._outage_started_at: Optional[float] = None
+        self._outage_reason: Optional[str] = None
+        self._first_audio_pending_since: Optional[float] = None
+        self._last_server_message_at: float = time.monotonic()
         self.yolo_model: Optional[Any] = None # Ultralytics YOLO model
+        self.yolo_engine: Optional[YoloInferenceEngine] = None # Micro-lotes de inferência sobre o yolo_model
+        self.class_lookup: Optional[ClassLookup] = None # Tabelas de perigo/mapeamento compiladas por id de classe
+        self.tracker: Optional[MultiObjectTracker] = None # Identidades de objetos entre frames (protegido por frame_lock)
+        self.danger_chime: Optional[ChimeMixer] = self._load_danger_chime()
+        self.scene_gate: Optional[SceneChangeGate] = SceneChangeGate(
+            change_threshold=CAMERA_SCENE_CHANGE_THRESHOLD,
+            min_interval_s=1.0 / CAMERA_SEND_MAX_FPS if CAMERA_SEND_MAX_FPS > 0 else 1.0,
+            keepalive_s=CAMERA_KEEPALIVE_S
+        ) if CAMERA_SCENE_GATE_ENABLED else None
+        self.mic_gate: Optional[SpeechGate] = SpeechGate(
+            EnergyZcrVad(AUDIO_SEND_SAMPLE_RATE, threshold_db=MIC_VAD_THRESHOLD_DB, min_dbfs=MIC_VAD_MIN_DBFS),
+            chunk_ms=MIC_PACKET_MS,
+            pre_roll_ms=MIC_VAD_PRE_ROLL_MS,
+            hangover_ms=MIC_VAD_HANGOVER_MS,
+            keepalive_s=MIC_VAD_KEEPALIVE_S
+        ) if MIC_VAD_ENABLED else None
+        self.mic_packetizer: Optional[PcmPacketizer] = None # Ativo enquanto o microfone está aberto
+        self.echo_suppressor: Optional[EchoSuppressor] = EchoSuppressor(
+            AUDIO_SEND_SAMPLE_RATE, AUDIO_RECEIVE_SAMPLE_RATE,
+            filter_ms=ECHO_FILTER_MS,
+            bulk_delay_ms=ECHO_BULK_DELAY_MS,
+            double_talk_margin_db=ECHO_DOUBLE_TALK_MARGIN_DB
+        ) if ECHO_SUPPRESSION_ENABLED else None
+        self.audio_player: Optional[CallbackPlayer] = None # Ativo enquanto o playback está aberto
+        self.drop_model_audio_until_turn_end: bool = False # Após barge-in local, até o servidor encerrar o turno
+        self.barge_in_counts: Dict[str, int] = {"local_vad": 0, "server": 0}
+        self.model_audio_chunks_dropped: int = 0
+        self.recorder: Optional[SessionRecorder] = SessionRecorder(
+            SESSION_RECORDING_DIR, AUDIO_SEND_SAMPLE_RATE, AUDIO_RECEIVE_SAMPLE_RATE,
+            channels=AUDIO_CHANNELS,
+            codec=SESSION_RECORDING_CODEC,
+            max_pending_bytes=int(SESSION_RECORDING_MAX_PENDING_MB * 1024 * 1024)
+        ) if record_session else None
+        self.replay_path: Optional[str] = replay_path
+        self.frame_encoder = FrameEncoder(
+            ladder=[EncodeLevel(max_side, quality) for max_side, quality in CAMERA_JPEG_LADDER],
+            level=CAMERA_JPEG_LEVEL
+        )
+        self.token_budget = TokenBudget(
+            GEMINI_CONTEXT_TRIGGER_TOKENS if GEMINI_CONTEXT_COMPRESSION_ENABLED else GEMINI_CONTEXT_WINDOW_TOKENS,
+            tokens_per_frame=GEMINI_TOKENS_PER_FRAME,
+            audio_tokens_per_s=GEMINI_AUDIO_TOKENS_PER_S,
+            levels=[BudgetLevel(*level) for level in TOKEN_BUDGET_LEVELS],
+            audio_sample_rate=AUDIO_SEND_SAMPLE_RATE,
+            audio_channels=AUDIO_CHANNELS
+        )
+        self.alert_scheduler = DangerAlertScheduler(
+            severity_by_label=DANGER_SEVERITY,
+            default_severity=DANGER_DEFAULT_SEVERITY,
+            confirm_frames=DANGER_ALERT_CONFIRM_FRAMES,
+            window_frames=DANGER_ALERT_WINDOW_FRAMES,
+            cooldown_s=DANGER_ALERT_COOLDOWN_S,
+            min_send_interval_s=DANGER_ALERT_MIN_INTERVAL_S,
+            urgent_severity=DANGER_ALERT_URGENT_SEVERITY
+        )
+        # O som local só toca para perigo novo ou mais grave, não a cada frame
+        self.chime_gate = DangerChimeGate(
+            severity_by_label=DANGER_SEVERITY,
+            default_severity=DANGER_DEFAULT_SEVERITY,
+            confirm_frames=DANGER_CHIME_CONFIRM_FRAMES,
+            release_frames=DANGER_CHIME_RELEASE_FRAMES
+        )
         self.midas_model: Optional[torch.nn.Module] = None
         self.midas_transform: Optional[Any] = None
         self.midas_device: Optional[torch.device] = None
 
         # Estado da interface e dados
         self.preview_window_active: bool = False
-        self.frame_lock: threading.Lock = threading.Lock() # Protege acesso a latest_bgr_frame e latest_yolo_results
-        self.latest_bgr_frame: Optional[np.ndarray] = None
-        self.latest_yolo_results: Optional[List[Any]] = None # Resultados brutos do YOLO
+        self.frame_lock: threading.Lock = threading.Lock() # Protege acesso a latest_bgr_frame e latest_detections
+        self.camera_ring: Optional[FrameRingBuffer] = None # Anel de frames escrito pela thread de captura
+        self._published_frame_ref: Optional[FrameRef] = None # Slot do anel apontado por latest_bgr_frame
+        self.camera_frames_skipped_by_inference: int = 0
+        self.latest_bgr_frame: Optional[np.ndarray] = None # Slot do anel (somente leitura, copiar antes de modificar)
+        self.latest_detections: Optional[FrameDetections] = None # Detecções YOLO do frame publicado
         
         self.awaiting_name_for_save_face: bool = False # Flag para o fluxo de salvar rosto
         self.pending_function_call_name: Optional[str] = None # Nome da função pendente de nome
+        self.pending_function_call_id: Optional[str] = None # Id do servidor da chamada pendente (None no caminho legado)
 
         self._initialize_models()
 
@@ -120,9 +281,22 @@ class AudioLoop:
             try:
                 self.yolo_model = load_yolo_model()
                 logger.info("Modelo YOLO carregado com sucesso.")
+                if self.yolo_model:
+                    yolo_engine = YoloInferenceEngine(
+                        load_yolo_backend(self.yolo_model),
+                        max_batch_size=YOLO_BATCH_MAX_SIZE,
+                        max_wait_ms=YOLO_BATCH_MAX_WAIT_MS
+                    )
+                    self.class_lookup = ClassLookup(yolo_engine.names, DANGER_CLASSES, YOLO_CLASS_MAP, SURFACE_CLASS_KEYS)
+                    self.class_lookup.report()
+                    self.tracker = self._new_tracker()
+                    yolo_engine.start() # Só sobe a thread depois que todo o resto deu certo
+                    self.yolo_engine = yolo_engine
             except Exception:
                 logger.exception("Falha ao carregar modelo YOLO. Funcionalidades de detecção de objetos podem ser afetadas.")
                 self.yolo_model = None # Garante que é None se falhar
+                self.yolo_engine = None
+                self.class_lookup = None
 
         if DeepFace: # Só tenta carregar DeepFace se a importação foi bem-sucedida
             try:
@@ -142,6 +316,58 @@ class AudioLoop:
             self.midas_model, self.midas_transform, self.midas_device = None, None, None
         logger.info("Inicialização de modelos concluída.")
 
+    def _load_danger_chime(self, sample_rate: int = AUDIO_RECEIVE_SAMPLE_RATE) -> Optional[ChimeMixer]:
+        """Decodifica o som de perigo uma única vez para mistura no stream de playback."""
+        try:
+            chime_pcm = load_wav_as_pcm16(DANGER_SOUND_PATH, sample_rate)
+        except FileNotFoundError:
+            logger.warning(f"Som de perigo não encontrado em {DANGER_SOUND_PATH}. Alerta sonoro local desabilitado.")
+            return None
+        except Exception:
+            logger.exception(f"Erro ao decodificar o som de perigo {DANGER_SOUND_PATH}. Alerta sonoro local desabilitado.")
+            return None
+        logger.info(f"Som de perigo carregado ({chime_pcm.size / sample_rate:.2f} s @ {sample_rate} Hz).")
+        return ChimeMixer(chime_pcm, sample_rate, duck_gain=DANGER_CHIME_DUCK_GAIN,
+                          cooldown_s=DANGER_CHIME_COOLDOWN_S)
+
+    def _new_uplink_scheduler(self) -> UplinkScheduler:
+        """Faixas de subida em ordem de prioridade estrita: áudio, controle (texto/alertas), vídeo."""
+        return UplinkScheduler([
+            (UPLINK_LANE_AUDIO, UPLINK_AUDIO_MAX_ITEMS, POLICY_BLOCK), # Nunca descarta fala
+            (UPLINK_LANE_CONTROL, UPLINK_CONTROL_MAX_ITEMS, POLICY_DROP_NEW),
+            (UPLINK_LANE_VIDEO, UPLINK_VIDEO_MAX_ITEMS, POLICY_LATEST), # Só o frame mais novo importa
+        ])
+
+    def _new_playback_buffer(self) -> PlaybackJitterBuffer:
+        return PlaybackJitterBuffer(
+            AUDIO_RECEIVE_SAMPLE_RATE, AUDIO_CHUNK_SIZE,
+            target_ms=PLAYBACK_JITTER_TARGET_MS,
+            max_depth_ms=PLAYBACK_JITTER_MAX_MS,
+            catchup_lag_ms=PLAYBACK_JITTER_CATCHUP_LAG_MS,
+            catchup_rate=PLAYBACK_JITTER_CATCHUP_RATE,
+            max_lag_ms=PLAYBACK_JITTER_MAX_LAG_MS,
+            new_stretch_gap_ms=PLAYBACK_JITTER_NEW_STRETCH_GAP_MS,
+            channels=AUDIO_CHANNELS
+        )
+
+    def _new_tracker(self) -> MultiObjectTracker:
+        return MultiObjectTracker(
+            iou_threshold=TRACKER_IOU_THRESHOLD,
+            max_age=TRACKER_MAX_AGE_FRAMES,
+            min_hits=TRACKER_MIN_HITS,
+            history_len=TRACKER_HISTORY_LEN,
+            report_max_misses=TRACKER_REPORT_MAX_MISSES
+        )
+
+    def audio_io_stats(self) -> Dict[str, Dict[str, float]]:
+        """Contadores de overrun (captura) e underrun (playback) dos streams em modo callback."""
+        io_stats: Dict[str, Dict[str, float]] = {}
+        if self.mic_packetizer:
+            io_stats["capture"] = self.mic_packetizer.stats()
+        if self.audio_player:
+            io_stats["playback"] = self.audio_player.stats()
+        return io_stats
+
     async def send_text_to_gemini(self) -> None:
         """
         Lê input de texto do console, trata comandos de debug locais ('q', 'p')
@@ -152,19 +378,11 @@ class AudioLoop:
             try:
                 text_input = await asyncio.to_thread(input, f"{self.trckuser} message > ")
 
-                # Limpa a fila de saída multimídia se houver nova entrada de texto,
-                # para priorizar a nova interação.
-                if self.multimedia_output_gemini_queue:
-                    while not self.multimedia_output_gemini_queue.empty():
-                        try:
-                            self.multimedia_output_gemini_queue.get_nowait()
-                            self.multimedia_output_gemini_queue.task_done()
-                        except asyncio.QueueEmpty:
-                            break # Fila já estava vazia
-                        except Exception:
-                            logger.exception("Erro ao limpar multimedia_output_gemini_queue antes de enviar texto.")
-                            break # Evita loop infinito em caso de erro inesperado na fila
-                    logger.debug("Fila de saída multimídia limpa antes de enviar novo texto.")
+                # Descarta frames pendentes se houver nova entrada de texto, para priorizar
+                # a nova interação. O áudio do microfone nunca é descartado.
+                if self.uplink_scheduler:
+                    if self.uplink_scheduler.clear([UPLINK_LANE_VIDEO]):
+                        logger.debug("Frames pendentes descartados antes de enviar novo texto.")
 
                 if text_input.lower() == "q":
                     logger.info("Comando 'q' recebido. Sinalizando parada para todas as tarefas.")
@@ -186,10 +404,12 @@ class AudioLoop:
                         logger.info("[DEBUG] Salvar rosto (comando 'p') só funciona no modo câmera.")
                     continue # Volta para o input sem enviar 'p' para o Gemini
 
-                if self.gemini_session:
+                if self.uplink_scheduler: # Durante uma troca de sessão o texto espera na faixa e sai na próxima
                     logger.info(f"Enviando texto para Gemini: '{text_input}'")
+                    if self.recorder:
+                        self.recorder.record_event("user_text", {"text": text_input})
                     # Envia "." se o input for vazio, como no código original, mas idealmente deveria tratar isso.
-                    await self.gemini_session.send(input=text_input or ".", end_of_turn=True)
+                    await self.uplink_scheduler.put(UPLINK_LANE_CONTROL, text_input or ".")
                 else:
                     if not self.stop_event.is_set(): # Evita log excessivo durante o desligamento
                         logger.warning("Sessão Gemini não está ativa. Não é possível enviar mensagem de texto.")
@@ -209,227 +429,382 @@ class AudioLoop:
                 await asyncio.sleep(1) # Pausa antes de tentar ler novo input
         logger.info("Tarefa send_text_to_gemini finalizada.")
 
-    def _process_camera_frame(self, cap: cv2.VideoCapture) -> Tuple[Optional[Dict[str, Any]], List[str]]:
+    def _run_yolo_on_frame(self, frame_bgr: np.ndarray) -> Tuple[Optional[FrameDetections], List[str]]:
         """
-        Captura um frame da câmera, realiza detecção YOLO, atualiza o preview (se ativo)
-        e prepara o frame para envio.
+        Executa a detecção YOLO em um frame do anel da câmera e atualiza o preview (se ativo).
+        Esta função é BLOQUEANTE e deve ser chamada com `asyncio.to_thread`.
 
         Args:
-            cap (cv2.VideoCapture): O objeto de captura de vídeo.
+            frame_bgr (np.ndarray): Frame BGR (slot do anel, não deve ser modificado).
 
         Returns:
-            Tuple[Optional[Dict[str, Any]], List[str]]:
-                - Um dicionário com os dados da imagem para envio (mime_type, data) ou None se falhar.
+            Tuple[Optional[FrameDetections], List[str]]:
+                - As detecções do frame ou None se a inferência falhar/estiver desabilitada.
                 - Uma lista de nomes de classes de perigo detectadas pelo YOLO.
         """
-        ret, frame_bgr = cap.read()
-        if not ret:
-            logger.warning("Falha ao ler frame da câmera.")
-            with self.frame_lock:
-                self.latest_bgr_frame = None
-                self.latest_yolo_results = None
-            return None, []
-
-        # Faz uma cópia para processamento e armazenamento
-        # frame_bgr já é um novo buffer da câmera, mas copiar garante isolamento se for modificar muito
-        current_frame_copy = frame_bgr.copy() 
-        
         yolo_alerts: List[str] = []
-        yolo_results_for_this_frame: Optional[List[Any]] = None
+        detections: Optional[FrameDetections] = None
         display_frame_for_preview: Optional[np.ndarray] = None
 
-        if self.yolo_model:
-            frame_rgb = cv2.cvtColor(current_frame_copy, cv2.COLOR_BGR2RGB)
+        if self.yolo_engine:
+            frame_rgb = cv2.cvtColor(frame_bgr, cv2.COLOR_BGR2RGB)
             try:
-                results = self.yolo_model.predict(frame_rgb, verbose=False, conf=YOLO_CONFIDENCE_THRESHOLD)
-                yolo_results_for_this_frame = results # Armazena os resultados brutos
+                results = self.yolo_engine.predict(frame_rgb)
+                detections = FrameDetections.from_results(results, self.yolo_engine.names)
+
+                # Verifica de uma vez quais detecções pertencem a classes de perigo
+                danger_mask = self.class_lookup.danger_mask(detections.cls) & (detections.conf >= YOLO_CONFIDENCE_THRESHOLD)
+                yolo_alerts = [detections.names[class_id] for class_id in np.unique(detections.cls[danger_mask]).tolist()]
 
                 if self.show_preview:
-                    # Cria uma cópia separada para desenhar, para não afetar current_frame_copy
-                    display_frame_for_preview = current_frame_copy.copy()
-
-                for result_item in results:
-                    for box in result_item.boxes:
-                        x1, y1, x2, y2 = map(int, box.xyxy[0])
-                        cls_id = int(box.cls[0])
-                        class_name_yolo = self.yolo_model.names[cls_id]
-                        conf = float(box.conf[0])
-
-                        if display_frame_for_preview is not None:
-                            label = f"{class_name_yolo}: {conf:.2f}"
-                            cv2.rectangle(display_frame_for_preview, (x1, y1), (x2, y2), (0, 255, 0), 2)
-                            cv2.putText(display_frame_for_preview, label, (x1, y1 - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 1)
-
-                        # Verifica se a classe detectada está em alguma lista de perigo
-                        is_dangerous = any(class_name_yolo in danger_list for danger_list in DANGER_CLASSES.values())
-                        if is_dangerous and conf >= YOLO_CONFIDENCE_THRESHOLD:
-                            yolo_alerts.append(class_name_yolo)
+                    # Cria uma cópia separada para desenhar, o slot do anel é somente leitura
+                    display_frame_for_preview = frame_bgr.copy()
+                    boxes_int = detections.xyxy.astype(int).tolist()
+                    for i, (x1, y1, x2, y2) in enumerate(boxes_int):
+                        label = f"{detections.class_name(i)}: {detections.conf[i]:.2f}"
+                        cv2.rectangle(display_frame_for_preview, (x1, y1), (x2, y2), (0, 255, 0), 2)
+                        cv2.putText(display_frame_for_preview, label, (x1, y1 - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 1)
             except Exception:
                 logger.exception("Erro durante a inferência YOLO.")
-                yolo_results_for_this_frame = None
+                detections = None
         elif self.show_preview: # Se não há modelo YOLO mas o preview está ativo
-             display_frame_for_preview = current_frame_copy.copy()
+             display_frame_for_preview = frame_bgr.copy()
 
+        if self.show_preview and display_frame_for_preview is not None:
+            self._show_preview(display_frame_for_preview)
 
-        with self.frame_lock:
-            self.latest_bgr_frame = current_frame_copy # Armazena o frame BGR original (copiado)
-            self.latest_yolo_results = yolo_results_for_this_frame
+        return detections, yolo_alerts
 
-        if self.show_preview and display_frame_for_preview is not None:
-            try:
-                cv2.imshow("Trackie YOLO Preview", display_frame_for_preview)
-                cv2.waitKey(1) # Essencial para o OpenCV processar eventos da GUI
-                self.preview_window_active = True
-            except cv2.error as e_cv:
-                # Erros comuns relacionados à ausência de um servidor X ou bibliotecas GUI
-                if "DISPLAY" in str(e_cv).upper() or "GTK" in str(e_cv).upper() or \
-                   "QT" in str(e_cv).upper() or "COULD NOT CONNECT TO DISPLAY" in str(e_cv).upper() or \
-                   "plugin \"xcb\"" in str(e_cv).lower(): # Adicionado xcb
-                    logger.warning("--------------------------------------------------------------------")
-                    logger.warning("AVISO: Não foi possível mostrar a janela de preview da câmera.")
-                    logger.warning("Verifique se um ambiente gráfico (X11, Wayland com XWayland) está disponível.")
-                    logger.warning("Desabilitando feedback visual para esta sessão.")
-                    logger.warning("--------------------------------------------------------------------")
-                    self.show_preview = False # Desabilita para futuras tentativas nesta sessão
-                    self.preview_window_active = False
-                    # Tenta fechar qualquer janela que possa ter sido criada parcialmente
-                    try: cv2.destroyAllWindows()
-                    except Exception: pass
-                else:
-                    logger.exception("Erro inesperado no OpenCV ao tentar mostrar preview.")
-                    self.show_preview = False
-                    self.preview_window_active = False
-            except Exception: # Captura qualquer outra exceção
-                logger.exception("Erro geral ao tentar mostrar preview da câmera.")
+    def _show_preview(self, display_frame_for_preview: np.ndarray) -> None:
+        """Mostra o frame anotado na janela de preview, desabilitando-a se não houver ambiente gráfico."""
+        try:
+            cv2.imshow("Trackie YOLO Preview", display_frame_for_preview)
+            cv2.waitKey(1) # Essencial para o OpenCV processar eventos da GUI
+            self.preview_window_active = True
+        except cv2.error as e_cv:
+            # Erros comuns relacionados à ausência de um servidor X ou bibliotecas GUI
+            if "DISPLAY" in str(e_cv).upper() or "GTK" in str(e_cv).upper() or \
+               "QT" in str(e_cv).upper() or "COULD NOT CONNECT TO DISPLAY" in str(e_cv).upper() or \
+               "plugin \"xcb\"" in str(e_cv).lower(): # Adicionado xcb
+                logger.warning("--------------------------------------------------------------------")
+                logger.warning("AVISO: Não foi possível mostrar a janela de preview da câmera.")
+                logger.warning("Verifique se um ambiente gráfico (X11, Wayland com XWayland) está disponível.")
+                logger.warning("Desabilitando feedback visual para esta sessão.")
+                logger.warning("--------------------------------------------------------------------")
+                self.show_preview = False # Desabilita para futuras tentativas nesta sessão
+                self.preview_window_active = False
+                # Tenta fechar qualquer janela que possa ter sido criada parcialmente
+                try: cv2.destroyAllWindows()
+                except Exception: pass
+            else:
+                logger.exception("Erro inesperado no OpenCV ao tentar mostrar preview.")
                 self.show_preview = False
                 self.preview_window_active = False
-        
-        image_part_for_gemini: Optional[Dict[str, Any]] = None
+        except Exception: # Captura qualquer outra exceção
+            logger.exception("Erro geral ao tentar mostrar preview da câmera.")
+            self.show_preview = False
+            self.preview_window_active = False
+
+    def _encode_frame_for_gemini(self, frame_bgr: np.ndarray) -> Optional[Dict[str, Any]]:
+        """
+        Converte um frame BGR em JPEG para envio ao Gemini.
+        Esta função é BLOQUEANTE e deve ser chamada com `asyncio.to_thread`.
+
+        Returns:
+            Optional[Dict[str, Any]]: Dicionário com mime_type e data, ou None se falhar.
+        """
         try:
-            # Converte o frame (RGB, se já convertido para YOLO, ou BGR para RGB) para JPEG
-            # Usa current_frame_copy que é BGR, para garantir consistência
-            frame_to_encode_rgb = cv2.cvtColor(current_frame_copy, cv2.COLOR_BGR2RGB)
-            
-            img = Image.fromarray(frame_to_encode_rgb)
-            img.thumbnail((1024, 1024)) # Redimensiona mantendo a proporção
-            image_io = io.BytesIO()
-            img.save(image_io, format="jpeg", quality=50) # Qualidade ajustável
-            image_io.seek(0)
-            image_part_for_gemini = {
-                "mime_type": "image/jpeg",
-                "data": base64.b64encode(image_io.read()).decode('utf-8')
-            }
+            # Redimensiona e codifica direto do buffer BGR (sem cópias RGB/PIL/BytesIO)
+            return self.frame_encoder.encode_part(frame_bgr)
         except Exception:
             logger.exception("Erro ao converter frame da câmera para JPEG para envio.")
-            return None, list(set(yolo_alerts)) # Retorna alertas mesmo se a imagem falhar
+            return None
+
+    def _publish_camera_frame(self, ref: Optional[FrameRef], detections: Optional[FrameDetections],
+                              run_detector: bool = True) -> None:
+        """
+        Publica o slot do anel (e os resultados YOLO correspondentes) como o estado mais
+        recente para as ferramentas e avança o rastreador. O slot publicado fica preso
+        até ser substituído.
+
+        Args:
+            ref (Optional[FrameRef]): Slot do anel a publicar (None limpa o estado).
+            detections (Optional[FrameDetections]): Detecções do frame, se o detector rodou.
+            run_detector (bool): False em frames só de propagação; mantém as últimas detecções.
+        """
+        with self.frame_lock:
+            previous_ref = self._published_frame_ref
+            self._published_frame_ref = ref
+            self.latest_bgr_frame = ref.frame if ref is not None else None
+            if ref is None:
+                self.latest_detections = None
+            elif run_detector:
+                self.latest_detections = detections
+            if self.tracker is not None and ref is not None:
+                if detections is not None:
+                    self.tracker.update(detections)
+                else:
+                    self.tracker.predict()
+        if self.camera_ring and previous_ref is not None:
+            self.camera_ring.release(previous_ref)
+
+    async def _camera_inference_consumer(self, wakeup: asyncio.Event) -> None:
+        """
+        Consumidor de inferência: sempre pega o frame mais novo do anel, roda o YOLO
+        e publica frame + resultados. Frames que chegaram durante a inferência são descartados.
+        O detector roda a cada YOLO_DETECT_EVERY_N_FRAMES frames; nos demais o rastreador
+        apenas propaga as caixas.
+        """
+        min_interval = 1.0 / YOLO_INFERENCE_MAX_FPS if YOLO_INFERENCE_MAX_FPS > 0 else 0.0
+        detect_every_n = max(1, YOLO_DETECT_EVERY_N_FRAMES)
+        frames_consumed = 0
+        last_seq = 0
+        while not self.stop_event.is_set():
+            await wakeup.wait()
+            wakeup.clear()
+            ref = self.camera_ring.acquire_latest() if self.camera_ring else None
+            if ref is None or ref.seq == last_seq:
+                if self.camera_ring: self.camera_ring.release(ref)
+                continue
+            if last_seq:
+                self.camera_frames_skipped_by_inference += ref.seq - last_seq - 1
+            last_seq = ref.seq
+            frames_consumed += 1
+
+            if self.tracker is not None and frames_consumed % detect_every_n != 0:
+                # Frame sem detector: o rastreador propaga as caixas por movimento
+                self._publish_camera_frame(ref, None, run_detector=False)
+                continue
+
+            started = time.monotonic()
+            try:
+                detections, yolo_alerts = await asyncio.to_thread(self._run_yolo_on_frame, ref.frame)
+            except Exception:
+                self.camera_ring.release(ref)
+                raise
+            self._publish_camera_frame(ref, detections) # O slot continua preso enquanto publicado
+
+            if detections is not None: # Frames sem inferência não contam para a histerese
+                self._trigger_danger_chime(yolo_alerts)
+
+            # O agendador decide se (e quando) os perigos do frame viram uma mensagem
+            if detections is not None:
+                self.alert_scheduler.observe(yolo_alerts)
+            if self.gemini_session:
+                danger_alert = self.alert_scheduler.next_alert()
+                if danger_alert:
+                    await self._send_danger_alert(danger_alert)
+
+            elapsed = time.monotonic() - started
+            if elapsed < min_interval:
+                await asyncio.sleep(min_interval - elapsed)
+
+    def _trigger_danger_chime(self, danger_labels: List[str]) -> None:
+        """
+        Toca o som de perigo local imediatamente, misturado no stream de playback,
+        sem esperar a resposta do Gemini, quando o perigo é novo ou mais grave que
+        os já ativos. Deve ser chamado no event loop, uma vez por frame do detector.
+        """
+        reason = self.chime_gate.observe(danger_labels)
+        # O callback do player mistura o som no próximo bloco do dispositivo
+        if reason and self.danger_chime:
+            self.danger_chime.trigger(time.monotonic(), force=(reason == "escalated"))
+
+    def _interrupt_playback(self, source: str, detected_at: Optional[float] = None) -> bool:
+        """
+        Barge-in: silencia o playback no próximo bloco do dispositivo e descarta o áudio
+        do modelo ainda no buffer de jitter. Deve ser chamado no event loop.
+
+        Args:
+            source (str): "local_vad" (fala detectada no microfone) ou "server" (`interrupted`).
+            detected_at (Optional[float]): `time.monotonic()` da detecção.
+
+        Returns:
+            bool: True se havia áudio do modelo tocando ou no buffer.
+        """
+        queued_ms = self.playback_buffer.clear() if self.playback_buffer else 0.0
+        player = self.audio_player
+        was_playing = bool(player and player.is_playing)
+        if not was_playing and not queued_ms:
+            return False
+        if player:
+            player.interrupt(detected_at)
+        self.barge_in_counts[source] = self.barge_in_counts.get(source, 0) + 1
+        if self.recorder:
+            self.recorder.record_event("barge_in", {"source": source, "flushed_ms": round(queued_ms, 1)}, detected_at)
+        logger.info(f"Barge-in ({source}): playback interrompido, {queued_ms:.0f} ms do modelo descartados do buffer.")
+        return True
+
+    async def _send_danger_alert(self, danger_alert: DangerAlert) -> None:
+        """Envia ao Gemini uma única mensagem com todos os perigos agrupados no alerta."""
+        if len(danger_alert.labels) == 1:
+            alert_msg = f"ALERTA DE PERIGO (YOLO): Trackie, avise {self.trckuser} URGENTEMENTE que um(a) '{danger_alert.labels[0].upper()}' foi detectado!"
+        else:
+            labels_text = ", ".join(f"'{label.upper()}'" for label in danger_alert.labels)
+            alert_msg = f"ALERTA DE PERIGO (YOLO): Trackie, avise {self.trckuser} URGENTEMENTE que foram detectados: {labels_text} (do mais grave ao menos grave)!"
+        if not self.uplink_scheduler:
+            return
+        logger.info(f"Enviando alerta YOLO para Gemini: {alert_msg}")
+        if not self.uplink_scheduler.put_nowait(UPLINK_LANE_CONTROL, alert_msg):
+            logger.warning(f"Faixa de controle cheia. Alerta YOLO para {danger_alert.labels} descartado.")
+
+    def _scene_objects_signature(self) -> Optional[FrozenSet[Tuple[int, int]]]:
+        """
+        Assinatura dos objetos em cena para o portão de mudança de cena: pares
+        (classe, id de track) dos tracks visíveis, ou (classe, 0) das últimas detecções.
+        """
+        with self.frame_lock:
+            if self.tracker is not None:
+                return frozenset((t.class_id, t.track_id) for t in self.tracker.visible_tracks())
+            if self.latest_detections is not None:
+                return frozenset((class_id, 0) for class_id in self.latest_detections.cls.tolist())
+        return None
+
+    def _gate_and_encode_frame(self, frame_bgr: np.ndarray,
+                               objects_in_scene: Optional[FrozenSet[Tuple[int, int]]]) -> Optional[Dict[str, Any]]:
+        """
+        Aplica o portão de mudança de cena e codifica o frame se aprovado.
+        Esta função é BLOQUEANTE e deve ser chamada com `asyncio.to_thread`.
+        """
+        if self.scene_gate:
+            reason = self.scene_gate.decide(frame_bgr, objects_in_scene)
+            if reason is None:
+                return None # Quase igual ao último frame enviado
+            logger.debug(f"Portão de cena: enviando frame (motivo: {reason}).")
+        return self._encode_frame_for_gemini(frame_bgr)
+
+    async def _camera_encoding_consumer(self, wakeup: asyncio.Event) -> None:
+        """
+        Consumidor de codificação: pega o frame mais novo do anel, passa pelo portão de
+        mudança de cena (se ativo), codifica em JPEG e coloca na fila de saída multimídia.
+        Sem o portão, envia na taxa fixa CAMERA_SEND_FPS; com ele, avalia frames na taxa
+        CAMERA_SEND_MAX_FPS e só envia os que mudaram (ou o keep-alive).
+        """
+        last_seq = 0
+        while not self.stop_event.is_set():
+            await wakeup.wait()
+            wakeup.clear()
+            ref = self.camera_ring.acquire_latest() if self.camera_ring else None
+            if ref is None or ref.seq == last_seq:
+                if self.camera_ring: self.camera_ring.release(ref)
+                continue
+            last_seq = ref.seq
+            objects_in_scene = self._scene_objects_signature() if self.scene_gate else None
+            try:
+                image_part = await asyncio.to_thread(self._gate_and_encode_frame, ref.frame, objects_in_scene)
+            finally:
+                self.camera_ring.release(ref)
 
-        return image_part_for_gemini, list(set(yolo_alerts)) # Remove duplicatas dos alertas
+            self._queue_video_frame(image_part)
+            await asyncio.sleep(self._video_send_interval())
+
+    def _queue_video_frame(self, image_part: Optional[Dict[str, Any]]) -> None:
+        """Coloca um frame codificado (câmera ou tela) na faixa de vídeo, onde só o mais novo fica na fila."""
+        if image_part and self.uplink_scheduler:
+            self.uplink_scheduler.put_nowait(UPLINK_LANE_VIDEO, image_part)
+            if self.recorder:
+                self.recorder.record_frame(image_part["data"])
+        self._apply_token_budget()
+
+    def _video_send_interval(self) -> float:
+        """
+        Intervalo até avaliar o próximo frame: CAMERA_SEND_FPS sem o portão de cena,
+        CAMERA_SEND_MAX_FPS com ele; mais espaçado quando o contexto da sessão está enchendo.
+        """
+        if self.scene_gate:
+            send_interval = 1.0 / CAMERA_SEND_MAX_FPS if CAMERA_SEND_MAX_FPS > 0 else 1.0
+        else:
+            send_interval = 1.0 / CAMERA_SEND_FPS if CAMERA_SEND_FPS > 0 else 1.0
+        if TOKEN_BUDGET_ADAPTIVE:
+            send_interval *= self.token_budget.current_level.frame_interval_scale
+        return send_interval
+
+    def _apply_token_budget(self) -> None:
+        """Ajusta resolução dos frames e ritmo do portão de cena ao degrau atual do orçamento de tokens."""
+        if not self.token_budget.update_level() or not TOKEN_BUDGET_ADAPTIVE:
+            return
+        level = self.token_budget.current_level
+        self.frame_encoder.set_level(CAMERA_JPEG_LEVEL + level.encoder_steps_down)
+        if self.scene_gate:
+            base_interval = 1.0 / CAMERA_SEND_MAX_FPS if CAMERA_SEND_MAX_FPS > 0 else 1.0
+            self.scene_gate.min_interval_s = base_interval * level.frame_interval_scale
+            self.scene_gate.keepalive_s = CAMERA_KEEPALIVE_S * level.frame_interval_scale
+
+    async def _watch_camera_capture(self, capture_thread: CameraCaptureThread) -> None:
+        """Falha o stream da câmera (o supervisor reabre a câmera) se a thread de captura morrer."""
+        while not self.stop_event.is_set():
+            await asyncio.sleep(0.5)
+            if not capture_thread.is_alive():
+                if not self.stop_event.is_set():
+                    raise RuntimeError("Thread de captura da câmera terminou inesperadamente")
+                return
 
     async def stream_camera_frames(self) -> None:
         """
-        Loop principal para capturar frames da câmera, processá-los e enviá-los
-        para a fila de saída multimídia. Também envia alertas YOLO.
+        Abre a câmera, inicia a thread de captura que escreve no anel de frames e roda
+        os consumidores de inferência YOLO e de codificação/envio em paralelo.
         """
         logger.info("Iniciando stream_camera_frames...")
         cap = None
+        capture_thread: Optional[CameraCaptureThread] = None
         try:
             # Tenta abrir a câmera. cv2.VideoCapture é bloqueante.
-            cap = await asyncio.to_thread(cv2.VideoCapture, 0) # TODO: Tornar o índice da câmera configurável
-            
+            cap = await asyncio.to_thread(cv2.VideoCapture, CAMERA_INDEX)
+
             if not cap.isOpened():
-                logger.critical("Erro crítico: Não foi possível abrir a câmera. stream_camera_frames será encerrado.")
-                with self.frame_lock: # Garante que o estado reflita a falha
-                    self.latest_bgr_frame = None
-                    self.latest_yolo_results = None
-                self.stop_event.set() # Sinaliza para outras tarefas pararem se a câmera é essencial
-                return
+                self._publish_camera_frame(None, None) # Garante que o estado reflita a falha
+                raise RuntimeError(f"Não foi possível abrir a câmera {CAMERA_INDEX}")
 
-            # Configuração de FPS (pode não ser respeitada por todas as câmeras/drivers)
-            target_fps = 1.0 # FPS desejado para processamento
-            cap.set(cv2.CAP_PROP_FPS, target_fps)
+            # A captura roda na taxa nativa; um buffer mínimo no driver evita frames atrasados.
+            cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
             actual_fps = cap.get(cv2.CAP_PROP_FPS)
-            logger.info(f"FPS solicitado para câmera: {target_fps}, FPS real reportado: {actual_fps if actual_fps > 0 else 'Não disponível/Configurável'}")
+            logger.info(f"FPS nativo reportado pela câmera: {actual_fps if actual_fps > 0 else 'Não disponível'}. "
+                        f"Envio: {CAMERA_SEND_FPS} FPS, inferência: até {YOLO_INFERENCE_MAX_FPS} FPS.")
 
-            # Calcula o intervalo de sleep. Se actual_fps for válido e próximo, usa-o.
-            # Senão, usa target_fps, com limites para evitar busy-waiting ou sleeps muito longos.
-            sleep_interval = 1.0 / target_fps 
-            if 0 < actual_fps < (target_fps * 5): # Se FPS real é razoável
-                 sleep_interval = 1.0 / actual_fps
-            sleep_interval = max(0.05, min(sleep_interval, 2.0))
-            logger.info(f"Intervalo de processamento de frame: {sleep_interval:.3f}s (Alvo: {1.0/target_fps:.3f}s)")
+            self.camera_ring = FrameRingBuffer(CAMERA_RING_SLOTS)
+            inference_wakeup = asyncio.Event()
+            encoding_wakeup = asyncio.Event()
+            loop = asyncio.get_running_loop()
 
-            while not self.stop_event.is_set():
-                if not cap.isOpened(): # Checagem adicional dentro do loop
-                    logger.error("Câmera desconectada ou fechada inesperadamente durante o loop. Encerrando stream_camera_frames.")
-                    self.stop_event.set()
-                    break
+            def _wake_consumers() -> None:
+                inference_wakeup.set()
+                encoding_wakeup.set()
 
-                # _process_camera_frame é síncrono e intensivo em CPU, então roda em thread
-                image_part, yolo_alerts = await asyncio.to_thread(self._process_camera_frame, cap)
+            capture_thread = CameraCaptureThread(
+                cap, self.camera_ring,
+                on_frame=lambda _seq: loop.call_soon_threadsafe(_wake_consumers)
+            )
+            capture_thread.start()
 
-                frame_was_successfully_read: bool
-                with self.frame_lock:
-                    frame_was_successfully_read = self.latest_bgr_frame is not None
-
-                if not frame_was_successfully_read:
-                    if not cap.isOpened(): # Se a câmera fechou E a leitura falhou
-                        logger.error("Leitura do frame falhou e câmera está fechada. Encerrando stream_camera_frames.")
-                        self.stop_event.set()
-                        break
-                    else: # Falha temporária na leitura, câmera ainda aberta
-                        logger.warning("Falha temporária na leitura do frame da câmera. Tentando novamente...")
-                        await asyncio.sleep(0.5) # Pausa antes de tentar novamente
-                        continue
-                
-                # Envia a imagem para a fila de saída para o Gemini
-                if image_part and self.multimedia_output_gemini_queue:
-                    try:
-                        if self.multimedia_output_gemini_queue.full():
-                            # Descarta o mais antigo para dar espaço ao novo
-                            discarded_item = await self.multimedia_output_gemini_queue.get()
-                            self.multimedia_output_gemini_queue.task_done()
-                            logger.debug(f"Fila de saída multimídia cheia. Frame descartado: {str(discarded_item)[:50]}...")
-                        self.multimedia_output_gemini_queue.put_nowait(image_part)
-                    except asyncio.QueueFull: # Deve ser raro devido à checagem .full() e descarte
-                        logger.warning("Fila de saída multimídia ainda cheia após tentativa de descarte. Frame perdido.")
-                    except Exception:
-                        logger.exception("Erro inesperado ao colocar frame na multimedia_output_gemini_queue.")
-                
-                # Envia alertas YOLO para o Gemini (se houver sessão ativa)
-                if yolo_alerts and self.gemini_session:
-                    for alert_class_name in yolo_alerts:
-                        try:
-                            # TODO: Considerar tocar o som de perigo de forma assíncrona se necessário
-                            # play_wav_file_sync(DANGER_SOUND_PATH) # Bloqueante, pode ser problemático aqui
-                            alert_msg = f"ALERTA DE PERIGO (YOLO): Trackie, avise {self.trckuser} URGENTEMENTE que um(a) '{alert_class_name.upper()}' foi detectado!"
-                            logger.info(f"Enviando alerta YOLO para Gemini: {alert_msg}")
-                            await self.gemini_session.send(input=alert_msg, end_of_turn=True)
-                        except Exception: # genai_errors.LiveSessionClosedError, etc.
-                            logger.exception(f"Erro ao enviar alerta YOLO para '{alert_class_name}'.")
-                            # Se a sessão estiver fechada, o loop principal de `run` deve tratar a reconexão.
-                            # Não setar stop_event aqui diretamente por um alerta falho, a menos que seja erro de sessão.
-                            # error_str = str(e_alert).upper()
-                            # if "LIVESESSION CLOSED" in error_str or "LIVESESSION NOT CONNECTED" in error_str:
-                            #    self.stop_event.set() # Sinaliza para reconexão
-                            #    break # Sai do loop de alertas
-                    if self.stop_event.is_set(): break # Se um erro de sessão ocorreu ao enviar alerta
-
-                await asyncio.sleep(sleep_interval) # Controla a taxa de captura
+            await asyncio.gather(
+                self._camera_inference_consumer(inference_wakeup),
+                self._camera_encoding_consumer(encoding_wakeup),
+                self._watch_camera_capture(capture_thread),
+            )
 
         except asyncio.CancelledError:
             logger.info("Tarefa stream_camera_frames cancelada.")
         except Exception:
-            logger.exception("Erro crítico em stream_camera_frames. Sinalizando parada.")
-            self.stop_event.set()
+            logger.exception("Erro em stream_camera_frames. O supervisor do pipeline decide se reabre a câmera.")
+            raise
         finally:
             logger.info("Finalizando stream_camera_frames...")
+            if capture_thread:
+                capture_thread.stop()
+                await asyncio.to_thread(capture_thread.join, 2.0)
             if cap and cap.isOpened():
                 cap.release()
                 logger.info("Câmera liberada.")
-            with self.frame_lock: # Limpa o último frame ao finalizar
-                self.latest_bgr_frame = None
-                self.latest_yolo_results = None
-            
+            self._publish_camera_frame(None, None) # Limpa o último frame ao finalizar
+            self.camera_ring = None
+            self.alert_scheduler.reset()
+            self.chime_gate.reset()
+            if self.scene_gate:
+                self.scene_gate.reset()
+            if self.tracker is not None:
+                with self.frame_lock:
+                    self.tracker = self._new_tracker() # Identidades não sobrevivem à reabertura da câmera
+
             if self.preview_window_active:
                 try:
                     cv2.destroyWindow("Trackie YOLO Preview") # Tenta fechar a janela específica
@@ -443,58 +818,84 @@ class AudioLoop:
             self.preview_window_active = False
             logger.info("stream_camera_frames concluído.")
 
+    def _capture_screen_frame(self) -> np.ndarray:
+        """
+        Captura o monitor principal como um frame BGR.
+        Esta função é BLOQUEANTE e deve ser chamada com `asyncio.to_thread`.
+        """
+        # Uma instância do mss por captura: no Windows ela só vale na thread que a criou
+        with mss.mss() as sct:
+            monitor = sct.monitors[1] if len(sct.monitors) > 1 else sct.monitors[0]
+            shot = sct.grab(monitor)
+        return np.ascontiguousarray(np.asarray(shot)[:, :, :3]) # BGRA -> BGR
+
+    def _capture_and_encode_screen(self) -> Optional[Dict[str, Any]]:
+        """Captura a tela, aplica o portão de mudança de cena e codifica. BLOQUEANTE."""
+        return self._gate_and_encode_frame(self._capture_screen_frame(), None)
+
+    async def stream_screen_frames(self) -> None:
+        """
+        Modo "screen": captura a tela e a envia pela faixa de vídeo, com o mesmo portão
+        de mudança de cena, escada JPEG e ritmo (orçamento de tokens) da câmera.
+        """
+        logger.info("Iniciando stream_screen_frames...")
+        try:
+            while not self.stop_event.is_set():
+                image_part = await asyncio.to_thread(self._capture_and_encode_screen)
+                self._queue_video_frame(image_part)
+                await asyncio.sleep(self._video_send_interval())
+        except asyncio.CancelledError:
+            logger.info("Tarefa stream_screen_frames cancelada.")
+        except Exception:
+            logger.exception("Erro em stream_screen_frames. O supervisor do pipeline decide se reinicia a captura de tela.")
+            raise
+        finally:
+            if self.scene_gate:
+                self.scene_gate.reset()
+            logger.info("stream_screen_frames concluído.")
+
     async def send_multimedia_realtime(self) -> None:
         """
-        Consome dados da fila `multimedia_output_gemini_queue` (frames de vídeo/tela, áudio do microfone)
-        e os envia para a sessão Gemini.
+        Consome as faixas do `uplink_scheduler` (áudio do microfone, texto/alertas, frames
+        de vídeo/tela) em ordem de prioridade e as envia para a sessão Gemini.
         """
         logger.info("send_multimedia_realtime pronto para enviar dados multimídia para Gemini...")
+        last_metrics_log = time.monotonic()
         try:
             while not self.stop_event.is_set():
-                if self.thinking_event.is_set(): # Pausa o envio se uma função local está em execução
-                    await asyncio.sleep(0.05)
-                    continue
-
-                if not self.multimedia_output_gemini_queue:
+                if not self.uplink_scheduler:
                     logger.debug("Fila de saída multimídia não inicializada. Aguardando...")
                     await asyncio.sleep(0.1)
                     continue
+
+                if UPLINK_METRICS_LOG_INTERVAL_S > 0 and time.monotonic() - last_metrics_log >= UPLINK_METRICS_LOG_INTERVAL_S:
+                    last_metrics_log = time.monotonic()
+                    logger.info(f"Métricas das faixas de subida: {self.uplink_scheduler.metrics()}")
+                    logger.info(f"Contadores de E/S de áudio: {self.audio_io_stats()}")
                 
                 try:
-                    # Espera por um item na fila com timeout para não bloquear indefinidamente
-                    media_data_item = await asyncio.wait_for(self.multimedia_output_gemini_queue.get(), timeout=1.0)
+                    # Espera por um item com timeout para não bloquear indefinidamente
+                    uplink_item = await asyncio.wait_for(self.uplink_scheduler.get(), timeout=1.0)
                 except asyncio.TimeoutError:
                     continue # Sem itens na fila, tenta novamente
-                except asyncio.QueueEmpty: # Redundante com TimeoutError, mas para clareza
-                    continue
                 except Exception: # Outros erros da fila
-                    logger.exception("Erro ao obter item da multimedia_output_gemini_queue.")
+                    logger.exception("Erro ao obter item do uplink_scheduler.")
                     await asyncio.sleep(0.1)
                     continue
+                if uplink_item is None: # Fila fechada
+                    break
+                media_data_item = uplink_item.payload
                 
                 if not self.gemini_session:
                     logger.warning("Sessão Gemini não ativa em send_multimedia_realtime. Descartando item.")
-                    if self.multimedia_output_gemini_queue: self.multimedia_output_gemini_queue.task_done()
                     await asyncio.sleep(0.5) # Aguarda antes de tentar processar próximo item
                     continue
                 
                 try:
-                    # Verifica se o item é um dicionário com 'data' e 'mime_type' (imagem, áudio PCM)
-                    # ou uma string (texto, embora o envio de texto principal seja por send_text_to_gemini)
-                    if isinstance(media_data_item, dict) and "data" in media_data_item and "mime_type" in media_data_item:
-                        # logger.debug(f"Enviando {media_data_item['mime_type']} para Gemini...")
-                        await self.gemini_session.send(input=media_data_item, end_of_turn=True) # end_of_turn=True para áudio/imagem
-                    elif isinstance(media_data_item, str): # Caso algum texto seja enfileirado aqui
-                        logger.info(f"Enviando texto via send_multimedia_realtime (tratando como turno completo): '{media_data_item}'")
-                        await self.gemini_session.send(input=media_data_item, end_of_turn=True)
-                    else:
-                        logger.warning(f"Tipo de mensagem desconhecido em multimedia_output_gemini_queue: {type(media_data_item)}")
-                    
-                    if self.multimedia_output_gemini_queue: self.multimedia_output_gemini_queue.task_done()
+                    await self._send_uplink_payload(uplink_item.lane, media_data_item)
 
                 except Exception as e_send: # genai_errors.LiveSessionError e outros
                     logger.error(f"Erro ao enviar dados multimídia para Gemini: {type(e_send).__name__} - {e_send}")
-                    if self.multimedia_output_gemini_queue: self.multimedia_output_gemini_queue.task_done() # Garante task_done
                     
                     error_str_upper = str(e_send).upper()
                     # Condições que indicam problemas sérios de sessão/conexão
@@ -521,83 +922,200 @@ class AudioLoop:
         finally:
             logger.info("send_multimedia_realtime finalizado.")
 
+    async def _send_uplink_payload(self, lane: str, media_data_item: Any) -> None:
+        """
+        Envia um item das faixas de subida para a sessão Gemini.
+
+        No modo de entrada em tempo real (GEMINI_REALTIME_INPUT), áudio e vídeo vão pelo
+        canal `send_realtime_input` sem fechar turno; os turnos terminam apenas com
+        texto explícito (`send_client_content`) ou com o fim de fala do VAD local
+        (`activity_end`). No modo legado, cada item é enviado com `end_of_turn=True`.
+        """
+        session = self.gemini_session
+        if isinstance(media_data_item, dict) and "activity" in media_data_item:
+            if media_data_item["activity"] == "start":
+                await session.send_realtime_input(activity_start=genai_types.ActivityStart())
+            else:
+                await session.send_realtime_input(activity_end=genai_types.ActivityEnd())
+        elif isinstance(media_data_item, dict) and "data" in media_data_item and "mime_type" in media_data_item:
+            # Item com 'data' e 'mime_type' (imagem JPEG, áudio PCM)
+            if not GEMINI_REALTIME_INPUT:
+                await session.send(input=media_data_item, end_of_turn=True) # end_of_turn=True para áudio/imagem
+            elif media_data_item["mime_type"].startswith("audio/"):
+                await session.send_realtime_input(audio=genai_types.Blob(
+                    data=media_data_item["data"], mime_type=f"audio/pcm;rate={AUDIO_SEND_SAMPLE_RATE}"))
+            else:
+                await session.send_realtime_input(video=genai_types.Blob(
+                    data=media_data_item["data"], mime_type=media_data_item["mime_type"]))
+            if media_data_item["mime_type"].startswith("audio/"):
+                self.token_budget.note_audio(len(media_data_item["data"]))
+            else:
+                self.token_budget.note_frame()
+        elif isinstance(media_data_item, str): # Texto do console ou alerta: sempre fecha o turno
+            logger.info(f"Enviando texto via send_multimedia_realtime (tratando como turno completo): '{media_data_item}'")
+            if GEMINI_REALTIME_INPUT:
+                await session.send_client_content(
+                    turns=genai_types.Content(role="user", parts=[genai_types.Part(text=media_data_item)]),
+                    turn_complete=True)
+            else:
+                await session.send(input=media_data_item, end_of_turn=True)
+            self.token_budget.note_text(media_data_item)
+        else:
+            logger.warning(f"Tipo de mensagem desconhecido na faixa '{lane}': {type(media_data_item)}")
+
+    async def _process_mic_packet(self, audio_data_chunk: bytes, captured_at: float) -> None:
+        """
+        Leva um pacote do microfone (PCM16 em AUDIO_SEND_SAMPLE_RATE) pela supressão de
+        eco, pelo portão de voz e pelo barge-in até a faixa de áudio. Usado pela captura
+        ao vivo e pelo replay de gravações.
+        """
+        if self.recorder:
+            self.recorder.record_audio("mic", audio_data_chunk, captured_at) # Cru, antes da supressão de eco
+
+        # Remove a voz do próprio assistente (e o alerta) captada pelo microfone
+        known_speech: Optional[bool] = None
+        if self.echo_suppressor:
+            echo_result = self.echo_suppressor.process(audio_data_chunk, captured_at)
+            audio_data_chunk = echo_result.pcm
+            if echo_result.echo_only:
+                known_speech = False # Pacote zerado: não é fala nem ruído da sala para o VAD
+
+        # Só trechos de fala (com pre-roll e hangover) e keep-alives seguem para o Gemini
+        if self.mic_gate:
+            gate_output = self.mic_gate.process(audio_data_chunk, speech=known_speech)
+            chunks_to_send = gate_output.chunks
+        else:
+            gate_output, chunks_to_send = None, [audio_data_chunk]
+
+        # O usuário começou a falar com o modelo ainda falando: corta o playback
+        # e ignora o resto da resposta interrompida até o servidor encerrar o turno
+        if BARGE_IN_ENABLED and gate_output and gate_output.speech_started:
+            if self._interrupt_playback("local_vad", time.monotonic()):
+                self.drop_model_audio_until_turn_end = True
+
+        if self.uplink_scheduler:
+            # A faixa de áudio nunca descarta: se estiver cheia, espera por espaço.
+            # Os marcadores de atividade seguem na mesma faixa para manter a ordem com o áudio.
+            if GEMINI_LOCAL_ACTIVITY_DETECTION and gate_output and gate_output.speech_started:
+                await self.uplink_scheduler.put(UPLINK_LANE_AUDIO, {"activity": "start"})
+            for chunk_to_send in chunks_to_send:
+                await self.uplink_scheduler.put(UPLINK_LANE_AUDIO, {"data": chunk_to_send, "mime_type": "audio/pcm"})
+            if GEMINI_LOCAL_ACTIVITY_DETECTION and gate_output and gate_output.speech_ended:
+                await self.uplink_scheduler.put(UPLINK_LANE_AUDIO, {"activity": "end"})
+
+    async def replay_session_recording(self) -> None:
+        """
+        Substitui o microfone e a câmera pelo conteúdo de uma gravação (`replay_path`),
+        no ritmo original: os pacotes do microfone passam por `_process_mic_packet` e os
+        JPEGs gravados vão direto para a faixa de vídeo.
+        """
+        try:
+            recording = await asyncio.to_thread(SessionRecording, self.replay_path)
+        except Exception:
+            logger.exception(f"Não foi possível abrir a gravação '{self.replay_path}'. Encerrando replay.")
+            self.stop_event.set()
+            return
+        mic_rate = recording.sample_rate("mic")
+        mic_resampler = create_resampler(mic_rate, AUDIO_SEND_SAMPLE_RATE, AUDIO_CHANNELS,
+                                         prefer_soxr=AUDIO_RESAMPLER_PREFER_SOXR)
+        logger.info(f"Replay da gravação {self.replay_path} ({len(recording.events)} eventos, microfone a {mic_rate} Hz).")
+        replayed = 0
+        try:
+            async for event, payload in recording.replay(kinds=("mic", "frame")):
+                if self.stop_event.is_set():
+                    break
+                if event["kind"] == "mic":
+                    await self._process_mic_packet(mic_resampler.process(payload), time.monotonic())
+                elif self.uplink_scheduler:
+                    self.uplink_scheduler.put_nowait(UPLINK_LANE_VIDEO, {"mime_type": "image/jpeg", "data": payload})
+                replayed += 1
+            logger.info(f"Replay concluído: {replayed} eventos reenviados.")
+        except asyncio.CancelledError:
+            logger.info("Tarefa replay_session_recording cancelada.")
+        except Exception:
+            logger.exception("Erro durante o replay da gravação.")
+
     async def stream_microphone_audio(self) -> None:
         """
-        Captura áudio do microfone e o envia para a fila `multimedia_output_gemini_queue`.
+        Captura áudio do microfone e o envia para a faixa de áudio do `uplink_scheduler`.
         """
         if not PYAUDIO_INSTANCE or not PYAUDIO_FORMAT:
             logger.error("PyAudio não inicializado corretamente. Tarefa stream_microphone_audio não pode iniciar.")
             return
 
         audio_stream = None
+        packetizer: Optional[PcmPacketizer] = None
         try:
             logger.info("Configurando stream de áudio de entrada (microfone)...")
             mic_info = await asyncio.to_thread(PYAUDIO_INSTANCE.get_default_input_device_info)
             logger.info(f"Usando microfone: {mic_info['name']} (Taxa: {mic_info['defaultSampleRate']} Hz, Canais: {mic_info['maxInputChannels']})")
-            
+            capture_rate = await asyncio.to_thread(
+                negotiate_stream_rate, PYAUDIO_INSTANCE, mic_info, AUDIO_SEND_SAMPLE_RATE,
+                AUDIO_CHANNELS, PYAUDIO_FORMAT, True
+            ) if AUDIO_NATIVE_RATE_NEGOTIATION else AUDIO_SEND_SAMPLE_RATE
+            # Reamostra no callback para AUDIO_SEND_SAMPLE_RATE; o resto do pipeline não vê a taxa do dispositivo
+            mic_resampler = create_resampler(capture_rate, AUDIO_SEND_SAMPLE_RATE, AUDIO_CHANNELS,
+                                             prefer_soxr=AUDIO_RESAMPLER_PREFER_SOXR)
+
+            # O PortAudio entrega o áudio por callback num anel pré-alocado; o event loop só
+            # é acordado quando há um pacote completo de MIC_PACKET_MS.
+            loop = asyncio.get_running_loop()
+            packet_ready = asyncio.Event()
+            packetizer = PcmPacketizer(
+                AUDIO_SEND_SAMPLE_RATE, MIC_PACKET_MS, channels=AUDIO_CHANNELS,
+                on_packet_ready=lambda: loop.call_soon_threadsafe(packet_ready.set)
+            )
+            self.mic_packetizer = packetizer
+            log_packetization_tradeoff(AUDIO_SEND_SAMPLE_RATE, packetizer.packet_ms)
+
+            def _on_mic_audio(in_data, frame_count, time_info, status_flags):
+                if status_flags & pyaudio.paInputOverflow:
+                    packetizer.device_overflows += 1
+                # Instante do primeiro sample no mesmo relógio do playback (monotonic + latência do ADC)
+                adc_age_s = time_info.get("current_time", 0.0) - time_info.get("input_buffer_adc_time", 0.0) if time_info else 0.0
+                if not 0.0 < adc_age_s < 1.0: # Alguns drivers não informam os tempos
+                    adc_age_s = frame_count / float(capture_rate)
+                packetizer.push(mic_resampler.process(in_data), time.monotonic() - adc_age_s)
+                return (None, pyaudio.paContinue)
+
             # Abre o stream de forma síncrona em uma thread separada
             audio_stream = await asyncio.to_thread(
                 PYAUDIO_INSTANCE.open,
                 format=PYAUDIO_FORMAT,
                 channels=AUDIO_CHANNELS,
-                rate=AUDIO_SEND_SAMPLE_RATE,
+                rate=capture_rate,
                 input=True,
                 input_device_index=mic_info["index"],
-                frames_per_buffer=AUDIO_CHUNK_SIZE
+                frames_per_buffer=max(1, round(packetizer.packet_frames * capture_rate / AUDIO_SEND_SAMPLE_RATE)),
+                stream_callback=_on_mic_audio
             )
-            logger.info("Escutando áudio do microfone...")
+            logger.info(f"Escutando áudio do microfone (pacotes de {packetizer.packet_ms:.0f} ms, "
+                        f"dispositivo a {capture_rate} Hz, reamostrador: {mic_resampler.backend})...")
 
             while not self.stop_event.is_set():
-                if self.thinking_event.is_set(): # Pausa a captura de áudio se o sistema está "pensando"
-                    await asyncio.sleep(0.05)
-                    continue
-
                 if not audio_stream or not audio_stream.is_active():
-                    logger.warning("Stream de áudio de entrada (microfone) não está ativo. Encerrando stream_microphone_audio.")
-                    self.stop_event.set() # Pode ser um problema sério com o áudio
-                    break
-                
+                    raise RuntimeError("Stream de áudio de entrada (microfone) não está ativo")
+
                 try:
-                    # Leitura do áudio é bloqueante, então roda em thread
-                    audio_data_chunk = await asyncio.to_thread(
-                        audio_stream.read, AUDIO_CHUNK_SIZE, exception_on_overflow=False
-                    )
-                    
-                    if self.multimedia_output_gemini_queue:
-                        audio_payload = {"data": audio_data_chunk, "mime_type": "audio/pcm"}
-                        try:
-                            if self.multimedia_output_gemini_queue.full():
-                                discarded = await self.multimedia_output_gemini_queue.get()
-                                self.multimedia_output_gemini_queue.task_done()
-                                # logger.debug(f"Fila de saída multimídia cheia (áudio). Chunk descartado.")
-                            self.multimedia_output_gemini_queue.put_nowait(audio_payload)
-                        except asyncio.QueueFull:
-                            # logger.warning("Fila de saída multimídia (áudio) ainda cheia. Chunk de áudio perdido.")
-                            pass # Evita log excessivo
-                        except Exception:
-                            logger.exception("Erro inesperado ao colocar chunk de áudio na multimedia_output_gemini_queue.")
-                
-                except OSError as e_os:
-                    if e_os.errno == -9988 or "Stream closed" in str(e_os) or "Input overflowed" in str(e_os).lower():
-                        logger.warning(f"Stream de áudio (microfone) fechado ou com overflow (OSError: {e_os}). Encerrando stream_microphone_audio.")
-                        self.stop_event.set() # Sinaliza problema com áudio
-                        break
-                    else: # Outro OSError
-                        logger.exception("Erro de OS não tratado ao ler do stream de áudio (microfone).")
-                        self.stop_event.set()
-                        break
-                except Exception: # Outras exceções durante a leitura
-                    logger.exception("Erro durante a leitura do áudio em stream_microphone_audio.")
-                    self.stop_event.set() 
-                    break
+                    await asyncio.wait_for(packet_ready.wait(), timeout=1.0)
+                except asyncio.TimeoutError:
+                    continue # Nenhum pacote completo; checa o stream de novo
+                packet_ready.clear()
+
+                # Erros aqui (ex.: OSError de stream fechado) sobem para o supervisor, que reabre o microfone
+                while (audio_data_chunk := packetizer.pop_packet()) is not None:
+                    await self._process_mic_packet(audio_data_chunk, packetizer.last_packet_captured_at)
         
         except asyncio.CancelledError:
             logger.info("Tarefa stream_microphone_audio cancelada.")
-        except Exception: # Erros na configuração do stream, etc.
-            logger.exception("Erro crítico em stream_microphone_audio (ex: configuração do stream). Sinalizando parada.")
-            self.stop_event.set()
+        except Exception: # Erros na configuração do stream, na leitura, etc.
+            logger.exception("Erro em stream_microphone_audio. O supervisor do pipeline decide se reabre o microfone.")
+            raise
         finally:
             logger.info("Finalizando stream_microphone_audio...")
+            if packetizer:
+                logger.info(f"Estatísticas do empacotador do microfone: {packetizer.stats()}")
+            self.mic_packetizer = None
             if audio_stream:
                 try:
                     if audio_stream.is_active():
@@ -636,28 +1154,70 @@ class AudioLoop:
 
                     async for response_part in self.gemini_session.receive():
                         if self.stop_event.is_set(): break # Verifica antes de processar
+                        self._last_server_message_at = time.monotonic()
+
+                        # Parte 0: Ciclo de vida da sessão (retomada e aviso de encerramento)
+                        resumption_update = getattr(response_part, "session_resumption_update", None)
+                        if resumption_update is not None and self.session_store:
+                            self.session_store.update(resumption_update)
+                        go_away = getattr(response_part, "go_away", None)
+                        if go_away is not None:
+                            time_left_s = duration_to_s(getattr(go_away, "time_left", None))
+                            logger.warning(f"Servidor vai encerrar a sessão (go_away, tempo restante: {time_left_s} s). Trocando de sessão no próximo momento quieto.")
+                            self.rollover_timer.on_go_away(time_left_s)
+                        usage_metadata = getattr(response_part, "usage_metadata", None)
+                        if usage_metadata is not None:
+                            self.token_budget.on_usage(usage_metadata) # Tamanho real do contexto, por modalidade
+                            self._apply_token_budget()
+
+                        # Sinais de interrupção e fim de turno do servidor
+                        server_content = getattr(response_part, "server_content", None)
+                        if server_content is not None:
+                            if getattr(server_content, "interrupted", False):
+                                self._interrupt_playback("server", time.monotonic())
+                                self.drop_model_audio_until_turn_end = False # O próximo áudio já é a nova resposta
+                            elif getattr(server_content, "turn_complete", False):
+                                self.drop_model_audio_until_turn_end = False
+                                if self.playback_buffer:
+                                    self.playback_buffer.mark_end_of_turn() # A cauda pode tocar sem esperar mais áudio
+                                    self.playback_ready.set()
 
                         # Parte 1: Lidar com áudio para playback
-                        if response_part.data and self.audio_input_gemini_queue: # Áudio PCM do Gemini
-                            try:
-                                self.audio_input_gemini_queue.put_nowait(response_part.data)
-                            except asyncio.QueueFull:
-                                logger.warning("Fila de áudio de entrada (do Gemini para playback) cheia. Áudio descartado.")
+                        if response_part.data and self.drop_model_audio_until_turn_end:
+                            self.model_audio_chunks_dropped += 1 # Resto da resposta interrompida pelo usuário
+                        elif response_part.data and self.playback_buffer: # Áudio PCM do Gemini
+                            self.playback_buffer.push(response_part.data) # Limitado em ms; descarta o mais antigo se cheio
+                            if self._first_audio_pending_since is not None:
+                                self._record_first_audio_after_switch()
+                            if self.recorder:
+                                self.recorder.record_audio("model", response_part.data)
+                            self.playback_ready.set()
                             # Áudio não impede o processamento de texto ou function calls no mesmo turno.
 
                         # Parte 2: Lidar com Function Calls
+                        # Cada chamada vira uma tarefa do `tool_executor`: o recebimento segue (áudio,
+                        # interrupções, cancelamentos) enquanto a ferramenta roda, e a FunctionResponse
+                        # é enviada quando ela termina.
+                        function_calls = list(getattr(getattr(response_part, "tool_call", None), "function_calls", None) or [])
                         if getattr(response_part, "function_call", None):
+                            function_calls.append(response_part.function_call)
+                        for fc in function_calls:
                             current_turn_has_function_call = True
-                            fc = response_part.function_call
                             function_name = fc.name
-                            args_dict = {key: val for key, val in fc.args.items()} # Converte para dict Python
-                            logger.info(f"\n[Gemini Function Call] Recebido: '{function_name}', Args: {args_dict}")
-
-                            await self._execute_function_call(function_name, args_dict)
-                            # Após executar uma function call e enviar a FunctionResponse,
-                            # o Gemini geralmente envia uma nova resposta (texto/áudio) baseada no resultado.
-                            # Portanto, continuamos no loop de `receive()` para pegar essa resposta.
-                            # O `thinking_event` é limpo dentro de `_execute_function_call`.
+                            args_dict = {key: val for key, val in (fc.args or {}).items()} # Converte para dict Python
+                            call_id = getattr(fc, "id", None)
+                            logger.info(f"\n[Gemini Function Call] Recebido: '{function_name}' (id {call_id}), Args: {args_dict}")
+                            if self.recorder:
+                                self.recorder.record_event("tool_call", {"name": function_name, "id": call_id, "args": args_dict})
+                            self.tool_executor.submit(function_name, args_dict, call_id)
+                        tool_call_cancellation = getattr(response_part, "tool_call_cancellation", None)
+                        if tool_call_cancellation is not None:
+                            cancelled_ids = list(getattr(tool_call_cancellation, "ids", None) or [])
+                            cancelled = self.tool_executor.cancel(cancelled_ids)
+                            logger.info(f"Servidor cancelou as chamadas {cancelled_ids} ({cancelled} ainda em andamento).")
+                            if self.recorder:
+                                self.recorder.record_event("tool_call_cancellation", {"ids": cancelled_ids})
+                        if function_calls:
                             # Limpa texto acumulado, pois a FC inicia um novo "sub-turno".
                             if current_turn_text_parts:
                                 accumulated_text_so_far = "".join(current_turn_text_parts).strip()
@@ -669,6 +1229,8 @@ class AudioLoop:
                         # Parte 3: Lidar com texto
                         if response_part.text:
                             current_turn_text_parts.append(response_part.text)
+                            if self.recorder:
+                                self.recorder.record_event("model_text", {"text": response_part.text})
                             # Imprime o texto incrementalmente
                             print(response_part.text, end="", flush=True) 
                         
@@ -694,15 +1256,17 @@ class AudioLoop:
 
 
                 except genai_errors.LiveSessionClosedError:
-                    logger.warning("Sessão Gemini fechada (LiveSessionClosedError) enquanto recebia. Tentando reconectar via loop principal.")
-                    # Não seta stop_event, deixa o `run` tratar.
-                    await asyncio.sleep(1) # Pausa antes que o `run` loop tente reconectar
-                    break # Sai do loop interno de `receive` para permitir que `run` reconecte
+                    logger.warning("Sessão Gemini fechada (LiveSessionClosedError) enquanto recebia. Trocando de sessão.")
+                    # Encerra o TaskGroup; o `run` reconecta na hora, retomando o contexto se possível
+                    raise SessionEnded("closed")
                 except genai_errors.DeadlineExceededError:
                     logger.warning("Timeout (DeadlineExceededError) ao receber da sessão Gemini. Pode ser problema de rede ou do servidor.")
                     await asyncio.sleep(1) # Pausa antes de tentar continuar ou reconectar
                     # Não quebra o loop aqui, pode ser temporário. Se persistir, o `run` deve pegar.
-                except Exception: # Outros erros durante o processamento da resposta
+                except Exception as e_receive: # Outros erros durante o processamento da resposta
+                    if is_connection_lost(e_receive) and not self.stop_event.is_set():
+                        logger.warning(f"Conexão com o Gemini perdida ({type(e_receive).__name__}: {e_receive}). Trocando de sessão.")
+                        raise SessionEnded("connection_lost")
                     logger.exception("Erro durante o recebimento ou processamento de resposta do Gemini.")
                     # error_str_upper = str(e_inner_loop).upper()
                     # if any(err_key in error_str_upper for err_key in ["LIVESESSION", "DEADLINE", "RST_STREAM", "UNAVAILABLE"]):
@@ -719,108 +1283,106 @@ class AudioLoop:
 
         except asyncio.CancelledError:
             logger.info("Tarefa _process_gemini_responses cancelada.")
+        except SessionEnded:
+            raise
         except Exception: # Erro crítico na configuração da tarefa ou loop externo
             logger.exception("Erro crítico em _process_gemini_responses. Sinalizando parada.")
             self.stop_event.set()
         finally:
             logger.info("_process_gemini_responses finalizado.")
-            self.awaiting_name_for_save_face = False # Garante que a flag é resetada
-            self.pending_function_call_name = None
-            if self.thinking_event.is_set():
-                self.thinking_event.clear() # Garante que o evento de "pensando" é limpo
+            # O nome pendente do salvar rosto e as ferramentas em andamento sobrevivem à troca de sessão;
+            # o `run` os descarta se a sessão nova não for retomada
 
 
     # --- Playback de Áudio do Gemini ---
     async def play_audio_from_gemini(self) -> None:
         """
-        Consome chunks de áudio da fila `audio_input_gemini_queue` (enviados pelo Gemini)
-        e os reproduz usando PyAudio.
+        Retira blocos do tamanho do dispositivo do `playback_buffer` (áudio do Gemini) e
+        os entrega ao `CallbackPlayer`, que os reproduz em modo callback do PyAudio.
         """
         if not PYAUDIO_INSTANCE or not PYAUDIO_FORMAT:
             logger.error("PyAudio não inicializado corretamente. Tarefa play_audio_from_gemini não pode iniciar.")
             return
 
         audio_output_stream = None
+        player: Optional[CallbackPlayer] = None
         try:
             logger.info("Configurando stream de áudio de saída (playback)...")
-            # Tenta obter informações do dispositivo de saída padrão para logging
+            # Tenta obter informações do dispositivo de saída padrão para logging e negociação da taxa
+            out_device_info = None
             try:
                 out_device_info = await asyncio.to_thread(PYAUDIO_INSTANCE.get_default_output_device_info)
                 logger.info(f"Usando dispositivo de saída de áudio: {out_device_info['name']} @ {out_device_info['defaultSampleRate']} Hz (esperado: {AUDIO_RECEIVE_SAMPLE_RATE} Hz)")
             except Exception:
                 logger.warning(f"Não foi possível obter informações do dispositivo de saída padrão. Usando taxa padrão: {AUDIO_RECEIVE_SAMPLE_RATE} Hz.")
-
+            playback_rate = await asyncio.to_thread(
+                negotiate_stream_rate, PYAUDIO_INSTANCE, out_device_info, AUDIO_RECEIVE_SAMPLE_RATE,
+                AUDIO_CHANNELS, PYAUDIO_FORMAT, False
+            ) if AUDIO_NATIVE_RATE_NEGOTIATION else AUDIO_RECEIVE_SAMPLE_RATE
+            playback_resampler = create_resampler(AUDIO_RECEIVE_SAMPLE_RATE, playback_rate, AUDIO_CHANNELS,
+                                                  prefer_soxr=AUDIO_RESAMPLER_PREFER_SOXR)
+            if self.danger_chime and self.danger_chime.sample_rate != playback_rate:
+                self.danger_chime = self._load_danger_chime(playback_rate) # O alerta é misturado na taxa do dispositivo
+            if self.echo_suppressor:
+                self.echo_suppressor.reference_rate = playback_rate # A referência é o que o dispositivo toca
+
+            # O dispositivo puxa blocos de ~AUDIO_CHUNK_SIZE de um anel pré-alocado; o som de
+            # perigo é misturado no próprio callback, sem esperar pelo áudio do modelo.
+            device_frames = max(1, round(AUDIO_CHUNK_SIZE * playback_rate / AUDIO_RECEIVE_SAMPLE_RATE))
+            player = CallbackPlayer(
+                playback_rate, device_frames, channels=AUDIO_CHANNELS,
+                ring_ms=PLAYBACK_RING_MS, mixer=self.danger_chime,
+                reference_tap=self.echo_suppressor.add_reference if self.echo_suppressor else None
+            )
+            self.audio_player = player
             audio_output_stream = await asyncio.to_thread(
                 PYAUDIO_INSTANCE.open,
                 format=PYAUDIO_FORMAT,
                 channels=AUDIO_CHANNELS,
-                rate=AUDIO_RECEIVE_SAMPLE_RATE, # Taxa que o Gemini envia
-                output=True
+                rate=playback_rate, # Taxa negociada (o Gemini envia AUDIO_RECEIVE_SAMPLE_RATE)
+                output=True,
+                frames_per_buffer=device_frames,
+                stream_callback=player.callback
             )
-            logger.info("Player de áudio (para respostas Gemini) pronto.")
+            logger.info(f"Player de áudio (para respostas Gemini) pronto (anel de {PLAYBACK_RING_MS:.0f} ms, "
+                        f"dispositivo a {playback_rate} Hz, reamostrador: {playback_resampler.backend}).")
 
             while not self.stop_event.is_set():
-                if not self.audio_input_gemini_queue:
-                    logger.debug("Fila de áudio de entrada (Gemini) não inicializada. Aguardando...")
+                playback_buffer = self.playback_buffer
+                if not playback_buffer:
+                    logger.debug("Buffer de playback (Gemini) não inicializado. Aguardando...")
                     await asyncio.sleep(0.1)
                     continue
                 
                 try:
-                    # Interrompe o áudio atual se houver nova entrada de texto do usuário (experimental)
-                    # Isso pode ser complexo de acertar (ex: se o usuário está respondendo ao Gemini)
-                    # if self.multimedia_output_gemini_queue and not self.multimedia_output_gemini_queue.empty() and \
-                    #    audio_output_stream and audio_output_stream.is_active():
-                    #     logger.info("Nova entrada de usuário detectada, interrompendo áudio do Gemini.")
-                    #     audio_output_stream.stop_stream()
-                    #     # Limpa a fila de áudio pendente do Gemini
-                    #     while not self.audio_input_gemini_queue.empty():
-                    #         self.audio_input_gemini_queue.get_nowait()
-                    #         self.audio_input_gemini_queue.task_done()
-                    #     await asyncio.sleep(0.05) # Pequena pausa
-                    #     if not audio_output_stream.is_active():
-                    #         audio_output_stream.start_stream() # Reinicia para o próximo áudio
-
-                    audio_chunk_to_play = await asyncio.wait_for(self.audio_input_gemini_queue.get(), timeout=0.5)
-                    
-                    if audio_chunk_to_play is None: # Sinal de encerramento da fila (enviado no cleanup)
-                        logger.info("Recebido sinal de encerramento (None) para play_audio_from_gemini.")
-                        break 
+                    # Acorda com áudio novo ou a cada bloco, para os prazos do prebuffer e da cauda
+                    try:
+                        await asyncio.wait_for(self.playback_ready.wait(), timeout=player.block_s)
+                    except asyncio.TimeoutError:
+                        pass
+                    self.playback_ready.clear()
 
-                    if audio_output_stream and audio_output_stream.is_active():
-                        await asyncio.to_thread(audio_output_stream.write, audio_chunk_to_play)
-                    else:
-                        logger.warning("Stream de áudio para playback (Gemini) não está ativo. Descartando chunk de áudio.")
-                    
-                    if self.audio_input_gemini_queue: self.audio_input_gemini_queue.task_done()
+                    while audio_output_stream.is_active() and not self.stop_event.is_set() and (block := playback_buffer.pop_block()) is not None:
+                        await player.write(playback_resampler.process(block), self.stop_event)
 
-                except asyncio.TimeoutError:
-                    continue # Sem áudio na fila, tenta novamente
-                except asyncio.QueueEmpty: # Redundante
-                    continue
-                except OSError as e_os_play:
-                    if "Stream closed" in str(e_os_play): # Checagem mais robusta
-                        logger.warning(f"Stream de playback (Gemini) fechado (OSError: {e_os_play}). Encerrando play_audio_from_gemini.")
-                        break 
-                    else:
-                        logger.exception("Erro de OS não tratado ao reproduzir áudio do Gemini.")
-                        break # Erro sério, encerra a tarefa
                 except Exception: # Outros erros
                     logger.exception("Erro ao reproduzir áudio do Gemini (interno).")
-                    # Se o stream fechar por outro motivo, pode ser pego aqui
-                    if "Stream closed" in str(sys.exc_info()[1]): 
-                        logger.warning("Stream de playback (Gemini) fechado (Exception). Encerrando play_audio_from_gemini.")
-                        break
-                    # Não quebra por erros genéricos, a menos que sejam repetitivos ou fatais.
                     await asyncio.sleep(0.1)
+                if not audio_output_stream.is_active():
+                    raise RuntimeError("Stream de áudio para playback (Gemini) não está ativo")
 
 
         except asyncio.CancelledError:
             logger.info("Tarefa play_audio_from_gemini cancelada.")
         except Exception: # Erros na configuração do stream, etc.
-            logger.exception("Erro crítico em play_audio_from_gemini (ex: configuração do stream).")
-            # Não seta stop_event aqui, pois o áudio pode não ser crítico para o resto.
+            logger.exception("Erro em play_audio_from_gemini. O supervisor do pipeline decide se reabre a saída de áudio.")
+            raise
         finally:
             logger.info("Finalizando play_audio_from_gemini...")
+            if player:
+                logger.info(f"Estatísticas do player de áudio (callback): {player.stats()}")
+            if self.playback_buffer:
+                logger.info(f"Estatísticas do buffer de jitter do playback: {self.playback_buffer.stats()}")
             if audio_output_stream:
                 try:
                     if audio_output_stream.is_active():
@@ -829,40 +1391,188 @@ class AudioLoop:
                     logger.info("Stream de áudio de saída (playback Gemini) fechado.")
                 except Exception:
                     logger.exception("Erro ao fechar stream de áudio de saída (playback Gemini).")
+            self.audio_player = None
             logger.info("play_audio_from_gemini concluído.")
 
 
+    # --- Ciclo de Vida da Sessão (retomada, troca proativa) ---
+    def _conversation_is_quiet(self) -> bool:
+        """Nenhuma fala, playback, ferramenta ou mensagem do servidor em andamento: bom momento para trocar de sessão."""
+        if self.thinking_event.is_set():
+            return False
+        if self.audio_player and self.audio_player.is_playing:
+            return False
+        if self.playback_buffer and not self.playback_buffer.is_empty:
+            return False
+        if self.mic_gate and self.mic_gate.in_speech:
+            return False
+        return time.monotonic() - self._last_server_message_at > 1.0
+
+    async def _session_watchdog(self) -> None:
+        """Levanta `SessionEnded` quando a sessão deve ser trocada (idade máxima ou go_away)."""
+        while not self.stop_event.is_set():
+            await asyncio.sleep(0.25)
+            reason = self.rollover_timer.due(self._conversation_is_quiet())
+            if reason:
+                logger.info(f"Troca proativa de sessão ({reason}).")
+                raise SessionEnded(reason)
+        raise SessionEnded("stop") # Não espera a próxima mensagem do servidor para encerrar o recebimento
+
+    def _on_session_opened(self, resumed: bool) -> None:
+        """Reinicia o relógio da troca proativa e mede o tempo sem conexão da troca anterior."""
+        self.rollover_timer.start()
+        self._last_server_message_at = time.monotonic()
+        if self._outage_started_at is None:
+            return
+        outage_ms = (time.monotonic() - self._outage_started_at) * 1000.0
+        self.session_switches.append({
+            "reason": self._outage_reason, "resumed": resumed,
+            "outage_ms": round(outage_ms, 1), "first_audio_ms": None
+        })
+        logger.info(f"Sessão {'retomada' if resumed else 'nova (contexto perdido)'} após {self._outage_reason}: "
+                    f"{outage_ms:.0f} ms sem conexão.")
+        self._first_audio_pending_since = self._outage_started_at
+        self._outage_started_at = None
+
+    def _record_first_audio_after_switch(self) -> None:
+        first_audio_ms = (time.monotonic() - self._first_audio_pending_since) * 1000.0
+        self._first_audio_pending_since = None
+        if self.session_switches:
+            self.session_switches[-1]["first_audio_ms"] = round(first_audio_ms, 1)
+        logger.info(f"Primeiro áudio do modelo {first_audio_ms:.0f} ms após a queda da sessão anterior.")
+
+    def _mark_session_lost(self, reason: str) -> None:
+        if self._outage_started_at is None:
+            self._outage_started_at = time.monotonic()
+            self._outage_reason = reason
+
+    async def _flush_unsent_tool_responses(self) -> None:
+        """Reenvia na sessão retomada as respostas de ferramenta que falharam com a conexão caída."""
+        while self.unsent_tool_responses and self.gemini_session:
+            function_name, result, call_id = self.unsent_tool_responses[0]
+            try:
+                await self._send_function_response(function_name, result, call_id)
+            except Exception:
+                logger.exception(f"Erro ao reenviar FunctionResponse pendente para '{function_name}'.")
+                return
+            self.unsent_tool_responses.pop(0)
+            self.token_budget.note_tool_result(result)
+            logger.info(f"FunctionResponse pendente para '{function_name}' reenviado após a troca de sessão.")
+
     # --- Loop Principal de Execução e Gerenciamento de Sessão ---
+    def _live_connect_config(self) -> Any:
+        """Config do `live.connect`: GEMINI_LIVE_CONNECT_CONFIG com o handle de retomada atual."""
+        return self.session_store.connect_config(GEMINI_LIVE_CONNECT_CONFIG) if self.session_store else GEMINI_LIVE_CONNECT_CONFIG
+
+    def _build_pipeline(self) -> PipelineSupervisor:
+        """
+        Tarefas que vivem enquanto o app roda, independentes da sessão Gemini: entrada
+        de texto, captura (microfone, câmera/tela ou replay), inferência e playback.
+        Trocas de sessão não reabrem dispositivos nem recarregam modelos; uma falha de
+        dispositivo reinicia só a tarefa dele, segundo a `RestartPolicy`.
+        """
+        device_policy = RestartPolicy(
+            max_restarts=PIPELINE_RESTART_MAX, window_s=PIPELINE_RESTART_WINDOW_S,
+            backoff_s=PIPELINE_RESTART_BACKOFF_S, backoff_max_s=PIPELINE_RESTART_BACKOFF_MAX_S
+        )
+        # Sem microfone ou sem saída de áudio o assistente não funciona: ao desistir, encerra o app
+        essential_policy = replace(device_policy, critical=True)
+        pipeline = PipelineSupervisor(self.stop_event)
+
+        # Entrada de texto do console ('q' encerra o app por conta própria)
+        pipeline.add("send_text_to_gemini", self.send_text_to_gemini, NEVER_RESTART)
+
+        # Captura de áudio do microfone (se PyAudio disponível)
+        if self.replay_path:
+            # Microfone e câmera vêm da gravação
+            pipeline.add("replay_session_recording", self.replay_session_recording, NEVER_RESTART)
+        elif PYAUDIO_INSTANCE:
+            pipeline.add("stream_microphone_audio", self.stream_microphone_audio, essential_policy)
+        else:
+            logger.warning("PyAudio não disponível. Captura de áudio do microfone desabilitada.")
+
+        # Captura de vídeo/tela baseada no modo (no replay, os frames vêm da gravação)
+        if self.video_mode == "camera" and not self.replay_path:
+            pipeline.add("stream_camera_frames", self.stream_camera_frames, device_policy)
+        elif self.video_mode == "screen" and not self.replay_path:
+            pipeline.add("stream_screen_frames", self.stream_screen_frames, device_policy)
+
+        # Reprodução do áudio recebido do Gemini (se PyAudio disponível)
+        if PYAUDIO_INSTANCE:
+            pipeline.add("play_audio_from_gemini", self.play_audio_from_gemini, essential_policy)
+        return pipeline
+
     async def run(self) -> None:
         """
-        O loop principal que gerencia a conexão com o Gemini, inicializa
-        e supervisiona todas as tarefas assíncronas (captura, envio, recebimento, playback).
+        O loop principal: inicia o pipeline supervisionado (captura, inferência, playback),
+        que vive durante toda a execução, e gerencia as sessões Gemini por baixo dele
+        (`_run_sessions`).
         """
         logger.info("Iniciando AudioLoopRefactored.run()...")
+        if self.recorder:
+            try:
+                await asyncio.to_thread(self.recorder.start)
+            except OSError:
+                logger.exception("Não foi possível criar o diretório de gravação. Sessão não será gravada.")
+                self.recorder = None
+        # As filas existem antes da primeira sessão: a captura já pode enfileirar enquanto conecta
+        self.playback_buffer = self._new_playback_buffer()
+        self.uplink_scheduler = self._new_uplink_scheduler()
+
+        self.pipeline = self._build_pipeline()
+        self.pipeline.start()
+        try:
+            await self._run_sessions()
+        except asyncio.CancelledError:
+            logger.info("Loop principal (run) cancelado. Encerrando.")
+        finally:
+            self.stop_event.set()
+            self.playback_ready.set() # Acorda o loop de playback para que ele veja o stop_event
+            if self.uplink_scheduler:
+                self.uplink_scheduler.close() # Libera produtores que esperavam por espaço
+            await self.pipeline.stop(timeout_s=3.0)
+            await self._cleanup_resources()
+        logger.info("AudioLoopRefactored.run() concluído e todos os recursos limpos.")
+
+    async def _run_sessions(self) -> None:
+        """
+        Conecta ao Gemini e roda as bordas ligadas à sessão (envio das faixas de subida,
+        recebimento, troca proativa). Quando a sessão termina, troca para a próxima —
+        a reserva já conectada do `connection_manager`, se houver — sem tocar na captura.
+        """
         max_connection_retries = 3
         retry_delay_base_seconds = 2.0
         connection_attempt = 0
 
         while connection_attempt <= max_connection_retries and not self.stop_event.is_set():
+            resume_handle: Optional[str] = None
+            session_opened = False
+            opened_at = time.monotonic()
             try:
                 if connection_attempt > 0: # Se é uma tentativa de reconexão
                     retry_delay = retry_delay_base_seconds * (2 ** (connection_attempt -1)) # Backoff exponencial
                     logger.info(f"Tentativa de reconexão {connection_attempt}/{max_connection_retries} à sessão Gemini após {retry_delay:.1f}s...")
                     await asyncio.sleep(retry_delay)
                 
-                # Limpa estado da sessão anterior antes de tentar uma nova
-                if self.gemini_session:
-                    try: await self.gemini_session.close()
-                    except Exception: pass
                 self.gemini_session = None
-                self.audio_input_gemini_queue = None # Áudio do Gemini para playback
-                self.multimedia_output_gemini_queue = None # Áudio/Vídeo do usuário para Gemini
-                self.awaiting_name_for_save_face = False
-                self.pending_function_call_name = None
-                if self.thinking_event.is_set(): self.thinking_event.clear()
+                resume_handle = self.session_store.handle if self.session_store else None
+                if not resume_handle:
+                    # Sessão nova: o contexto do servidor se perdeu, então o estado local da conversa também
+                    if self.playback_buffer:
+                        self.playback_buffer.clear()
+                    if self.uplink_scheduler:
+                        self.uplink_scheduler.clear()
+                    self.awaiting_name_for_save_face = False
+                    self.pending_function_call_name = None
+                    self.pending_function_call_id = None
+                    self.unsent_tool_responses.clear()
+                    self.tool_executor.cancel_all() # Os ids das chamadas não valem na sessão nova
+                    self.token_budget.reset_context()
+                # Na retomada, o áudio pendente nas filas, o nome aguardado e as ferramentas em andamento seguem para a sessão retomada
+                self.drop_model_audio_until_turn_end = False
 
                 # Verifica se os componentes essenciais do Gemini estão disponíveis
-                if not GEMINI_CLIENT:
+                if not self.live_client:
                     logger.critical("Cliente Gemini (GEMINI_CLIENT) não inicializado. Não é possível conectar. Encerrando.")
                     self.stop_event.set()
                     break
@@ -871,79 +1581,70 @@ class AudioLoop:
                     self.stop_event.set()
                     break
                 
-                logger.info(f"Tentando conectar ao Gemini (Modelo: {GEMINI_MODEL_NAME}, Tentativa {connection_attempt + 1})...")
-
-                async with GEMINI_CLIENT.aio.live.connect(
-                    model=GEMINI_MODEL_NAME, 
-                    config=GEMINI_LIVE_CONNECT_CONFIG
-                ) as session:
+                logger.info(f"Tentando conectar ao Gemini (Modelo: {GEMINI_MODEL_NAME}, Tentativa {connection_attempt + 1}, "
+                            f"{'retomando sessão anterior' if resume_handle else 'sessão nova'})...")
+                session = await self.connection_manager.activate(self._outage_reason)
+                try:
                     self.gemini_session = session
+                    session_opened = True
+                    opened_at = time.monotonic()
                     session_id_str = 'N/A'
                     if hasattr(session, 'session_id'): session_id_str = session.session_id
                     elif hasattr(session, '_session_id'): session_id_str = session._session_id # type: ignore
                     logger.info(f"Sessão Gemini LiveConnect estabelecida (ID: {session_id_str}). Tentativa {connection_attempt + 1} bem-sucedida.")
                     connection_attempt = 0 # Reseta contador de tentativas após sucesso
+                    self._on_session_opened(resumed=resume_handle is not None)
 
-                    # Inicializa as filas de comunicação para esta sessão
-                    self.audio_input_gemini_queue = asyncio.Queue() # Para áudio do Gemini para playback
-                    self.multimedia_output_gemini_queue = asyncio.Queue(maxsize=150) # Para áudio/vídeo do usuário para Gemini
-
-                    # Grupo de tarefas para gerenciar todas as corrotinas da sessão
+                    # Só as bordas de envio e recebimento pertencem à sessão
                     async with asyncio.TaskGroup() as tg:
-                        logger.info("Iniciando tarefas da sessão Gemini...")
-                        
-                        # Tarefa para enviar texto do console para Gemini
-                        tg.create_task(self.send_text_to_gemini(), name="send_text_to_gemini_task")
-                        
                         # Tarefa para enviar dados multimídia (áudio do mic, vídeo/tela) para Gemini
                         tg.create_task(self.send_multimedia_realtime(), name="send_multimedia_realtime_task")
-                        
-                        # Tarefa para capturar áudio do microfone (se PyAudio disponível)
-                        if PYAUDIO_INSTANCE:
-                            tg.create_task(self.stream_microphone_audio(), name="stream_microphone_audio_task")
-                        else:
-                            logger.warning("PyAudio não disponível. Captura de áudio do microfone desabilitada.")
 
-                        # Tarefas de captura de vídeo/tela baseadas no modo
-                        if self.video_mode == "camera":
-                            tg.create_task(self.stream_camera_frames(), name="stream_camera_frames_task")
-                        elif self.video_mode == "screen":
-                            tg.create_task(self.stream_screen_frames(), name="stream_screen_frames_task")
-                        
                         # Tarefa para processar respostas do Gemini (texto, áudio para playback, function calls)
                         tg.create_task(self._process_gemini_responses(), name="process_gemini_responses_task")
-                        
-                        # Tarefa para reproduzir áudio recebido do Gemini (se PyAudio disponível)
-                        if PYAUDIO_INSTANCE:
-                            tg.create_task(self.play_audio_from_gemini(), name="play_audio_from_gemini_task")
-                        
-                        logger.info("Todas as tarefas da sessão Gemini foram iniciadas. Aguardando conclusão ou sinal de parada...")
-                    
-                    # Se o TaskGroup finalizar sem self.stop_event.is_set(),
-                    # pode indicar que a sessão Gemini terminou ou uma tarefa crítica falhou.
-                    logger.info("TaskGroup da sessão Gemini finalizado.")
-                    if not self.stop_event.is_set():
-                        logger.warning("Sessão Gemini ou uma de suas tarefas principais terminou inesperadamente. Tentando reconectar...")
-                        connection_attempt += 1 
-                    else: # stop_event foi setado, encerra o loop de conexão
-                        logger.info("Sinal de parada detectado após TaskGroup. Encerrando loop de conexão.")
-                        break 
+
+                        # Troca proativa de sessão (idade máxima / go_away) e respostas de ferramenta pendentes
+                        tg.create_task(self._session_watchdog(), name="session_watchdog_task")
+                        if resume_handle and self.unsent_tool_responses:
+                            tg.create_task(self._flush_unsent_tool_responses(), name="flush_unsent_tool_responses_task")
+                finally:
+                    self.gemini_session = None
+                    await self.connection_manager.release_active()
+
+                # Se o TaskGroup finalizar sem self.stop_event.is_set(),
+                # pode indicar que a sessão Gemini terminou ou uma tarefa crítica falhou.
+                logger.info("TaskGroup da sessão Gemini finalizado.")
+                if not self.stop_event.is_set():
+                    logger.warning("Sessão Gemini ou uma de suas tarefas principais terminou inesperadamente. Tentando reconectar...")
+                    self._mark_session_lost("task_exit")
+                    connection_attempt += 1 
+                else: # stop_event foi setado, encerra o loop de conexão
+                    logger.info("Sinal de parada detectado após TaskGroup. Encerrando loop de conexão.")
+                    break 
             
             except asyncio.CancelledError:
-                logger.info("Loop principal (run) cancelado. Encerrando.")
+                logger.info("Loop de sessões cancelado. Encerrando.")
                 self.stop_event.set() # Garante que todas as outras partes saibam
-                break
+                raise
             except ExceptionGroup as eg: # Erros originados dentro do TaskGroup
+                session_ended, eg = eg.split(SessionEnded)
+                if session_ended is not None and not self.stop_event.is_set():
+                    self._mark_session_lost(session_ended.exceptions[0].reason)
+                if eg is None:
+                    # Troca de sessão pedida (go_away, troca proativa, conexão caída): reconecta já, sem backoff,
+                    # a menos que a conexão esteja caindo logo após abrir
+                    if session_ended.exceptions[0].reason in ("connection_lost", "closed") and time.monotonic() - opened_at < 5.0:
+                        connection_attempt += 1
+                    continue
+                self._mark_session_lost("error")
                 logger.error(f"Erro(s) no TaskGroup da sessão Gemini (Tentativa {connection_attempt + 1}):")
                 for i, exc in enumerate(eg.exceptions):
                     logger.error(f"  Erro {i+1} no TaskGroup: {type(exc).__name__} - {exc}")
                     # traceback.print_exception(type(exc), exc, exc.__traceback__) # Log mais detalhado se necessário
                 # self.stop_event.set() # Não necessariamente, pode ser um erro recuperável pela reconexão
                 connection_attempt += 1
-                self.gemini_session = None # Garante que a sessão é considerada perdida
             except (genai_errors.LiveSessionError, genai_errors.GoogleAPIError, Exception) as e_conn: # Erros de conexão ou outros
-                logger.error(f"Erro ao conectar ou erro inesperado no loop run (Tentativa {connection_attempt + 1}): {type(e_conn).__name__} - {e_conn}")
-                # traceback.print_exc() # O logger.error acima já deve capturar isso se for exception
+                logger.error(f"Erro ao conectar ou erro inesperado no loop de sessões (Tentativa {connection_attempt + 1}): {type(e_conn).__name__} - {e_conn}")
                 
                 # Verifica se o erro é fatal ou se vale a pena tentar reconectar
                 error_str_upper = str(e_conn).upper()
@@ -955,10 +1656,12 @@ class AudioLoop:
                     self.stop_event.set()
                     break # Não tenta reconectar em erros de autenticação/configuração
 
+                if resume_handle and not session_opened and self.session_store:
+                    self.session_store.invalidate(f"conexão com o handle falhou ({type(e_conn).__name__})") # Próxima tentativa: sessão nova
+                self._mark_session_lost("connection_error")
                 connection_attempt += 1
-                self.gemini_session = None # Garante que a sessão é considerada perdida
                 if connection_attempt > max_connection_retries:
-                    logger.error("Máximo de tentativas de reconexão ({max_connection_retries}) atingido após erro. Encerrando.")
+                    logger.error(f"Máximo de tentativas de reconexão ({max_connection_retries}) atingido após erro. Encerrando.")
                     self.stop_event.set()
                     break
         
@@ -967,32 +1670,52 @@ class AudioLoop:
             logger.critical("Não foi possível estabelecer ou manter a conexão com Gemini após múltiplas tentativas. Encerrando.")
             self.stop_event.set()
 
-        await self._cleanup_resources()
-        logger.info("AudioLoopRefactored.run() concluído e todos os recursos limpos.")
-
     async def _cleanup_resources(self) -> None:
         """Realiza a limpeza final de todos os recursos."""
         logger.info("Iniciando limpeza final de recursos em AudioLoopRefactored...")
         self.stop_event.set() # Garante que todas as tarefas sejam sinalizadas para parar
+        await self.tool_executor.close() # Cancela as ferramentas em andamento antes de fechar a sessão
 
-        if self.gemini_session:
-            try:
-                logger.info("Fechando sessão Gemini LiveConnect ativa...")
-                await self.gemini_session.close()
-                logger.info("Sessão Gemini LiveConnect fechada.")
-            except Exception:
-                logger.exception("Erro ao fechar sessão Gemini LiveConnect na limpeza final.")
-            finally:
-                self.gemini_session = None
-
-        # Sinaliza para a fila de playback de áudio que não haverá mais itens
-        if self.audio_input_gemini_queue:
-            try:
-                self.audio_input_gemini_queue.put_nowait(None) # Envia None como sentinela
-            except asyncio.QueueFull:
-                logger.warning("Fila de áudio de entrada (Gemini playback) cheia. Não foi possível enviar sentinela de parada.")
-            except Exception: # Outros erros
-                logger.exception("Erro ao enviar sentinela para audio_input_gemini_queue durante limpeza.")
+        try:
+            logger.info("Fechando sessões Gemini LiveConnect (ativa e reserva)...")
+            await self.connection_manager.close()
+            logger.info("Sessões Gemini LiveConnect fechadas.")
+        except Exception:
+            logger.exception("Erro ao fechar sessões Gemini LiveConnect na limpeza final.")
+        finally:
+            self.gemini_session = None
+
+        # Acorda o loop de playback para que ele veja o stop_event
+        self.playback_ready.set()
+
+        if self.yolo_engine:
+            await asyncio.to_thread(self.yolo_engine.stop)
+        logger.info(f"Estatísticas de alertas de perigo: {self.alert_scheduler.stats()}")
+        if self.danger_chime:
+            logger.info(f"Estatísticas do som de perigo local: {self.danger_chime.stats()}")
+        logger.info(f"Estatísticas do gatilho do som de perigo: {self.chime_gate.stats()}")
+        logger.info(f"Barge-in: {self.barge_in_counts}, chunks de respostas interrompidas descartados: {self.model_audio_chunks_dropped}")
+        logger.info(f"Estatísticas do codificador de frames: {self.frame_encoder.stats()}")
+        if self.scene_gate:
+            logger.info(f"Estatísticas do portão de mudança de cena: {self.scene_gate.stats()}")
+        if self.mic_gate:
+            logger.info(f"Estatísticas do portão de voz do microfone: {self.mic_gate.stats()}")
+        if self.echo_suppressor:
+            logger.info(f"Estatísticas da supressão de eco: {self.echo_suppressor.stats()}")
+        if self.session_store:
+            logger.info(f"Retomada de sessão: {self.session_store.stats()}")
+        logger.info(f"Sessão reserva: {self.connection_manager.stats()}")
+        logger.info(f"Orçamento de tokens do contexto: {self.token_budget.stats()}")
+        logger.info(f"Execução de ferramentas: {self.tool_executor.stats()}")
+        if self.pipeline:
+            logger.info(f"Tarefas do pipeline (reinícios): {self.pipeline.stats()}")
+        if self.session_switches:
+            logger.info(f"Trocas de sessão (tempo sem conexão / até o primeiro áudio): {list(self.session_switches)}")
+        if self.uplink_scheduler:
+            logger.info(f"Métricas das faixas de subida: {self.uplink_scheduler.metrics()}")
+            self.uplink_scheduler.close()
+        if self.recorder:
+            await asyncio.to_thread(self.recorder.close) # Esvazia a fila de escrita e fecha os arquivos
 
         # Fecha janelas OpenCV se estiverem ativas
         if self.preview_window_active:
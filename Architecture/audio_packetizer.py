@@ -0,0 +1,126 @@
+# trackie_app/audio_packetizer.py
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .audio_ring import ByteRingBuffer
+from .logger_config import get_logger
+
+logger = get_logger(__name__)
+
+# Bytes fixos por mensagem de áudio no websocket (envelope JSON + cabeçalhos), estimativa
+DEFAULT_MESSAGE_OVERHEAD_BYTES = 120
+
+
+class PcmPacketizer:
+    """
+    Agrega o PCM do microfone em pacotes de duração fixa (20–200 ms).
+
+    O callback do PortAudio chama `push` com o bloco que o dispositivo entregou;
+    os bytes vão para um buffer circular pré-alocado e, quando há pelo menos um
+    pacote completo, `on_packet_ready` é chamado (ex.: `loop.call_soon_threadsafe`).
+    O event loop retira pacotes com `pop_packet`, sem nenhum salto de thread por chunk.
+
+    Cada `push` pode informar o instante (`time.monotonic()`) do primeiro sample do
+    bloco; `last_packet_captured_at` traz o instante do primeiro sample do último
+    pacote retirado (usado para alinhar o microfone com o playback).
+    """
+
+    def __init__(self, sample_rate: int, packet_ms: float, sample_width: int = 2, channels: int = 1,
+                 ring_ms: float = 2000.0, on_packet_ready: Optional[Callable[[], None]] = None):
+        packet_ms = min(max(packet_ms, 20.0), 200.0)
+        self.sample_rate = sample_rate
+        self.frame_bytes = sample_width * channels
+        self.packet_frames = max(1, int(sample_rate * packet_ms / 1000.0))
+        self.packet_bytes = self.packet_frames * self.frame_bytes
+        self.packet_ms = self.packet_frames * 1000.0 / sample_rate
+        ring_packets = max(2, int(ring_ms / self.packet_ms))
+        self.ring = ByteRingBuffer(ring_packets * self.packet_bytes)
+        self._packet = bytearray(self.packet_bytes)
+        self.on_packet_ready = on_packet_ready
+        self._frames_in: int = 0 # Alterado só pelo produtor
+        self._frames_out: int = 0 # Alterado só pelo consumidor
+        self._capture_anchor: Tuple[int, float] = (0, time.monotonic()) # (frame, instante), publicado pelo produtor
+        self.last_packet_captured_at: float = self._capture_anchor[1]
+
+        # Estatísticas
+        self.device_callbacks: int = 0
+        self.packets_out: int = 0
+        self.device_overflows: int = 0 # Sinalizados pelo próprio PortAudio
+        self._started_at = time.monotonic()
+
+    def push(self, data: bytes, captured_at: Optional[float] = None) -> None:
+        """Chamado pelo callback do dispositivo (thread do PortAudio)."""
+        self.device_callbacks += 1
+        if captured_at is not None:
+            self._capture_anchor = (self._frames_in, captured_at)
+        self._frames_in += self.ring.write(data) // self.frame_bytes
+        if self.on_packet_ready is not None and self.ring.available() >= self.packet_bytes:
+            self.on_packet_ready()
+
+    def pop_packet(self) -> Optional[bytes]:
+        """Retira um pacote completo, ou None se ainda não há um (lado do event loop)."""
+        if self.ring.available() < self.packet_bytes:
+            return None
+        self.ring.read_into(self._packet)
+        anchor_frame, anchor_time = self._capture_anchor
+        self.last_packet_captured_at = anchor_time + (self._frames_out - anchor_frame) / float(self.sample_rate)
+        self._frames_out += self.packet_frames
+        self.packets_out += 1
+        return bytes(self._packet)
+
+    def discard_pending(self) -> int:
+        """Descarta o áudio acumulado (ex.: enquanto o envio está pausado)."""
+        discarded = self.ring.discard()
+        self._frames_out += discarded // self.frame_bytes
+        return discarded
+
+    def stats(self) -> Dict[str, float]:
+        elapsed = max(time.monotonic() - self._started_at, 1e-6)
+        return {
+            "packet_ms": round(self.packet_ms, 1),
+            "packets_out": self.packets_out,
+            "packets_per_s": round(self.packets_out / elapsed, 1),
+            "device_callbacks": self.device_callbacks,
+            "device_overflows": self.device_overflows,
+            "ring_overrun_bytes": self.ring.overrun_bytes,
+            "ring_depth_ms": round(self.ring.available() / self.frame_bytes * 1000.0 / self.sample_rate, 1),
+        }
+
+
+def packetization_tradeoff(sample_rate: int, packet_ms_options: List[float], sample_width: int = 2,
+                           message_overhead_bytes: int = DEFAULT_MESSAGE_OVERHEAD_BYTES) -> List[Dict[str, float]]:
+    """
+    Compromisso latência x overhead para cada duração de pacote: o pacote espera
+    encher antes de sair (latência adicional = duração do pacote) e cada mensagem
+    paga base64 (+33%) mais um envelope fixo.
+    """
+    rows = []
+    for packet_ms in packet_ms_options:
+        payload = int(sample_rate * packet_ms / 1000.0) * sample_width
+        wire = (payload + 2) // 3 * 4 + message_overhead_bytes
+        messages_per_s = 1000.0 / packet_ms
+        rows.append({
+            "packet_ms": packet_ms,
+            "added_latency_ms": packet_ms,
+            "messages_per_s": round(messages_per_s, 1),
+            "wire_kbps": round(wire * messages_per_s * 8 / 1000.0, 1),
+            "overhead_pct": round((wire - payload) / wire * 100.0, 1),
+        })
+    return rows
+
+
+def log_packetization_tradeoff(sample_rate: int, chosen_packet_ms: float) -> None:
+    """Registra no log a tabela de compromisso com a duração configurada destacada."""
+    options = sorted({20.0, 40.0, 64.0, 100.0, 200.0, float(chosen_packet_ms)})
+    for row in packetization_tradeoff(sample_rate, options):
+        marker = " <- configurado" if row["packet_ms"] == chosen_packet_ms else ""
+        logger.info(f"Pacote de microfone {row['packet_ms']:5.0f} ms: +{row['added_latency_ms']:.0f} ms de latência, "
+                    f"{row['messages_per_s']:5.1f} msg/s, {row['wire_kbps']:6.1f} kbps, "
+                    f"overhead {row['overhead_pct']:.1f}%{marker}")
+
+
+if __name__ == "__main__":
+    from .app_config import AUDIO_SEND_SAMPLE_RATE
+
+    for row in packetization_tradeoff(AUDIO_SEND_SAMPLE_RATE, [20.0, 40.0, 64.0, 100.0, 200.0]):
+        print(row)
@@ -0,0 +1,167 @@
+# trackie_app/audio_playback.py
+import asyncio
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Optional, Union
+
+import numpy as np
+
+from .audio_ring import ByteRingBuffer
+from .logger_config import get_logger
+
+logger = get_logger(__name__)
+
+try:
+    import pyaudio
+    _PA_CONTINUE = pyaudio.paContinue
+    _PA_OUTPUT_UNDERFLOW = pyaudio.paOutputUnderflow
+except ImportError: # Permite usar o player offline (ex.: benchmarks) sem PyAudio
+    _PA_CONTINUE = 0
+    _PA_OUTPUT_UNDERFLOW = 0x4
+
+
+class CallbackPlayer:
+    """
+    Playback em modo callback do PortAudio sobre um `ByteRingBuffer`.
+
+    O event loop só empurra bytes com `write` (sem `asyncio.to_thread` por chunk);
+    o callback do dispositivo (`callback`) puxa exatamente um bloco do anel,
+    completa com silêncio o que faltar e, se houver um `mixer` (ex.: `ChimeMixer`)
+    tocando, mistura-o no próprio bloco — o som entra na saída em até um buffer.
+
+    Contadores:
+    - underruns: blocos em que o anel tinha áudio, mas não o bastante (inclui o
+      último bloco de cada resposta); o silêncio entre respostas não conta.
+    - device_underflows: underflows sinalizados pelo próprio PortAudio.
+    - writer_waits: vezes em que o event loop esperou espaço no anel (o modelo
+      envia áudio mais rápido que o tempo real; o excedente fica no buffer de jitter).
+
+    Barge-in: `interrupt` só publica um pedido; o próprio callback (único consumidor
+    do anel) descarta o áudio pendente no bloco seguinte e mede o tempo até o
+    silêncio, somando a latência até o DAC informada pelo PortAudio.
+
+    `reference_tap(pcm, played_at)` recebe cada bloco final (já com o alerta
+    misturado) e o instante `time.monotonic()` em que ele chega ao DAC — a
+    referência da supressão de eco.
+    """
+
+    def __init__(self, sample_rate: int, device_frames: int, sample_width: int = 2, channels: int = 1,
+                 ring_ms: float = 500.0, mixer: Any = None,
+                 reference_tap: Optional[Callable[[bytes, float], None]] = None):
+        self.sample_rate = sample_rate
+        self.frame_bytes = sample_width * channels
+        self.device_frames = device_frames
+        self.block_bytes = device_frames * self.frame_bytes
+        self.block_s = device_frames / float(sample_rate)
+        ring_blocks = max(2, int(ring_ms / 1000.0 / self.block_s))
+        self.ring = ByteRingBuffer(ring_blocks * self.block_bytes)
+        self.mixer = mixer
+        self.reference_tap = reference_tap
+        self._block = bytearray(self.block_bytes)
+
+        # Estatísticas
+        self.device_callbacks: int = 0
+        self.underruns: int = 0 # Alterado só pelo callback
+        self.device_underflows: int = 0 # Alterado só pelo callback
+        self.writer_waits: int = 0 # Alterado só pelo event loop
+        self.bytes_written: int = 0
+        self._started_at = time.monotonic()
+
+        # Barge-in: pedidos publicados pelo event loop, atendidos pelo callback
+        self._interrupt_requests: int = 0 # Alterado só pelo event loop
+        self._interrupt_requested_at: float = 0.0
+        self._interrupts_done: int = 0 # Alterado só pelo callback
+        self.flushed_bytes: int = 0 # Alterado só pelo callback
+        self.time_to_silence_ms: Deque[float] = deque(maxlen=200)
+
+    @property
+    def buffered_ms(self) -> float:
+        return self.ring.available() / self.frame_bytes * 1000.0 / self.sample_rate
+
+    @property
+    def is_playing(self) -> bool:
+        """Há áudio do modelo no anel ainda não tocado."""
+        return self.ring.available() > 0 and self._interrupts_done == self._interrupt_requests
+
+    def interrupt(self, requested_at: Optional[float] = None) -> None:
+        """
+        Pede ao callback que descarte o áudio pendente (lado do event loop). O silêncio
+        começa no próximo bloco do dispositivo.
+
+        Args:
+            requested_at (Optional[float]): `time.monotonic()` da detecção que causou a
+                interrupção; base do tempo até o silêncio.
+        """
+        self._interrupt_requested_at = time.monotonic() if requested_at is None else requested_at
+        self._interrupt_requests += 1
+
+    def callback(self, in_data: Optional[bytes], frame_count: int, time_info: Dict[str, float],
+                 status_flags: int):
+        """Callback do PortAudio (thread do dispositivo), passado como `stream_callback`."""
+        now = time.monotonic()
+        self.device_callbacks += 1
+        if status_flags & _PA_OUTPUT_UNDERFLOW:
+            self.device_underflows += 1
+        dac_delay_s = time_info.get("output_buffer_dac_time", 0.0) - time_info.get("current_time", 0.0) if time_info else 0.0
+        if not 0.0 <= dac_delay_s < 1.0: # Alguns drivers não informam os tempos
+            dac_delay_s = 0.0
+        requests = self._interrupt_requests
+        if requests != self._interrupts_done:
+            self.flushed_bytes += self.ring.discard()
+            self.time_to_silence_ms.append((now - self._interrupt_requested_at + dac_delay_s) * 1000.0)
+            self._interrupts_done = requests
+        size = frame_count * self.frame_bytes
+        if size != len(self._block):
+            self._block = bytearray(size) # Só se o dispositivo mudar o tamanho do bloco
+        copied = self.ring.read_into(self._block, fill_silence=True)
+        if 0 < copied < size:
+            self.underruns += 1
+        out = bytes(self._block)
+        if self.mixer is not None and self.mixer.active:
+            out = self.mixer.mix_into(out, min_frames=frame_count)
+        if self.reference_tap is not None:
+            self.reference_tap(out, now + dac_delay_s)
+        return (out, _PA_CONTINUE)
+
+    async def write(self, data: Union[bytes, bytearray, memoryview], stop_event: Optional[asyncio.Event] = None) -> int:
+        """
+        Copia `data` para o anel, esperando (sem bloquear o event loop) quando ele está
+        cheio. Retorna os bytes escritos (menos que `len(data)` se `stop_event` disparar
+        ou se `interrupt` for chamado durante a escrita).
+        """
+        while self._interrupts_done != self._interrupt_requests: # Não escreve antes do descarte pendente
+            await asyncio.sleep(self.block_s / 2)
+        generation = self._interrupt_requests
+        view = memoryview(data)
+        offset = 0
+        while offset < len(view):
+            if self._interrupt_requests != generation:
+                break
+            free = self.ring.free()
+            if free == 0:
+                if stop_event is not None and stop_event.is_set():
+                    break
+                self.writer_waits += 1
+                await asyncio.sleep(self.block_s / 2)
+                continue
+            offset += self.ring.write(view[offset:offset + free])
+        self.bytes_written += offset
+        return offset
+
+    def stats(self) -> Dict[str, float]:
+        elapsed = max(time.monotonic() - self._started_at, 1e-6)
+        silence_ms = np.array(self.time_to_silence_ms) if self.time_to_silence_ms else None
+        return {
+            "device_frames": self.device_frames,
+            "device_callbacks": self.device_callbacks,
+            "callbacks_per_s": round(self.device_callbacks / elapsed, 1),
+            "underruns": self.underruns,
+            "device_underflows": self.device_underflows,
+            "writer_waits": self.writer_waits,
+            "written_s": round(self.bytes_written / self.frame_bytes / self.sample_rate, 1),
+            "buffered_ms": round(self.buffered_ms, 1),
+            "interrupts": self._interrupts_done,
+            "flushed_ms": round(self.flushed_bytes / self.frame_bytes * 1000.0 / self.sample_rate, 1),
+            "time_to_silence_p50_ms": round(float(np.percentile(silence_ms, 50)), 1) if silence_ms is not None else None,
+            "time_to_silence_max_ms": round(float(silence_ms.max()), 1) if silence_ms is not None else None,
+        }
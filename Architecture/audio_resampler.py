@@ -0,0 +1,180 @@
+# trackie_app/audio_resampler.py
+import time
+from math import gcd
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from .logger_config import get_logger
+
+logger = get_logger(__name__)
+
+try:
+    import soxr
+    _SOXR_AVAILABLE = True
+except ImportError:
+    soxr = None
+    _SOXR_AVAILABLE = False
+
+
+class PolyphaseResampler:
+    """
+    Reamostrador racional (L/M) polifásico em NumPy para PCM16 intercalado.
+
+    O protótipo é um sinc janelado (Kaiser) com corte na menor das duas taxas de
+    Nyquist, decomposto em L fases de K coeficientes. O estado (últimas K-1
+    amostras de entrada e as posições absolutas de entrada/saída) é mantido entre
+    chamadas, então chunks de qualquer tamanho produzem o mesmo sinal que o áudio
+    inteiro de uma vez, sem cliques nas emendas.
+    """
+
+    backend = "numpy"
+
+    def __init__(self, in_rate: int, out_rate: int, channels: int = 1, zero_crossings: int = 8,
+                 rolloff: float = 0.94, kaiser_beta: float = 8.6):
+        divisor = gcd(in_rate, out_rate)
+        self.in_rate = in_rate
+        self.out_rate = out_rate
+        self.channels = channels
+        self.up = out_rate // divisor
+        self.down = in_rate // divisor
+        self.taps_per_phase = int(np.ceil(2 * zero_crossings * max(1.0, self.down / self.up)))
+
+        length = self.taps_per_phase * self.up
+        cutoff = 0.5 / max(self.up, self.down) * rolloff # Ciclos por amostra na taxa intermediária (entrada x L)
+        n = np.arange(length) - (length - 1) / 2.0
+        prototype = 2.0 * cutoff * np.sinc(2.0 * cutoff * n) * np.kaiser(length, kaiser_beta) * self.up
+        # bank[p, k] = h[p + k*L], invertido em k para casar com as janelas em ordem crescente
+        self._bank = prototype.reshape(self.taps_per_phase, self.up).T[:, ::-1].astype(np.float32).copy()
+
+        self._history = np.zeros((self.taps_per_phase - 1, channels), dtype=np.float32)
+        self._in_count = 0
+        self._out_count = 0
+
+    def reset(self) -> None:
+        self._history[:] = 0.0
+        self._in_count = 0
+        self._out_count = 0
+
+    def process(self, pcm: bytes) -> bytes:
+        """Reamostra um chunk PCM16; pode devolver uma amostra a mais ou a menos que a proporção exata."""
+        samples = np.frombuffer(pcm, dtype=np.int16).reshape(-1, self.channels).astype(np.float32)
+        if samples.shape[0] == 0:
+            return b""
+        buffer = np.concatenate((self._history, samples))
+        end = self._in_count + samples.shape[0]
+        last_out = (end * self.up - 1) // self.down
+        outputs = np.arange(self._out_count, last_out + 1, dtype=np.int64)
+        positions = outputs * self.down
+        window_index = positions // self.up - self._in_count # Janela cujo último elemento é x[base]
+        windows = sliding_window_view(buffer, self.taps_per_phase, axis=0)[window_index] # (n, canais, K)
+        resampled = np.einsum("nck,nk->nc", windows, self._bank[positions % self.up])
+
+        self._history = buffer[-(self.taps_per_phase - 1):] if self.taps_per_phase > 1 else buffer[:0]
+        self._in_count = end
+        self._out_count = last_out + 1
+        return np.clip(np.rint(resampled), -32768, 32767).astype(np.int16).tobytes()
+
+
+class SoxrResampler:
+    """Mesma interface do `PolyphaseResampler`, usando `soxr.ResampleStream` (libsoxr)."""
+
+    backend = "soxr"
+
+    def __init__(self, in_rate: int, out_rate: int, channels: int = 1, quality: str = "HQ"):
+        self.in_rate = in_rate
+        self.out_rate = out_rate
+        self.channels = channels
+        self.quality = quality
+        self._stream = soxr.ResampleStream(in_rate, out_rate, channels, dtype="int16", quality=quality)
+
+    def reset(self) -> None:
+        self._stream = soxr.ResampleStream(self.in_rate, self.out_rate, self.channels, dtype="int16", quality=self.quality)
+
+    def process(self, pcm: bytes) -> bytes:
+        samples = np.frombuffer(pcm, dtype=np.int16).reshape(-1, self.channels)
+        return self._stream.resample_chunk(samples).tobytes()
+
+
+class PassthroughResampler:
+    """Taxas iguais: devolve o PCM sem cópia."""
+
+    backend = "passthrough"
+
+    def __init__(self, in_rate: int, out_rate: int, channels: int = 1):
+        self.in_rate = in_rate
+        self.out_rate = out_rate
+        self.channels = channels
+
+    def reset(self) -> None:
+        pass
+
+    def process(self, pcm: bytes) -> bytes:
+        return pcm
+
+
+def create_resampler(in_rate: int, out_rate: int, channels: int = 1, prefer_soxr: bool = True) -> Any:
+    """Reamostrador com estado para o par de taxas: passthrough, soxr (se instalado) ou NumPy polifásico."""
+    if in_rate == out_rate:
+        return PassthroughResampler(in_rate, out_rate, channels)
+    if prefer_soxr and _SOXR_AVAILABLE:
+        return SoxrResampler(in_rate, out_rate, channels)
+    return PolyphaseResampler(in_rate, out_rate, channels)
+
+
+def negotiate_stream_rate(pa: Any, device_info: Optional[Dict[str, Any]], wanted_rate: int, channels: int,
+                          sample_format: Any, is_input: bool) -> int:
+    """
+    Escolhe a taxa para abrir o dispositivo: a nativa (`defaultSampleRate`) quando
+    o PortAudio confirma que ela é suportada, senão a taxa do pipeline (`wanted_rate`).
+    """
+    if not device_info:
+        return wanted_rate
+    native_rate = int(round(float(device_info.get("defaultSampleRate") or wanted_rate)))
+    if native_rate == wanted_rate:
+        return wanted_rate
+    if is_input:
+        format_kwargs = {"input_device": device_info["index"], "input_channels": channels, "input_format": sample_format}
+    else:
+        format_kwargs = {"output_device": device_info["index"], "output_channels": channels, "output_format": sample_format}
+    try:
+        if pa.is_format_supported(native_rate, **format_kwargs):
+            logger.info(f"Dispositivo '{device_info.get('name')}' aberto na taxa nativa {native_rate} Hz "
+                        f"(pipeline: {wanted_rate} Hz, reamostrado).")
+            return native_rate
+    except ValueError as e: # PyAudio sinaliza formato não suportado com ValueError
+        logger.warning(f"Taxa nativa {native_rate} Hz recusada para '{device_info.get('name')}' ({e}). Usando {wanted_rate} Hz.")
+    return wanted_rate
+
+
+def benchmark_resamplers(rate_pairs: List[Tuple[int, int]], seconds: float = 10.0,
+                         chunk_ms: float = 20.0) -> Dict[str, Dict[str, float]]:
+    """
+    CPU por segundo de áudio (ms de CPU / s de áudio) para cada par de taxas, processando
+    ruído em chunks de `chunk_ms` com estado, como no pipeline.
+    """
+    rng = np.random.default_rng(0)
+    results: Dict[str, Dict[str, float]] = {}
+    for in_rate, out_rate in rate_pairs:
+        signal = (rng.normal(0, 0.2, int(in_rate * seconds)) * 32767).astype(np.int16)
+        chunk = int(in_rate * chunk_ms / 1000.0)
+        backends = [False] + ([True] if _SOXR_AVAILABLE else [])
+        for use_soxr in backends:
+            resampler = create_resampler(in_rate, out_rate, prefer_soxr=use_soxr)
+            produced = 0
+            started = time.process_time()
+            for offset in range(0, signal.size, chunk):
+                produced += len(resampler.process(signal[offset:offset + chunk].tobytes())) // 2
+            cpu_s = time.process_time() - started
+            results[f"{resampler.backend}_{in_rate}->{out_rate}"] = {
+                "cpu_ms_per_audio_s": round(cpu_s / seconds * 1000.0, 2),
+                "output_ratio": round(produced / (signal.size * out_rate / in_rate), 4),
+            }
+    return results
+
+
+if __name__ == "__main__":
+    pairs = [(48000, 16000), (44100, 16000), (16000, 48000), (24000, 48000), (24000, 44100)]
+    for name, result in benchmark_resamplers(pairs).items():
+        print(f"{name:>28}: {result['cpu_ms_per_audio_s']:7.2f} ms CPU/s de áudio  (saída/esperado {result['output_ratio']})")
@@ -0,0 +1,95 @@
+# trackie_app/audio_ring.py
+from typing import Union
+
+
+class ByteRingBuffer:
+    """
+    Buffer circular de bytes pré-alocado para um único produtor e um único consumidor
+    (ex.: callback do PortAudio de um lado, event loop do outro), sem locks.
+
+    Cada lado só altera o próprio contador (`_write_total` pelo produtor,
+    `_read_total` pelo consumidor); os contadores só crescem e a atribuição de um
+    int é atômica sob o GIL. O produtor copia os dados antes de publicar o novo
+    contador, então o consumidor nunca vê bytes incompletos.
+    """
+
+    def __init__(self, capacity: int):
+        if capacity <= 0:
+            raise ValueError("A capacidade do buffer circular deve ser positiva.")
+        self.capacity = capacity
+        self._buffer = bytearray(capacity)
+        self._view = memoryview(self._buffer)
+        self._write_total = 0 # Alterado só pelo produtor
+        self._read_total = 0 # Alterado só pelo consumidor
+
+        # Contadores (cada um alterado por um único lado)
+        self.overrun_bytes: int = 0 # Bytes recusados por falta de espaço (produtor)
+        self.underrun_bytes: int = 0 # Bytes pedidos e não disponíveis (consumidor)
+
+    def available(self) -> int:
+        """Bytes prontos para leitura."""
+        return self._write_total - self._read_total
+
+    def free(self) -> int:
+        """Espaço livre para escrita."""
+        return self.capacity - (self._write_total - self._read_total)
+
+    def write(self, data: Union[bytes, bytearray, memoryview]) -> int:
+        """
+        Copia o máximo possível de `data` para o buffer (lado do produtor).
+
+        Returns:
+            int: Bytes escritos; o resto conta como overrun.
+        """
+        size = min(len(data), self.free())
+        if size < len(data):
+            self.overrun_bytes += len(data) - size
+        if size == 0:
+            return 0
+        source = memoryview(data)[:size]
+        start = self._write_total % self.capacity
+        first = min(size, self.capacity - start)
+        self._view[start:start + first] = source[:first]
+        if first < size:
+            self._view[:size - first] = source[first:]
+        self._write_total += size # Publica só depois da cópia
+        return size
+
+    def read_into(self, out: Union[bytearray, memoryview], fill_silence: bool = False) -> int:
+        """
+        Copia até `len(out)` bytes para `out` (lado do consumidor).
+
+        Args:
+            out: Destino pré-alocado.
+            fill_silence (bool): Completa com zeros o que faltar (conta como underrun).
+
+        Returns:
+            int: Bytes de áudio real copiados.
+        """
+        out_view = memoryview(out)
+        size = min(len(out_view), self.available())
+        if size:
+            start = self._read_total % self.capacity
+            first = min(size, self.capacity - start)
+            out_view[:first] = self._view[start:start + first]
+            if first < size:
+                out_view[first:size] = self._view[:size - first]
+            self._read_total += size # Libera o espaço só depois da cópia
+        missing = len(out_view) - size
+        if missing and fill_silence:
+            out_view[size:] = bytes(missing)
+            self.underrun_bytes += missing
+        return size
+
+    def read(self, size: int) -> bytes:
+        """Lê até `size` bytes como um novo objeto `bytes`."""
+        out = bytearray(min(size, self.available()))
+        self.read_into(out)
+        return bytes(out)
+
+    def discard(self, size: int = -1) -> int:
+        """Descarta até `size` bytes (todos se negativo) sem copiá-los (lado do consumidor)."""
+        available = self.available()
+        size = available if size < 0 else min(size, available)
+        self._read_total += size
+        return size
@@ -0,0 +1,74 @@
+# trackie_app/class_lookup.py
+from typing import Dict, List
+
+import numpy as np
+
+from .logger_config import get_logger
+
+logger = get_logger(__name__)
+
+
+class ClassLookup:
+    """
+    Tabelas de consulta compiladas uma vez contra `names` do modelo carregado.
+
+    - `is_danger[class_id]`: a classe pertence a DANGER_CLASSES.
+    - `ids_by_query[nome]`: ids de classe para um nome em português (ou o nome do modelo).
+    - `surface_class_ids`: ids das classes de superfície (SURFACE_CLASS_KEYS).
+    """
+
+    def __init__(self, names: Dict[int, str], danger_classes: Dict[str, List[str]],
+                 class_map: Dict[str, List[str]], surface_keys: List[str]):
+        self.names = names
+        num_classes = (max(names) + 1) if names else 0
+        ids_by_model_name: Dict[str, int] = {name: class_id for class_id, name in names.items()}
+
+        self.is_danger = np.zeros(num_classes, dtype=bool)
+        self.unreachable_danger_labels: List[str] = []
+        for model_labels in danger_classes.values():
+            for label in model_labels:
+                class_id = ids_by_model_name.get(label)
+                if class_id is None:
+                    self.unreachable_danger_labels.append(label)
+                    continue
+                self.is_danger[class_id] = True
+
+        self.ids_by_query: Dict[str, np.ndarray] = {}
+        for label, model_labels in class_map.items():
+            class_ids = [ids_by_model_name[l] for l in model_labels if l in ids_by_model_name]
+            self.ids_by_query[label.lower()] = np.array(class_ids, dtype=np.int64)
+        # Como no comportamento original, uma consulta sem entrada no mapa é tratada como nome do modelo
+        for model_name, class_id in ids_by_model_name.items():
+            self.ids_by_query.setdefault(model_name.lower(), np.array([class_id], dtype=np.int64))
+
+        surface_ids = set()
+        for key in surface_keys:
+            surface_ids.update(self.ids_by_query.get(key.lower(), np.zeros(0, dtype=np.int64)).tolist())
+        self.surface_class_ids = np.array(sorted(surface_ids), dtype=np.int64)
+        self._empty_ids = np.zeros(0, dtype=np.int64)
+
+    def class_ids_for_query(self, query: str) -> np.ndarray:
+        """Ids de classe do modelo para um nome de objeto (português ou nome do modelo)."""
+        return self.ids_by_query.get(query.lower(), self._empty_ids)
+
+    def danger_mask(self, class_ids: np.ndarray) -> np.ndarray:
+        """
+        Máscara booleana das detecções cuja classe é perigosa (O(1) por caixa).
+        Ids fora de `names` (ex.: backend exportado com outro conjunto de classes) não são perigo.
+        """
+        class_ids = np.asarray(class_ids)
+        in_range = (class_ids >= 0) & (class_ids < self.is_danger.size)
+        if in_range.all():
+            return self.is_danger[class_ids]
+        mask = np.zeros(class_ids.shape, dtype=bool)
+        mask[in_range] = self.is_danger[class_ids[in_range]]
+        return mask
+
+    def report(self) -> None:
+        """Registra no log as entradas de perigo que o modelo carregado nunca vai emitir."""
+        reachable = int(self.is_danger.sum())
+        logger.info(f"Tabelas de classes compiladas: {len(self.names)} classes no modelo, "
+                    f"{reachable} classes de perigo alcançáveis, superfícies: {self.surface_class_ids.tolist()}.")
+        if self.unreachable_danger_labels:
+            logger.warning(f"Rótulos de perigo que o modelo carregado nunca detecta ({len(self.unreachable_danger_labels)}): "
+                           f"{', '.join(self.unreachable_danger_labels)}")
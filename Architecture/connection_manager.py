@@ -0,0 +1,290 @@
+# trackie_app/connection_manager.py
+import asyncio
+import time
+from typing import Any, Callable, Dict, List, Optional, Set
+
+import numpy as np
+
+from .logger_config import get_logger
+
+logger = get_logger(__name__)
+
+
+class _HeldSession:
+    """
+    Uma conexão `live.connect` mantida aberta por uma tarefa própria: o contexto
+    `async with` do SDK vive nessa tarefa, então a sessão pode ser criada antes de
+    ser usada (reserva) e fechada de qualquer lugar com `close`.
+    """
+
+    def __init__(self, live_client: Any, model: str, config: Any, handle: Optional[str], role: str):
+        self.handle = handle
+        self.role = role # "active" ou "standby" (só para logs)
+        self.session: Any = None
+        self.error: Optional[BaseException] = None
+        self.created_at = time.monotonic()
+        self.opened_at: Optional[float] = None
+        self._ready = asyncio.Event()
+        self._release = asyncio.Event()
+        self._task = asyncio.get_running_loop().create_task(
+            self._hold(live_client, model, config), name=f"live_session_{role}_task")
+
+    async def _hold(self, live_client: Any, model: str, config: Any) -> None:
+        try:
+            async with live_client.aio.live.connect(model=model, config=config) as session:
+                self.session = session
+                self.opened_at = time.monotonic()
+                self._ready.set()
+                await self._release.wait()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e: # Falha ao conectar ou ao fechar
+            self.error = e
+        finally:
+            self._ready.set()
+
+    @property
+    def ready(self) -> bool:
+        return self._ready.is_set()
+
+    @property
+    def alive(self) -> bool:
+        """Conectada, não liberada e com a tarefa de conexão ainda viva."""
+        return self.session is not None and not self._release.is_set() and not self._task.done()
+
+    async def wait_open(self) -> Any:
+        """Espera a conexão abrir; levanta o erro de conexão se ela falhou."""
+        await self._ready.wait()
+        if self.session is None:
+            raise self.error if self.error is not None else ConnectionError("Live session closed before opening")
+        return self.session
+
+    async def close(self) -> None:
+        self._release.set()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        except Exception:
+            logger.exception(f"Erro ao fechar sessão Live ({self.role}).")
+
+
+class LiveConnectionManager:
+    """
+    Mantém a sessão Live ativa e uma sessão reserva já conectada, para que a troca
+    de sessão (queda, go_away, troca proativa) não espere por um novo handshake.
+
+    A reserva é aberta com o handle de retomada atual (`current_handle`) e é
+    renovada quando o handle muda (no máximo a cada `standby_refresh_min_s`) ou
+    quando fica mais velha que `standby_max_age_s`. Em `activate`, ela só é
+    promovida se ainda estiver viva e com o handle atual; senão a conexão é feita
+    na hora.
+
+    Se o servidor derrubar a sessão ativa logo depois de uma reserva retomar o mesmo
+    handle (uma retomada "roubando" a conexão), a reserva é desligada até o fim da
+    execução e as trocas voltam a conectar na hora.
+    """
+
+    def __init__(self, live_client: Any, model: str, connect_config: Callable[[], Any],
+                 current_handle: Callable[[], Optional[str]], standby_enabled: bool = True,
+                 standby_max_age_s: float = 300.0, standby_refresh_min_s: float = 5.0,
+                 takeover_window_s: float = 2.0):
+        self.live_client = live_client
+        self.model = model
+        self.connect_config = connect_config
+        self.current_handle = current_handle
+        self.standby_enabled = standby_enabled
+        self.standby_max_age_s = standby_max_age_s
+        self.standby_refresh_min_s = standby_refresh_min_s
+        self.takeover_window_s = takeover_window_s
+        self._active: Optional[_HeldSession] = None
+        self._standby: Optional[_HeldSession] = None
+        self._closing: Set[asyncio.Task] = set()
+        self._keeper: Optional[asyncio.Task] = None
+        self._last_standby_opened_at: float = 0.0
+
+        # Estatísticas
+        self.hot_swaps: int = 0
+        self.direct_connects: int = 0
+        self.standby_opened: int = 0
+        self.standby_failures: int = 0
+        self.standby_discarded: int = 0
+
+    @property
+    def active_handle(self) -> Optional[str]:
+        """Handle com que a sessão ativa foi aberta (None: sessão nova)."""
+        return self._active.handle if self._active else None
+
+    def _open(self, role: str) -> _HeldSession:
+        handle = self.current_handle() # Lido junto com a config: os dois descrevem a mesma retomada
+        return _HeldSession(self.live_client, self.model, self.connect_config(), handle, role)
+
+    def _discard(self, held: Optional[_HeldSession]) -> None:
+        if held is None:
+            return
+        task = asyncio.get_running_loop().create_task(held.close())
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
+
+    async def activate(self, reason: Optional[str] = None) -> Any:
+        """
+        Torna uma sessão ativa e a devolve: a reserva, se estiver pronta e com o handle
+        atual, ou uma conexão nova. Levanta o erro de conexão se ela falhar.
+
+        Args:
+            reason (Optional[str]): Motivo da troca ("connection_lost", "go_away"...), usado
+                para detectar a derrubada da ativa causada pela reserva.
+        """
+        if (reason in ("connection_lost", "closed") and self.standby_enabled and self._last_standby_opened_at
+                and time.monotonic() - self._last_standby_opened_at < self.takeover_window_s):
+            logger.warning("A sessão ativa caiu logo após a reserva conectar; desligando a sessão reserva.")
+            self.standby_enabled = False
+            self._discard(self._standby)
+            self._standby = None
+
+        standby, self._standby = self._standby, None
+        if standby is not None and standby.ready and standby.alive and standby.handle == self.current_handle():
+            standby.role = "active"
+            self._active = standby
+            self.hot_swaps += 1
+            logger.info("Sessão reserva promovida a ativa (troca sem novo handshake).")
+        else:
+            if standby is not None:
+                self.standby_discarded += 1
+                self._discard(standby)
+            held = self._open("active")
+            try:
+                await held.wait_open()
+            except BaseException:
+                self._discard(held)
+                raise
+            self._active = held
+            self.direct_connects += 1
+        if self.standby_enabled and self._keeper is None:
+            self._keeper = asyncio.get_running_loop().create_task(self._keep_standby(), name="live_standby_keeper_task")
+        return self._active.session
+
+    async def release_active(self) -> None:
+        """Fecha a sessão ativa (a reserva continua aberta para a próxima `activate`)."""
+        active, self._active = self._active, None
+        if active is not None:
+            await active.close()
+
+    async def _keep_standby(self) -> None:
+        """Abre e renova a sessão reserva enquanto houver uma sessão ativa."""
+        while self.standby_enabled:
+            await asyncio.sleep(1.0)
+            if self._active is None:
+                continue
+            standby = self._standby
+            now = time.monotonic()
+            if standby is not None:
+                if standby.ready and standby.session is None:
+                    self.standby_failures += 1
+                    logger.warning(f"Falha ao abrir a sessão reserva: {standby.error}")
+                    self._standby = None
+                    await asyncio.sleep(self.standby_refresh_min_s) # Não insiste em falhas seguidas
+                    continue
+                stale = standby.handle != self.current_handle() and now - standby.created_at >= self.standby_refresh_min_s
+                expired = now - standby.created_at >= self.standby_max_age_s
+                if not (stale or expired or (standby.ready and not standby.alive)):
+                    continue
+                self.standby_discarded += 1
+                self._discard(standby)
+            self._standby = self._open("standby")
+            self.standby_opened += 1
+            try:
+                await self._standby.wait_open()
+                self._last_standby_opened_at = time.monotonic()
+            except Exception:
+                pass # Contabilizado na próxima volta
+
+    async def close(self) -> None:
+        """Fecha a ativa, a reserva e as conexões em fechamento."""
+        if self._keeper is not None:
+            self._keeper.cancel()
+            try:
+                await self._keeper
+            except asyncio.CancelledError:
+                pass
+            self._keeper = None
+        self._discard(self._standby)
+        self._standby = None
+        await self.release_active()
+        if self._closing:
+            await asyncio.gather(*self._closing, return_exceptions=True)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "hot_swaps": self.hot_swaps,
+            "direct_connects": self.direct_connects,
+            "standby_opened": self.standby_opened,
+            "standby_failures": self.standby_failures,
+            "standby_discarded": self.standby_discarded,
+            "standby_enabled": self.standby_enabled,
+        }
+
+
+async def measure_failover_first_audio(standby: bool, trials: int = 5, connect_delay_s: float = 0.3,
+                                       reply_delay_s: float = 0.2) -> Dict[str, Any]:
+    """
+    Tempo sem conexão e até o primeiro áudio da resposta quando a sessão ativa cai logo
+    após o fim de uma fala do usuário, contra a sessão falsa (`fake_live`), com e sem
+    a sessão reserva. Ambos os casos retomam pelo handle; a diferença é o handshake.
+    """
+    from types import SimpleNamespace
+
+    from .fake_live import FakeLiveClient
+
+    client = FakeLiveClient(connect_delay_s=connect_delay_s, reply_audio_s=0.2, reply_delay_s=reply_delay_s)
+    handle: Optional[str] = None
+    manager = LiveConnectionManager(
+        client, "fake",
+        connect_config=lambda: SimpleNamespace(session_resumption=SimpleNamespace(handle=handle)),
+        current_handle=lambda: handle,
+        standby_enabled=standby, standby_refresh_min_s=0.0
+    )
+    outage_ms: List[float] = []
+    first_audio_ms: List[float] = []
+
+    async def _receive_until(session: Any, want_audio: bool) -> None:
+        nonlocal handle
+        while True:
+            async for response in session.receive():
+                if response.session_resumption_update is not None:
+                    handle = response.session_resumption_update.new_handle
+                    if not want_audio:
+                        return
+                if want_audio and response.data:
+                    return
+
+    session = await manager.activate()
+    await _receive_until(session, want_audio=False) # Handle inicial
+    for _ in range(trials):
+        if standby:
+            while manager._standby is None or not manager._standby.ready or manager._standby.handle != handle:
+                await asyncio.sleep(0.05) # A reserva acompanha o handle atual
+            await asyncio.sleep(manager.takeover_window_s + 0.5) # Queda longe da abertura da reserva (não é "roubo" da conexão)
+        await session.send_realtime_input(activity_start=True)
+        await session.send_realtime_input(activity_end=True)
+        session.drop()
+        lost_at = time.monotonic()
+        await manager.release_active()
+        session = await manager.activate("connection_lost")
+        outage_ms.append((time.monotonic() - lost_at) * 1000.0)
+        await _receive_until(session, want_audio=True)
+        first_audio_ms.append((time.monotonic() - lost_at) * 1000.0)
+    await manager.close()
+    return {
+        "standby": standby,
+        "trials": trials,
+        "outage_p50_ms": round(float(np.percentile(outage_ms, 50)), 1),
+        "first_audio_p50_ms": round(float(np.percentile(first_audio_ms, 50)), 1),
+        "first_audio_max_ms": round(float(max(first_audio_ms)), 1),
+        **manager.stats(),
+    }
+
+
+if __name__ == "__main__":
+    print("com reserva:", asyncio.run(measure_failover_first_audio(standby=True)))
+    print("sem reserva:", asyncio.run(measure_failover_first_audio(standby=False)))
@@ -0,0 +1,75 @@
+# trackie_app/detections.py
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+
+def boxes_data_as_numpy(boxes: Any) -> np.ndarray:
+    """
+    Converte `boxes.data` (tensor do Ultralytics ou array NumPy) em um array (N, 6)
+    [x1, y1, x2, y2, conf, cls] com uma única transferência `.cpu().numpy()`.
+    """
+    data = boxes.data
+    if hasattr(data, "cpu"):
+        data = data.cpu().numpy()
+    data = np.asarray(data, dtype=np.float32)
+    if data.size == 0:
+        return np.zeros((0, 6), dtype=np.float32)
+    data = data.reshape(-1, data.shape[-1])
+    # Com rastreamento o Ultralytics inclui a coluna de id: [x1, y1, x2, y2, id, conf, cls]
+    return np.concatenate([data[:, :4], data[:, -2:]], axis=1) if data.shape[1] > 6 else data
+
+
+@dataclass
+class FrameDetections:
+    """
+    Detecções de um frame em arrays NumPy compactos, construídos uma vez por frame.
+
+    Attributes:
+        xyxy (np.ndarray): Caixas (N, 4) em pixels do frame original.
+        conf (np.ndarray): Confianças (N,).
+        cls (np.ndarray): Ids de classe (N,) do modelo.
+        names (Dict[int, str]): Mapa id -> nome de classe do modelo.
+        track_ids (Optional[np.ndarray]): Ids de track (N,) quando vindas do rastreador.
+    """
+    xyxy: np.ndarray
+    conf: np.ndarray
+    cls: np.ndarray
+    names: Dict[int, str]
+    track_ids: Optional[np.ndarray] = None
+
+    @classmethod
+    def empty(cls, names: Dict[int, str]) -> "FrameDetections":
+        return cls(np.zeros((0, 4), dtype=np.float32), np.zeros(0, dtype=np.float32),
+                   np.zeros(0, dtype=np.int64), names)
+
+    @classmethod
+    def from_results(cls, results: Optional[List[Any]], names: Dict[int, str]) -> "FrameDetections":
+        """Constrói as detecções a partir da saída de `predict` (lista de `Results`)."""
+        chunks = [boxes_data_as_numpy(r.boxes) for r in (results or [])
+                  if getattr(r, "boxes", None) is not None and len(r.boxes) > 0]
+        if not chunks:
+            return cls.empty(names)
+        data = chunks[0] if len(chunks) == 1 else np.concatenate(chunks)
+        return cls(data[:, :4].copy(), data[:, 4].copy(), data[:, 5].astype(np.int64), names)
+
+    def __len__(self) -> int:
+        return self.cls.shape[0]
+
+    def class_name(self, index: int) -> str:
+        return self.names.get(int(self.cls[index]), str(int(self.cls[index])))
+
+    def mask_for_class_ids(self, class_ids: np.ndarray) -> np.ndarray:
+        """Máscara booleana (N,) das detecções cuja classe está em `class_ids`."""
+        return np.isin(self.cls, class_ids)
+
+    def best_index(self, mask: np.ndarray) -> Optional[int]:
+        """Índice da detecção de maior confiança dentro da máscara, ou None se vazia."""
+        if not mask.any():
+            return None
+        return int(np.argmax(np.where(mask, self.conf, -1.0)))
+
+    def bbox_dict(self, index: int) -> Dict[str, int]:
+        x1, y1, x2, y2 = self.xyxy[index].astype(int).tolist()
+        return {'x1': x1, 'y1': y1, 'x2': x2, 'y2': y2}
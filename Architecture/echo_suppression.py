@@ -0,0 +1,220 @@
+# trackie_app/echo_suppression.py
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from .logger_config import get_logger
+
+logger = get_logger(__name__)
+
+
+@dataclass
+class EchoResult:
+    """Resultado de um pacote do microfone passado pelo `EchoSuppressor`."""
+    pcm: bytes # Áudio limpo (silêncio nos trechos só de eco)
+    reference_active: bool # O modelo/alerta estava tocando durante o pacote
+    echo_only: bool # Nenhum trecho com fala local (pacote suprimido)
+
+
+class EchoSuppressor:
+    """
+    Supressão de eco em NumPy usando o áudio tocado como referência.
+
+    O callback do playback registra cada bloco com o instante em que ele chega ao
+    DAC (`add_reference`); o microfone informa o instante do ADC do primeiro sample
+    de cada pacote (`process`). Os dois usam `time.monotonic()` mais as latências
+    informadas pelo PortAudio, então a referência é lida já alinhada no tempo.
+
+    Em blocos de `block_ms`:
+    1. Um filtro adaptativo NLMS (em bloco) estima o eco a partir da referência e o
+       subtrai do microfone.
+    2. Um portão com limiar adaptativo compara a energia residual com a da
+       referência: abaixo do acoplamento microfone/referência aprendido +
+       `double_talk_margin_db` o bloco é
+       só eco e vira silêncio; acima, é fala local (double-talk) e passa o residual.
+       O filtro e o acoplamento só se adaptam em blocos só de eco.
+    """
+
+    def __init__(self, sample_rate: int = 16000, reference_rate: int = 24000, filter_ms: float = 32.0,
+                 block_ms: float = 10.0, step_size: float = 0.2, history_s: float = 2.0,
+                 bulk_delay_ms: float = 0.0, double_talk_margin_db: float = 6.0,
+                 reference_active_dbfs: float = -50.0, near_end_min_dbfs: float = -55.0,
+                 use_nlms: bool = True):
+        self.sample_rate = sample_rate
+        self.reference_rate = reference_rate
+        self.filter_len = max(1, int(sample_rate * filter_ms / 1000.0))
+        self.block_len = max(1, int(sample_rate * block_ms / 1000.0))
+        self.step_size = step_size
+        self.bulk_delay = int(sample_rate * bulk_delay_ms / 1000.0)
+        self.double_talk_margin_db = double_talk_margin_db
+        self.reference_active_dbfs = reference_active_dbfs
+        self.near_end_min_dbfs = near_end_min_dbfs
+        self.use_nlms = use_nlms
+
+        self._clock_origin = time.monotonic()
+        self._history = max(int(sample_rate * history_s), 4 * (self.filter_len + self.block_len))
+        self._reference = np.zeros(self._history, dtype=np.float32)
+        self._reference_end = 0 # Índice absoluto (em samples desde a origem) do fim do que foi escrito
+        self._lock = threading.Lock() # Callback do playback x event loop
+        self._weights = np.zeros(self.filter_len, dtype=np.float32)
+        self._coupling_db = 0.0 # Microfone/referência aprendido em blocos só de eco (começa conservador)
+
+        # Estatísticas
+        self.packets: int = 0
+        self.reference_active_packets: int = 0
+        self.echo_only_packets: int = 0
+        self.double_talk_packets: int = 0
+        self._erle_sum_db: float = 0.0
+        self._erle_blocks: int = 0
+
+    def _index_at(self, at: float) -> int:
+        return int(round((at - self._clock_origin) * self.sample_rate))
+
+    def add_reference(self, pcm: bytes, played_at: float) -> None:
+        """
+        Registra um bloco tocado (PCM16 mono na taxa de referência) que chega ao DAC em
+        `played_at`. Chamado pelo callback do playback.
+        """
+        samples = np.frombuffer(pcm, dtype=np.int16)
+        if samples.size == 0:
+            return
+        count = max(1, int(round(samples.size * self.sample_rate / self.reference_rate)))
+        if self.reference_rate != self.sample_rate:
+            positions = np.arange(count, dtype=np.float32) * (self.reference_rate / self.sample_rate)
+            resampled = np.interp(positions, np.arange(samples.size), samples).astype(np.float32)
+        else:
+            resampled = samples.astype(np.float32)
+        resampled *= 1.0 / 32768.0
+
+        start = self._index_at(played_at)
+        with self._lock:
+            if start > self._reference_end: # Lacuna (stream parado): referência em silêncio
+                self._write(self._reference_end, np.zeros(min(start - self._reference_end, self._history), dtype=np.float32))
+            self._write(start, resampled)
+            self._reference_end = max(self._reference_end, start + count)
+
+    def _write(self, start: int, values: np.ndarray) -> None:
+        values = values[-self._history:]
+        begin = start % self._history
+        first = min(values.size, self._history - begin)
+        self._reference[begin:begin + first] = values[:first]
+        if first < values.size:
+            self._reference[:values.size - first] = values[first:]
+
+    def _read(self, start: int, count: int) -> np.ndarray:
+        out = np.zeros(count, dtype=np.float32)
+        with self._lock:
+            valid_from = max(start, self._reference_end - self._history)
+            valid_to = min(start + count, self._reference_end)
+            if valid_from < valid_to:
+                out[valid_from - start:valid_to - start] = self._reference[np.arange(valid_from, valid_to) % self._history]
+        return out
+
+    def process(self, pcm: bytes, captured_at: float) -> EchoResult:
+        """
+        Remove o eco de um pacote PCM16 mono do microfone cujo primeiro sample foi
+        capturado em `captured_at` (`time.monotonic()`).
+        """
+        self.packets += 1
+        mic = np.frombuffer(pcm, dtype=np.int16).astype(np.float32) * (1.0 / 32768.0)
+        start = self._index_at(captured_at) - self.bulk_delay
+        reference = self._read(start - self.filter_len + 1, mic.size + self.filter_len - 1)
+        if 10.0 * np.log10(float(np.mean(reference * reference)) + 1e-12) <= self.reference_active_dbfs:
+            return EchoResult(pcm, reference_active=False, echo_only=False)
+        self.reference_active_packets += 1
+
+        out = np.empty_like(mic)
+        near_end_blocks = 0
+        for offset in range(0, mic.size, self.block_len):
+            near = mic[offset:offset + self.block_len]
+            windows = sliding_window_view(reference[offset:offset + near.size + self.filter_len - 1], self.filter_len)
+            residual = near - windows @ self._weights[::-1] if self.use_nlms else near
+            ref_power = float(np.mean(windows[:, -1] ** 2)) + 1e-12
+            near_power = float(np.mean(near * near)) + 1e-12
+            residual_power = float(np.mean(residual * residual)) + 1e-12
+            # O residual é comparado ao acoplamento do microfone sem cancelamento (estável
+            # enquanto o filtro converge): o ganho do NLMS só aumenta a margem
+            near_end = (10.0 * np.log10(residual_power / ref_power) > self._coupling_db + self.double_talk_margin_db
+                        and 10.0 * np.log10(residual_power) > self.near_end_min_dbfs)
+            if near_end:
+                near_end_blocks += 1
+                out[offset:offset + near.size] = residual
+                continue
+            out[offset:offset + near.size] = 0.0
+            if ref_power > 10.0 ** (self.reference_active_dbfs / 10.0):
+                coupling_db = 10.0 * np.log10(near_power / ref_power)
+                self._coupling_db += 0.05 * (min(max(coupling_db, -60.0), 10.0) - self._coupling_db)
+                self._erle_sum_db += 10.0 * np.log10(near_power / residual_power)
+                self._erle_blocks += 1
+                if self.use_nlms:
+                    norm = self.filter_len * float(np.mean(windows * windows)) + 1e-6
+                    self._weights += (self.step_size / norm) * (windows.T @ residual)[::-1]
+
+        if near_end_blocks:
+            self.double_talk_packets += 1
+            cleaned = np.clip(out * 32768.0, -32768, 32767).astype(np.int16).tobytes()
+            return EchoResult(cleaned, reference_active=True, echo_only=False)
+        self.echo_only_packets += 1
+        return EchoResult(bytes(len(pcm)), reference_active=True, echo_only=True)
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "packets": self.packets,
+            "reference_active_packets": self.reference_active_packets,
+            "echo_only_packets": self.echo_only_packets,
+            "double_talk_packets": self.double_talk_packets,
+            "coupling_db": round(float(self._coupling_db), 1),
+            "avg_erle_db": round(float(self._erle_sum_db) / self._erle_blocks, 1) if self._erle_blocks else 0.0,
+        }
+
+
+def evaluate_synthetic(seconds: float = 6.0, echo_gain: float = 0.3, echo_delay_ms: float = 4.0,
+                       near_end_from_s: Optional[float] = 3.0, packet_ms: float = 100.0,
+                       seed: int = 0, **suppressor_kwargs) -> Dict[str, float]:
+    """
+    Avaliação offline: referência de ruído modulado (tipo fala) a 24 kHz, eco atrasado
+    e filtrado no microfone a 16 kHz e, a partir de `near_end_from_s`, uma fala local
+    sintética. Devolve as estatísticas e a fração de pacotes de double-talk detectados.
+    """
+    rng = np.random.default_rng(seed)
+    suppressor = EchoSuppressor(16000, 24000, **suppressor_kwargs)
+    origin = suppressor._clock_origin
+    envelope = lambda n, rate: 0.5 + 0.5 * np.sin(2 * np.pi * 3.0 * np.arange(n) / rate)
+
+    far_24k = (rng.normal(0, 0.2, int(seconds * 24000)) * envelope(int(seconds * 24000), 24000))
+    far_16k = np.interp(np.arange(int(seconds * 16000)) * 1.5, np.arange(far_24k.size), far_24k)
+    room = np.exp(-np.arange(48) / 8.0) * echo_gain / 3.0
+    echo = np.convolve(far_16k, room)[:far_16k.size]
+    delay = int(16000 * echo_delay_ms / 1000.0)
+    mic = np.concatenate((np.zeros(delay), echo[:echo.size - delay])) + rng.normal(0, 0.001, far_16k.size)
+    if near_end_from_s is not None:
+        t = np.arange(far_16k.size) / 16000.0
+        mic += np.where(t >= near_end_from_s, 0.2 * np.sin(2 * np.pi * 220 * t) * envelope(t.size, 16000), 0.0)
+
+    # Playback e microfone intercalados como no app: a referência chega antes do pacote
+    block, played = 1024, 0
+    packet = int(16000 * packet_ms / 1000.0)
+    double_talk_after = total_after = 0
+    for index in range(0, mic.size - packet + 1, packet):
+        while played + block <= far_24k.size and played / 24000.0 < (index + packet) / 16000.0:
+            suppressor.add_reference((far_24k[played:played + block] * 32767).astype(np.int16).tobytes(),
+                                     origin + played / 24000.0)
+            played += block
+        result = suppressor.process((np.clip(mic[index:index + packet], -1, 1) * 32767).astype(np.int16).tobytes(),
+                                    origin + index / 16000.0)
+        if near_end_from_s is not None and index / 16000.0 >= near_end_from_s:
+            total_after += 1
+            double_talk_after += not result.echo_only
+    stats = suppressor.stats()
+    stats["near_end_detected_fraction"] = round(double_talk_after / total_after, 2) if total_after else None
+    return stats
+
+
+if __name__ == "__main__":
+    print("só eco:", evaluate_synthetic(near_end_from_s=None))
+    print("eco + fala local a partir de 3 s:", evaluate_synthetic())
+    print("só portão (sem NLMS):", evaluate_synthetic(use_nlms=False))
@@ -0,0 +1,440 @@
+# trackie_app/fake_live.py
+import asyncio
+import contextlib
+import time
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+
+import numpy as np
+
+from .logger_config import get_logger
+
+logger = get_logger(__name__)
+
+
+@dataclass
+class FakeServerContent:
+    """Subconjunto de `LiveServerContent` usado pelo AudioLoop."""
+    interrupted: bool = False
+    turn_complete: bool = False
+
+
+@dataclass
+class FakeGoAway:
+    """Subconjunto de `LiveServerGoAway`."""
+    time_left: str = "10s"
+
+
+@dataclass
+class FakeResumptionUpdate:
+    """Subconjunto de `LiveServerSessionResumptionUpdate`."""
+    new_handle: Optional[str] = None
+    resumable: bool = True
+
+
+@dataclass
+class FakeModalityTokenCount:
+    modality: str
+    token_count: int
+
+
+@dataclass
+class FakeUsageMetadata:
+    """Subconjunto de `UsageMetadata`: contexto atual por modalidade (custos aproximados do servidor)."""
+    prompt_token_count: int = 0
+    response_token_count: int = 0
+    prompt_tokens_details: List[FakeModalityTokenCount] = field(default_factory=list)
+
+
+@dataclass
+class FakeResponse:
+    """Mensagem do servidor no formato lido por `_process_gemini_responses`."""
+    data: Optional[bytes] = None
+    text: Optional[str] = None
+    function_call: Any = None
+    tool_call: Any = None
+    tool_call_cancellation: Any = None
+    server_content: Any = None
+    go_away: Any = None
+    session_resumption_update: Any = None
+    usage_metadata: Any = None
+
+
+@dataclass
+class RecordedSend:
+    """Um envio do cliente registrado pela sessão falsa."""
+    method: str # "send", "send_realtime_input", "send_client_content", "send_tool_response"
+    kind: str # "audio", "video", "text", "activity_start", "activity_end", "audio_stream_end", "tool_response", "content"
+    turn_complete: bool
+    size: int
+    at: float
+
+
+class FakeLiveSession:
+    """
+    Sessão Live local que implementa a mesma superfície usada pelo AudioLoop
+    (`send`, `send_realtime_input`, `send_client_content`, `send_tool_response`,
+    `receive`, `close`) e registra tudo o que foi enviado, para testar a
+    semântica de turnos sem rede.
+
+    Com `reply_audio_s > 0`, cada fim de turno do usuário (texto com
+    turn_complete ou activity_end) recebe uma resposta de áudio sintética após
+    `reply_delay_s`. Um activity_start enquanto a resposta ainda estaria tocando
+    a interrompe com `server_content.interrupted`, como o servidor real.
+
+    Retomada: com `issue_handle`, a sessão manda um `session_resumption_update` ao
+    abrir e a cada fim de turno. `drop` simula a queda da conexão (envios e
+    `receive` passam a levantar `ConnectionError`); `go_away` avisa o fim da sessão.
+    """
+
+    def __init__(self, session_id: str, reply_audio_s: float = 0.0, reply_delay_s: float = 0.2,
+                 sample_rate: int = 24000, resumed: bool = False,
+                 issue_handle: Optional[Callable[[], str]] = None, drop_every_n_turns: int = 0,
+                 on_drop: Optional[Callable[["FakeLiveSession"], None]] = None):
+        self.session_id = session_id
+        self.reply_audio_s = reply_audio_s
+        self.reply_delay_s = reply_delay_s
+        self.sample_rate = sample_rate
+        self.resumed = resumed
+        self.issue_handle = issue_handle
+        self.drop_every_n_turns = drop_every_n_turns
+        self.on_drop = on_drop
+        self.sends: List[RecordedSend] = []
+        self.closed = False
+        self.dropped = False
+        self.user_turns = 0
+        self.pending_replies = 0 # Respostas agendadas e não entregues (herdadas por uma sessão retomada)
+        self._turns: "asyncio.Queue[Optional[List[FakeResponse]]]" = asyncio.Queue()
+        self._reply_tasks: List[asyncio.Task] = []
+        self._speaking_until: float = 0.0
+        self.interruptions_sent: int = 0
+
+    # --- Superfície do cliente ---
+
+    async def send(self, input: Any = None, end_of_turn: bool = False) -> None:
+        """Caminho legado `session.send(input=..., end_of_turn=...)`."""
+        self._check_open()
+        if isinstance(input, str):
+            kind, size = "text", len(input)
+        elif isinstance(input, dict) and "mime_type" in input:
+            kind = "audio" if str(input["mime_type"]).startswith("audio") else "video"
+            size = len(input.get("data") or b"")
+        else:
+            kind, size = "content", 0
+        self._record("send", kind, end_of_turn, size)
+
+    async def send_realtime_input(self, *, audio: Any = None, video: Any = None, media: Any = None,
+                                  text: Optional[str] = None, activity_start: Any = None,
+                                  activity_end: Any = None, audio_stream_end: Optional[bool] = None) -> None:
+        self._check_open()
+        if audio is not None:
+            self._record("send_realtime_input", "audio", False, len(getattr(audio, "data", b"") or b""))
+        if video is not None or media is not None:
+            blob = video if video is not None else media
+            self._record("send_realtime_input", "video", False, len(getattr(blob, "data", b"") or b""))
+        if text is not None:
+            self._record("send_realtime_input", "text", False, len(text))
+        if activity_start is not None:
+            self._record("send_realtime_input", "activity_start", False, 0)
+            self._interrupt_reply()
+        if activity_end is not None:
+            self._record("send_realtime_input", "activity_end", False, 0)
+            self._end_user_turn()
+        if audio_stream_end:
+            self._record("send_realtime_input", "audio_stream_end", False, 0)
+
+    async def send_client_content(self, *, turns: Any = None, turn_complete: bool = True) -> None:
+        self._check_open()
+        self._record("send_client_content", "text", turn_complete, len(str(turns or "")))
+        if turn_complete:
+            self._end_user_turn()
+
+    async def send_tool_response(self, *, function_responses: Any = None) -> None:
+        self._check_open()
+        count = len(function_responses) if isinstance(function_responses, (list, tuple)) else 1
+        self._record("send_tool_response", "tool_response", False, count)
+
+    async def receive(self) -> AsyncIterator[FakeResponse]:
+        """Entrega as mensagens de um turno do servidor, como o SDK; espera se não houver nenhum."""
+        turn = await self._turns.get()
+        if turn is None:
+            await self._turns.put(None) # Mantém o sinal de fechamento para chamadas seguintes
+            if self.dropped:
+                raise ConnectionError("Fake live connection lost")
+            return
+        for response in turn:
+            yield response
+
+    async def close(self) -> None:
+        if self.closed:
+            return
+        self.closed = True
+        for task in self._reply_tasks:
+            task.cancel()
+        await self._turns.put(None)
+
+    # --- Controle do teste ---
+
+    def drop(self) -> None:
+        """Simula a queda da conexão: as respostas agendadas ficam pendentes (para uma retomada)."""
+        if self.dropped or self.closed:
+            return
+        self.dropped = True
+        for task in self._reply_tasks:
+            if not task.done():
+                task.cancel()
+        self._turns.put_nowait(None)
+        logger.info(f"[FakeLive] Conexão da sessão {self.session_id} derrubada ({self.pending_replies} resposta(s) pendente(s)).")
+        if self.on_drop is not None:
+            self.on_drop(self)
+
+    def go_away(self, time_left_s: float = 10.0) -> None:
+        self.push_turn([FakeResponse(go_away=FakeGoAway(time_left=f"{time_left_s}s"))])
+
+    def push_turn(self, responses: List[FakeResponse]) -> None:
+        """Agenda um turno do servidor (ex.: chamada de ferramenta, go_away)."""
+        self._turns.put_nowait(list(responses))
+
+    def sends_of(self, kind: str) -> List[RecordedSend]:
+        return [s for s in self.sends if s.kind == kind]
+
+    def summary(self) -> Dict[str, Any]:
+        kinds: Dict[str, int] = {}
+        for s in self.sends:
+            kinds[s.kind] = kinds.get(s.kind, 0) + 1
+        return {
+            "session_id": self.session_id,
+            "sends_by_kind": kinds,
+            "turn_completions": sum(1 for s in self.sends if s.turn_complete),
+            "legacy_sends": sum(1 for s in self.sends if s.method == "send"),
+            "interruptions_sent": self.interruptions_sent,
+            "resumed": self.resumed,
+            "dropped": self.dropped,
+        }
+
+    def check_turn_semantics(self) -> List[str]:
+        """
+        Verifica a semântica de turnos dos envios registrados e devolve as violações:
+        mídia (áudio/vídeo) nunca fecha turno, e activity_start/activity_end alternam.
+        """
+        violations: List[str] = []
+        in_activity = False
+        for index, s in enumerate(self.sends):
+            if s.kind in ("audio", "video") and s.turn_complete:
+                violations.append(f"#{index}: {s.kind} enviado com fim de turno ({s.method}).")
+            if s.kind == "activity_start":
+                if in_activity:
+                    violations.append(f"#{index}: activity_start sem activity_end anterior.")
+                in_activity = True
+            elif s.kind == "activity_end":
+                if not in_activity:
+                    violations.append(f"#{index}: activity_end sem activity_start.")
+                in_activity = False
+        return violations
+
+    def _record(self, method: str, kind: str, turn_complete: bool, size: int) -> None:
+        self.sends.append(RecordedSend(method, kind, turn_complete, size, time.monotonic()))
+
+    def _check_open(self) -> None:
+        if self.dropped:
+            raise ConnectionError("Fake live connection lost")
+        if self.closed:
+            raise RuntimeError("LiveSession closed")
+
+    def _interrupt_reply(self) -> None:
+        pending = [task for task in self._reply_tasks if not task.done()]
+        if not pending and time.monotonic() >= self._speaking_until:
+            return
+        for task in pending:
+            task.cancel()
+        self.pending_replies = 0
+        self._speaking_until = 0.0
+        self.interruptions_sent += 1
+        self.push_turn([FakeResponse(server_content=FakeServerContent(interrupted=True))])
+
+    def _end_user_turn(self) -> None:
+        self.user_turns += 1
+        self._schedule_reply()
+        if self.drop_every_n_turns and self.user_turns % self.drop_every_n_turns == 0:
+            self.drop() # Queda logo após o fim da fala, antes da resposta
+
+    def _schedule_reply(self) -> None:
+        if self.reply_audio_s <= 0:
+            return
+        self.pending_replies += 1
+        self._reply_tasks.append(asyncio.get_running_loop().create_task(self._reply()))
+
+    def _resumption_update(self) -> List[FakeResponse]:
+        if self.issue_handle is None:
+            return []
+        return [FakeResponse(session_resumption_update=FakeResumptionUpdate(new_handle=self.issue_handle()))]
+
+    async def _reply(self) -> None:
+        await asyncio.sleep(self.reply_delay_s)
+        self.pending_replies -= 1
+        chunk_frames = self.sample_rate // 25 # 40 ms por mensagem
+        num_chunks = max(1, int(self.reply_audio_s * 25))
+        t = np.arange(chunk_frames) / self.sample_rate
+        tone = (np.sin(2 * np.pi * 440 * t) * 4000).astype(np.int16).tobytes()
+        self._speaking_until = time.monotonic() + num_chunks / 25.0
+        self.push_turn([FakeResponse(data=tone) for _ in range(num_chunks)]
+                       + [FakeResponse(server_content=FakeServerContent(turn_complete=True),
+                                       usage_metadata=self._usage(num_chunks / 25.0))]
+                       + self._resumption_update())
+
+    def _usage(self, reply_s: float) -> FakeUsageMetadata:
+        audio_bytes = sum(s.size for s in self.sends if s.kind == "audio")
+        by_modality = {
+            "AUDIO": int(audio_bytes / 32000.0 * 32), # PCM16 a 16 kHz, 32 tokens/s
+            "IMAGE": 258 * len(self.sends_of("video")),
+            "TEXT": sum(s.size for s in self.sends if s.kind == "text") // 4,
+        }
+        return FakeUsageMetadata(
+            prompt_token_count=sum(by_modality.values()),
+            response_token_count=int(reply_s * 32),
+            prompt_tokens_details=[FakeModalityTokenCount(m, count) for m, count in by_modality.items()]
+        )
+
+
+class _FakeLiveConnector:
+    def __init__(self, client: "FakeLiveClient"):
+        self._client = client
+
+    @contextlib.asynccontextmanager
+    async def connect(self, model: str = "", config: Any = None):
+        client = self._client
+        resumption = getattr(config, "session_resumption", None)
+        handle = getattr(resumption, "handle", None)
+        if handle and handle not in client.handles:
+            raise RuntimeError(f"Fake live: invalid session resumption handle '{handle}'")
+        resumed = bool(handle)
+        await asyncio.sleep(client.connect_delay_s + (0.0 if resumed else client.fresh_setup_s))
+        session = FakeLiveSession(
+            f"fake-{len(client.sessions) + 1}", resumed=resumed,
+            issue_handle=client.new_handle if resumption is not None else None,
+            on_drop=client._hand_over_pending,
+            **client.session_kwargs
+        )
+        client.sessions.append(session)
+        client.connect_configs.append(config)
+        logger.info(f"[FakeLive] Sessão {session.session_id} aberta (modelo: {model}, {'retomada' if resumed else 'nova'}).")
+        session.push_turn(session._resumption_update())
+        if resumed:
+            for previous in client.sessions[:-1]:
+                if previous.dropped and previous.pending_replies:
+                    client._carry_pending(previous, session)
+        try:
+            yield session
+        finally:
+            await session.close()
+            logger.info(f"[FakeLive] Sessão {session.session_id} fechada: {session.summary()}")
+
+
+class FakeLiveClient:
+    """Substituto de `GEMINI_CLIENT` com `client.aio.live.connect(...)` servido pela `FakeLiveSession`."""
+
+    def __init__(self, connect_delay_s: float = 0.05, fresh_setup_s: float = 0.0, **session_kwargs: Any):
+        """
+        Args:
+            connect_delay_s (float): Atraso de toda conexão (handshake).
+            fresh_setup_s (float): Atraso extra de uma sessão nova (sem handle), que o
+                servidor real gasta processando a instrução do sistema e as ferramentas.
+            **session_kwargs: Repassados a cada `FakeLiveSession`.
+        """
+        self.connect_delay_s = connect_delay_s
+        self.fresh_setup_s = fresh_setup_s
+        self.session_kwargs = session_kwargs
+        self.sessions: List[FakeLiveSession] = []
+        self.connect_configs: List[Any] = []
+        self.handles: List[str] = []
+        live = type("live", (), {})()
+        live.connect = _FakeLiveConnector(self).connect
+        self.aio = type("aio", (), {})()
+        self.aio.live = live
+
+    def new_handle(self) -> str:
+        self.handles.append(f"fake-handle-{len(self.handles) + 1}")
+        return self.handles[-1]
+
+    def _carry_pending(self, source: FakeLiveSession, target: FakeLiveSession) -> None:
+        # O contexto retomado inclui o turno do usuário ainda sem resposta
+        for _ in range(source.pending_replies):
+            target._schedule_reply()
+        source.pending_replies = 0
+
+    def _hand_over_pending(self, dropped: FakeLiveSession) -> None:
+        """Uma sessão retomada já aberta (reserva) herda as respostas pendentes da que caiu."""
+        for session in reversed(self.sessions):
+            if session is not dropped and session.resumed and not (session.closed or session.dropped):
+                self._carry_pending(dropped, session)
+                return
+
+    def report(self) -> Dict[str, Any]:
+        """Resumo de todas as sessões e violações de semântica de turnos encontradas."""
+        return {
+            "sessions": [s.summary() for s in self.sessions],
+            "violations": [v for s in self.sessions for v in s.check_turn_semantics()],
+        }
+
+
+async def measure_reconnect_first_audio(resume: bool, trials: int = 5, connect_delay_s: float = 0.05,
+                                        fresh_setup_s: float = 0.5, reply_delay_s: float = 0.2) -> Dict[str, Any]:
+    """
+    Tempo entre uma queda da conexão logo após o fim de uma fala do usuário e o primeiro
+    áudio da resposta, contra a sessão falsa:
+    - resume=True: reconecta com o handle de retomada; a resposta ao turno pendente
+      chega na sessão retomada.
+    - resume=False: sessão nova (paga `fresh_setup_s`) e o turno perdido precisa ser
+      repetido (aqui, imediatamente — o melhor caso sem retomada).
+    """
+    from types import SimpleNamespace
+
+    client = FakeLiveClient(connect_delay_s=connect_delay_s, fresh_setup_s=fresh_setup_s,
+                            reply_audio_s=0.2, reply_delay_s=reply_delay_s)
+    handle: Optional[str] = None
+    samples_ms: List[float] = []
+
+    def _config() -> Any:
+        return SimpleNamespace(session_resumption=SimpleNamespace(handle=handle if resume else None))
+
+    async def _first_audio(session: FakeLiveSession) -> None:
+        nonlocal handle
+        while True:
+            async for response in session.receive():
+                if response.session_resumption_update is not None:
+                    handle = response.session_resumption_update.new_handle
+                if response.data:
+                    return
+
+    async def _handles(session: FakeLiveSession) -> None:
+        nonlocal handle
+        async for response in session.receive():
+            if response.session_resumption_update is not None:
+                handle = response.session_resumption_update.new_handle
+
+    for _ in range(trials):
+        async with client.aio.live.connect(config=_config()) as session:
+            await _handles(session) # Handle inicial
+            await session.send_realtime_input(activity_start=True)
+            await session.send_realtime_input(activity_end=True)
+            session.drop()
+            lost_at = time.monotonic()
+        async with client.aio.live.connect(config=_config()) as session:
+            if not resume:
+                await session.send_realtime_input(activity_start=True)
+                await session.send_realtime_input(activity_end=True)
+            await _first_audio(session)
+            samples_ms.append((time.monotonic() - lost_at) * 1000.0)
+    values = np.array(samples_ms)
+    return {
+        "resume": resume,
+        "trials": trials,
+        "first_audio_p50_ms": round(float(np.percentile(values, 50)), 1),
+        "first_audio_max_ms": round(float(values.max()), 1),
+        "resumed_sessions": sum(1 for s in client.sessions if s.resumed),
+    }
+
+
+if __name__ == "__main__":
+    print("com retomada:", asyncio.run(measure_reconnect_first_audio(resume=True)))
+    print("sessão nova: ", asyncio.run(measure_reconnect_first_audio(resume=False)))
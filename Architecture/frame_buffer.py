@@ -0,0 +1,179 @@
+# trackie_app/frame_buffer.py
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, List, Optional
+
+import cv2
+import numpy as np
+
+from .logger_config import get_logger
+
+logger = get_logger(__name__)
+
+
+@dataclass
+class FrameRef:
+    """Referência a um slot do anel. Enquanto não for liberada, o slot não é sobrescrito."""
+    seq: int
+    index: int
+    frame: np.ndarray
+
+
+class FrameRingBuffer:
+    """
+    Anel pequeno de buffers de frame pré-alocados, com um único escritor
+    (a thread de captura) e vários consumidores que sempre pegam o frame mais novo.
+
+    O escritor nunca grava sobre o slot mais recente nem sobre slots "presos"
+    (pinned) por um consumidor. Frames intermediários que ninguém pegou a tempo
+    são simplesmente sobrescritos, o que descarta frames velhos sem fila.
+    """
+
+    def __init__(self, num_slots: int = 6):
+        if num_slots < 3:
+            raise ValueError("FrameRingBuffer precisa de pelo menos 3 slots.")
+        self.num_slots: int = num_slots
+        self._slots: List[Optional[np.ndarray]] = [None] * num_slots
+        self._pins: List[int] = [0] * num_slots
+        self._lock = threading.Lock()
+        self._latest_index: int = -1
+        self._latest_seq: int = 0 # 0 = nenhum frame publicado ainda
+        self.frames_written: int = 0
+        self.frames_without_free_slot: int = 0
+
+    def preallocate(self, shape: tuple, dtype=np.uint8) -> None:
+        """Aloca todos os slots vazios (ou de formato diferente) com o formato informado."""
+        with self._lock:
+            for i, slot in enumerate(self._slots):
+                if (slot is None or slot.shape != shape or slot.dtype != dtype) and self._pins[i] == 0:
+                    self._slots[i] = np.empty(shape, dtype=dtype)
+
+    def acquire_write_slot(self) -> Optional[int]:
+        """
+        Escolhe o próximo slot livre para escrita (não é o mais recente e não está preso).
+
+        Returns:
+            Optional[int]: Índice do slot ou None se todos estiverem ocupados.
+        """
+        with self._lock:
+            for step in range(1, self.num_slots + 1):
+                candidate = (self._latest_index + step) % self.num_slots
+                if candidate != self._latest_index and self._pins[candidate] == 0:
+                    return candidate
+            self.frames_without_free_slot += 1
+            return None
+
+    def slot_buffer(self, index: int) -> Optional[np.ndarray]:
+        """Retorna o buffer pré-alocado do slot (ou None antes da pré-alocação)."""
+        return self._slots[index]
+
+    def commit(self, index: int, frame: np.ndarray) -> int:
+        """
+        Publica o slot recém-escrito como o frame mais recente.
+
+        Args:
+            index (int): Slot obtido por `acquire_write_slot`.
+            frame (np.ndarray): O frame escrito. Se o backend de captura realocou o
+                buffer (formato diferente), o novo array passa a ser o slot.
+
+        Returns:
+            int: O número de sequência do frame publicado.
+        """
+        with self._lock:
+            self._slots[index] = frame
+            self._latest_index = index
+            self._latest_seq += 1
+            self.frames_written += 1
+            return self._latest_seq
+
+    @property
+    def latest_seq(self) -> int:
+        return self._latest_seq
+
+    def acquire_latest(self) -> Optional[FrameRef]:
+        """
+        Prende e retorna o frame mais recente. Deve ser liberado com `release`.
+
+        Returns:
+            Optional[FrameRef]: Referência ao slot ou None se ainda não há frames.
+        """
+        with self._lock:
+            if self._latest_index < 0 or self._slots[self._latest_index] is None:
+                return None
+            self._pins[self._latest_index] += 1
+            return FrameRef(self._latest_seq, self._latest_index, self._slots[self._latest_index])
+
+    def release(self, ref: Optional[FrameRef]) -> None:
+        """Libera um slot preso por `acquire_latest`."""
+        if ref is None:
+            return
+        with self._lock:
+            if self._pins[ref.index] > 0:
+                self._pins[ref.index] -= 1
+
+
+class CameraCaptureThread(threading.Thread):
+    """
+    Thread dedicada que lê a câmera continuamente e escreve no `FrameRingBuffer`.
+
+    Ler na taxa nativa da câmera esvazia o buffer do driver, então os consumidores
+    (inferência YOLO, codificação JPEG) sempre enxergam o frame atual em vez de um
+    backlog de segundos.
+    """
+
+    def __init__(self, cap: cv2.VideoCapture, ring: FrameRingBuffer,
+                 on_frame: Optional[Callable[[int], None]] = None):
+        super().__init__(name="camera_capture_thread", daemon=True)
+        self.cap = cap
+        self.ring = ring
+        self.on_frame = on_frame
+        self.failed: bool = False
+        self._stop_requested = threading.Event()
+        self._preallocated = False
+
+    def stop(self) -> None:
+        self._stop_requested.set()
+
+    def run(self) -> None:
+        logger.info("Thread de captura da câmera iniciada.")
+        consecutive_failures = 0
+        while not self._stop_requested.is_set():
+            index = self.ring.acquire_write_slot()
+            if index is None:
+                # Todos os slots presos: descarta o frame só para não acumular no driver.
+                self.cap.grab()
+                continue
+
+            buffer = self.ring.slot_buffer(index)
+            try:
+                if buffer is not None:
+                    ret, frame = self.cap.read(buffer)
+                else:
+                    ret, frame = self.cap.read()
+            except cv2.error:
+                logger.exception("Erro do OpenCV ao ler frame da câmera.")
+                ret, frame = False, None
+
+            if not ret or frame is None:
+                consecutive_failures += 1
+                if not self.cap.isOpened():
+                    logger.error("Câmera fechada durante a captura. Encerrando thread de captura.")
+                    self.failed = True
+                    break
+                if consecutive_failures == 1 or consecutive_failures % 20 == 0:
+                    logger.warning(f"Falha ao ler frame da câmera ({consecutive_failures} consecutivas).")
+                time.sleep(0.05)
+                continue
+
+            consecutive_failures = 0
+            seq = self.ring.commit(index, frame)
+            if not self._preallocated:
+                self.ring.preallocate(frame.shape, frame.dtype)
+                self._preallocated = True
+            if self.on_frame:
+                try:
+                    self.on_frame(seq)
+                except Exception:
+                    logger.exception("Erro no callback de novo frame da câmera.")
+        logger.info("Thread de captura da câmera finalizada.")
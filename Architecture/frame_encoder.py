@@ -0,0 +1,223 @@
+# trackie_app/frame_encoder.py
+import base64
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+from .logger_config import get_logger
+
+logger = get_logger(__name__)
+
+try:
+    from turbojpeg import TurboJPEG, TJPF_BGR, TJSAMP_420
+    _TURBOJPEG_AVAILABLE = True
+except ImportError:
+    TurboJPEG = None
+    _TURBOJPEG_AVAILABLE = False
+
+
+@dataclass(frozen=True)
+class EncodeLevel:
+    """Um degrau da escada de qualidade: maior lado em pixels e qualidade JPEG."""
+    max_side: int
+    quality: int
+
+
+DEFAULT_LADDER: Tuple[EncodeLevel, ...] = (
+    EncodeLevel(1024, 50), # Equivalente ao caminho original (thumbnail 1024, qualidade 50)
+    EncodeLevel(768, 45),
+    EncodeLevel(512, 40),
+    EncodeLevel(384, 35),
+)
+
+
+class FrameEncoder:
+    """
+    Codifica frames BGR da câmera em JPEG direto do buffer, sem conversão para RGB
+    nem cópias via PIL/BytesIO. Usa libjpeg-turbo (PyTurboJPEG) quando instalado
+    e `cv2.imencode` caso contrário.
+
+    O redimensionamento escreve num buffer reaproveitado entre chamadas (um por
+    resolução de saída), e o degrau atual da escada de qualidade pode ser trocado
+    em tempo de execução (`set_level`, `step_down`, `step_up`).
+    """
+
+    def __init__(self, ladder: Sequence[EncodeLevel] = DEFAULT_LADDER, level: int = 0,
+                 prefer_turbojpeg: bool = True):
+        if not ladder:
+            raise ValueError("A escada de qualidade do codificador não pode ser vazia.")
+        self.ladder: List[EncodeLevel] = list(ladder)
+        self.level = max(0, min(level, len(self.ladder) - 1))
+        self._resize_buffers: Dict[Tuple[int, int], np.ndarray] = {}
+        self._turbo: Optional[Any] = None
+        if prefer_turbojpeg and _TURBOJPEG_AVAILABLE:
+            try:
+                self._turbo = TurboJPEG()
+            except Exception as e: # Biblioteca nativa ausente
+                logger.warning(f"PyTurboJPEG instalado mas libjpeg-turbo indisponível ({e}). Usando cv2.imencode.")
+        self._imencode_params = {}
+
+        # Estatísticas
+        self.frames_encoded: int = 0
+        self.bytes_encoded: int = 0
+        self.total_encode_s: float = 0.0
+
+    @property
+    def backend(self) -> str:
+        return "turbojpeg" if self._turbo is not None else "opencv"
+
+    @property
+    def current_level(self) -> EncodeLevel:
+        return self.ladder[self.level]
+
+    def set_level(self, level: int) -> None:
+        self.level = max(0, min(level, len(self.ladder) - 1))
+
+    def step_down(self) -> bool:
+        """Desce um degrau (menor resolução/qualidade). Retorna False se já está no último."""
+        if self.level + 1 >= len(self.ladder):
+            return False
+        self.level += 1
+        return True
+
+    def step_up(self) -> bool:
+        """Sobe um degrau (maior resolução/qualidade). Retorna False se já está no primeiro."""
+        if self.level == 0:
+            return False
+        self.level -= 1
+        return True
+
+    def encode(self, frame_bgr: np.ndarray, level: Optional[int] = None) -> bytes:
+        """
+        Redimensiona (só para baixo, mantendo a proporção) e codifica o frame em JPEG.
+        Esta função é BLOQUEANTE e deve ser chamada com `asyncio.to_thread`.
+
+        Args:
+            frame_bgr (np.ndarray): Frame BGR uint8 (não é modificado).
+            level (Optional[int]): Degrau da escada a usar (padrão: o degrau atual).
+
+        Returns:
+            bytes: Imagem JPEG.
+        """
+        started = time.monotonic()
+        step = self.ladder[self.level if level is None else max(0, min(level, len(self.ladder) - 1))]
+        resized = self._resize(frame_bgr, step.max_side)
+
+        if self._turbo is not None:
+            jpeg = self._turbo.encode(resized, quality=step.quality, pixel_format=TJPF_BGR,
+                                      jpeg_subsample=TJSAMP_420)
+        else:
+            params = self._imencode_params.get(step.quality)
+            if params is None:
+                params = [int(cv2.IMWRITE_JPEG_QUALITY), step.quality]
+                self._imencode_params[step.quality] = params
+            ok, encoded = cv2.imencode(".jpg", resized, params)
+            if not ok:
+                raise RuntimeError("cv2.imencode falhou ao codificar o frame.")
+            jpeg = encoded.tobytes()
+
+        self.frames_encoded += 1
+        self.bytes_encoded += len(jpeg)
+        self.total_encode_s += time.monotonic() - started
+        return jpeg
+
+    def encode_part(self, frame_bgr: np.ndarray, level: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Codifica o frame no formato de parte de mídia enviado ao Gemini. Os bytes JPEG vão
+        crus: o SDK faz a codificação base64 na serialização, sem uma cópia extra aqui.
+        """
+        return {"mime_type": "image/jpeg", "data": self.encode(frame_bgr, level)}
+
+    def stats(self) -> Dict[str, Any]:
+        frames = self.frames_encoded
+        return {
+            "backend": self.backend,
+            "level": self.level,
+            "frames_encoded": frames,
+            "avg_kb": round(self.bytes_encoded / frames / 1024.0, 1) if frames else 0.0,
+            "avg_encode_ms": round(self.total_encode_s / frames * 1000.0, 2) if frames else 0.0,
+        }
+
+    def _resize(self, frame_bgr: np.ndarray, max_side: int) -> np.ndarray:
+        height, width = frame_bgr.shape[:2]
+        scale = max_side / float(max(height, width))
+        if scale >= 1.0:
+            return frame_bgr # Como o thumbnail do PIL, nunca aumenta a imagem
+        size = (max(1, int(width * scale)), max(1, int(height * scale)))
+        key = (size[1], size[0])
+        buffer = self._resize_buffers.get(key)
+        if buffer is None or buffer.shape[2:] != frame_bgr.shape[2:]:
+            buffer = np.empty((size[1], size[0]) + frame_bgr.shape[2:], dtype=frame_bgr.dtype)
+            self._resize_buffers[key] = buffer
+        cv2.resize(frame_bgr, size, dst=buffer, interpolation=cv2.INTER_AREA)
+        return buffer
+
+
+def encode_with_pil(frame_bgr: np.ndarray, max_side: int = 1024, quality: int = 50) -> Dict[str, Any]:
+    """Caminho de codificação original (BGR -> RGB -> PIL -> BytesIO -> base64), usado como referência."""
+    import io
+    from PIL import Image
+
+    frame_rgb = cv2.cvtColor(frame_bgr, cv2.COLOR_BGR2RGB)
+    img = Image.fromarray(frame_rgb)
+    img.thumbnail((max_side, max_side))
+    image_io = io.BytesIO()
+    img.save(image_io, format="jpeg", quality=quality)
+    image_io.seek(0)
+    # Inclui o custo do base64 do caminho original, mas mede o tamanho do JPEG
+    base64.b64encode(image_io.getvalue())
+    return {"mime_type": "image/jpeg", "data": image_io.getvalue()}
+
+
+def benchmark_encoders(frames_bgr: List[np.ndarray], iterations: int = 50) -> Dict[str, Dict[str, float]]:
+    """
+    Micro-benchmark: caminho PIL original vs `FrameEncoder` (cv2 e, se houver, turbojpeg)
+    em cada degrau da escada padrão. Retorna ms por frame e KB médio por frame.
+    """
+    def run(encode_fn) -> Dict[str, float]:
+        encode_fn(frames_bgr[0]) # Aquecimento
+        total_bytes = 0
+        started = time.perf_counter()
+        for i in range(iterations):
+            total_bytes += len(encode_fn(frames_bgr[i % len(frames_bgr)])["data"])
+        elapsed = time.perf_counter() - started
+        return {"ms_per_frame": round(elapsed / iterations * 1000.0, 2),
+                "kb_per_frame": round(total_bytes / iterations / 1024.0, 1)}
+
+    results = {"pil_1024_q50": run(encode_with_pil)}
+    backends = [False] + ([True] if _TURBOJPEG_AVAILABLE else [])
+    for use_turbo in backends:
+        encoder = FrameEncoder(prefer_turbojpeg=use_turbo)
+        for index, step in enumerate(encoder.ladder):
+            results[f"{encoder.backend}_{step.max_side}_q{step.quality}"] = run(
+                lambda frame: encoder.encode_part(frame, level=index))
+    return results
+
+
+if __name__ == "__main__":
+    import argparse
+    from .app_config import CAMERA_INDEX
+
+    parser = argparse.ArgumentParser(description="Micro-benchmark de codificação JPEG dos frames da câmera.")
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--synthetic", action="store_true", help="Usa frames sintéticos 1280x720 em vez da câmera.")
+    args = parser.parse_args()
+
+    frames: List[np.ndarray] = []
+    if not args.synthetic:
+        cap = cv2.VideoCapture(CAMERA_INDEX)
+        for _ in range(10):
+            ok, frame = cap.read()
+            if ok:
+                frames.append(frame)
+        cap.release()
+    if not frames:
+        rng = np.random.default_rng(0)
+        base = cv2.GaussianBlur(rng.integers(0, 255, (720, 1280, 3), dtype=np.uint8), (15, 15), 0)
+        frames = [np.roll(base, shift * 8, axis=1) for shift in range(10)]
+
+    for name, result in benchmark_encoders(frames, args.iterations).items():
+        print(f"{name:>24}: {result['ms_per_frame']:7.2f} ms/frame  {result['kb_per_frame']:7.1f} KB/frame")
@@ -39,6 +39,7 @@ from .utility_functions import play_wav_file_sync # Supondo que este módulo exi
 from .models import ( # Supondo que este módulo exista e funcione
     load_yolo_model, preload_deepface_models, load_midas_model, ensure_deepface_db_path
 )
+from .detections import FrameDetections
 
 # Importar DeepFace dinamicamente ou condicionalmente se for um problema
 try:
@@ -49,8 +50,6 @@ except ImportError:
 
 
 logger = get_logger(__name__)
-from .audio_loop import AudioLoop
-print("audioloop importada para function calling")
 
 
 class Function_Calling:
@@ -311,14 +310,14 @@ class Function_Calling:
             logger.exception("[MiDaS Tool] Erro durante a inferência MiDaS.")
             return None
 
-    def _find_best_yolo_match(self, object_type_query: str, yolo_results_current_frame: List[Any]) -> Optional[Tuple[Dict[str, int], float, str]]:
+    def _find_best_yolo_match(self, object_type_query: str, detections: Optional[FrameDetections]) -> Optional[Tuple[Dict[str, int], float, str]]:
         """
-        Encontra a melhor correspondência YOLO para um tipo de objeto nos resultados atuais.
-        Esta função é relativamente rápida, mas acessa `self.yolo_model.names`.
+        Encontra a melhor correspondência YOLO para um tipo de objeto nas detecções atuais.
+        A busca é uma máscara por classe seguida de argmax sobre as confianças.
 
         Args:
             object_type_query (str): O tipo de objeto a ser procurado (ex: "copo", "celular").
-            yolo_results_current_frame (List[Any]): Os resultados da predição YOLO para o frame atual.
+            detections (Optional[FrameDetections]): As detecções YOLO do frame atual.
 
         Returns:
             Optional[Tuple[Dict[str, int], float, str]]:
@@ -327,49 +326,17 @@ class Function_Calling:
                 - Nome da classe detectada.
                 Retorna None se nenhuma correspondência for encontrada ou se o modelo YOLO não estiver disponível.
         """
-        if not self.yolo_model or not yolo_results_current_frame:
-            # logger.debug(f"[YOLO Match] Modelo YOLO ou resultados não disponíveis para encontrar '{object_type_query}'.")
+        if not self.class_lookup or detections is None or len(detections) == 0:
             return None
 
-        best_match_info: Optional[Tuple[Dict[str, int], float, str]] = None
-        highest_confidence = -1.0
-        
-        # Mapeia o tipo de objeto consultado para as classes YOLO reais
+        # Mapeia o tipo de objeto consultado para os ids de classe YOLO (índice pré-compilado)
         # Ex: "celular" pode mapear para "cell phone"
-        target_yolo_class_names = YOLO_CLASS_MAP.get(object_type_query.lower(), [object_type_query.lower()])
-        # logger.debug(f"[YOLO Match] Procurando por classes YOLO: {target_yolo_class_names} para query '{object_type_query}'.")
-
-        for result_item in yolo_results_current_frame: # Iterar sobre cada resultado (geralmente um por imagem)
-            if not hasattr(result_item, 'boxes') or not result_item.boxes:
-                continue
-
-            for box in result_item.boxes:
-                if not (hasattr(box, 'cls') and hasattr(box, 'conf') and hasattr(box, 'xyxy') and \
-                        box.cls.nelement() > 0 and box.conf.nelement() > 0 and box.xyxy.nelement() >= 4):
-                    continue # Box inválido ou sem informações suficientes
+        target_class_ids = self.class_lookup.class_ids_for_query(object_type_query)
 
-                class_id = int(box.cls[0])
-                confidence = float(box.conf[0])
-                
-                if class_id < len(self.yolo_model.names):
-                    detected_class_name = self.yolo_model.names[class_id]
-                else:
-                    # logger.warning(f"[YOLO Match] ID de classe {class_id} fora do intervalo de nomes do modelo YOLO.")
-                    continue # ID de classe inválido
-
-                if detected_class_name in target_yolo_class_names:
-                    if confidence > highest_confidence:
-                        highest_confidence = confidence
-                        coords = list(map(int, box.xyxy[0]))
-                        bbox = {'x1': coords[0], 'y1': coords[1], 'x2': coords[2], 'y2': coords[3]}
-                        best_match_info = (bbox, confidence, detected_class_name)
-                        # logger.debug(f"[YOLO Match] Novo melhor match para '{object_type_query}': {detected_class_name} ({confidence:.2f}) at {bbox}")
-        
-        # if best_match_info:
-        #     logger.info(f"[YOLO Match] Melhor correspondência para '{object_type_query}': {best_match_info[2]} com conf {best_match_info[1]:.2f}.")
-        # else:
-        #     logger.info(f"[YOLO Match] Nenhuma correspondência encontrada para '{object_type_query}' nas classes {target_yolo_class_names}.")
-        return best_match_info
+        best_index = detections.best_index(detections.mask_for_class_ids(target_class_ids))
+        if best_index is None:
+            return None
+        return detections.bbox_dict(best_index), float(detections.conf[best_index]), detections.class_name(best_index)
 
     def _estimate_direction_from_bbox(self, bbox: Dict[str, int], frame_width: int) -> str:
         """
@@ -396,68 +363,42 @@ class Function_Calling:
         else:
             return "à sua frente"
 
-    def _check_if_object_is_on_surface(self, target_bbox: Dict[str, int], yolo_results_current_frame: List[Any]) -> bool:
+    def _check_if_object_is_on_surface(self, target_bbox: Dict[str, int], detections: Optional[FrameDetections]) -> bool:
         """
         Verifica se o objeto (target_bbox) parece estar sobre uma superfície (mesa, bancada, etc.)
         detectada pelo YOLO no mesmo frame.
 
         Args:
             target_bbox (Dict[str, int]): Bounding box do objeto de interesse.
-            yolo_results_current_frame (List[Any]): Resultados YOLO do frame atual.
+            detections (Optional[FrameDetections]): Detecções YOLO do frame atual.
 
         Returns:
             bool: True se o objeto parece estar sobre uma superfície, False caso contrário.
         """
-        if not self.yolo_model or not yolo_results_current_frame:
+        if not self.class_lookup or detections is None or len(detections) == 0:
             return False
 
-        # Nomes de classes YOLO que representam superfícies
-        surface_class_keys = ["mesa", "mesa de jantar", "bancada", "prateleira", "escrivaninha", "cama"] # Adicionado "desk", "bed"
-        surface_yolo_target_names = []
-        for key in surface_class_keys:
-            surface_yolo_target_names.extend(YOLO_CLASS_MAP.get(key, [])) 
-        surface_yolo_target_names = list(set(surface_yolo_target_names)) # Remove duplicatas
-
-        if not surface_yolo_target_names:
-            # logger.debug("[Surface Check] Nenhuma classe YOLO de superfície definida no YOLO_CLASS_MAP.")
+        # Ids de classes YOLO que representam superfícies (SURFACE_CLASS_KEYS, pré-compilados)
+        surface_mask = detections.mask_for_class_ids(self.class_lookup.surface_class_ids)
+        if not surface_mask.any():
             return False
 
         target_bottom_y = target_bbox['y2']
         target_center_x = (target_bbox['x1'] + target_bbox['x2']) / 2.0
+        surfaces = detections.xyxy[surface_mask].astype(int)
+        s_x1, s_y1, s_x2 = surfaces[:, 0], surfaces[:, 1], surfaces[:, 2]
 
-        for result_item in yolo_results_current_frame:
-            if not hasattr(result_item, 'boxes') or not result_item.boxes:
-                continue
-            for box in result_item.boxes:
-                if not (hasattr(box, 'cls') and hasattr(box, 'xyxy') and \
-                        box.cls.nelement() > 0 and box.xyxy.nelement() >= 4):
-                    continue
+        # Lógica de alinhamento:
+        # 1. Objeto horizontalmente sobre a superfície? (centro do objeto dentro da largura da superfície)
+        is_horizontally_aligned = (s_x1 < target_center_x) & (target_center_x < s_x2)
 
-                class_id = int(box.cls[0])
-                if class_id >= len(self.yolo_model.names): continue
-                
-                detected_class_name = self.yolo_model.names[class_id]
+        # 2. Objeto verticalmente próximo ao topo da superfície?
+        #    A base do objeto (target_bottom_y) deve estar um pouco acima ou sobre o topo da superfície (s_y1).
+        y_tolerance_pixels = 30 # Ajustável
+        is_vertically_aligned = ((s_y1 - y_tolerance_pixels) < target_bottom_y) & (target_bottom_y < (s_y1 + y_tolerance_pixels * 1.5))
+                               # (permite que o objeto esteja um pouco "dentro" da superfície ou flutuando um pouco acima)
 
-                if detected_class_name in surface_yolo_target_names:
-                    s_coords = list(map(int, box.xyxy[0]))
-                    s_x1, s_y1, s_x2, s_y2 = s_coords[0], s_coords[1], s_coords[2], s_coords[3]
-
-                    # Lógica de alinhamento:
-                    # 1. Objeto horizontalmente sobre a superfície? (centro do objeto dentro da largura da superfície)
-                    is_horizontally_aligned = (s_x1 < target_center_x < s_x2)
-                    
-                    # 2. Objeto verticalmente próximo ao topo da superfície?
-                    #    (base do objeto está perto do topo da superfície)
-                    #    y_tolerance_pixels define o quão "próximo" é aceitável.
-                    #    A base do objeto (target_bottom_y) deve estar um pouco acima ou sobre o topo da superfície (s_y1).
-                    y_tolerance_pixels = 30 # Ajustável
-                    is_vertically_aligned = (s_y1 - y_tolerance_pixels) < target_bottom_y < (s_y1 + y_tolerance_pixels * 1.5)
-                                           # (permite que o objeto esteja um pouco "dentro" da superfície ou flutuando um pouco acima)
-
-                    if is_horizontally_aligned and is_vertically_aligned:
-                        # logger.debug(f"[Surface Check] Objeto em {target_bbox} parece estar na superfície '{detected_class_name}' em {s_coords}.")
-                        return True
-        return False
+        return bool((is_horizontally_aligned & is_vertically_aligned).any())
 
     def _handle_find_object_and_estimate_distance(self, object_description: str, object_type: str) -> str:
         """
@@ -475,13 +416,17 @@ class Function_Calling:
         start_time = time.time()
 
         current_frame_bgr: Optional[np.ndarray] = None
-        yolo_results_for_frame: Optional[List[Any]] = None
+        detections_for_frame: Optional[FrameDetections] = None
+        tracked_detections: Optional[FrameDetections] = None
         frame_height, frame_width = 0, 0
 
         with self.frame_lock:
             if self.latest_bgr_frame is not None:
                 current_frame_bgr = self.latest_bgr_frame.copy()
-                yolo_results_for_frame = self.latest_yolo_results # Pode ser None se YOLO falhou ou não rodou ainda
+                detections_for_frame = self.latest_detections # Pode ser None se YOLO falhou ou não rodou ainda
+                if self.tracker is not None and self.yolo_engine:
+                    # Tracks que o detector está vendo agora (sem os só propagados), menos ruidoso que um único frame
+                    tracked_detections = self.tracker.as_detections(self.yolo_engine.names)
                 if current_frame_bgr is not None: # Checagem adicional de segurança
                     frame_height, frame_width, _ = current_frame_bgr.shape
         
@@ -489,30 +434,38 @@ class Function_Calling:
             logger.warning("[Find Object Tool] Nenhum frame de câmera válido disponível.")
             return f"{self.trckuser}, não estou enxergando nada no momento para localizar o {object_description}."
 
-        if not yolo_results_for_frame:
+        if detections_for_frame is None:
             logger.warning("[Find Object Tool] Nenhum resultado YOLO disponível para o frame atual. Tentando rodar YOLO sob demanda.")
             # Tenta rodar YOLO se não houver resultados (pode acontecer se get_frames estiver lento ou YOLO desabilitado)
-            if self.yolo_model:
+            if self.yolo_engine:
                 try:
                     frame_rgb_temp = cv2.cvtColor(current_frame_bgr, cv2.COLOR_BGR2RGB)
-                    yolo_results_for_frame = self.yolo_model.predict(frame_rgb_temp, verbose=False, conf=YOLO_CONFIDENCE_THRESHOLD)
+                    # Passa pelo motor de inferência, que junta este frame ao lote da câmera
+                    results = self.yolo_engine.predict(frame_rgb_temp, timeout=10.0)
+                    detections_for_frame = FrameDetections.from_results(results, self.yolo_engine.names)
                     logger.info("[Find Object Tool] YOLO executado sob demanda.")
                 except Exception:
                     logger.exception("[Find Object Tool] Falha ao executar YOLO sob demanda.")
-                    yolo_results_for_frame = None # Garante que é None
-            if not yolo_results_for_frame: # Se ainda não há resultados
+                    detections_for_frame = None # Garante que é None
+            if detections_for_frame is None: # Se ainda não há resultados
                  return f"{self.trckuser}, não consegui processar a imagem a tempo para encontrar o {object_description}."
 
 
-        # Tenta encontrar o objeto usando o object_type fornecido pelo Gemini
-        best_yolo_match = self._find_best_yolo_match(object_type, yolo_results_for_frame)
-
-        # Fallback: se não encontrou com object_type, tenta com a última palavra da descrição
-        if not best_yolo_match and object_description:
-            last_word_in_description = object_description.split(" ")[-1].lower()
-            if last_word_in_description != object_type.lower(): # Evita busca redundante
-                logger.info(f"[Find Object Tool] Nenhum '{object_type}' encontrado. Tentando fallback com a última palavra: '{last_word_in_description}'.")
-                best_yolo_match = self._find_best_yolo_match(last_word_in_description, yolo_results_for_frame)
+        # Tenta primeiro os tracks suavizados e depois as detecções cruas do último frame
+        best_yolo_match = None
+        for candidate_detections in (tracked_detections, detections_for_frame):
+            # Tenta encontrar o objeto usando o object_type fornecido pelo Gemini
+            best_yolo_match = self._find_best_yolo_match(object_type, candidate_detections)
+
+            # Fallback: se não encontrou com object_type, tenta com a última palavra da descrição
+            if not best_yolo_match and object_description:
+                last_word_in_description = object_description.split(" ")[-1].lower()
+                if last_word_in_description != object_type.lower(): # Evita busca redundante
+                    logger.info(f"[Find Object Tool] Nenhum '{object_type}' encontrado. Tentando fallback com a última palavra: '{last_word_in_description}'.")
+                    best_yolo_match = self._find_best_yolo_match(last_word_in_description, candidate_detections)
+            if best_yolo_match:
+                detections_for_frame = candidate_detections
+                break
         
         if not best_yolo_match:
             logger.info(f"[Find Object Tool] Objeto '{object_description}' (tipo: '{object_type}') não encontrado via YOLO.")
@@ -523,7 +476,7 @@ class Function_Calling:
 
         # Estimativas de direção e superfície
         direction_str = self._estimate_direction_from_bbox(target_bbox, frame_width)
-        is_on_surface = self._check_if_object_is_on_surface(target_bbox, yolo_results_for_frame)
+        is_on_surface = self._check_if_object_is_on_surface(target_bbox, detections_for_frame)
         surface_msg_part = "sobre uma superfície (como uma mesa ou prateleira)" if is_on_surface else ""
 
         # Estimativa de distância com MiDaS
@@ -606,12 +559,15 @@ class Function_Calling:
 
     #oooters
 
-    async def _execute_function_call(self, function_name: str, args: Dict[str, Any]) -> None:
+    async def _execute_function_call(self, function_name: str, args: Dict[str, Any],
+                                     call_id: Optional[str] = None) -> Optional[str]:
         """
-        Executa uma função local (tool) solicitada pelo Gemini.
+        Executa uma função local (tool) solicitada pelo Gemini e devolve o resultado a
+        enviar (None: nada a enviar agora, ex.: aguardando o nome da pessoa). Roda como
+        tarefa do `tool_executor`, que envia o resultado com `_send_tool_response`.
+        `call_id` é o id do servidor, guardado quando a resposta fica para depois.
         """
         logger.info(f"Processando Function Call: '{function_name}' com args: {args}")
-        self.thinking_event.set() # Sinaliza que o sistema está ocupado com uma tarefa local
 
         result_message_from_tool: Optional[str] = None
         tool_executed_successfully = False
@@ -621,6 +577,7 @@ class Function_Calling:
             logger.info(f"[Function Call] '{function_name}' chamado sem 'person_name'. Solicitando ao usuário.")
             self.awaiting_name_for_save_face = True
             self.pending_function_call_name = function_name # Guarda o nome da FC original
+            self.pending_function_call_id = call_id # E o id, para a resposta casar com a chamada
             
             # Pede ao Gemini (ou diretamente ao usuário via TTS) para fornecer o nome
             # Esta mensagem será falada pelo Gemini se a sessão estiver configurada para TTS.
@@ -635,21 +592,16 @@ class Function_Calling:
                     # Se falhar, reseta o estado para evitar ficar preso
                     self.awaiting_name_for_save_face = False
                     self.pending_function_call_name = None
+                    self.pending_function_call_id = None
                     result_message_from_tool = "Não consegui pedir o nome da pessoa." # Informa o Gemini sobre a falha
             else:
                 logger.warning("Sessão Gemini inativa. Não é possível solicitar nome para save_known_face.")
                 result_message_from_tool = "Sessão inativa, não pude pedir o nome."
             
             # Neste ponto, a execução da FC original é adiada. O nome virá em uma próxima mensagem do usuário.
-            # O `thinking_event` será limpo quando o nome for recebido e a função real for chamada.
             # Não enviamos FunctionResponse aqui; esperamos a resposta do usuário.
-            # O `thinking_event` é limpo aqui porque a "ação" imediata (pedir nome) terminou.
-            # Ele será setado novamente quando o nome for recebido e a função real for chamada.
-            if not result_message_from_tool: # Se o pedido de nome foi enviado com sucesso
-                 self.thinking_event.clear() # Permite que o Gemini responda
-                 return # Sai para aguardar o nome
-            # Se houve erro ao pedir nome, `result_message_from_tool` terá uma mensagem de erro.
-            # Prossegue para enviar essa falha como FunctionResponse.
+            # Se o pedido de nome foi enviado, não há resposta agora; se falhou, a falha vira a FunctionResponse.
+            return result_message_from_tool
 
         elif self.awaiting_name_for_save_face and self.pending_function_call_name:
             # Este bloco é chamado quando o Gemini envia o nome fornecido pelo usuário
@@ -745,29 +697,47 @@ class Function_Calling:
                 logger.exception(f"Erro ao executar handler para ferramenta '{function_name}'.")
                 result_message_from_tool = f"Ocorreu um erro interno ao processar a função {function_name}."
 
-        # Envia o resultado da função de volta para o Gemini
-        if result_message_from_tool is not None and self.gemini_session:
-            logger.info(f"[Function Call] Resultado da ferramenta '{function_name}': '{result_message_from_tool}'")
-            try:
-                function_response_content = Content(
-                    role="tool", # Papel correto para respostas de função
-                    parts=[Part.from_function_response(
-                        name=function_name, # Nome da função original que foi chamada
-                        response={"result": Value(string_value=str(result_message_from_tool))} # Resultado como string
-                    )]
-                )
-                await self.gemini_session.send(input=function_response_content) # Não deve ter end_of_turn=True
-                logger.info(f"FunctionResponse para '{function_name}' enviado para Gemini.")
-            except Exception:
-                logger.exception(f"Erro ao enviar FunctionResponse para '{function_name}' ao Gemini.")
-                # Se o envio da FunctionResponse falhar, o Gemini pode ficar esperando.
-                # Pode ser necessário um tratamento mais robusto aqui, como tentar fechar e reabrir a sessão.
-        elif not self.gemini_session:
-            logger.warning(f"Sessão Gemini inativa. Não foi possível enviar resultado da função '{function_name}'.")
-
-        if self.thinking_event.is_set():
-            self.thinking_event.clear()
         logger.info(f"Processamento da Function Call '{function_name}' concluído.")
+        return result_message_from_tool
+
+    async def _send_function_response(self, function_name: str, result: str, call_id: Optional[str]) -> None:
+        """
+        Envia uma FunctionResponse pela sessão atual; levanta a exceção se o envio falhar.
+        Chamadas do `tool_call` do servidor (com id) respondem por `send_tool_response`;
+        o caminho legado (`function_call` sem id) usa `send` com um Content de papel "tool".
+        """
+        if call_id is not None:
+            await self.gemini_session.send_tool_response(function_responses=[genai_types.FunctionResponse(
+                id=call_id, name=function_name, response={"result": result}
+            )])
+        else:
+            await self.gemini_session.send(input=Content(
+                role="tool", # Papel correto para respostas de função
+                parts=[Part.from_function_response(
+                    name=function_name, # Nome da função original que foi chamada
+                    response={"result": Value(string_value=result)} # Resultado como string
+                )]
+            )) # Não deve ter end_of_turn=True
+
+    async def _send_tool_response(self, function_name: str, result: str, call_id: Optional[str] = None) -> None:
+        """Envia o resultado de uma ferramenta ao Gemini; se não der, guarda para a sessão retomada."""
+        result = str(result)
+        if not self.gemini_session:
+            logger.warning(f"Sessão Gemini inativa. Resultado da função '{function_name}' será enviado se a sessão for retomada.")
+            self.unsent_tool_responses.append((function_name, result, call_id))
+            return
+        logger.info(f"[Function Call] Resultado da ferramenta '{function_name}': '{result}'")
+        if self.recorder:
+            self.recorder.record_event("tool_response", {"name": function_name, "id": call_id, "result": result})
+        try:
+            await self._send_function_response(function_name, result, call_id)
+        except Exception:
+            logger.exception(f"Erro ao enviar FunctionResponse para '{function_name}' ao Gemini.")
+            # Se o envio da FunctionResponse falhar, o Gemini fica esperando: reenviada se a sessão for retomada
+            self.unsent_tool_responses.append((function_name, result, call_id))
+            return
+        self.token_budget.note_tool_result(result)
+        logger.info(f"FunctionResponse para '{function_name}' enviado para Gemini.")
 
 
     async def _handle_pending_name_submission(self, user_provided_name: str) -> None:
@@ -780,12 +750,13 @@ class Function_Calling:
             return
 
         original_function_name = self.pending_function_call_name
+        original_call_id = self.pending_function_call_id
         logger.info(f"Nome '{user_provided_name}' recebido para função pendente '{original_function_name}'. Processando...")
-        self.thinking_event.set()
 
         # Limpa o estado de espera ANTES de chamar a função, para evitar loops se falhar
         self.awaiting_name_for_save_face = False
         self.pending_function_call_name = None
+        self.pending_function_call_id = None
         result_message_fc: Optional[str] = None
 
         try:
@@ -798,26 +769,8 @@ class Function_Calling:
             logger.exception(f"Erro ao executar '{original_function_name}' com nome '{user_provided_name}'.")
             result_message_fc = f"Ocorreu um erro ao tentar '{original_function_name}' para '{user_provided_name}'."
 
-        if result_message_fc is not None and self.gemini_session:
-            logger.info(f"Resultado da função (com nome pendente) '{original_function_name}': '{result_message_fc}'")
-            try:
-                await self.gemini_session.send(
-                    input=Content(
-                        role="tool",
-                        parts=[Part.from_function_response(
-                            name=original_function_name,
-                            response={"result": Value(string_value=result_message_fc)}
-                        )]
-                    )
-                )
-                logger.info(f"FunctionResponse (com nome pendente) para '{original_function_name}' enviado.")
-            except Exception:
-                logger.exception(f"Erro ao enviar FunctionResponse (com nome pendente) para '{original_function_name}'.")
-        elif not self.gemini_session:
-            logger.warning(f"Sessão inativa. Não foi possível enviar resultado da função (com nome pendente) '{original_function_name}'.")
-
-        if self.thinking_event.is_set():
-            self.thinking_event.clear()
+        if result_message_fc is not None:
+            await self._send_tool_response(original_function_name, result_message_fc, original_call_id)
         logger.info(f"Processamento de nome pendente para '{original_function_name}' concluído.")
 
 
@@ -5,7 +5,10 @@ from google.genai.types import Content, Part, GenerateContentConfig, LiveConnect
 from google.genai import errors as genai_errors
 from google.protobuf.struct_pb2 import Value
 
-from .app_config import TRCKUSER, SYSTEM_INSTRUCTION_TEXT # Importa configurações necessárias
+from .app_config import ( # Importa configurações necessárias
+    TRCKUSER, SYSTEM_INSTRUCTION_TEXT, GEMINI_REALTIME_INPUT, MIC_VAD_ENABLED,
+    GEMINI_CONTEXT_COMPRESSION_ENABLED, GEMINI_CONTEXT_TRIGGER_TOKENS, GEMINI_CONTEXT_TARGET_TOKENS
+)
 from .logger_config import get_logger
 
 logger = get_logger(__name__)
@@ -77,6 +80,9 @@ GEMINI_TOOLS = [
     )
 ]
 # --- Configuração da Sessão LiveConnect Gemini ---
+# Com entrada em tempo real e VAD local, os turnos de voz são delimitados pelo cliente
+# (activity_start/activity_end) e a detecção automática do servidor é desligada.
+GEMINI_LOCAL_ACTIVITY_DETECTION = GEMINI_REALTIME_INPUT and MIC_VAD_ENABLED
 GEMINI_LIVE_CONNECT_CONFIG = None
 try:
     GEMINI_LIVE_CONNECT_CONFIG = genai_types.LiveConnectConfig(
@@ -90,6 +96,14 @@ try:
             )
         ),
         tools=GEMINI_TOOLS,
+        realtime_input_config=genai_types.RealtimeInputConfig(
+            automatic_activity_detection=genai_types.AutomaticActivityDetection(disabled=True)
+        ) if GEMINI_LOCAL_ACTIVITY_DETECTION else None,
+        # Sessões longas: ao passar de trigger_tokens o servidor descarta os turnos mais antigos até target_tokens
+        context_window_compression=genai_types.ContextWindowCompressionConfig(
+            trigger_tokens=GEMINI_CONTEXT_TRIGGER_TOKENS,
+            sliding_window=genai_types.SlidingWindow(target_tokens=GEMINI_CONTEXT_TARGET_TOKENS)
+        ) if GEMINI_CONTEXT_COMPRESSION_ENABLED else None,
         system_instruction=genai_types.Content(
             parts=[
                 genai_types.Part.from_text(text=f"the name of your user is:  {TRCKUSER}, "),
@@ -0,0 +1,179 @@
+# trackie_app/inference_engine.py
+import queue
+import threading
+from abc import ABC, abstractmethod
+import time
+from concurrent.futures import Future
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .logger_config import get_logger
+
+logger = get_logger(__name__)
+
+
+class DetectorBackend(ABC):
+    """
+    Interface mínima de um backend de detecção usado pelo `YoloInferenceEngine`.
+
+    Cada backend recebe uma lista de frames RGB e devolve uma lista de resultados
+    (um por frame) no formato do Ultralytics: objetos com `.boxes` (xyxy, conf, cls)
+    e `.names`. Um backend incompleto falha ao ser instanciado.
+    """
+    name: str = "base"
+
+    @property
+    @abstractmethod
+    def names(self) -> Dict[int, str]:
+        ...
+
+    @abstractmethod
+    def predict_batch(self, frames_rgb: List[np.ndarray]) -> List[Any]:
+        ...
+
+
+class UltralyticsBackend(DetectorBackend):
+    """Backend que usa o modelo YOLO do Ultralytics (PyTorch) carregado por `models.load_yolo_model`."""
+    name = "torch"
+
+    def __init__(self, yolo_model: Any, confidence_threshold: float):
+        self.model = yolo_model
+        self.confidence_threshold = confidence_threshold
+
+    @property
+    def names(self) -> Dict[int, str]:
+        return self.model.names
+
+    def predict_batch(self, frames_rgb: List[np.ndarray]) -> List[Any]:
+        # Uma única chamada ao predict para o lote inteiro amortiza pré-processamento e forward.
+        return list(self.model.predict(frames_rgb, verbose=False, conf=self.confidence_threshold))
+
+
+class YoloInferenceEngine:
+    """
+    Serviço de inferência que agrupa frames de vários produtores (loop da câmera,
+    ferramentas, câmeras extras) em micro-lotes com prazo máximo de espera,
+    roda um forward em lote e devolve o resultado de cada chamador via Future.
+    """
+
+    def __init__(self, backend: DetectorBackend, max_batch_size: int = 4, max_wait_ms: float = 10.0):
+        self.backend = backend
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait_s = max(0.0, max_wait_ms) / 1000.0
+        self._requests: "queue.Queue[Optional[Tuple[np.ndarray, Future]]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+
+        # Estatísticas
+        self.batches_run: int = 0
+        self.frames_inferred: int = 0
+        self.total_inference_s: float = 0.0
+
+    @property
+    def names(self) -> Dict[int, str]:
+        return self.backend.names
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._worker, name="yolo_inference_engine", daemon=True)
+        self._thread.start()
+        logger.info(f"Motor de inferência YOLO iniciado (backend: {self.backend.name}, "
+                    f"lote máx: {self.max_batch_size}, espera máx: {self.max_wait_s * 1000:.0f} ms).")
+
+    def stop(self, timeout: float = 2.0) -> None:
+        self._stopping.set()
+        self._requests.put(None) # Acorda o worker
+        if self._thread:
+            self._thread.join(timeout)
+        # Falha explicitamente as requisições que sobraram na fila
+        while True:
+            try:
+                item = self._requests.get_nowait()
+            except queue.Empty:
+                break
+            if item is not None and item[1].set_running_or_notify_cancel():
+                item[1].set_exception(RuntimeError("Motor de inferência YOLO encerrado."))
+        logger.info("Motor de inferência YOLO parado.")
+
+    def submit(self, frame_rgb: np.ndarray) -> Future:
+        """
+        Enfileira um frame RGB para inferência.
+
+        Returns:
+            Future: Resolve para a lista de resultados do frame (mesmo formato de `model.predict`).
+        """
+        future: Future = Future()
+        if self._stopping.is_set():
+            future.set_exception(RuntimeError("Motor de inferência YOLO encerrado."))
+            return future
+        self._requests.put((frame_rgb, future))
+        return future
+
+    def predict(self, frame_rgb: np.ndarray, timeout: Optional[float] = None) -> List[Any]:
+        """Versão BLOQUEANTE de `submit`, para uso dentro de `asyncio.to_thread`."""
+        return self.submit(frame_rgb).result(timeout=timeout)
+
+    def stats(self) -> Dict[str, Any]:
+        avg_batch = self.frames_inferred / self.batches_run if self.batches_run else 0.0
+        avg_ms = (self.total_inference_s / self.batches_run * 1000.0) if self.batches_run else 0.0
+        return {
+            "backend": self.backend.name,
+            "batches_run": self.batches_run,
+            "frames_inferred": self.frames_inferred,
+            "avg_batch_size": round(avg_batch, 2),
+            "avg_batch_ms": round(avg_ms, 1),
+            "pending": self._requests.qsize(),
+        }
+
+    def _collect_batch(self) -> List[Tuple[np.ndarray, Future]]:
+        """Bloqueia até a primeira requisição e junta outras até encher o lote ou vencer o prazo."""
+        batch: List[Tuple[np.ndarray, Future]] = []
+        first = self._requests.get()
+        if first is None:
+            return batch
+        batch.append(first)
+        deadline = time.monotonic() + self.max_wait_s
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._requests.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                break
+            batch.append(item)
+        return batch
+
+    def _worker(self) -> None:
+        while not self._stopping.is_set():
+            batch = self._collect_batch()
+            # Ignora requisições cujo chamador já desistiu (Future cancelado)
+            batch = [(frame, fut) for frame, fut in batch if fut.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+
+            started = time.monotonic()
+            try:
+                results = self.backend.predict_batch([frame for frame, _ in batch])
+            except Exception as e:
+                logger.exception("Erro durante a inferência YOLO em lote.")
+                for _, fut in batch:
+                    fut.set_exception(e)
+                continue
+
+            if len(results) != len(batch):
+                error = RuntimeError(f"Backend retornou {len(results)} resultados para {len(batch)} frames.")
+                for _, fut in batch:
+                    fut.set_exception(error)
+                continue
+
+            self.total_inference_s += time.monotonic() - started
+            self.batches_run += 1
+            self.frames_inferred += len(batch)
+            for (_, fut), result in zip(batch, results):
+                fut.set_result([result]) # Mesmo formato de `model.predict` para um frame
@@ -9,7 +9,7 @@ import traceback # Para o bloco finally do main
 from . import logger_config # Executa o código em logger_config.py
 logger = logger_config.get_logger(__name__) # Obtém o logger configurado
 
-from .app_config import DEFAULT_MODE, YOLO_MODEL_PATH, SYSTEM_INSTRUCTION_TEXT
+from .app_config import DEFAULT_MODE, YOLO_MODEL_PATH, SYSTEM_INSTRUCTION_TEXT, SESSION_RECORDING_ENABLED
 from .external_apis import PYAUDIO_INSTANCE, GEMINI_CLIENT
 from .audio_loop import AudioLoop
 from .function_call import Function_Calling
@@ -25,6 +25,22 @@ if __name__ == "__main__":
         "--show_preview", action="store_true",
         help="Mostra janela com preview da câmera e detecções YOLO (apenas no modo 'camera')."
     )
+    parser.add_argument(
+        "--fake_live", action="store_true",
+        help="Usa um servidor Live local falso que registra os envios (teste offline da semântica de turnos)."
+    )
+    parser.add_argument(
+        "--fake_drop_every", type=int, default=0, metavar="N",
+        help="Com --fake_live, derruba a conexão a cada N turnos do usuário (mede a reconexão e o tempo até o primeiro áudio)."
+    )
+    parser.add_argument(
+        "--record", action="store_true",
+        help="Grava áudio, frames enviados e eventos da sessão em SESSION_RECORDING_DIR (app_config.py)."
+    )
+    parser.add_argument(
+        "--replay", type=str, default=None, metavar="DIR",
+        help="Usa o microfone e os frames de uma gravação no lugar da captura ao vivo."
+    )
     args = parser.parse_args()
 
     show_actual_preview = False
@@ -49,7 +65,12 @@ if __name__ == "__main__":
         logger.info("O programa não pode funcionar sem áudio. Encerrando.")
         exit(1)
 
-    if not GEMINI_CLIENT:
+    live_client = None
+    if args.fake_live:
+        from .fake_live import FakeLiveClient
+        live_client = FakeLiveClient(reply_audio_s=1.0, fresh_setup_s=0.5, drop_every_n_turns=args.fake_drop_every)
+        logger.info("Servidor Live FALSO ativado: nada será enviado ao Gemini.")
+    elif not GEMINI_CLIENT:
         logger.critical("ERRO CRÍTICO: Cliente Gemini não pôde ser inicializado (verifique API Key/conexão). Encerrando.") # Mudado para critical
         exit(1)
 
@@ -62,7 +83,8 @@ if __name__ == "__main__":
     main_loop_instance = None # Renomeado para evitar conflito
     try:
         logger.info(f"Iniciando Trackie no modo: {args.mode}")
-        main_loop_instance = AudioLoop(video_mode=args.mode, show_preview=show_actual_preview)
+        main_loop_instance = AudioLoop(video_mode=args.mode, show_preview=show_actual_preview, live_client=live_client,
+                                       record_session=args.record or SESSION_RECORDING_ENABLED, replay_path=args.replay)
         asyncio.run(main_loop_instance.run())
 
     except KeyboardInterrupt:
@@ -77,6 +99,8 @@ if __name__ == "__main__":
             logger.info("Sinalizando parada devido a erro inesperado...")
             main_loop_instance.stop_event.set()
     finally:
+        if live_client is not None:
+            logger.info(f"Relatório do servidor Live falso: {live_client.report()}")
         logger.info("Bloco __main__ finalizado.")
         # A limpeza de PyAudio é feita dentro de AudioLoop.run()
         logger.info("Programa completamente finalizado.")
\ No newline at end of file
@@ -11,9 +11,11 @@ from .app_config import BASE_DIR # Importa BASE_DIR para o caminho do .env
 
 from .app_config import (
     YOLO_MODEL_PATH, DB_PATH, DEEPFACE_MODEL_NAME,
-    MIDAS_MODEL_TYPE
+    MIDAS_MODEL_TYPE, YOLO_CONFIDENCE_THRESHOLD, YOLO_BACKEND,
+    YOLO_ONNX_INTRA_OP_THREADS, YOLO_ONNX_INT8
 )
 from .logger_config import get_logger
+from .inference_engine import DetectorBackend, UltralyticsBackend
 
 logger = get_logger(__name__)
 
@@ -37,6 +39,38 @@ def load_yolo_model():
         yolo_model = None
     return yolo_model
 
+def load_yolo_backend(yolo_model) -> DetectorBackend:
+    """
+    Escolhe o backend de execução do detector conforme YOLO_BACKEND.
+    Para "onnxruntime"/"openvino", exporta o modelo para ONNX (em cache ao lado do .pt)
+    e volta para o caminho PyTorch se algo falhar.
+    """
+    torch_backend = UltralyticsBackend(yolo_model, YOLO_CONFIDENCE_THRESHOLD)
+    if YOLO_BACKEND == "torch":
+        return torch_backend
+    if YOLO_BACKEND not in ("onnxruntime", "openvino"):
+        logger.warning(f"YOLO_BACKEND desconhecido '{YOLO_BACKEND}'. Usando PyTorch.")
+        return torch_backend
+
+    from .onnx_detector import OnnxRuntimeBackend, export_yolo_to_onnx, quantize_onnx_int8, ort
+    if ort is None:
+        logger.warning("onnxruntime não instalado. Detector YOLO continuará em PyTorch.")
+        return torch_backend
+    try:
+        onnx_path = export_yolo_to_onnx(yolo_model, YOLO_MODEL_PATH)
+        if onnx_path and YOLO_ONNX_INT8:
+            onnx_path = quantize_onnx_int8(onnx_path) or onnx_path
+        if not onnx_path:
+            return torch_backend
+        return OnnxRuntimeBackend(
+            onnx_path, YOLO_CONFIDENCE_THRESHOLD,
+            intra_op_threads=YOLO_ONNX_INTRA_OP_THREADS,
+            use_openvino=(YOLO_BACKEND == "openvino")
+        )
+    except Exception:
+        logger.exception("Erro ao iniciar backend ONNX do YOLO. Usando PyTorch.")
+        return torch_backend
+
 def ensure_deepface_db_path():
     """Garante que o diretório do banco de dados DeepFace exista."""
     if not os.path.exists(DB_PATH):
@@ -0,0 +1,334 @@
+# trackie_app/onnx_detector.py
+import ast
+import os
+import sys
+from typing import Any, Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from .logger_config import get_logger
+from .inference_engine import DetectorBackend
+from .detections import boxes_data_as_numpy
+
+logger = get_logger(__name__)
+
+# ONNX Runtime é opcional: sem ele o detector continua no caminho PyTorch.
+try:
+    import onnxruntime as ort
+except ImportError:
+    ort = None
+
+
+class OnnxBoxes:
+    """
+    Caixas de detecção em NumPy com a mesma interface usada do `Boxes` do Ultralytics:
+    `.xyxy`, `.conf`, `.cls`, `.data`, iteração caixa a caixa e `.cpu()/.numpy()`.
+    """
+
+    def __init__(self, data: np.ndarray):
+        self.data = data.reshape(-1, 6).astype(np.float32, copy=False) # [x1, y1, x2, y2, conf, cls]
+
+    @property
+    def xyxy(self) -> np.ndarray:
+        return self.data[:, :4]
+
+    @property
+    def conf(self) -> np.ndarray:
+        return self.data[:, 4]
+
+    @property
+    def cls(self) -> np.ndarray:
+        return self.data[:, 5]
+
+    def cpu(self) -> "OnnxBoxes":
+        return self
+
+    def numpy(self) -> "OnnxBoxes":
+        return self
+
+    def __len__(self) -> int:
+        return self.data.shape[0]
+
+    def __iter__(self):
+        for row in self.data:
+            yield OnnxBoxes(row)
+
+
+class OnnxResults:
+    """Resultado de um frame, compatível com o `Results` do Ultralytics (`.boxes`, `.names`, `.orig_shape`)."""
+
+    def __init__(self, boxes: OnnxBoxes, names: Dict[int, str], orig_shape: Tuple[int, int]):
+        self.boxes = boxes
+        self.names = names
+        self.orig_shape = orig_shape
+
+
+def _letterbox(frame: np.ndarray, size: int) -> Tuple[np.ndarray, float, Tuple[float, float]]:
+    """Redimensiona mantendo a proporção e completa com cinza até `size`x`size` (como o Ultralytics)."""
+    h, w = frame.shape[:2]
+    gain = min(size / h, size / w)
+    new_w, new_h = int(round(w * gain)), int(round(h * gain))
+    pad_w, pad_h = (size - new_w) / 2.0, (size - new_h) / 2.0
+    if (new_w, new_h) != (w, h):
+        frame = cv2.resize(frame, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+    top, bottom = int(round(pad_h - 0.1)), int(round(pad_h + 0.1))
+    left, right = int(round(pad_w - 0.1)), int(round(pad_w + 0.1))
+    frame = cv2.copyMakeBorder(frame, top, bottom, left, right, cv2.BORDER_CONSTANT, value=(114, 114, 114))
+    return frame, gain, (left, top)
+
+
+def _nms(boxes: np.ndarray, scores: np.ndarray, iou_threshold: float, max_det: int) -> np.ndarray:
+    """NMS guloso em NumPy. Retorna os índices mantidos em ordem decrescente de score."""
+    order = scores.argsort()[::-1]
+    areas = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+    keep: List[int] = []
+    while order.size > 0 and len(keep) < max_det:
+        i = order[0]
+        keep.append(i)
+        rest = order[1:]
+        xx1 = np.maximum(boxes[i, 0], boxes[rest, 0])
+        yy1 = np.maximum(boxes[i, 1], boxes[rest, 1])
+        xx2 = np.minimum(boxes[i, 2], boxes[rest, 2])
+        yy2 = np.minimum(boxes[i, 3], boxes[rest, 3])
+        inter = np.clip(xx2 - xx1, 0, None) * np.clip(yy2 - yy1, 0, None)
+        iou = inter / (areas[i] + areas[rest] - inter + 1e-7)
+        order = rest[iou <= iou_threshold]
+    return np.asarray(keep, dtype=np.int64)
+
+
+class OnnxRuntimeBackend(DetectorBackend):
+    """
+    Backend de detecção que roda o YOLO exportado para ONNX com ONNX Runtime
+    (e com o execution provider do OpenVINO quando disponível e solicitado).
+    """
+    name = "onnxruntime"
+
+    def __init__(self, onnx_path: str, confidence_threshold: float, intra_op_threads: int = 0,
+                 use_openvino: bool = False, iou_threshold: float = 0.7, max_det: int = 300):
+        if ort is None:
+            raise RuntimeError("onnxruntime não está instalado.")
+        self.confidence_threshold = confidence_threshold
+        self.iou_threshold = iou_threshold
+        self.max_det = max_det
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.inter_op_num_threads = 1
+        if intra_op_threads > 0:
+            options.intra_op_num_threads = intra_op_threads
+
+        providers: List[Any] = ["CPUExecutionProvider"]
+        if use_openvino:
+            if "OpenVINOExecutionProvider" in ort.get_available_providers():
+                ov_options = {"device_type": "CPU"}
+                if intra_op_threads > 0:
+                    ov_options["num_of_threads"] = str(intra_op_threads)
+                providers.insert(0, ("OpenVINOExecutionProvider", ov_options))
+                self.name = "openvino"
+            else:
+                logger.warning("OpenVINOExecutionProvider não disponível no onnxruntime instalado. Usando CPUExecutionProvider.")
+
+        self.session = ort.InferenceSession(onnx_path, sess_options=options, providers=providers)
+        self.input_name = self.session.get_inputs()[0].name
+        metadata = self.session.get_modelmeta().custom_metadata_map
+        self._names: Dict[int, str] = ast.literal_eval(metadata["names"]) if "names" in metadata else {}
+        imgsz = ast.literal_eval(metadata["imgsz"]) if "imgsz" in metadata else [640, 640]
+        self.input_size = int(imgsz[0])
+        batch_dim = self.session.get_inputs()[0].shape[0]
+        self.dynamic_batch = not isinstance(batch_dim, int)
+        logger.info(f"Detector ONNX carregado de '{onnx_path}' (providers: {self.session.get_providers()}, "
+                    f"threads intra-op: {intra_op_threads or 'padrão'}, lote dinâmico: {self.dynamic_batch}).")
+
+    @property
+    def names(self) -> Dict[int, str]:
+        return self._names
+
+    def predict_batch(self, frames_rgb: List[np.ndarray]) -> List[Any]:
+        letterboxed = [_letterbox(frame, self.input_size) for frame in frames_rgb]
+        batch = np.stack([lb[0] for lb in letterboxed]).astype(np.float32) / 255.0
+        batch = np.ascontiguousarray(batch.transpose(0, 3, 1, 2)) # BHWC -> BCHW
+
+        if self.dynamic_batch:
+            outputs = self.session.run(None, {self.input_name: batch})[0]
+        else: # Modelo exportado com lote fixo 1
+            outputs = np.concatenate([self.session.run(None, {self.input_name: batch[i:i + 1]})[0]
+                                      for i in range(batch.shape[0])])
+
+        results = []
+        for prediction, frame, (_, gain, (pad_x, pad_y)) in zip(outputs, frames_rgb, letterboxed):
+            data = self._postprocess(prediction, gain, pad_x, pad_y, frame.shape[:2])
+            results.append(OnnxResults(OnnxBoxes(data), self._names, frame.shape[:2]))
+        return results
+
+    def _postprocess(self, prediction: np.ndarray, gain: float, pad_x: float, pad_y: float,
+                     orig_shape: Tuple[int, int]) -> np.ndarray:
+        """Converte a saída (4 + nc, anchors) em caixas [x1, y1, x2, y2, conf, cls] no frame original."""
+        prediction = prediction.T # (anchors, 4 + nc)
+        class_scores = prediction[:, 4:]
+        cls = class_scores.argmax(axis=1)
+        conf = class_scores[np.arange(class_scores.shape[0]), cls]
+        mask = conf >= self.confidence_threshold
+        if not mask.any():
+            return np.zeros((0, 6), dtype=np.float32)
+
+        cxcywh, conf, cls = prediction[mask, :4], conf[mask], cls[mask]
+        boxes = np.empty_like(cxcywh)
+        boxes[:, 0] = cxcywh[:, 0] - cxcywh[:, 2] / 2
+        boxes[:, 1] = cxcywh[:, 1] - cxcywh[:, 3] / 2
+        boxes[:, 2] = cxcywh[:, 0] + cxcywh[:, 2] / 2
+        boxes[:, 3] = cxcywh[:, 1] + cxcywh[:, 3] / 2
+
+        # NMS por classe: desloca as caixas de cada classe para regiões disjuntas
+        offsets = cls[:, None].astype(np.float32) * 7680.0
+        keep = _nms(boxes + offsets, conf, self.iou_threshold, self.max_det)
+        boxes, conf, cls = boxes[keep], conf[keep], cls[keep]
+
+        boxes[:, [0, 2]] = (boxes[:, [0, 2]] - pad_x) / gain
+        boxes[:, [1, 3]] = (boxes[:, [1, 3]] - pad_y) / gain
+        boxes[:, [0, 2]] = boxes[:, [0, 2]].clip(0, orig_shape[1])
+        boxes[:, [1, 3]] = boxes[:, [1, 3]].clip(0, orig_shape[0])
+        return np.concatenate([boxes, conf[:, None], cls[:, None].astype(np.float32)], axis=1).astype(np.float32)
+
+
+def export_yolo_to_onnx(yolo_model: Any, pt_path: str) -> Optional[str]:
+    """
+    Exporta o modelo YOLO para ONNX uma única vez, guardando o arquivo ao lado do `.pt`.
+
+    Returns:
+        Optional[str]: Caminho do `.onnx` (em cache ou recém-exportado) ou None se falhar.
+    """
+    onnx_path = os.path.splitext(pt_path)[0] + ".onnx"
+    if os.path.exists(onnx_path) and os.path.getmtime(onnx_path) >= os.path.getmtime(pt_path):
+        return onnx_path
+    try:
+        logger.info(f"Exportando modelo YOLO para ONNX em '{onnx_path}' (apenas na primeira execução)...")
+        exported = yolo_model.export(format="onnx", dynamic=True, simplify=True, verbose=False)
+        if exported and os.path.abspath(str(exported)) != os.path.abspath(onnx_path):
+            os.replace(str(exported), onnx_path)
+        logger.info("Exportação ONNX concluída.")
+        return onnx_path
+    except Exception:
+        logger.exception("Falha ao exportar o modelo YOLO para ONNX.")
+        return None
+
+
+def quantize_onnx_int8(onnx_path: str) -> Optional[str]:
+    """
+    Gera (uma única vez) a variante INT8 com quantização dinâmica dos pesos.
+
+    Returns:
+        Optional[str]: Caminho do `.int8.onnx` ou None se a quantização não estiver disponível.
+    """
+    int8_path = os.path.splitext(onnx_path)[0] + ".int8.onnx"
+    if os.path.exists(int8_path) and os.path.getmtime(int8_path) >= os.path.getmtime(onnx_path):
+        return int8_path
+    try:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+        logger.info(f"Quantizando modelo ONNX para INT8 em '{int8_path}'...")
+        quantize_dynamic(onnx_path, int8_path, weight_type=QuantType.QUInt8)
+        return int8_path
+    except Exception:
+        logger.exception("Falha ao quantizar o modelo ONNX para INT8.")
+        return None
+
+
+def check_backend_parity(reference: DetectorBackend, candidate: DetectorBackend,
+                         frames_rgb: List[np.ndarray], iou_threshold: float = 0.5) -> Dict[str, Any]:
+    """
+    Compara as detecções de dois backends nos mesmos frames.
+
+    Uma detecção de um backend conta como reproduzida quando o outro tem uma caixa
+    da mesma classe com IoU >= `iou_threshold`. A comparação vale nos dois sentidos:
+    `match_ratio` (detecções da referência achadas no candidato) e
+    `candidate_match_ratio` (detecções do candidato achadas na referência, ou seja,
+    sem falsos positivos novos).
+
+    Returns:
+        Dict[str, Any]: Contagens por backend e as frações de detecções reproduzidas.
+    """
+    ref_results = reference.predict_batch(frames_rgb)
+    cand_results = candidate.predict_batch(frames_rgb)
+    ref_total, cand_total, matched, cand_matched = 0, 0, 0, 0
+    for ref_res, cand_res in zip(ref_results, cand_results):
+        ref_data = boxes_data_as_numpy(ref_res.boxes)
+        cand_data = boxes_data_as_numpy(cand_res.boxes)
+        ref_total += len(ref_data)
+        cand_total += len(cand_data)
+        matched += sum(_has_match(row, cand_data, iou_threshold) for row in ref_data)
+        cand_matched += sum(_has_match(row, ref_data, iou_threshold) for row in cand_data)
+    return {
+        "reference": reference.name,
+        "candidate": candidate.name,
+        "frames": len(frames_rgb),
+        "reference_detections": ref_total,
+        "candidate_detections": cand_total,
+        "match_ratio": matched / ref_total if ref_total else 1.0,
+        "candidate_match_ratio": cand_matched / cand_total if cand_total else 1.0,
+    }
+
+
+def _has_match(row: np.ndarray, others: np.ndarray, iou_threshold: float) -> bool:
+    """Há em `others` uma caixa da mesma classe de `row` com IoU >= `iou_threshold`?"""
+    same_class = others[others[:, 5] == row[5]]
+    if len(same_class) == 0:
+        return False
+    xx1 = np.maximum(row[0], same_class[:, 0])
+    yy1 = np.maximum(row[1], same_class[:, 1])
+    xx2 = np.minimum(row[2], same_class[:, 2])
+    yy2 = np.minimum(row[3], same_class[:, 3])
+    inter = np.clip(xx2 - xx1, 0, None) * np.clip(yy2 - yy1, 0, None)
+    area_row = (row[2] - row[0]) * (row[3] - row[1])
+    area_others = (same_class[:, 2] - same_class[:, 0]) * (same_class[:, 3] - same_class[:, 1])
+    return bool((inter / (area_row + area_others - inter + 1e-7)).max() >= iou_threshold)
+
+
+PARITY_FIXTURE_IMAGES = ("bus.jpg", "zidane.jpg") # Imagens de exemplo distribuídas com o Ultralytics
+
+
+def parity_fixture_paths() -> List[str]:
+    """Caminhos do conjunto fixo de imagens da verificação de paridade (assets do Ultralytics)."""
+    from ultralytics.utils import ASSETS
+    paths = [os.path.join(str(ASSETS), name) for name in PARITY_FIXTURE_IMAGES]
+    missing = [path for path in paths if not os.path.exists(path)]
+    if missing:
+        raise FileNotFoundError(f"Imagens de paridade não encontradas: {missing}")
+    return paths
+
+
+def run_parity_check(image_paths: Optional[List[str]] = None, use_openvino: bool = False) -> Optional[Dict[str, Any]]:
+    """
+    Roda o YOLO em PyTorch (Ultralytics) e o mesmo modelo exportado em ONNX Runtime nas
+    imagens dadas (por padrão, o conjunto fixo `PARITY_FIXTURE_IMAGES`) e compara as
+    detecções. O candidato é sempre o `OnnxRuntimeBackend`, independente de YOLO_BACKEND.
+
+    Returns:
+        Optional[Dict[str, Any]]: Relatório de `check_backend_parity`, ou None se o modelo
+            não carregar ou a exportação falhar.
+    """
+    from .app_config import YOLO_MODEL_PATH, YOLO_CONFIDENCE_THRESHOLD
+    from .inference_engine import UltralyticsBackend
+    from .models import load_yolo_model
+
+    frames = [cv2.cvtColor(cv2.imread(path), cv2.COLOR_BGR2RGB) for path in (image_paths or parity_fixture_paths())]
+    torch_model = load_yolo_model()
+    if torch_model is None:
+        return None
+    onnx_path = export_yolo_to_onnx(torch_model, YOLO_MODEL_PATH)
+    if not onnx_path:
+        return None
+    return check_backend_parity(
+        UltralyticsBackend(torch_model, YOLO_CONFIDENCE_THRESHOLD),
+        OnnxRuntimeBackend(onnx_path, YOLO_CONFIDENCE_THRESHOLD, use_openvino=use_openvino),
+        frames
+    )
+
+
+if __name__ == "__main__":
+    # Verificação de paridade: python -m Architecture.onnx_detector [imagem ...]
+    # Sem imagens, usa o conjunto fixo PARITY_FIXTURE_IMAGES.
+    report = run_parity_check(sys.argv[1:] or None)
+    if report is None:
+        sys.exit(1)
+    print(report)
+    sys.exit(0 if min(report["match_ratio"], report["candidate_match_ratio"]) >= 0.9 else 2)
@@ -0,0 +1,156 @@
+# trackie_app/pipeline_supervisor.py
+import asyncio
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional
+
+from .logger_config import get_logger
+
+logger = get_logger(__name__)
+
+
+@dataclass(frozen=True)
+class RestartPolicy:
+    """
+    O que fazer quando uma tarefa do pipeline falha (exceção) ou termina sozinha.
+
+    - restart: reinicia a tarefa, com atraso `backoff_s` dobrando a cada falha
+      seguida até `backoff_max_s`.
+    - max_restarts/window_s: acima de `max_restarts` reinícios em `window_s`, desiste.
+    - critical: ao desistir, para o app (`stop_event`); senão segue sem a tarefa.
+    - restart_on_exit: um retorno normal (sem `stop_event`) também conta como falha.
+    """
+    restart: bool = True
+    max_restarts: int = 5
+    window_s: float = 60.0
+    backoff_s: float = 1.0
+    backoff_max_s: float = 15.0
+    critical: bool = False
+    restart_on_exit: bool = True
+
+
+NEVER_RESTART = RestartPolicy(restart=False, restart_on_exit=False)
+
+
+class _Worker:
+    def __init__(self, name: str, factory: Callable[[], Awaitable[Any]], policy: RestartPolicy):
+        self.name = name
+        self.factory = factory
+        self.policy = policy
+        self.task: Optional[asyncio.Task] = None
+        self.starts: int = 0
+        self.failures: int = 0
+        self.restart_times: Deque[float] = deque()
+        self.state: str = "idle" # "running", "backoff", "done", "gave_up"
+        self.last_error: Optional[str] = None
+
+
+class PipelineSupervisor:
+    """
+    Mantém vivas as tarefas de longa duração do pipeline (captura, inferência,
+    playback) independentemente das sessões Gemini. Cada tarefa é criada por uma
+    fábrica (`add`) e, quando falha, é recriada segundo a sua `RestartPolicy` —
+    só a tarefa que falhou reabre o seu dispositivo; as outras seguem rodando.
+    """
+
+    def __init__(self, stop_event: asyncio.Event):
+        self.stop_event = stop_event
+        self._workers: List[_Worker] = []
+        self._runner: Optional[asyncio.Task] = None
+
+    def add(self, name: str, factory: Callable[[], Awaitable[Any]], policy: RestartPolicy = RestartPolicy()) -> None:
+        """Registra uma tarefa; `factory` devolve uma corrotina nova a cada (re)início."""
+        self._workers.append(_Worker(name, factory, policy))
+
+    def start(self) -> asyncio.Task:
+        self._runner = asyncio.get_running_loop().create_task(self._run_all(), name="pipeline_supervisor_task")
+        return self._runner
+
+    async def _run_all(self) -> None:
+        await asyncio.gather(*(self._supervise(worker) for worker in self._workers))
+
+    async def _supervise(self, worker: _Worker) -> None:
+        policy = worker.policy
+        consecutive_failures = 0
+        while not self.stop_event.is_set():
+            worker.starts += 1
+            worker.state = "running"
+            started_at = time.monotonic()
+            worker.task = None
+            try:
+                worker.task = asyncio.get_running_loop().create_task(worker.factory(), name=f"{worker.name}_task")
+                await worker.task
+                if self.stop_event.is_set() or not policy.restart_on_exit:
+                    worker.state = "done"
+                    return
+                worker.last_error = "terminou sem stop_event"
+            except asyncio.CancelledError:
+                if worker.task is not None and worker.task.cancelled() and not self._cancelling():
+                    worker.last_error = "cancelada" # A própria tarefa foi cancelada, não o supervisor
+                else:
+                    if worker.task is not None:
+                        worker.task.cancel()
+                    raise
+            except Exception as e:
+                worker.last_error = f"{type(e).__name__}: {e}"
+            if self.stop_event.is_set():
+                worker.state = "done"
+                return
+
+            worker.failures += 1
+            now = time.monotonic()
+            if now - started_at > policy.window_s:
+                consecutive_failures = 0 # Rodou bem por um tempo: o backoff recomeça
+            consecutive_failures += 1
+            while worker.restart_times and now - worker.restart_times[0] > policy.window_s:
+                worker.restart_times.popleft()
+            if not policy.restart or len(worker.restart_times) >= policy.max_restarts:
+                worker.state = "gave_up"
+                if policy.critical:
+                    logger.critical(f"Tarefa '{worker.name}' falhou ({worker.last_error}) e não será reiniciada. Encerrando o app.")
+                    self.stop_event.set()
+                else:
+                    logger.error(f"Tarefa '{worker.name}' falhou ({worker.last_error}) e não será reiniciada. Seguindo sem ela.")
+                return
+            delay = min(policy.backoff_s * (2 ** (consecutive_failures - 1)), policy.backoff_max_s)
+            logger.warning(f"Tarefa '{worker.name}' falhou ({worker.last_error}). Reiniciando em {delay:.1f}s.")
+            worker.restart_times.append(now)
+            worker.state = "backoff"
+            try:
+                await asyncio.wait_for(self.stop_event.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+        worker.state = "done"
+
+    def _cancelling(self) -> bool:
+        current = asyncio.current_task()
+        return current is not None and current.cancelling() > 0
+
+    async def stop(self, timeout_s: float = 3.0) -> None:
+        """
+        Espera as tarefas terminarem sozinhas (após `stop_event`) por até `timeout_s`
+        e cancela as que sobrarem (ex.: leitura do console presa em `input()`).
+        """
+        if self._runner is None:
+            return
+        self.stop_event.set()
+        done, _ = await asyncio.wait({self._runner}, timeout=timeout_s)
+        if not done:
+            for worker in self._workers:
+                if worker.task is not None and not worker.task.done():
+                    worker.task.cancel()
+            await asyncio.wait({self._runner}, timeout=2.0)
+        if self._runner.done() and not self._runner.cancelled() and self._runner.exception():
+            logger.error(f"Supervisor do pipeline terminou com erro: {self._runner.exception()}")
+        self._runner = None
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {
+            worker.name: {
+                "state": worker.state,
+                "starts": worker.starts,
+                "failures": worker.failures,
+                "last_error": worker.last_error,
+            } for worker in self._workers
+        }
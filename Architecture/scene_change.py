@@ -0,0 +1,115 @@
+# trackie_app/scene_change.py
+import time
+from typing import Dict, FrozenSet, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from .logger_config import get_logger
+
+logger = get_logger(__name__)
+
+
+class SceneChangeGate:
+    """
+    Decide quais frames da câmera valem a pena codificar e enviar ao Gemini.
+
+    Compara uma miniatura em tons de cinza do frame com a do último frame enviado
+    (diferença absoluta média, 0..1) e o conjunto de objetos detectados/rastreados
+    com o do último envio. Frames quase iguais são pulados; mudanças de cena ou de
+    objetos são enviadas na taxa máxima; uma cena parada ainda envia um frame a
+    cada `keepalive_s`.
+    """
+
+    def __init__(self, change_threshold: float = 0.04, min_interval_s: float = 0.5,
+                 keepalive_s: float = 5.0, thumb_size: Tuple[int, int] = (32, 24)):
+        self.change_threshold = change_threshold
+        self.min_interval_s = min_interval_s
+        self.keepalive_s = keepalive_s
+        self.thumb_size = thumb_size
+        self._gray = None # Buffers reaproveitados para a miniatura
+        self._thumb = np.empty((thumb_size[1], thumb_size[0]), dtype=np.uint8)
+        self._last_sent_thumb: Optional[np.ndarray] = None
+        self._last_sent_objects: Optional[FrozenSet] = None
+        self._last_sent_at: Optional[float] = None
+
+        # Estatísticas
+        self.frames_checked: int = 0
+        self.frames_skipped: int = 0
+        self.sent_by_reason: Dict[str, int] = {"first": 0, "scene": 0, "objects": 0, "keepalive": 0}
+
+    def decide(self, frame_bgr: np.ndarray, objects: Optional[FrozenSet] = None,
+               now: Optional[float] = None) -> Optional[str]:
+        """
+        Avalia o frame e registra o envio se ele for aprovado.
+        Esta função é BLOQUEANTE (cv2) e deve rodar fora do event loop.
+
+        Args:
+            frame_bgr (np.ndarray): Frame BGR candidato.
+            objects (Optional[FrozenSet]): Assinatura dos objetos em cena (ex.: pares
+                (classe, id de track)); None se não há detector.
+            now (Optional[float]): Instante atual (time.monotonic() por padrão).
+
+        Returns:
+            Optional[str]: Motivo do envio ("first", "scene", "objects", "keepalive") ou None para pular.
+        """
+        now = time.monotonic() if now is None else now
+        self.frames_checked += 1
+        if self._last_sent_at is not None and now - self._last_sent_at < self.min_interval_s:
+            self.frames_skipped += 1
+            return None
+
+        thumb = self._thumbnail(frame_bgr)
+        if self._last_sent_thumb is None:
+            reason = "first"
+        elif objects is not None and objects != self._last_sent_objects:
+            reason = "objects"
+        elif self.scene_distance(thumb) >= self.change_threshold:
+            reason = "scene"
+        elif now - self._last_sent_at >= self.keepalive_s:
+            reason = "keepalive"
+        else:
+            self.frames_skipped += 1
+            return None
+
+        if self._last_sent_thumb is None:
+            self._last_sent_thumb = thumb.copy()
+        else:
+            np.copyto(self._last_sent_thumb, thumb)
+        self._last_sent_objects = objects
+        self._last_sent_at = now
+        self.sent_by_reason[reason] += 1
+        return reason
+
+    def scene_distance(self, thumb: np.ndarray) -> float:
+        """Diferença absoluta média (0..1) entre a miniatura e a do último frame enviado."""
+        if self._last_sent_thumb is None:
+            return 1.0
+        return float(cv2.absdiff(thumb, self._last_sent_thumb).mean()) / 255.0
+
+    def reset(self) -> None:
+        """Força o próximo frame a ser enviado (ex.: nova sessão ou câmera reaberta)."""
+        self._last_sent_thumb = None
+        self._last_sent_objects = None
+        self._last_sent_at = None
+
+    def stats(self) -> Dict[str, object]:
+        sent = sum(self.sent_by_reason.values())
+        return {
+            "frames_checked": self.frames_checked,
+            "frames_sent": sent,
+            "frames_skipped": self.frames_skipped,
+            "skip_ratio": round(self.frames_skipped / self.frames_checked, 3) if self.frames_checked else 0.0,
+            "sent_by_reason": dict(self.sent_by_reason),
+        }
+
+    def _thumbnail(self, frame_bgr: np.ndarray) -> np.ndarray:
+        if frame_bgr.ndim == 3:
+            if self._gray is None or self._gray.shape != frame_bgr.shape[:2]:
+                self._gray = np.empty(frame_bgr.shape[:2], dtype=np.uint8)
+            cv2.cvtColor(frame_bgr, cv2.COLOR_BGR2GRAY, dst=self._gray)
+            gray = self._gray
+        else:
+            gray = frame_bgr
+        cv2.resize(gray, self.thumb_size, dst=self._thumb, interpolation=cv2.INTER_AREA)
+        return self._thumb
@@ -0,0 +1,281 @@
+# trackie_app/session_recorder.py
+import asyncio
+import json
+import os
+import queue
+import threading
+import time
+import wave
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from .logger_config import get_logger
+
+logger = get_logger(__name__)
+
+try:
+    import soundfile
+    _SOUNDFILE_AVAILABLE = True
+except (ImportError, OSError): # OSError: libsndfile ausente
+    soundfile = None
+    _SOUNDFILE_AVAILABLE = False
+
+AUDIO_STREAMS = ("mic", "model")
+_OPUS_RATES = (8000, 12000, 16000, 24000, 48000)
+
+
+def _pick_codec(preferred: str, sample_rate: int) -> str:
+    """Codec efetivo para um stream: opus -> flac -> wav, conforme o que estiver disponível."""
+    if preferred == "opus" and _SOUNDFILE_AVAILABLE and sample_rate in _OPUS_RATES \
+            and "OPUS" in soundfile.available_subtypes("OGG"):
+        return "opus"
+    if preferred in ("opus", "flac") and _SOUNDFILE_AVAILABLE:
+        return "flac"
+    return "wav"
+
+
+class _AudioTrack:
+    """Arquivo de áudio de um stream, aberto e escrito só pela thread do gravador."""
+
+    EXTENSIONS = {"opus": "ogg", "flac": "flac", "wav": "wav"}
+
+    def __init__(self, directory: str, name: str, sample_rate: int, channels: int, codec: str):
+        self.filename = f"{name}.{self.EXTENSIONS[codec]}"
+        self.channels = channels
+        self.frames_written = 0
+        path = os.path.join(directory, self.filename)
+        if codec == "wav":
+            self._wav = wave.open(path, "wb")
+            self._wav.setnchannels(channels)
+            self._wav.setsampwidth(2)
+            self._wav.setframerate(sample_rate)
+            self._sf = None
+        else:
+            self._wav = None
+            self._sf = soundfile.SoundFile(path, "w", samplerate=sample_rate, channels=channels,
+                                           format="OGG" if codec == "opus" else "FLAC",
+                                           subtype="OPUS" if codec == "opus" else "PCM_16")
+
+    def write(self, pcm: bytes) -> int:
+        """Escreve o PCM16 e devolve o offset (em frames) do primeiro frame escrito."""
+        offset = self.frames_written
+        if self._wav is not None:
+            self._wav.writeframesraw(pcm)
+        else:
+            self._sf.write(np.frombuffer(pcm, dtype=np.int16).reshape(-1, self.channels))
+        self.frames_written += len(pcm) // (2 * self.channels)
+        return offset
+
+    def close(self) -> None:
+        if self._wav is not None:
+            self._wav.close()
+        else:
+            self._sf.close()
+
+
+class SessionRecorder:
+    """
+    Grava a sessão para depuração: áudio do microfone e do modelo (Opus/FLAC via
+    `soundfile` se instalado, WAV caso contrário), os JPEGs enviados ao Gemini e os
+    eventos (chamadas de ferramenta, texto, barge-in...).
+
+    Layout do diretório:
+    - session.json: cabeçalho (início, taxas, codecs, arquivos).
+    - mic.*, model.*: áudio contínuo de cada stream (só os trechos recebidos, emendados).
+    - frames/NNNNNN.jpg: imagens enviadas.
+    - events.jsonl: índice em ordem de tempo; cada linha tem `t` (s desde o início) e,
+      para áudio, `offset`/`frames` no arquivo do stream, o que permite buscar um
+      instante sem decodificar o resto.
+
+    Os métodos `record_*` nunca bloqueiam: copiam o dado para uma fila atendida por uma
+    thread de escrita. Acima de `max_pending_bytes` pendentes o item é descartado e contado.
+    """
+
+    def __init__(self, root_dir: str, mic_rate: int, model_rate: int, channels: int = 1,
+                 codec: str = "opus", max_pending_bytes: int = 16 * 1024 * 1024):
+        self.started_at = time.monotonic()
+        self.directory = os.path.join(root_dir, datetime.now().strftime("%Y%m%d-%H%M%S"))
+        self.rates = {"mic": mic_rate, "model": model_rate}
+        self.channels = channels
+        self.codecs = {stream: _pick_codec(codec, rate) for stream, rate in self.rates.items()}
+        self.max_pending_bytes = max_pending_bytes
+        self._queue: "queue.Queue[Optional[Tuple[str, float, Any, int]]]" = queue.Queue()
+        self._pending_bytes = 0
+        self._pending_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+        # Estatísticas
+        self.items_written: int = 0
+        self.items_dropped: int = 0
+        self.frames_saved: int = 0
+        self.bytes_in: int = 0
+
+    def start(self) -> None:
+        os.makedirs(os.path.join(self.directory, "frames"), exist_ok=True)
+        self._thread = threading.Thread(target=self._writer, name="SessionRecorderWriter", daemon=True)
+        self._thread.start()
+        logger.info(f"Gravando sessão em {self.directory} (áudio: {self.codecs}).")
+
+    def _now(self, at: Optional[float]) -> float:
+        return (time.monotonic() if at is None else at) - self.started_at
+
+    def _enqueue(self, kind: str, at: Optional[float], payload: Any, size: int) -> bool:
+        with self._pending_lock:
+            if self._thread is None or self._pending_bytes + size > self.max_pending_bytes:
+                self.items_dropped += 1
+                return False
+            self._pending_bytes += size
+        self.bytes_in += size
+        self._queue.put_nowait((kind, self._now(at), payload, size))
+        return True
+
+    def record_audio(self, stream: str, pcm: bytes, at: Optional[float] = None) -> bool:
+        """Áudio PCM16 do `stream` ("mic" ou "model"); `at` é o `time.monotonic()` do primeiro sample."""
+        return self._enqueue(stream, at, bytes(pcm), len(pcm))
+
+    def record_frame(self, jpeg: bytes, at: Optional[float] = None, reason: Optional[str] = None) -> bool:
+        return self._enqueue("frame", at, (bytes(jpeg), reason), len(jpeg))
+
+    def record_event(self, kind: str, data: Dict[str, Any], at: Optional[float] = None) -> bool:
+        """Evento sem mídia (ex.: "tool_call", "tool_response", "user_text", "model_text", "barge_in")."""
+        return self._enqueue(kind, at, data, 256)
+
+    def close(self) -> None:
+        """Esvazia a fila e fecha os arquivos. BLOQUEANTE: chamar com `asyncio.to_thread`."""
+        if self._thread is None:
+            return
+        self._queue.put(None)
+        self._thread.join()
+        self._thread = None
+        logger.info(f"Gravação da sessão finalizada: {self.stats()}")
+
+    def _writer(self) -> None:
+        tracks = {stream: _AudioTrack(self.directory, stream, rate, self.channels, self.codecs[stream])
+                  for stream, rate in self.rates.items()}
+        header = {
+            "started_at": datetime.now().isoformat(timespec="seconds"),
+            "channels": self.channels,
+            "streams": {stream: {"file": tracks[stream].filename, "sample_rate": self.rates[stream],
+                                 "codec": self.codecs[stream]} for stream in AUDIO_STREAMS},
+        }
+        with open(os.path.join(self.directory, "session.json"), "w", encoding="utf-8") as f:
+            json.dump(header, f, ensure_ascii=False, indent=2)
+
+        with open(os.path.join(self.directory, "events.jsonl"), "w", encoding="utf-8") as index:
+            while True:
+                item = self._queue.get()
+                if item is None:
+                    break
+                kind, t, payload, size = item
+                try:
+                    if kind in tracks:
+                        offset = tracks[kind].write(payload)
+                        entry = {"t": round(t, 4), "kind": kind, "offset": offset,
+                                 "frames": len(payload) // (2 * self.channels)}
+                    elif kind == "frame":
+                        jpeg, reason = payload
+                        name = f"frames/{self.frames_saved:06d}.jpg"
+                        with open(os.path.join(self.directory, name), "wb") as f:
+                            f.write(jpeg)
+                        self.frames_saved += 1
+                        entry = {"t": round(t, 4), "kind": "frame", "file": name, "reason": reason}
+                    else:
+                        entry = {"t": round(t, 4), "kind": kind, "data": payload}
+                    index.write(json.dumps(entry, ensure_ascii=False, default=str) + "\n")
+                    self.items_written += 1
+                except Exception:
+                    logger.exception(f"Erro ao gravar item '{kind}' da sessão.")
+                finally:
+                    with self._pending_lock:
+                        self._pending_bytes -= size
+        for track in tracks.values():
+            track.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "directory": self.directory,
+            "items_written": self.items_written,
+            "items_dropped": self.items_dropped,
+            "frames_saved": self.frames_saved,
+            "input_mb": round(self.bytes_in / 1024.0 / 1024.0, 1),
+            "pending_kb": round(self._pending_bytes / 1024.0, 1),
+        }
+
+
+class SessionRecording:
+    """Leitura de uma gravação do `SessionRecorder`: eventos por tempo e áudio por offset."""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        with open(os.path.join(directory, "session.json"), "r", encoding="utf-8") as f:
+            self.header: Dict[str, Any] = json.load(f)
+        self.channels: int = self.header.get("channels", 1)
+        self.events: List[Dict[str, Any]] = []
+        with open(os.path.join(directory, "events.jsonl"), "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    self.events.append(json.loads(line))
+
+    def sample_rate(self, stream: str) -> int:
+        return self.header["streams"][stream]["sample_rate"]
+
+    def iter_events(self, start_s: float = 0.0, kinds: Optional[Tuple[str, ...]] = None) -> Iterator[Dict[str, Any]]:
+        """Eventos a partir de `start_s`, em ordem (busca binária no índice)."""
+        times = [event["t"] for event in self.events]
+        first = int(np.searchsorted(times, start_s, side="left")) if times else 0
+        for event in self.events[first:]:
+            if kinds is None or event["kind"] in kinds:
+                yield event
+
+    def read_audio(self, stream: str, offset: int, frames: int) -> bytes:
+        """Lê `frames` do arquivo do stream a partir de `offset` (com seek, sem ler o início)."""
+        path = os.path.join(self.directory, self.header["streams"][stream]["file"])
+        if path.endswith(".wav"):
+            with wave.open(path, "rb") as wav_file:
+                wav_file.setpos(offset)
+                return wav_file.readframes(frames)
+        if not _SOUNDFILE_AVAILABLE:
+            raise RuntimeError(f"O pacote 'soundfile' é necessário para ler {path}.")
+        with soundfile.SoundFile(path, "r") as sound_file:
+            sound_file.seek(offset)
+            return sound_file.read(frames, dtype="int16").tobytes()
+
+    def read_frame(self, event: Dict[str, Any]) -> bytes:
+        with open(os.path.join(self.directory, event["file"]), "rb") as f:
+            return f.read()
+
+    async def replay(self, start_s: float = 0.0, speed: float = 1.0,
+                     kinds: Tuple[str, ...] = ("mic", "frame")) -> AsyncIterator[Tuple[Dict[str, Any], Any]]:
+        """
+        Reproduz os eventos no ritmo original (dividido por `speed`), entregando
+        `(evento, carga)`: PCM para áudio, JPEG para frames e `data` para os demais.
+        """
+        clock_start = time.monotonic()
+        for event in self.iter_events(start_s, kinds):
+            delay = (event["t"] - start_s) / speed - (time.monotonic() - clock_start)
+            if delay > 0:
+                await asyncio.sleep(delay)
+            if event["kind"] in AUDIO_STREAMS:
+                payload = await asyncio.to_thread(self.read_audio, event["kind"], event["offset"], event["frames"])
+            elif event["kind"] == "frame":
+                payload = await asyncio.to_thread(self.read_frame, event)
+            else:
+                payload = event.get("data")
+            yield event, payload
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Resumo de uma gravação de sessão do Trackie.")
+    parser.add_argument("directory")
+    args = parser.parse_args()
+    recording = SessionRecording(args.directory)
+    counts: Dict[str, int] = {}
+    for event in recording.events:
+        counts[event["kind"]] = counts.get(event["kind"], 0) + 1
+    duration = recording.events[-1]["t"] if recording.events else 0.0
+    print(f"{args.directory}: {duration:.1f} s, eventos por tipo: {counts}")
+    print(json.dumps(recording.header, ensure_ascii=False, indent=2))
@@ -0,0 +1,197 @@
+# trackie_app/session_resumption.py
+import json
+import os
+import time
+from datetime import timedelta
+from typing import Any, Dict, Optional
+
+from .logger_config import get_logger
+
+logger = get_logger(__name__)
+
+# Trechos de mensagens de erro que indicam conexão perdida (websocket/gRPC), não erro de lógica
+_CONNECTION_LOST_MARKERS = ("CLOSED", "CONNECTION", "RST_STREAM", "UNAVAILABLE", "GOAWAY", "DEADLINE", "1006", "1011")
+
+
+class SessionEnded(Exception):
+    """
+    A sessão Live atual acabou e deve ser trocada por outra. Levantada dentro do
+    TaskGroup da sessão; o `run` reconecta na hora (sem backoff), retomando o
+    contexto pelo handle se houver um.
+    """
+
+    def __init__(self, reason: str):
+        super().__init__(reason)
+        self.reason = reason # "go_away", "rollover", "connection_lost", "closed"
+
+
+def is_connection_lost(exc: BaseException) -> bool:
+    """True se a exceção indica que a conexão com o servidor caiu."""
+    if isinstance(exc, (ConnectionError, EOFError)):
+        return True
+    text = f"{type(exc).__name__} {exc}".upper()
+    return any(marker in text for marker in _CONNECTION_LOST_MARKERS)
+
+
+def duration_to_s(value: Any) -> Optional[float]:
+    """Converte o `time_left` do go_away ("12.5s", timedelta ou número) em segundos."""
+    if value is None:
+        return None
+    if isinstance(value, timedelta):
+        return value.total_seconds()
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return float(str(value).strip().rstrip("s"))
+    except ValueError:
+        return None
+
+
+class SessionResumptionStore:
+    """
+    Guarda o handle de retomada da sessão Live (`session_resumption_update.new_handle`)
+    em memória e num JSON, para que uma reconexão retome o contexto da conversa no
+    servidor em vez de começar uma sessão nova.
+
+    O servidor só aceita handles recentes: acima de `handle_ttl_s` o handle é
+    ignorado; um handle recusado na conexão é descartado com `invalidate`.
+    """
+
+    def __init__(self, path: Optional[str] = None, handle_ttl_s: float = 7200.0, load_saved: bool = True):
+        self.path = path
+        self.handle_ttl_s = handle_ttl_s
+        self._handle: Optional[str] = None
+        self._updated_at: float = 0.0 # time.time(): o handle sobrevive a reinícios do app
+
+        # Estatísticas
+        self.updates: int = 0
+        self.not_resumable_updates: int = 0
+        self.resumed_connects: int = 0
+        self.fresh_connects: int = 0
+        self.invalidated: int = 0
+
+        if path and load_saved:
+            self._load()
+
+    @property
+    def handle(self) -> Optional[str]:
+        """Handle válido para a próxima conexão, ou None (sessão nova)."""
+        if self._handle and time.time() - self._updated_at < self.handle_ttl_s:
+            return self._handle
+        return None
+
+    def update(self, update: Any) -> bool:
+        """
+        Aplica um `session_resumption_update` do servidor. Fora de pontos retomáveis
+        (ex.: no meio de uma geração ou chamada de ferramenta) o servidor manda
+        `resumable=False` e o handle anterior continua valendo.
+
+        Returns:
+            bool: True se o handle mudou.
+        """
+        new_handle = getattr(update, "new_handle", None)
+        if not getattr(update, "resumable", True) or not new_handle:
+            self.not_resumable_updates += 1
+            return False
+        self._handle = new_handle
+        self._updated_at = time.time()
+        self.updates += 1
+        self._save()
+        return True
+
+    def invalidate(self, reason: str) -> None:
+        """Descarta o handle (recusado pelo servidor ou contexto perdido)."""
+        if self._handle:
+            logger.warning(f"Handle de retomada da sessão descartado: {reason}")
+            self.invalidated += 1
+        self._handle = None
+        self._save()
+
+    def connect_config(self, base_config: Any) -> Any:
+        """
+        Cópia de `base_config` (LiveConnectConfig) com `session_resumption`: com o handle
+        atual retoma a sessão anterior; sem handle, pede ao servidor que envie handles.
+        """
+        from google.genai import types as genai_types # Só necessário com o SDK real
+
+        handle = self.handle
+        if handle:
+            self.resumed_connects += 1
+        else:
+            self.fresh_connects += 1
+        return base_config.model_copy(update={"session_resumption": genai_types.SessionResumptionConfig(handle=handle)})
+
+    def _load(self) -> None:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                saved = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, json.JSONDecodeError):
+            logger.warning(f"Não foi possível ler o handle de sessão salvo em '{self.path}'. Começando sessão nova.")
+            return
+        self._handle = saved.get("handle")
+        self._updated_at = float(saved.get("updated_at", 0.0))
+        if self.handle:
+            logger.info(f"Handle de retomada carregado (de {time.time() - self._updated_at:.0f} s atrás).")
+
+    def _save(self) -> None:
+        if not self.path:
+            return
+        temp_path = f"{self.path}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump({"handle": self._handle, "updated_at": self._updated_at}, f)
+            os.replace(temp_path, self.path) # Nunca deixa um JSON pela metade
+        except OSError:
+            logger.exception(f"Erro ao salvar o handle de sessão em '{self.path}'.")
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "updates": self.updates,
+            "not_resumable_updates": self.not_resumable_updates,
+            "resumed_connects": self.resumed_connects,
+            "fresh_connects": self.fresh_connects,
+            "invalidated": self.invalidated,
+        }
+
+
+class SessionRolloverTimer:
+    """
+    Decide quando trocar de sessão antes que o servidor a encerre.
+
+    - Por idade: depois de `max_age_s`, troca no primeiro momento quieto (sem fala,
+      playback ou ferramenta em andamento); passados mais `grace_s`, troca mesmo assim.
+    - Por go_away: troca no primeiro momento quieto, ou `go_away_margin_s` antes do
+      prazo informado pelo servidor.
+    """
+
+    def __init__(self, max_age_s: float = 540.0, grace_s: float = 30.0, go_away_margin_s: float = 1.0):
+        self.max_age_s = max_age_s
+        self.grace_s = grace_s
+        self.go_away_margin_s = go_away_margin_s
+        self._started_at = time.monotonic()
+        self._go_away_deadline: Optional[float] = None
+
+    def start(self, now: Optional[float] = None) -> None:
+        self._started_at = time.monotonic() if now is None else now
+        self._go_away_deadline = None
+
+    def on_go_away(self, time_left_s: Optional[float], now: Optional[float] = None) -> None:
+        now = time.monotonic() if now is None else now
+        deadline = now + (time_left_s if time_left_s is not None else 0.0)
+        if self._go_away_deadline is None or deadline < self._go_away_deadline:
+            self._go_away_deadline = deadline
+
+    def due(self, quiet: bool, now: Optional[float] = None) -> Optional[str]:
+        """Motivo da troca ("go_away" ou "rollover") se ela deve acontecer agora, senão None."""
+        now = time.monotonic() if now is None else now
+        if self._go_away_deadline is not None:
+            if quiet or now >= self._go_away_deadline - self.go_away_margin_s:
+                return "go_away"
+        if self.max_age_s > 0:
+            age = now - self._started_at
+            if age >= self.max_age_s and (quiet or age >= self.max_age_s + self.grace_s):
+                return "rollover"
+        return None
@@ -0,0 +1,218 @@
+# trackie_app/token_budget.py
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence
+
+from .logger_config import get_logger
+
+logger = get_logger(__name__)
+
+SOURCES = ("frames", "audio", "text", "tool")
+
+# Modalidade do `usage_metadata.prompt_tokens_details` -> fonte do cliente
+_MODALITY_SOURCE = {"IMAGE": "frames", "VIDEO": "frames", "AUDIO": "audio", "TEXT": "text"}
+
+
+@dataclass(frozen=True)
+class BudgetLevel:
+    """Degrau da política de envio: a partir de `min_pressure`, espaça os frames e desce a resolução."""
+    min_pressure: float
+    frame_interval_scale: float # Multiplica o intervalo entre frames (e o keep-alive do portão de cena)
+    encoder_steps_down: int # Degraus a descer na escada do FrameEncoder
+
+
+DEFAULT_LEVELS: Sequence[BudgetLevel] = (
+    BudgetLevel(0.0, 1.0, 0),
+    BudgetLevel(0.6, 2.0, 1),
+    BudgetLevel(0.8, 4.0, 2),
+    BudgetLevel(0.95, 8.0, 3),
+)
+
+
+def _modality_name(modality: Any) -> str:
+    name = getattr(modality, "name", None) or getattr(modality, "value", None) or str(modality)
+    return str(name).upper().split(".")[-1]
+
+
+class TokenBudget:
+    """
+    Contabiliza os tokens de contexto da sessão Live e decide o degrau da política de envio.
+
+    O tamanho do contexto vem do `usage_metadata` do servidor (`prompt_token_count`, com o
+    detalhamento por modalidade); entre dois relatórios, os envios do cliente são somados
+    como estimativa (`note_*`), com os custos fixos do servidor: tokens por frame
+    (conforme `media_resolution`), tokens por segundo de áudio e ~4 caracteres por token.
+
+    A pressão é o contexto estimado dividido por `limit_tokens` — o `trigger_tokens` da
+    compressão por janela deslizante, ou a janela inteira sem compressão. O degrau só
+    desce depois que a pressão cai `hysteresis` abaixo do limite que o ativou.
+    """
+
+    def __init__(self, limit_tokens: int, tokens_per_frame: int = 258, audio_tokens_per_s: float = 32.0,
+                 chars_per_token: float = 4.0, levels: Sequence[BudgetLevel] = DEFAULT_LEVELS,
+                 hysteresis: float = 0.05, audio_sample_rate: int = 16000, audio_channels: int = 1):
+        self.limit_tokens = max(1, limit_tokens)
+        self.tokens_per_frame = tokens_per_frame
+        self.audio_tokens_per_s = audio_tokens_per_s
+        self.chars_per_token = chars_per_token
+        self.levels: List[BudgetLevel] = sorted(levels, key=lambda level: level.min_pressure)
+        self.hysteresis = hysteresis
+        self._audio_bytes_per_s = audio_sample_rate * audio_channels * 2
+        self.level: int = 0
+
+        self.reported_context_tokens: int = 0 # Último prompt_token_count do servidor
+        self._pending_estimate: float = 0.0 # Enviado desde o último relatório
+        self.context_by_source: Dict[str, int] = {source: 0 for source in SOURCES} # Último detalhamento do servidor
+
+        # Estatísticas
+        self.sent_estimate: Dict[str, float] = {source: 0.0 for source in SOURCES} # Acumulado, estimado pelo cliente
+        self.response_tokens: int = 0
+        self.usage_reports: int = 0
+        self.compressions: int = 0
+        self.peak_context_tokens: int = 0
+        self.level_changes: int = 0
+        self.time_at_level: Dict[int, float] = {}
+        self._level_since = time.monotonic()
+
+    # --- Envios do cliente (estimativa) ---
+
+    def _add(self, source: str, tokens: float) -> None:
+        self.sent_estimate[source] += tokens
+        self._pending_estimate += tokens
+
+    def note_frame(self) -> None:
+        self._add("frames", self.tokens_per_frame)
+
+    def note_audio(self, pcm_bytes: int) -> None:
+        self._add("audio", pcm_bytes / self._audio_bytes_per_s * self.audio_tokens_per_s)
+
+    def note_text(self, text: str) -> None:
+        self._add("text", len(text) / self.chars_per_token)
+
+    def note_tool_result(self, result: Any) -> None:
+        self._add("tool", len(str(result)) / self.chars_per_token)
+
+    # --- Relatórios do servidor ---
+
+    def on_usage(self, usage: Any) -> None:
+        """Aplica um `usage_metadata` do servidor (enviado ao fim das gerações)."""
+        prompt_tokens = getattr(usage, "prompt_token_count", None)
+        if prompt_tokens is None:
+            return
+        self.usage_reports += 1
+        if self.reported_context_tokens and prompt_tokens < self.reported_context_tokens * 0.8:
+            self.compressions += 1 # O servidor descartou o início do contexto (janela deslizante)
+            logger.info(f"Contexto da sessão comprimido pelo servidor: {self.reported_context_tokens} -> {prompt_tokens} tokens.")
+        self.reported_context_tokens = prompt_tokens
+        self.peak_context_tokens = max(self.peak_context_tokens, prompt_tokens)
+        self._pending_estimate = 0.0
+        self.response_tokens += getattr(usage, "response_token_count", None) or 0
+
+        breakdown = {source: 0 for source in SOURCES}
+        for detail in getattr(usage, "prompt_tokens_details", None) or []:
+            source = _MODALITY_SOURCE.get(_modality_name(getattr(detail, "modality", "")))
+            if source:
+                breakdown[source] += getattr(detail, "token_count", None) or 0
+        breakdown["tool"] = getattr(usage, "tool_use_prompt_token_count", None) or 0
+        if any(breakdown.values()):
+            self.context_by_source = breakdown
+
+    def reset_context(self) -> None:
+        """Sessão nova (sem retomada): o contexto recomeça do zero."""
+        self.reported_context_tokens = 0
+        self._pending_estimate = 0.0
+        self.context_by_source = {source: 0 for source in SOURCES}
+
+    # --- Política ---
+
+    @property
+    def context_tokens(self) -> int:
+        return int(self.reported_context_tokens + self._pending_estimate)
+
+    @property
+    def pressure(self) -> float:
+        return self.context_tokens / self.limit_tokens
+
+    @property
+    def current_level(self) -> BudgetLevel:
+        return self.levels[self.level]
+
+    def update_level(self, now: Optional[float] = None) -> bool:
+        """Recalcula o degrau pela pressão atual. Retorna True se ele mudou."""
+        pressure = self.pressure
+        level = self.level
+        while level + 1 < len(self.levels) and pressure >= self.levels[level + 1].min_pressure:
+            level += 1
+        while level > 0 and pressure < self.levels[level].min_pressure - self.hysteresis:
+            level -= 1
+        if level == self.level:
+            return False
+        now = time.monotonic() if now is None else now
+        self.time_at_level[self.level] = self.time_at_level.get(self.level, 0.0) + now - self._level_since
+        self._level_since = now
+        logger.info(f"Orçamento de tokens: pressão {pressure:.2f} ({self.context_tokens}/{self.limit_tokens}), "
+                    f"política de envio {self.level} -> {level}.")
+        self.level = level
+        self.level_changes += 1
+        return True
+
+    def stats(self, now: Optional[float] = None) -> Dict[str, Any]:
+        now = time.monotonic() if now is None else now
+        time_at_level = dict(self.time_at_level)
+        time_at_level[self.level] = time_at_level.get(self.level, 0.0) + now - self._level_since
+        return {
+            "context_tokens": self.context_tokens,
+            "limit_tokens": self.limit_tokens,
+            "pressure": round(self.pressure, 3),
+            "peak_context_tokens": self.peak_context_tokens,
+            "context_by_source": dict(self.context_by_source),
+            "sent_estimate_by_source": {source: int(tokens) for source, tokens in self.sent_estimate.items()},
+            "response_tokens": self.response_tokens,
+            "usage_reports": self.usage_reports,
+            "compressions": self.compressions,
+            "level": self.level,
+            "level_changes": self.level_changes,
+            "time_at_level_s": {level: round(seconds, 1) for level, seconds in sorted(time_at_level.items())},
+        }
+
+
+def simulate_session(minutes: float = 60.0, fps: float = 1.0, speech_fraction: float = 0.2,
+                     trigger_tokens: int = 25600, target_tokens: int = 12800,
+                     adaptive: bool = True) -> Dict[str, Any]:
+    """
+    Simula uma sessão longa (frames a `fps`, fala em `speech_fraction` do tempo) contra um
+    servidor que comprime o contexto para `target_tokens` ao passar de `trigger_tokens` e
+    relata o uso a cada 10 s. Com `adaptive`, o intervalo entre frames segue o degrau do
+    orçamento. Retorna frames enviados, compressões e as estatísticas finais.
+    """
+    budget = TokenBudget(trigger_tokens)
+    budget._level_since = 0.0 # Relógio simulado
+    context = 0.0
+    next_frame_at = 0.0
+    frames_sent = 0
+    step_s = 0.1
+    for tick in range(int(minutes * 60 / step_s)):
+        now = tick * step_s
+        scale = budget.current_level.frame_interval_scale if adaptive else 1.0
+        if now >= next_frame_at:
+            budget.note_frame()
+            context += budget.tokens_per_frame
+            frames_sent += 1
+            next_frame_at = now + scale / fps
+        if (tick % 10) / 10.0 < speech_fraction: # Fala em parte de cada segundo
+            pcm_bytes = int(step_s * budget._audio_bytes_per_s)
+            budget.note_audio(pcm_bytes)
+            context += pcm_bytes / budget._audio_bytes_per_s * budget.audio_tokens_per_s
+        if context > trigger_tokens:
+            context = target_tokens
+        if tick % 100 == 0:
+            budget.on_usage(type("usage", (), {"prompt_token_count": int(context)})())
+        budget.update_level(now)
+    return {"adaptive": adaptive, "frames_sent": frames_sent, **budget.stats(minutes * 60)}
+
+
+if __name__ == "__main__":
+    for adaptive in (False, True):
+        result = simulate_session(adaptive=adaptive)
+        print(f"adaptativo={adaptive}: {result['frames_sent']} frames, {result['compressions']} compressões, "
+              f"tempo por degrau (s): {result['time_at_level_s']}")
@@ -0,0 +1,159 @@
+# trackie_app/tool_executor.py
+import asyncio
+import itertools
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Deque, Dict, Iterable, Optional
+
+import numpy as np
+
+from .logger_config import get_logger
+
+logger = get_logger(__name__)
+
+
+@dataclass
+class ToolCall:
+    """Uma chamada de ferramenta em execução (ou na fila do limite de concorrência)."""
+    call_id: str
+    name: str
+    args: Dict[str, Any]
+    server_id: Optional[str] # Id do `tool_call` do servidor (None no caminho legado `function_call`)
+    submitted_at: float = field(default_factory=time.monotonic)
+    started_at: Optional[float] = None
+    task: Optional[asyncio.Task] = None
+
+
+class ToolExecutor:
+    """
+    Executa as chamadas de ferramenta do Gemini como tarefas independentes, para que
+    o recebimento (áudio do modelo) e as faixas de subida continuem fluindo enquanto
+    DeepFace/MiDaS rodam.
+
+    - Cada chamada recebe um id (o do servidor, se houver) e roda em
+      `run_tool(nome, args, id_do_servidor)`, que devolve o resultado (ou None quando
+      não há resposta a enviar agora).
+    - O resultado vai para `send_result(nome, resultado, id_do_servidor)`.
+    - Concorrência limitada por ferramenta (`concurrency`); o excedente espera na fila.
+    - Prazo por ferramenta (`timeouts`): ao estourar, o Gemini recebe uma mensagem de
+      tempo esgotado. A thread de uma ferramenta síncrona (`asyncio.to_thread`) não pode
+      ser interrompida; ela termina em segundo plano e o resultado é descartado.
+    - `cancel` atende o `tool_call_cancellation` do servidor: nenhum resultado é enviado.
+    - `busy_event` fica setado enquanto houver alguma chamada em andamento.
+    """
+
+    def __init__(self, run_tool: Callable[[str, Dict[str, Any], Optional[str]], Awaitable[Optional[str]]],
+                 send_result: Callable[[str, str, Optional[str]], Awaitable[None]],
+                 busy_event: Optional[asyncio.Event] = None, default_concurrency: int = 1,
+                 concurrency: Optional[Dict[str, int]] = None, default_timeout_s: float = 30.0,
+                 timeouts: Optional[Dict[str, float]] = None):
+        self.run_tool = run_tool
+        self.send_result = send_result
+        self.busy_event = busy_event
+        self.default_concurrency = max(1, default_concurrency)
+        self.concurrency = dict(concurrency or {})
+        self.default_timeout_s = default_timeout_s
+        self.timeouts = dict(timeouts or {})
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._calls: Dict[str, ToolCall] = {}
+        self._local_ids = itertools.count(1)
+
+        # Estatísticas
+        self.submitted: int = 0
+        self.completed: int = 0
+        self.failed: int = 0
+        self.timed_out: int = 0
+        self.cancelled: int = 0
+        self.queue_wait_ms: Deque[float] = deque(maxlen=200)
+        self.run_ms: Dict[str, Deque[float]] = {}
+
+    @property
+    def running(self) -> int:
+        return len(self._calls)
+
+    def _semaphore(self, name: str) -> asyncio.Semaphore:
+        if name not in self._semaphores:
+            self._semaphores[name] = asyncio.Semaphore(max(1, self.concurrency.get(name, self.default_concurrency)))
+        return self._semaphores[name]
+
+    def submit(self, name: str, args: Dict[str, Any], server_id: Optional[str] = None) -> ToolCall:
+        """Agenda a chamada e retorna na hora (não espera a ferramenta)."""
+        call = ToolCall(server_id or f"local-{next(self._local_ids)}", name, dict(args), server_id)
+        if call.call_id in self._calls:
+            logger.warning(f"Chamada de ferramenta '{call.call_id}' repetida pelo servidor. Ignorada.")
+            return self._calls[call.call_id]
+        call.task = asyncio.get_running_loop().create_task(self._run(call), name=f"tool_{name}_{call.call_id}")
+        self._calls[call.call_id] = call
+        self.submitted += 1
+        if self.busy_event is not None:
+            self.busy_event.set()
+        return call
+
+    async def _run(self, call: ToolCall) -> None:
+        timeout_s = self.timeouts.get(call.name, self.default_timeout_s)
+        result: Optional[str] = None
+        try:
+            async with self._semaphore(call.name):
+                call.started_at = time.monotonic()
+                self.queue_wait_ms.append((call.started_at - call.submitted_at) * 1000.0)
+                logger.info(f"[Tool] '{call.name}' ({call.call_id}) iniciada; {self.running} em andamento.")
+                result = await asyncio.wait_for(self.run_tool(call.name, call.args, call.server_id), timeout=timeout_s)
+            self.completed += 1
+        except asyncio.TimeoutError:
+            self.timed_out += 1
+            logger.warning(f"[Tool] '{call.name}' ({call.call_id}) excedeu {timeout_s:g} s.")
+            result = f"A função '{call.name}' demorou demais (mais de {timeout_s:g} s) e foi interrompida."
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            logger.info(f"[Tool] '{call.name}' ({call.call_id}) cancelada.")
+            return # Cancelada pelo servidor ou no encerramento: nada a responder
+        except Exception:
+            self.failed += 1
+            logger.exception(f"[Tool] Erro ao executar '{call.name}' ({call.call_id}).")
+            result = f"Ocorreu um erro interno ao processar a função {call.name}."
+        finally:
+            if call.started_at is not None:
+                self.run_ms.setdefault(call.name, deque(maxlen=100)).append((time.monotonic() - call.started_at) * 1000.0)
+            self._calls.pop(call.call_id, None)
+            if not self._calls and self.busy_event is not None:
+                self.busy_event.clear()
+        if result is not None:
+            try:
+                await self.send_result(call.name, result, call.server_id)
+            except Exception:
+                logger.exception(f"[Tool] Erro ao enviar o resultado de '{call.name}' ({call.call_id}).")
+
+    def cancel(self, call_ids: Iterable[str]) -> int:
+        """Cancela as chamadas pelos ids do servidor (`tool_call_cancellation.ids`). Retorna quantas achou."""
+        found = 0
+        for call_id in call_ids:
+            call = self._calls.get(call_id)
+            if call is not None and call.task is not None and not call.task.done():
+                call.task.cancel()
+                found += 1
+        return found
+
+    def cancel_all(self) -> int:
+        """Cancela tudo (ex.: sessão nova, em que os ids antigos não valem mais)."""
+        return self.cancel(list(self._calls))
+
+    async def close(self) -> None:
+        tasks = [call.task for call in self._calls.values() if call.task is not None]
+        self.cancel_all()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    def stats(self) -> Dict[str, Any]:
+        queue_wait = np.array(self.queue_wait_ms) if self.queue_wait_ms else None
+        return {
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "timed_out": self.timed_out,
+            "cancelled": self.cancelled,
+            "running": self.running,
+            "queue_wait_p95_ms": round(float(np.percentile(queue_wait, 95)), 1) if queue_wait is not None else None,
+            "run_p50_ms": {name: round(float(np.percentile(np.array(values), 50)), 1)
+                           for name, values in self.run_ms.items() if values},
+        }
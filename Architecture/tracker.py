@@ -0,0 +1,217 @@
+# trackie_app/tracker.py
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .detections import FrameDetections
+from .logger_config import get_logger
+
+logger = get_logger(__name__)
+
+
+def _xyxy_to_z(xyxy: np.ndarray) -> np.ndarray:
+    """[x1, y1, x2, y2] -> medida do Kalman [cx, cy, área, proporção]."""
+    w = max(float(xyxy[2] - xyxy[0]), 1e-3)
+    h = max(float(xyxy[3] - xyxy[1]), 1e-3)
+    return np.array([xyxy[0] + w / 2.0, xyxy[1] + h / 2.0, w * h, w / h], dtype=np.float64)
+
+
+def _x_to_xyxy(x: np.ndarray) -> np.ndarray:
+    """Estado do Kalman [cx, cy, área, proporção, ...] -> [x1, y1, x2, y2]."""
+    area, ratio = max(float(x[2]), 1e-3), max(float(x[3]), 1e-3)
+    w = np.sqrt(area * ratio)
+    h = area / w
+    return np.array([x[0] - w / 2.0, x[1] - h / 2.0, x[0] + w / 2.0, x[1] + h / 2.0], dtype=np.float32)
+
+
+def iou_matrix(boxes_a: np.ndarray, boxes_b: np.ndarray) -> np.ndarray:
+    """IoU (len(a), len(b)) entre dois conjuntos de caixas xyxy."""
+    if len(boxes_a) == 0 or len(boxes_b) == 0:
+        return np.zeros((len(boxes_a), len(boxes_b)), dtype=np.float32)
+    a = boxes_a[:, None, :]
+    b = boxes_b[None, :, :]
+    inter_w = np.clip(np.minimum(a[..., 2], b[..., 2]) - np.maximum(a[..., 0], b[..., 0]), 0, None)
+    inter_h = np.clip(np.minimum(a[..., 3], b[..., 3]) - np.maximum(a[..., 1], b[..., 1]), 0, None)
+    inter = inter_w * inter_h
+    area_a = (a[..., 2] - a[..., 0]) * (a[..., 3] - a[..., 1])
+    area_b = (b[..., 2] - b[..., 0]) * (b[..., 3] - b[..., 1])
+    return (inter / (area_a + area_b - inter + 1e-7)).astype(np.float32)
+
+
+class _BoxKalmanFilter:
+    """Filtro de Kalman de velocidade constante sobre [cx, cy, área, proporção] (como no SORT)."""
+
+    _F = np.eye(7)
+    _F[0, 4] = _F[1, 5] = _F[2, 6] = 1.0
+    _H = np.eye(4, 7)
+    _Q = np.diag([1.0, 1.0, 1.0, 1.0, 0.01, 0.01, 1e-4])
+    _R = np.diag([1.0, 1.0, 10.0, 10.0])
+
+    def __init__(self, xyxy: np.ndarray):
+        self.x = np.zeros(7, dtype=np.float64)
+        self.x[:4] = _xyxy_to_z(xyxy)
+        self.P = np.diag([10.0, 10.0, 10.0, 10.0, 1e4, 1e4, 1e4])
+
+    def predict(self) -> np.ndarray:
+        if self.x[6] + self.x[2] <= 0: # Evita área negativa
+            self.x[6] = 0.0
+        self.x = self._F @ self.x
+        self.P = self._F @ self.P @ self._F.T + self._Q
+        return _x_to_xyxy(self.x)
+
+    def update(self, xyxy: np.ndarray) -> None:
+        y = _xyxy_to_z(xyxy) - self._H @ self.x
+        S = self._H @ self.P @ self._H.T + self._R
+        K = self.P @ self._H.T @ np.linalg.inv(S)
+        self.x = self.x + K @ y
+        self.P = (np.eye(7) - K @ self._H) @ self.P
+
+    @property
+    def xyxy(self) -> np.ndarray:
+        return _x_to_xyxy(self.x)
+
+
+class Track:
+    """Um objeto rastreado com id estável, estado suavizado e histórico recente."""
+
+    def __init__(self, track_id: int, xyxy: np.ndarray, conf: float, class_id: int,
+                 timestamp: float, history_len: int):
+        self.track_id = track_id
+        self.class_id = class_id
+        self.conf = conf
+        self.kalman = _BoxKalmanFilter(xyxy)
+        self.hits = 1
+        self.age = 0
+        self.time_since_update = 0
+        self.misses = 0 # Rodadas seguidas do detector sem casar (o track só está sendo propagado)
+        self.first_seen = timestamp
+        self.last_seen = timestamp
+        self.history: Deque[Tuple[float, np.ndarray, float]] = deque(maxlen=history_len)
+        self.history.append((timestamp, xyxy.copy(), conf))
+
+    @property
+    def xyxy(self) -> np.ndarray:
+        return self.kalman.xyxy
+
+    def predict(self) -> np.ndarray:
+        self.age += 1
+        self.time_since_update += 1
+        return self.kalman.predict()
+
+    def update(self, xyxy: np.ndarray, conf: float, timestamp: float) -> None:
+        self.kalman.update(xyxy)
+        self.hits += 1
+        self.time_since_update = 0
+        self.misses = 0
+        self.last_seen = timestamp
+        self.conf = 0.7 * self.conf + 0.3 * conf # Suaviza a confiança entre frames
+        self.history.append((timestamp, xyxy.copy(), conf))
+
+
+class MultiObjectTracker:
+    """
+    Rastreador multi-objeto leve no estilo SORT: predição de Kalman por track,
+    associação gulosa por IoU (apenas dentro da mesma classe) e ids estáveis.
+
+    `update` é chamado nos frames com detecção; `predict` propaga as caixas nos
+    frames em que o detector não roda (ex.: detecção a cada N frames).
+
+    Um track sem detecção continua vivo por até `max_age` frames (para não trocar de
+    id numa oclusão curta), mas só é relatado como presente (`visible_tracks`,
+    `as_detections`) se casou em até `report_max_misses` rodadas recentes do detector.
+    """
+
+    def __init__(self, iou_threshold: float = 0.3, max_age: int = 15, min_hits: int = 2,
+                 history_len: int = 30, report_max_misses: int = 0):
+        self.iou_threshold = iou_threshold
+        self.max_age = max_age
+        self.min_hits = min_hits
+        self.report_max_misses = report_max_misses
+        self.history_len = history_len
+        self.tracks: List[Track] = []
+        self.newly_confirmed_ids: List[int] = [] # Tracks que atingiram min_hits na última atualização
+        self._next_id = 1
+
+    def predict(self) -> None:
+        """Avança todos os tracks um passo sem detecções e remove os expirados."""
+        for track in self.tracks:
+            track.predict()
+        self.newly_confirmed_ids = []
+        self._drop_expired()
+
+    def update(self, detections: FrameDetections, timestamp: Optional[float] = None) -> List[Track]:
+        """
+        Associa as detecções do frame aos tracks existentes e cria tracks novos.
+
+        Returns:
+            List[Track]: Os tracks confirmados após a atualização.
+        """
+        timestamp = time.monotonic() if timestamp is None else timestamp
+        predicted = np.array([t.predict() for t in self.tracks], dtype=np.float32).reshape(-1, 4)
+
+        iou = iou_matrix(predicted, detections.xyxy)
+        if iou.size:
+            # Tracks só casam com detecções da mesma classe
+            track_classes = np.array([t.class_id for t in self.tracks], dtype=np.int64)
+            iou[track_classes[:, None] != detections.cls[None, :]] = 0.0
+
+        matched_tracks, matched_dets = set(), set()
+        if iou.size:
+            flat_order = np.argsort(iou, axis=None)[::-1]
+            for flat in flat_order:
+                t_idx, d_idx = divmod(int(flat), iou.shape[1])
+                if iou[t_idx, d_idx] < self.iou_threshold:
+                    break
+                if t_idx in matched_tracks or d_idx in matched_dets:
+                    continue
+                matched_tracks.add(t_idx)
+                matched_dets.add(d_idx)
+                self.tracks[t_idx].update(detections.xyxy[d_idx], float(detections.conf[d_idx]), timestamp)
+
+        self.newly_confirmed_ids = [self.tracks[t].track_id for t in matched_tracks
+                                    if self.tracks[t].hits == self.min_hits]
+        for t_idx, track in enumerate(self.tracks):
+            if t_idx not in matched_tracks:
+                track.misses += 1
+
+        for d_idx in range(len(detections)):
+            if d_idx in matched_dets:
+                continue
+            track = Track(self._next_id, detections.xyxy[d_idx], float(detections.conf[d_idx]),
+                          int(detections.cls[d_idx]), timestamp, self.history_len)
+            self._next_id += 1
+            self.tracks.append(track)
+            if self.min_hits <= 1:
+                self.newly_confirmed_ids.append(track.track_id)
+
+        self._drop_expired()
+        return self.confirmed_tracks()
+
+    def confirmed_tracks(self) -> List[Track]:
+        """Tracks confirmados, inclusive os que só estão sendo propagados sem detecção."""
+        return [t for t in self.tracks if t.hits >= self.min_hits]
+
+    def visible_tracks(self) -> List[Track]:
+        """Tracks confirmados que o detector ainda está vendo (no máximo `report_max_misses` rodadas sem casar)."""
+        return [t for t in self.tracks if t.hits >= self.min_hits and t.misses <= self.report_max_misses]
+
+    def as_detections(self, names: Dict[int, str]) -> FrameDetections:
+        """Estado suavizado dos tracks visíveis no formato `FrameDetections` (com `track_ids`)."""
+        tracks = self.visible_tracks()
+        if not tracks:
+            return FrameDetections.empty(names)
+        return FrameDetections(
+            xyxy=np.array([t.xyxy for t in tracks], dtype=np.float32),
+            conf=np.array([t.conf for t in tracks], dtype=np.float32),
+            cls=np.array([t.class_id for t in tracks], dtype=np.int64),
+            names=names,
+            track_ids=np.array([t.track_id for t in tracks], dtype=np.int64),
+        )
+
+    def _drop_expired(self) -> None:
+        before = len(self.tracks)
+        self.tracks = [t for t in self.tracks if t.time_since_update <= self.max_age]
+        if len(self.tracks) != before:
+            logger.debug(f"Tracker: {before - len(self.tracks)} track(s) expirado(s).")
@@ -0,0 +1,169 @@
+# trackie_app/uplink_scheduler.py
+import asyncio
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Deque, Dict, Iterable, List, Optional, Tuple
+
+from .logger_config import get_logger
+
+logger = get_logger(__name__)
+
+# Políticas de descarte de uma faixa quando ela está cheia
+POLICY_BLOCK = "block" # O produtor espera (nunca descarta)
+POLICY_LATEST = "latest" # Mantém só os itens mais novos (descarta o mais antigo)
+POLICY_DROP_NEW = "drop_new" # Recusa o item novo
+
+# Faixas usadas pelo AudioLoop
+UPLINK_LANE_AUDIO = "audio"
+UPLINK_LANE_CONTROL = "control"
+UPLINK_LANE_VIDEO = "video"
+
+
+@dataclass
+class UplinkItem:
+    """Um item da fila de subida para o Gemini, com a faixa de origem e o instante de entrada."""
+    lane: str
+    payload: Any
+    enqueued_at: float
+
+
+class UplinkLane:
+    """Uma faixa da fila de subida: limite próprio, política de descarte e métricas."""
+
+    def __init__(self, name: str, maxsize: int, policy: str):
+        if policy not in (POLICY_BLOCK, POLICY_LATEST, POLICY_DROP_NEW):
+            raise ValueError(f"Política de faixa desconhecida: {policy}")
+        self.name = name
+        self.maxsize = max(1, maxsize)
+        self.policy = policy
+        self.items: Deque[UplinkItem] = deque()
+        self.not_full = asyncio.Event()
+        self.not_full.set()
+
+        # Métricas
+        self.enqueued: int = 0
+        self.sent: int = 0
+        self.dropped: int = 0
+        self.max_depth: int = 0
+        self.total_age_s: float = 0.0
+        self.max_age_s: float = 0.0
+
+    def full(self) -> bool:
+        return len(self.items) >= self.maxsize
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "policy": self.policy,
+            "depth": len(self.items),
+            "max_depth": self.max_depth,
+            "enqueued": self.enqueued,
+            "sent": self.sent,
+            "dropped": self.dropped,
+            "avg_age_ms": round(self.total_age_s / self.sent * 1000.0, 1) if self.sent else 0.0,
+            "max_age_ms": round(self.max_age_s * 1000.0, 1),
+        }
+
+
+class UplinkScheduler:
+    """
+    Fila de subida para o Gemini dividida em faixas com prioridade estrita.
+
+    `get` sempre entrega o item da faixa de maior prioridade que tiver algo, na
+    ordem em que as faixas foram declaradas. Cada faixa tem seu limite e sua
+    política quando cheia, para que uma rajada de frames nunca tire áudio da fila.
+    Deve ser usada de dentro de um único event loop.
+    """
+
+    def __init__(self, lanes: Iterable[Tuple[str, int, str]]):
+        """
+        Args:
+            lanes (Iterable[Tuple[str, int, str]]): (nome, limite, política) de cada
+                faixa, da maior para a menor prioridade.
+        """
+        self.lanes: Dict[str, UplinkLane] = {}
+        for name, maxsize, policy in lanes:
+            self.lanes[name] = UplinkLane(name, maxsize, policy)
+        self._priority: List[UplinkLane] = list(self.lanes.values())
+        self._not_empty = asyncio.Event()
+        self._closed = False
+
+    def put_nowait(self, lane_name: str, payload: Any) -> bool:
+        """
+        Enfileira sem esperar, aplicando a política da faixa se ela estiver cheia.
+
+        Returns:
+            bool: False se o item foi recusado (faixa cheia com política block/drop_new ou fila fechada).
+        """
+        lane = self.lanes[lane_name]
+        if self._closed:
+            return False
+        if lane.full():
+            if lane.policy == POLICY_LATEST:
+                lane.items.popleft()
+                lane.dropped += 1
+            else:
+                lane.dropped += 1
+                return False
+        self._append(lane, payload)
+        return True
+
+    async def put(self, lane_name: str, payload: Any) -> bool:
+        """Enfileira; em faixas `block` espera por espaço em vez de descartar."""
+        lane = self.lanes[lane_name]
+        if lane.policy != POLICY_BLOCK:
+            return self.put_nowait(lane_name, payload)
+        while lane.full() and not self._closed:
+            lane.not_full.clear()
+            await lane.not_full.wait()
+        if self._closed:
+            return False
+        self._append(lane, payload)
+        return True
+
+    async def get(self) -> Optional[UplinkItem]:
+        """Próximo item pela prioridade das faixas; None quando a fila foi fechada e esvaziada."""
+        while True:
+            for lane in self._priority:
+                if lane.items:
+                    item = lane.items.popleft()
+                    lane.not_full.set()
+                    age = time.monotonic() - item.enqueued_at
+                    lane.sent += 1
+                    lane.total_age_s += age
+                    lane.max_age_s = max(lane.max_age_s, age)
+                    return item
+            if self._closed:
+                return None
+            self._not_empty.clear()
+            await self._not_empty.wait()
+
+    def clear(self, lane_names: Optional[Iterable[str]] = None) -> int:
+        """Descarta os itens pendentes das faixas indicadas (todas por padrão). Retorna quantos."""
+        removed = 0
+        for name in (lane_names if lane_names is not None else self.lanes.keys()):
+            lane = self.lanes[name]
+            removed += len(lane.items)
+            lane.dropped += len(lane.items)
+            lane.items.clear()
+            lane.not_full.set()
+        return removed
+
+    def close(self) -> None:
+        """Fecha a fila: produtores bloqueados são liberados e `get` devolve None ao esvaziar."""
+        self._closed = True
+        self._not_empty.set()
+        for lane in self._priority:
+            lane.not_full.set()
+
+    def depth(self) -> int:
+        return sum(len(lane.items) for lane in self._priority)
+
+    def metrics(self) -> Dict[str, Dict[str, Any]]:
+        return {name: lane.metrics() for name, lane in self.lanes.items()}
+
+    def _append(self, lane: UplinkLane, payload: Any) -> None:
+        lane.items.append(UplinkItem(lane.name, payload, time.monotonic()))
+        lane.enqueued += 1
+        lane.max_depth = max(lane.max_depth, len(lane.items))
+        self._not_empty.set()
@@ -0,0 +1,207 @@
+# trackie_app/voice_activity.py
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Deque, Dict, List, Optional
+
+import numpy as np
+
+from .logger_config import get_logger
+
+logger = get_logger(__name__)
+
+
+class EnergyZcrVad:
+    """
+    Detector de voz leve em NumPy: energia RMS (dBFS) contra um piso de ruído
+    adaptativo, mais taxa de cruzamentos por zero (ZCR) para rejeitar chiado.
+
+    Cada chunk PCM16 mono é dividido em sub-quadros de `frame_ms`; o chunk é voz
+    se pelo menos `min_voiced_fraction` dos sub-quadros forem voz.
+
+    Sub-quadros de silêncio digital (amostras todas zero, ex.: pacotes zerados pela
+    supressão de eco) não são ruído da sala e não mexem no piso de ruído.
+    """
+
+    def __init__(self, sample_rate: int = 16000, frame_ms: float = 20.0, threshold_db: float = 9.0,
+                 min_dbfs: float = -50.0, max_zcr: float = 0.35, noise_adapt: float = 0.05,
+                 min_voiced_fraction: float = 0.3):
+        self.sample_rate = sample_rate
+        self.frame_len = max(1, int(sample_rate * frame_ms / 1000.0))
+        self.threshold_db = threshold_db
+        self.min_dbfs = min_dbfs
+        self.max_zcr = max_zcr
+        self.noise_adapt = noise_adapt
+        self.min_voiced_fraction = min_voiced_fraction
+        self.noise_floor_db: Optional[float] = None
+
+    def is_speech(self, pcm: bytes) -> bool:
+        samples = np.frombuffer(pcm, dtype=np.int16)
+        num_frames = samples.size // self.frame_len
+        if num_frames == 0:
+            return False
+        frames = samples[:num_frames * self.frame_len].reshape(num_frames, self.frame_len).astype(np.float32)
+
+        rms = np.sqrt(np.mean(frames * frames, axis=1)) / 32768.0
+        energy_db = 20.0 * np.log10(rms + 1e-9)
+        signs = np.signbit(frames)
+        zcr = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / float(self.frame_len - 1 or 1)
+        live = rms > 0.0 # Fora o silêncio digital
+
+        if self.noise_floor_db is None:
+            if not live.any():
+                return False
+            self.noise_floor_db = float(np.percentile(energy_db[live], 10))
+        threshold = max(self.noise_floor_db + self.threshold_db, self.min_dbfs)
+        voiced = (energy_db > threshold) & (zcr < self.max_zcr)
+        speech = voiced.mean() >= self.min_voiced_fraction
+
+        # O piso de ruído acompanha só os sub-quadros sem voz (sobe devagar, desce rápido)
+        quiet = energy_db[~voiced & live]
+        if quiet.size:
+            quiet_db = float(quiet.mean())
+            rate = self.noise_adapt if quiet_db > self.noise_floor_db else 0.5
+            self.noise_floor_db += rate * (quiet_db - self.noise_floor_db)
+        return bool(speech)
+
+
+@dataclass
+class GateOutput:
+    """Resultado de um chunk do microfone passado pelo `SpeechGate`."""
+    chunks: List[bytes] = field(default_factory=list) # Chunks a enviar, em ordem
+    speech_started: bool = False # Início de fala neste chunk (já inclui o pre-roll)
+    speech_ended: bool = False # Fim da cauda de hangover neste chunk
+    keepalive: bool = False # O chunk enviado é apenas keep-alive
+
+
+class SpeechGate:
+    """
+    Envia ao Gemini só os trechos de fala do microfone.
+
+    - Pre-roll: os últimos `pre_roll_ms` antes do início da fala são enviados junto,
+      para não cortar o começo das palavras.
+    - Hangover: continua enviando por `hangover_ms` após a última detecção de voz.
+    - Keep-alive: em silêncio, envia um chunk a cada `keepalive_s` para manter o
+      stream de áudio vivo no servidor.
+    """
+
+    def __init__(self, vad: EnergyZcrVad, chunk_ms: float, pre_roll_ms: float = 300.0,
+                 hangover_ms: float = 500.0, keepalive_s: float = 2.0):
+        self.vad = vad
+        self.chunk_ms = chunk_ms
+        self.hangover_chunks = max(0, int(round(hangover_ms / chunk_ms)))
+        self.keepalive_s = keepalive_s
+        self._pre_roll: Deque[bytes] = deque(maxlen=max(0, int(round(pre_roll_ms / chunk_ms))))
+        self._in_speech = False
+        self._hangover_left = 0
+        self._last_sent_at: Optional[float] = None
+
+        # Estatísticas
+        self.chunks_in: int = 0
+        self.speech_chunks: int = 0
+        self.chunks_sent: int = 0
+        self.keepalives_sent: int = 0
+        self.bytes_in: int = 0
+        self.bytes_sent: int = 0
+        self.segments: int = 0
+
+    @property
+    def in_speech(self) -> bool:
+        return self._in_speech
+
+    def process(self, pcm: bytes, now: Optional[float] = None, speech: Optional[bool] = None) -> GateOutput:
+        """
+        Args:
+            speech (Optional[bool]): Decisão já conhecida para o chunk (ex.: False para um
+                pacote zerado pela supressão de eco); o VAD não é consultado nem adaptado.
+        """
+        now = time.monotonic() if now is None else now
+        self.chunks_in += 1
+        self.bytes_in += len(pcm)
+        output = GateOutput()
+
+        if self.vad.is_speech(pcm) if speech is None else speech:
+            self.speech_chunks += 1
+            self._hangover_left = self.hangover_chunks
+            if not self._in_speech:
+                self._in_speech = True
+                self.segments += 1
+                output.speech_started = True
+                output.chunks.extend(self._pre_roll)
+                self._pre_roll.clear()
+            output.chunks.append(pcm)
+        elif self._in_speech:
+            output.chunks.append(pcm)
+            if self._hangover_left > 0:
+                self._hangover_left -= 1
+            else:
+                self._in_speech = False
+                output.speech_ended = True
+        else:
+            if self._last_sent_at is None or now - self._last_sent_at >= self.keepalive_s:
+                output.chunks.append(pcm)
+                output.keepalive = True
+                self.keepalives_sent += 1
+                self._pre_roll.clear() # O pre-roll só faz sentido para áudio ainda não enviado
+            else:
+                self._pre_roll.append(pcm)
+
+        if output.chunks:
+            self._last_sent_at = now
+            self.chunks_sent += len(output.chunks)
+            self.bytes_sent += sum(len(c) for c in output.chunks)
+        return output
+
+    def reset(self) -> None:
+        self._pre_roll.clear()
+        self._in_speech = False
+        self._hangover_left = 0
+        self._last_sent_at = None
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "chunks_in": self.chunks_in,
+            "chunks_sent": self.chunks_sent,
+            "speech_segments": self.segments,
+            "keepalives_sent": self.keepalives_sent,
+            "speech_ratio": round(self.speech_chunks / self.chunks_in, 3) if self.chunks_in else 0.0,
+            "bytes_sent": self.bytes_sent,
+            "bytes_saved": self.bytes_in - self.bytes_sent,
+            "noise_floor_db": round(self.vad.noise_floor_db, 1) if self.vad.noise_floor_db is not None else None,
+        }
+
+
+def evaluate_wav(filepath: str, sample_rate: int = 16000, chunk_frames: int = 1024,
+                 **gate_kwargs) -> Dict[str, float]:
+    """
+    Passa uma gravação WAV pelo `SpeechGate` em chunks do tamanho do microfone, sem
+    precisar de microfone, e devolve as estatísticas e os segmentos de fala (em s).
+    """
+    from .alert_chime import load_wav_as_pcm16
+
+    samples = load_wav_as_pcm16(filepath, sample_rate)
+    chunk_ms = chunk_frames * 1000.0 / sample_rate
+    gate = SpeechGate(EnergyZcrVad(sample_rate), chunk_ms, **gate_kwargs)
+    segments, segment_start = [], None
+    for index in range(samples.size // chunk_frames):
+        t = index * chunk_ms / 1000.0
+        output = gate.process(samples[index * chunk_frames:(index + 1) * chunk_frames].tobytes(), now=t)
+        if output.speech_started:
+            segment_start = t
+        if output.speech_ended and segment_start is not None:
+            segments.append((round(segment_start, 2), round(t, 2)))
+            segment_start = None
+    result = gate.stats()
+    result["segments_s"] = segments
+    return result
+
+
+if __name__ == "__main__":
+    import argparse
+    from .app_config import AUDIO_SEND_SAMPLE_RATE, MIC_PACKET_MS
+
+    parser = argparse.ArgumentParser(description="Avalia o portão de voz do microfone em gravações WAV.")
+    parser.add_argument("wav_files", nargs="+")
+    args = parser.parse_args()
+    for wav_path in args.wav_files:
+        print(wav_path, evaluate_wav(wav_path, AUDIO_SEND_SAMPLE_RATE, int(AUDIO_SEND_SAMPLE_RATE * MIC_PACKET_MS / 1000.0)))
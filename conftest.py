@@ -0,0 +1 @@
+# conftest.py na raiz: o pytest coloca este diretório no sys.path, então os testes importam `Architecture.*`.
@@ -0,0 +1,36 @@
+# tests/conftest.py
+import pytest
+
+# Módulos importados no topo de `Architecture.audio_loop` (e de function_call/models/external_apis)
+AUDIO_LOOP_DEPENDENCIES = (
+    "cv2", "PIL", "mss", "pandas", "google.genai", "google.protobuf", "pyaudio",
+    "torch", "dotenv", "playsound", "ultralytics", "deepface",
+)
+
+
+@pytest.fixture
+def audio_loop_module():
+    """O módulo `Architecture.audio_loop`; pula o teste se alguma dependência não estiver instalada."""
+    for module in AUDIO_LOOP_DEPENDENCIES:
+        pytest.importorskip(module)
+    from Architecture import audio_loop
+    return audio_loop
+
+
+@pytest.fixture
+def make_audio_loop(audio_loop_module, monkeypatch, tmp_path):
+    """
+    Constrói um `AudioLoop` real contra o `FakeLiveClient`, sem baixar o MiDaS, sem
+    pré-carregar o DeepFace e sem ler o handle de retomada salvo do usuário.
+    """
+    from Architecture.fake_live import FakeLiveClient
+
+    monkeypatch.setattr(audio_loop_module, "load_midas_model", lambda: (None, None, None))
+    monkeypatch.setattr(audio_loop_module, "DeepFace", None)
+    monkeypatch.setattr(audio_loop_module, "GEMINI_SESSION_HANDLE_PATH", str(tmp_path / "live_session.json"))
+
+    def _make(video_mode: str = "none", **client_kwargs):
+        client = FakeLiveClient(connect_delay_s=0.0, **client_kwargs)
+        return audio_loop_module.AudioLoop(video_mode=video_mode, live_client=client), client
+
+    return _make
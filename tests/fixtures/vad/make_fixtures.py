@@ -0,0 +1,96 @@
+# tests/fixtures/vad/make_fixtures.py
+"""
+Gera as gravações sintéticas (16 kHz, PCM16 mono) usadas em tests/test_voice_activity.py
+e o gabarito `expected_segments.json` com os trechos de fala de cada uma.
+Determinístico: rodar de novo reproduz os mesmos arquivos.
+
+    python tests/fixtures/vad/make_fixtures.py
+"""
+import json
+import os
+import wave
+
+import numpy as np
+
+SAMPLE_RATE = 16000
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def _db(dbfs: float) -> float:
+    return 10.0 ** (dbfs / 20.0)
+
+
+def _room_noise(rng: np.random.Generator, seconds: float, dbfs: float) -> np.ndarray:
+    """Ruído de sala: ruído branco passado por um passa-baixas de 1 polo (energia nas baixas)."""
+    white = rng.normal(0.0, 1.0, int(seconds * SAMPLE_RATE))
+    pink = np.empty_like(white)
+    acc = 0.0
+    for i, x in enumerate(white):
+        acc = 0.97 * acc + 0.03 * x
+        pink[i] = acc
+    return pink / (np.sqrt(np.mean(pink * pink)) + 1e-12) * _db(dbfs)
+
+
+def _voiced(seconds: float, dbfs: float, f0: float) -> np.ndarray:
+    """Fala sintética: harmônicos de `f0` com leve vibrato e envelope silábico de ~4 Hz."""
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    phase = 2 * np.pi * np.cumsum(f0 * (1.0 + 0.03 * np.sin(2 * np.pi * 5.0 * t))) / SAMPLE_RATE
+    signal = sum(np.sin(k * phase) / k for k in range(1, 12))
+    syllables = 0.35 + 0.65 * np.abs(np.sin(np.pi * 4.0 * t))
+    edges = np.minimum(1.0, np.minimum(t, t[-1] - t) / 0.02) # Sem cliques nas bordas
+    signal = signal * syllables * edges
+    return signal / (np.sqrt(np.mean(signal * signal)) + 1e-12) * _db(dbfs)
+
+
+def _hiss(rng: np.random.Generator, seconds: float, dbfs: float) -> np.ndarray:
+    """Chiado: ruído branco passado por um passa-altas (ZCR alto, como ventilador ou 'sss')."""
+    white = rng.normal(0.0, 1.0, int(seconds * SAMPLE_RATE))
+    hiss = np.diff(white, prepend=0.0)
+    return hiss / np.sqrt(np.mean(hiss * hiss)) * _db(dbfs)
+
+
+def _write(name: str, samples: np.ndarray) -> None:
+    pcm = np.clip(samples * 32768.0, -32768, 32767).astype("<i2")
+    with wave.open(os.path.join(HERE, name), "wb") as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(SAMPLE_RATE)
+        wav_file.writeframes(pcm.tobytes())
+
+
+def build() -> dict:
+    rng = np.random.default_rng(2024)
+    expected = {}
+
+    # Duas falas em ruído de sala
+    parts, speech, t = [], [], 0.0
+    for kind, seconds in (("noise", 1.5), ("speech", 1.2), ("noise", 1.5), ("speech", 0.8), ("noise", 1.5)):
+        noise = _room_noise(rng, seconds, -45.0)
+        if kind == "speech":
+            noise = noise + _voiced(seconds, -20.0, 140.0 if not speech else 210.0)
+            speech.append([t, t + seconds])
+        parts.append(noise)
+        t += seconds
+    _write("two_utterances_room_noise.wav", np.concatenate(parts))
+    expected["two_utterances_room_noise.wav"] = speech
+
+    # Só chiado alto (ZCR alto) e ruído de sala: nenhuma fala
+    _write("hiss_no_speech.wav", np.concatenate((
+        _room_noise(rng, 1.0, -45.0), _hiss(rng, 2.0, -30.0), _room_noise(rng, 1.0, -45.0))))
+    expected["hiss_no_speech.wav"] = []
+
+    # Ruído, 2 s zerados pela supressão de eco, ruído de sala um pouco mais alto e uma fala
+    parts = [_room_noise(rng, 1.0, -44.0), np.zeros(2 * SAMPLE_RATE), _room_noise(rng, 2.0, -40.0)]
+    parts.append(_room_noise(rng, 1.0, -40.0) + _voiced(1.0, -20.0, 180.0))
+    parts.append(_room_noise(rng, 1.5, -40.0))
+    _write("echo_zeros_then_speech.wav", np.concatenate(parts))
+    expected["echo_zeros_then_speech.wav"] = [[5.0, 6.0]]
+    return expected
+
+
+if __name__ == "__main__":
+    segments = build()
+    with open(os.path.join(HERE, "expected_segments.json"), "w", encoding="utf-8") as f:
+        json.dump(segments, f, indent=2)
+        f.write("\n")
+    print(segments)
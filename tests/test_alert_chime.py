@@ -0,0 +1,67 @@
+# tests/test_alert_chime.py
+import numpy as np
+
+from Architecture.alert_chime import ChimeMixer, DangerChimeGate
+
+SEVERITY = {"knife": 3, "car": 2, "dog": 1}
+
+
+def _gate(**kwargs):
+    return DangerChimeGate(SEVERITY, default_severity=1, **kwargs)
+
+
+def test_stationary_hazard_chimes_once():
+    """Um perigo parado à vista toca o som uma única vez, não a cada cool-down."""
+    gate = _gate(release_frames=5)
+    reasons = [gate.observe(["car"]) for _ in range(300)]
+    assert reasons[0] == "new"
+    assert reasons[1:] == [None] * 299
+    assert gate.stats()["fired_new"] == 1
+
+
+def test_hazard_chimes_again_after_release():
+    gate = _gate(release_frames=5)
+    assert gate.observe(["car"]) == "new"
+    for _ in range(5):
+        assert gate.observe([]) is None
+    assert gate.observe(["car"]) == "new"
+
+
+def test_flicker_shorter_than_release_does_not_rechime():
+    """Falhas curtas do detector (histerese de soltura) não reiniciam o perigo."""
+    gate = _gate(release_frames=5)
+    assert gate.observe(["car"]) == "new"
+    for _ in range(20):
+        for _ in range(4):
+            assert gate.observe([]) is None
+        assert gate.observe(["car"]) is None
+
+
+def test_confirm_frames_delays_first_chime():
+    gate = _gate(confirm_frames=3)
+    assert gate.observe(["dog"]) is None
+    assert gate.observe(["dog"]) is None
+    assert gate.observe(["dog"]) == "new"
+
+
+def test_more_severe_hazard_escalates():
+    gate = _gate()
+    assert gate.observe(["dog"]) == "new"
+    assert gate.observe(["dog", "knife"]) == "escalated"
+    # Um perigo novo menos grave que o já ativo continua sendo "new" (respeita o cool-down)
+    assert gate.observe(["dog", "knife", "car"]) == "new"
+    assert gate.stats()["fired_escalated"] == 1
+
+
+def test_reset_forgets_active_hazards():
+    gate = _gate()
+    assert gate.observe(["car"]) == "new"
+    gate.reset()
+    assert gate.observe(["car"]) == "new"
+
+
+def test_force_bypasses_cooldown():
+    mixer = ChimeMixer(np.zeros(100, dtype=np.int16), 24000, cooldown_s=3.0)
+    assert mixer.trigger()
+    assert not mixer.trigger()
+    assert mixer.trigger(force=True)
@@ -0,0 +1,97 @@
+# tests/test_alert_scheduler.py
+from Architecture.alert_scheduler import DangerAlertScheduler
+
+SEVERITY = {"car": 3, "knife": 2, "dog": 1}
+
+
+def _scheduler(**kwargs):
+    options = dict(confirm_frames=3, window_frames=5, cooldown_s=20.0, min_send_interval_s=3.0, urgent_severity=3)
+    options.update(kwargs)
+    return DangerAlertScheduler(SEVERITY, default_severity=1, **options)
+
+
+def test_needs_n_of_m_frames_to_confirm():
+    scheduler = _scheduler()
+    for t, labels in enumerate([["knife"], [], ["knife"]]):
+        scheduler.observe(labels, now=float(t))
+        assert scheduler.next_alert(now=float(t)) is None
+    scheduler.observe(["knife"], now=3.0) # 3 dos últimos 5 frames
+    alert = scheduler.next_alert(now=3.0)
+    assert alert is not None and alert.labels == ["knife"] and alert.severity == 2
+
+
+def test_single_frame_flicker_never_alerts():
+    """Um falso positivo isolado sai da janela sem virar mensagem."""
+    scheduler = _scheduler()
+    for t in range(20):
+        scheduler.observe(["knife"] if t % 5 == 0 else [], now=float(t))
+        assert scheduler.next_alert(now=float(t)) is None
+    assert scheduler.stats()["alerts_sent"] == 0
+
+
+def test_cooldown_suppresses_repeats_of_the_same_label():
+    scheduler = _scheduler(confirm_frames=1, window_frames=1)
+    scheduler.observe(["knife"], now=0.0)
+    assert scheduler.next_alert(now=0.0) is not None
+    for t in range(1, 20): # Perigo parado à vista durante o cool-down
+        scheduler.observe(["knife"], now=float(t))
+        assert scheduler.next_alert(now=float(t)) is None
+    scheduler.observe(["knife"], now=20.0)
+    assert scheduler.next_alert(now=20.0).labels == ["knife"]
+
+
+def test_simultaneous_hazards_are_merged_most_severe_first():
+    scheduler = _scheduler(confirm_frames=1, window_frames=1)
+    scheduler.observe(["dog", "knife", "car"], now=0.0)
+    alert = scheduler.next_alert(now=0.0)
+    assert alert.labels == ["car", "knife", "dog"]
+    assert alert.severity == 3
+    assert scheduler.next_alert(now=0.0) is None
+
+
+def test_rate_limit_holds_alerts_unless_urgent():
+    scheduler = _scheduler(confirm_frames=1, window_frames=1)
+    scheduler.observe(["dog"], now=0.0)
+    assert scheduler.next_alert(now=0.0).labels == ["dog"]
+
+    scheduler.observe(["dog", "knife"], now=1.0)
+    assert scheduler.next_alert(now=1.0) is None # Severidade 2 espera o intervalo mínimo
+    scheduler.observe(["dog", "knife", "car"], now=1.5)
+    assert scheduler.next_alert(now=1.5).labels == ["car", "knife"] # Urgente fura o limite e leva o pendente junto
+
+    scheduler.observe(["dog", "knife", "car"], now=2.0)
+    assert scheduler.next_alert(now=2.0) is None
+
+
+def test_rate_limited_alert_goes_out_after_the_interval():
+    scheduler = _scheduler(confirm_frames=1, window_frames=1)
+    scheduler.observe(["dog"], now=0.0)
+    scheduler.next_alert(now=0.0)
+    scheduler.observe(["knife"], now=1.0)
+    assert scheduler.next_alert(now=1.0) is None
+    assert scheduler.next_alert(now=3.0).labels == ["knife"]
+
+
+def test_counters():
+    scheduler = _scheduler(confirm_frames=2, window_frames=3)
+    scheduler.observe(["knife"], now=0.0) # Ainda não confirmado: suprimido
+    scheduler.observe(["knife", "dog"], now=1.0) # knife confirmado; dog ainda não
+    scheduler.observe(["knife", "dog"], now=2.0) # knife já pendente; dog confirmado
+    alert = scheduler.next_alert(now=2.0)
+    assert alert.labels == ["knife", "dog"]
+    scheduler.observe(["knife", "dog"], now=3.0) # Ambos em cool-down
+    stats = scheduler.stats()
+    assert stats["alerts_sent"] == 1
+    assert stats["alerts_merged"] == 1
+    assert stats["alerts_suppressed"] == 5
+    assert stats["pending"] == 0
+
+
+def test_reset_forgets_labels_but_keeps_counters():
+    scheduler = _scheduler(confirm_frames=1, window_frames=1)
+    scheduler.observe(["knife"], now=0.0)
+    scheduler.next_alert(now=0.0)
+    scheduler.reset()
+    scheduler.observe(["knife"], now=1.0)
+    assert scheduler.next_alert(now=5.0).labels == ["knife"] # Sem cool-down após a reabertura
+    assert scheduler.stats()["alerts_sent"] == 2
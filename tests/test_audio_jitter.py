@@ -0,0 +1,77 @@
+# tests/test_audio_jitter.py
+import numpy as np
+import pytest
+
+from Architecture.audio_jitter import PlaybackJitterBuffer, simulate_arrivals, synthetic_patterns
+
+SAMPLE_RATE = 24000
+DEVICE_FRAMES = 1024
+PATTERNS = synthetic_patterns(SAMPLE_RATE)
+
+
+def _run(name, **buffer_kwargs):
+    arrivals = PATTERNS[name]
+    duration = arrivals[-1][0] + sum(frames for _, frames in arrivals) / SAMPLE_RATE + 1.0
+    result = simulate_arrivals(arrivals, duration, SAMPLE_RATE, DEVICE_FRAMES, **buffer_kwargs)
+    result["in_ms"] = sum(frames for _, frames in arrivals) * 1000.0 / SAMPLE_RATE
+    return result
+
+
+@pytest.mark.parametrize("name", ["burst_3x", "very_long_burst_10x", "realtime_jitter_30ms"])
+def test_audio_queued_ahead_is_never_compressed_or_dropped(name):
+    """O modelo adiantar áudio (ou jitter pequeno) não é atraso: tudo toca, sem aceleração nem descarte."""
+    result = _run(name)
+    assert result["compressed_blocks"] == 0
+    assert result["dropped_ms"] == 0.0
+    assert result["skipped_late_ms"] == 0.0
+    assert result["blocks_out"] * DEVICE_FRAMES * 1000.0 / SAMPLE_RATE >= result["in_ms"]
+
+
+def test_stall_with_backlog_is_caught_up_by_compression():
+    """Uma parada de 1 s seguida do acumulado atrasa o playback; a compressão recupera parte disso."""
+    result = _run("stall_1s_backlog")
+    assert result["max_lag_ms"] > 800.0
+    assert result["compressed_blocks"] > 0
+    assert result["dropped_ms"] == 0.0
+    assert result["skipped_late_ms"] == 0.0
+
+
+def test_stall_without_backlog_has_nothing_to_recover():
+    """Sem sobra na fila não há o que comprimir: a fala só continua 600 ms depois."""
+    result = _run("stall_600ms")
+    assert result["max_lag_ms"] > 500.0
+    assert result["compressed_blocks"] == 0
+    assert result["skipped_late_ms"] == 0.0
+
+
+def test_pause_without_turn_end_starts_a_new_stretch():
+    """Uma pausa longa do produtor com a fila vazia é uma fala nova, não atraso a recuperar."""
+    result = _run("pause_2.5s_no_turn_end")
+    assert result["max_lag_ms"] < 300.0
+    assert result["compressed_blocks"] == 0
+
+
+def test_lag_above_max_is_skipped_from_the_late_part():
+    """Com atraso acima de max_lag_ms, o trecho atrasado é pulado e o resto toca normalmente."""
+    result = _run("stall_4s_backlog", new_stretch_gap_ms=10000.0, max_lag_ms=2000.0, catchup_lag_ms=300.0)
+    assert result["max_lag_ms"] > 2000.0
+    assert 2500.0 < result["skipped_late_ms"] < 4000.0
+    assert result["dropped_ms"] == 0.0
+
+
+def test_memory_cap_drops_only_beyond_max_depth():
+    jitter = PlaybackJitterBuffer(SAMPLE_RATE, DEVICE_FRAMES, max_depth_ms=1000.0)
+    jitter.push(bytes(int(SAMPLE_RATE * 1.5) * 2), now=0.0)
+    assert jitter.depth_ms == pytest.approx(1000.0, abs=1.0)
+    assert jitter.stats()["dropped_ms"] == pytest.approx(500.0, abs=1.0)
+
+
+def test_compression_keeps_block_size_and_content_order():
+    jitter = PlaybackJitterBuffer(SAMPLE_RATE, DEVICE_FRAMES, target_ms=40.0, catchup_lag_ms=100.0)
+    ramp = (np.arange(SAMPLE_RATE * 2) % 30000).astype(np.int16)
+    jitter.push(ramp[:SAMPLE_RATE // 10].tobytes(), now=0.0)
+    assert jitter.pop_block(now=0.05) is not None # Começa a tocar
+    jitter.push(ramp[SAMPLE_RATE // 10:].tobytes(), now=0.6) # Chegou atrasado, com sobra
+    block = jitter.pop_block(now=0.6)
+    assert len(block) == DEVICE_FRAMES * 2
+    assert jitter.compressed_blocks == 1
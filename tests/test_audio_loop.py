@@ -0,0 +1,97 @@
+# tests/test_audio_loop.py
+import asyncio
+from types import SimpleNamespace
+
+import numpy as np
+
+from Architecture.fake_live import FakeLiveSession
+
+
+def test_construction_wires_tool_executor_to_function_calling(make_audio_loop):
+    """O `AudioLoop` constrói e o executor de ferramentas aponta para os métodos de `Function_Calling`."""
+    loop, _ = make_audio_loop()
+    assert loop.tool_executor.run_tool == loop._execute_function_call
+    assert loop.tool_executor.send_result == loop._send_tool_response
+
+
+def test_tool_call_result_reaches_the_session(make_audio_loop):
+    """Uma chamada de ferramenta roda pelo executor e a FunctionResponse sai com o id do servidor."""
+    loop, _ = make_audio_loop()
+
+    async def _run():
+        session = FakeLiveSession("tool-test")
+        loop.gemini_session = session
+        loop.tool_executor.submit("identify_person_in_front", {}, "call-1") # Sem câmera: responde na hora
+        while loop.tool_executor.running:
+            await asyncio.sleep(0.01)
+        return session
+
+    session = asyncio.run(_run())
+    assert len(session.sends_of("tool_response")) == 1
+    assert loop.unsent_tool_responses == []
+    assert loop.tool_executor.stats()["completed"] == 1
+
+
+def test_unsent_tool_response_is_flushed_on_resumed_session(make_audio_loop):
+    """Um resultado que falhou com a conexão caída é reenviado na sessão retomada."""
+    loop, client = make_audio_loop()
+
+    def _config(handle):
+        return SimpleNamespace(session_resumption=SimpleNamespace(handle=handle))
+
+    async def _run():
+        async with client.aio.live.connect(config=_config(None)) as first:
+            loop.gemini_session = first
+            first.drop()
+            await loop._send_tool_response("identify_person_in_front", "Pessoa não reconhecida.", "call-7")
+            queued = list(loop.unsent_tool_responses)
+        async with client.aio.live.connect(config=_config(client.handles[-1])) as resumed:
+            loop.gemini_session = resumed
+            await loop._flush_unsent_tool_responses()
+        return first, resumed, queued
+
+    first, resumed, queued = asyncio.run(_run())
+    assert queued == [("identify_person_in_front", "Pessoa não reconhecida.", "call-7")]
+    assert first.sends_of("tool_response") == []
+    assert resumed.resumed
+    assert len(resumed.sends_of("tool_response")) == 1
+    assert loop.unsent_tool_responses == []
+
+
+def test_screen_mode_streams_frames_to_the_video_lane(make_audio_loop, monkeypatch):
+    """O modo "screen" registra uma tarefa que existe e envia frames pela faixa de vídeo."""
+    from Architecture.uplink_scheduler import UPLINK_LANE_VIDEO
+
+    loop, _ = make_audio_loop(video_mode="screen")
+    assert "stream_screen_frames" in loop._build_pipeline().stats()
+    shots = iter(np.full((480, 640, 3), 255 * (i % 2), dtype=np.uint8) for i in range(1000)) # Cena sempre mudando
+    monkeypatch.setattr(loop, "_capture_screen_frame", lambda: next(shots))
+    monkeypatch.setattr(loop, "_video_send_interval", lambda: 0.01)
+    if loop.scene_gate:
+        loop.scene_gate.min_interval_s = 0.0
+
+    async def _run():
+        loop.uplink_scheduler = loop._new_uplink_scheduler()
+        task = asyncio.create_task(loop.stream_screen_frames())
+        while loop.uplink_scheduler.lanes[UPLINK_LANE_VIDEO].enqueued < 3 and not task.done():
+            await asyncio.sleep(0.01)
+        loop.stop_event.set()
+        await asyncio.wait_for(task, timeout=2.0) # Levanta o erro da captura, se houver
+
+    asyncio.run(_run())
+    video = loop.uplink_scheduler.lanes[UPLINK_LANE_VIDEO]
+    assert len(video.items) == 1 # Só o frame mais novo fica na fila
+    assert video.items[-1].payload["mime_type"] == "image/jpeg"
+
+
+def test_yolo_backend_failure_takes_the_model_error_path(make_audio_loop, audio_loop_module, monkeypatch):
+    """Se o backend do detector falhar, o modo câmera segue sem YOLO em vez de derrubar a construção."""
+    def _broken_backend(yolo_model):
+        raise RuntimeError("backend indisponível")
+
+    monkeypatch.setattr(audio_loop_module, "load_yolo_model", lambda: object())
+    monkeypatch.setattr(audio_loop_module, "load_yolo_backend", _broken_backend)
+    loop, _ = make_audio_loop(video_mode="camera")
+    assert loop.yolo_model is None
+    assert loop.yolo_engine is None
+    assert loop.class_lookup is None
@@ -0,0 +1,35 @@
+# tests/test_class_lookup.py
+import numpy as np
+
+from Architecture.class_lookup import ClassLookup
+
+NAMES = {0: "person", 43: "knife", 56: "chair", 60: "dining table"}
+DANGER = {"faca": ["knife"], "arma_de_fogo": ["gun"]}
+CLASS_MAP = {"cadeira": ["chair"], "mesa": ["dining table", "desk"]}
+
+
+def _lookup():
+    return ClassLookup(NAMES, DANGER, CLASS_MAP, ["mesa"])
+
+
+def test_danger_mask_and_unreachable_labels():
+    lookup = _lookup()
+    assert lookup.danger_mask(np.array([0, 43, 56], dtype=np.int64)).tolist() == [False, True, False]
+    assert lookup.unreachable_danger_labels == ["gun"]
+
+
+def test_danger_mask_ignores_ids_outside_the_model_names():
+    """Um id >= num_classes (ou negativo) não levanta IndexError: simplesmente não é perigo."""
+    lookup = _lookup()
+    ids = np.array([43, 61, 500, -1], dtype=np.int64)
+    assert lookup.danger_mask(ids).tolist() == [True, False, False, False]
+    assert lookup.danger_mask(np.zeros(0, dtype=np.int64)).tolist() == []
+
+
+def test_queries_map_portuguese_names_and_fall_back_to_model_names():
+    lookup = _lookup()
+    assert lookup.class_ids_for_query("Cadeira").tolist() == [56]
+    assert lookup.class_ids_for_query("mesa").tolist() == [60] # "desk" não existe no modelo
+    assert lookup.class_ids_for_query("knife").tolist() == [43]
+    assert lookup.class_ids_for_query("unicórnio").tolist() == []
+    assert lookup.surface_class_ids.tolist() == [60]
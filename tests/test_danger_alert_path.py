@@ -0,0 +1,99 @@
+# tests/test_danger_alert_path.py
+import asyncio
+
+import numpy as np
+
+from Architecture.alert_chime import ChimeMixer
+from Architecture.alert_scheduler import DangerAlert
+from Architecture.fake_live import FakeLiveSession
+
+NAMES = {0: "person", 1: "knife", 2: "car"}
+
+
+class _Boxes:
+    def __init__(self, data: np.ndarray):
+        self.data = data
+
+    def __len__(self) -> int:
+        return self.data.shape[0]
+
+
+class _Result:
+    def __init__(self, data: np.ndarray):
+        self.boxes = _Boxes(data)
+
+
+class _FakeEngine:
+    """Detector falso no lugar do `YoloInferenceEngine`: as mesmas caixas em todo frame."""
+
+    def __init__(self, rows):
+        self.names = NAMES
+        self.data = np.array(rows, dtype=np.float32).reshape(-1, 6)
+        self.calls = 0
+
+    def predict(self, frame_rgb):
+        self.calls += 1
+        return [_Result(self.data)]
+
+
+def _control_messages(loop, lane):
+    return [item.payload for item in loop.uplink_scheduler.lanes[lane].items]
+
+
+def test_send_danger_alert_queues_one_control_message(make_audio_loop):
+    """Um alerta com vários perigos vira uma única mensagem na faixa de controle."""
+    from Architecture.uplink_scheduler import UPLINK_LANE_CONTROL
+
+    loop, _ = make_audio_loop()
+    loop.uplink_scheduler = loop._new_uplink_scheduler()
+    asyncio.run(loop._send_danger_alert(DangerAlert(["knife", "fire"], 3)))
+
+    queued = _control_messages(loop, UPLINK_LANE_CONTROL)
+    assert len(queued) == 1
+    assert "'KNIFE', 'FIRE'" in queued[0]
+
+
+def test_camera_inference_consumer_alerts_once_for_a_stationary_hazard(make_audio_loop, audio_loop_module, monkeypatch):
+    """
+    Frames da câmera -> detector -> agendador de alertas e som local: perigos
+    simultâneos confirmados saem numa mensagem só, e um perigo parado não repete
+    nem a mensagem nem o som.
+    """
+    from Architecture.class_lookup import ClassLookup
+    from Architecture.frame_buffer import FrameRingBuffer
+    from Architecture.uplink_scheduler import UPLINK_LANE_CONTROL
+
+    monkeypatch.setattr(audio_loop_module, "YOLO_INFERENCE_MAX_FPS", 0.0) # Sem espera entre inferências
+    loop, _ = make_audio_loop()
+    engine = _FakeEngine([[10, 10, 50, 80, 0.9, 1], [100, 40, 300, 200, 0.8, 2], [5, 5, 20, 20, 0.9, 0]])
+    loop.yolo_engine = engine
+    loop.class_lookup = ClassLookup(NAMES, audio_loop_module.DANGER_CLASSES, audio_loop_module.YOLO_CLASS_MAP,
+                                    audio_loop_module.SURFACE_CLASS_KEYS)
+    loop.tracker = loop._new_tracker()
+    loop.danger_chime = ChimeMixer(np.zeros(100, dtype=np.int16), 24000, cooldown_s=0.0)
+    frames = 12
+
+    async def _run():
+        loop.gemini_session = FakeLiveSession("alert-test")
+        loop.uplink_scheduler = loop._new_uplink_scheduler()
+        loop.camera_ring = FrameRingBuffer(3)
+        wakeup = asyncio.Event()
+        consumer = asyncio.create_task(loop._camera_inference_consumer(wakeup))
+        for _ in range(frames):
+            index = loop.camera_ring.acquire_write_slot()
+            seq = loop.camera_ring.commit(index, np.zeros((240, 320, 3), dtype=np.uint8))
+            wakeup.set()
+            while loop._published_frame_ref is None or loop._published_frame_ref.seq != seq:
+                await asyncio.sleep(0.001)
+        loop.stop_event.set()
+        wakeup.set()
+        await asyncio.wait_for(consumer, timeout=2.0)
+
+    asyncio.run(_run())
+    assert engine.calls == frames
+    queued = _control_messages(loop, UPLINK_LANE_CONTROL)
+    assert len(queued) == 1 # Confirmação N-de-M, depois cool-down
+    assert "'CAR', 'KNIFE'" in queued[0] # Agrupados, do mais grave ao menos grave
+    assert loop.alert_scheduler.stats()["alerts_merged"] == 1
+    assert loop.danger_chime.chimes_triggered == 1 # Mesmo sem cool-down no mixer
+    assert len(loop.tracker.visible_tracks()) == 3
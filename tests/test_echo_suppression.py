@@ -0,0 +1,40 @@
+# tests/test_echo_suppression.py
+import numpy as np
+import pytest
+
+from Architecture.echo_suppression import EchoSuppressor, evaluate_synthetic
+
+
+@pytest.mark.parametrize("use_nlms", [True, False])
+def test_echo_only_packets_are_suppressed(use_nlms):
+    """Só a voz do assistente no microfone: quase todos os pacotes viram silêncio."""
+    stats = evaluate_synthetic(near_end_from_s=None, use_nlms=use_nlms)
+    assert stats["reference_active_packets"] == stats["packets"]
+    assert stats["echo_only_packets"] >= 0.95 * stats["packets"]
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_double_talk_is_detected_once_the_user_speaks(seed):
+    """Eco nos 3 primeiros segundos, depois eco + fala local: a fala passa, o eco antes dela não."""
+    stats = evaluate_synthetic(seconds=6.0, near_end_from_s=3.0, seed=seed)
+    assert stats["near_end_detected_fraction"] >= 0.9
+    assert stats["echo_only_packets"] >= 0.9 * stats["packets"] / 2 # Metade anterior à fala
+
+
+def test_nlms_reduces_the_echo():
+    assert evaluate_synthetic(near_end_from_s=None)["avg_erle_db"] > 3.0
+
+
+def test_echo_only_packet_is_returned_as_digital_silence():
+    suppressor = EchoSuppressor(16000, 16000)
+    rng = np.random.default_rng(0)
+    origin = suppressor._clock_origin
+    results = []
+    for index in range(20): # 100 ms por pacote, referência tocando no mesmo instante
+        far = (rng.normal(0, 0.2, 1600) * 32767 * 0.5).astype(np.int16)
+        suppressor.add_reference(far.tobytes(), origin + index * 0.1)
+        mic = (far.astype(np.float32) * 0.1).astype(np.int16)
+        results.append(suppressor.process(mic.tobytes(), origin + index * 0.1))
+    suppressed = [r for r in results if r.echo_only]
+    assert len(suppressed) >= 15
+    assert all(not np.frombuffer(r.pcm, dtype=np.int16).any() for r in suppressed)
@@ -0,0 +1,68 @@
+# tests/test_fake_live.py
+import asyncio
+from types import SimpleNamespace
+
+from Architecture.fake_live import FakeLiveSession
+
+
+def test_check_turn_semantics_flags_media_turn_ends_and_unbalanced_activity():
+    async def _run():
+        session = FakeLiveSession("bad")
+        await session.send(input={"data": b"\x00" * 640, "mime_type": "audio/pcm"}, end_of_turn=True)
+        await session.send_realtime_input(activity_end=True)
+        await session.send_realtime_input(activity_start=True)
+        await session.send_realtime_input(activity_start=True)
+        return session.check_turn_semantics()
+
+    violations = asyncio.run(_run())
+    assert len(violations) == 3
+    assert "audio enviado com fim de turno" in violations[0]
+
+
+def test_uplink_payloads_keep_turn_semantics(make_audio_loop, audio_loop_module):
+    """
+    Áudio, vídeo, texto e marcadores de atividade passam por `_send_uplink_payload`
+    contra o servidor falso: mídia nunca fecha turno e cada texto ou activity_end
+    fecha exatamente um.
+    """
+    from Architecture.uplink_scheduler import UPLINK_LANE_AUDIO, UPLINK_LANE_CONTROL, UPLINK_LANE_VIDEO
+
+    assert audio_loop_module.GEMINI_REALTIME_INPUT
+    loop, client = make_audio_loop()
+    audio = {"data": b"\x01\x00" * 320, "mime_type": "audio/pcm"}
+    video = {"data": b"\xff\xd8jpeg", "mime_type": "image/jpeg"}
+    uplink = [
+        (UPLINK_LANE_VIDEO, video),
+        (UPLINK_LANE_AUDIO, {"activity": "start"}),
+        (UPLINK_LANE_AUDIO, audio),
+        (UPLINK_LANE_AUDIO, audio),
+        (UPLINK_LANE_VIDEO, video),
+        (UPLINK_LANE_AUDIO, audio),
+        (UPLINK_LANE_AUDIO, {"activity": "end"}),
+        (UPLINK_LANE_CONTROL, "Onde está o meu celular?"),
+        (UPLINK_LANE_AUDIO, {"activity": "start"}),
+        (UPLINK_LANE_AUDIO, audio),
+        (UPLINK_LANE_AUDIO, {"activity": "end"}),
+        (UPLINK_LANE_CONTROL, "ALERTA DE PERIGO (YOLO): teste"),
+    ]
+
+    async def _run():
+        async with client.aio.live.connect(config=SimpleNamespace(session_resumption=None)) as session:
+            loop.gemini_session = session
+            for lane, payload in uplink:
+                await loop._send_uplink_payload(lane, payload)
+            return session
+
+    session = asyncio.run(_run())
+    assert session.check_turn_semantics() == []
+    assert client.report()["violations"] == []
+    assert session.summary()["legacy_sends"] == 0
+    media = session.sends_of("audio") + session.sends_of("video")
+    assert len(media) == 6
+    assert not any(s.turn_complete for s in media)
+    texts = session.sends_of("text")
+    assert len(texts) == 2 and all(s.turn_complete for s in texts)
+    assert len(session.sends_of("activity_end")) == 2
+    # Um fim de turno por texto ou activity_end, e nenhum outro
+    assert session.user_turns == 4
+    assert sum(1 for s in session.sends if s.turn_complete) == len(texts)
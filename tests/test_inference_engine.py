@@ -0,0 +1,46 @@
+# tests/test_inference_engine.py
+import numpy as np
+import pytest
+
+from Architecture.inference_engine import DetectorBackend, YoloInferenceEngine
+
+
+class _EchoBackend(DetectorBackend):
+    name = "echo"
+
+    def __init__(self):
+        self.batch_sizes = []
+
+    @property
+    def names(self):
+        return {0: "person"}
+
+    def predict_batch(self, frames_rgb):
+        self.batch_sizes.append(len(frames_rgb))
+        return [int(frame[0, 0, 0]) for frame in frames_rgb]
+
+
+def test_incomplete_backend_fails_on_instantiation():
+    class _NoPredict(DetectorBackend):
+        @property
+        def names(self):
+            return {}
+
+    with pytest.raises(TypeError):
+        _NoPredict()
+    with pytest.raises(TypeError):
+        DetectorBackend()
+
+
+def test_engine_returns_each_frame_its_own_result():
+    backend = _EchoBackend()
+    engine = YoloInferenceEngine(backend, max_batch_size=4, max_wait_ms=5.0)
+    engine.start()
+    try:
+        futures = [engine.submit(np.full((2, 2, 3), i, dtype=np.uint8)) for i in range(6)]
+        assert [f.result(timeout=2.0) for f in futures] == [[i] for i in range(6)] # Formato de `model.predict`
+    finally:
+        engine.stop()
+    assert engine.names == {0: "person"}
+    assert sum(backend.batch_sizes) == 6
+    assert max(backend.batch_sizes) <= 4
@@ -0,0 +1,23 @@
+# tests/test_onnx_parity.py
+import os
+
+import pytest
+
+for _module in ("cv2", "onnxruntime", "ultralytics", "torch"):
+    pytest.importorskip(_module)
+
+from Architecture.app_config import YOLO_MODEL_PATH
+from Architecture.onnx_detector import PARITY_FIXTURE_IMAGES, run_parity_check
+
+
+@pytest.mark.skipif(not os.path.exists(YOLO_MODEL_PATH), reason="modelo YOLO não encontrado")
+def test_onnx_backend_matches_torch_on_fixture_images():
+    """ONNX Runtime reproduz as detecções do Ultralytics no conjunto fixo de imagens, nos dois sentidos."""
+    report = run_parity_check()
+    assert report is not None
+    assert report["reference"] == "torch"
+    assert report["candidate"] == "onnxruntime" # Nunca o PyTorch comparado com ele mesmo
+    assert report["frames"] == len(PARITY_FIXTURE_IMAGES)
+    assert report["reference_detections"] > 0 # As imagens têm objetos: a paridade não é trivial
+    assert report["match_ratio"] >= 0.9
+    assert report["candidate_match_ratio"] >= 0.9
@@ -0,0 +1,61 @@
+# tests/test_tool_executor.py
+import asyncio
+
+from Architecture.tool_executor import ToolExecutor
+
+
+def test_calls_run_concurrently_and_keep_their_server_ids():
+    """Ferramentas diferentes rodam juntas; `run_tool` e `send_result` recebem o id do servidor."""
+    async def _run():
+        seen, sent, busy = [], [], asyncio.Event()
+
+        async def run_tool(name, args, call_id):
+            seen.append((name, call_id))
+            await asyncio.sleep(0.1)
+            return f"{name} ok"
+
+        async def send_result(name, result, call_id):
+            sent.append((name, result, call_id))
+
+        executor = ToolExecutor(run_tool, send_result, busy_event=busy)
+        started = asyncio.get_running_loop().time()
+        executor.submit("identify_person_in_front", {}, "call-1")
+        executor.submit("locate_object_and_estimate_distance", {"object_type": "celular"}, "call-2")
+        assert busy.is_set()
+        while executor.running:
+            await asyncio.sleep(0.01)
+        elapsed = asyncio.get_running_loop().time() - started
+        return seen, sent, busy.is_set(), elapsed
+
+    seen, sent, busy, elapsed = asyncio.run(_run())
+    assert sorted(seen) == [("identify_person_in_front", "call-1"), ("locate_object_and_estimate_distance", "call-2")]
+    assert sorted(sent) == [("identify_person_in_front", "identify_person_in_front ok", "call-1"),
+                            ("locate_object_and_estimate_distance", "locate_object_and_estimate_distance ok", "call-2")]
+    assert not busy
+    assert elapsed < 0.18 # Em paralelo, não 0.2 s em sequência
+
+
+def test_cancelled_call_sends_nothing_and_timeout_sends_message():
+    async def _run():
+        sent = []
+
+        async def run_tool(name, args, call_id):
+            await asyncio.sleep(args["seconds"])
+            return "ok"
+
+        async def send_result(name, result, call_id):
+            sent.append((call_id, result))
+
+        executor = ToolExecutor(run_tool, send_result, timeouts={"slow": 0.05})
+        executor.submit("slow", {"seconds": 1.0}, "timeout-me")
+        executor.submit("other", {"seconds": 1.0}, "cancel-me")
+        await asyncio.sleep(0.01)
+        assert executor.cancel(["cancel-me", "unknown"]) == 1
+        while executor.running:
+            await asyncio.sleep(0.01)
+        return sent, executor.stats()
+
+    sent, stats = asyncio.run(_run())
+    assert [call_id for call_id, _ in sent] == ["timeout-me"]
+    assert "demorou demais" in sent[0][1]
+    assert stats["cancelled"] == 1 and stats["timed_out"] == 1
@@ -0,0 +1,58 @@
+# tests/test_tracker.py
+import numpy as np
+
+from Architecture.detections import FrameDetections
+from Architecture.tracker import MultiObjectTracker
+
+NAMES = {0: "person", 67: "cell phone"}
+
+
+def _detections(*boxes):
+    if not boxes:
+        return FrameDetections.empty(NAMES)
+    return FrameDetections(
+        xyxy=np.array([b[:4] for b in boxes], dtype=np.float32),
+        conf=np.full(len(boxes), 0.9, dtype=np.float32),
+        cls=np.array([b[4] for b in boxes], dtype=np.int64),
+        names=NAMES,
+    )
+
+
+def test_object_that_left_is_not_reported():
+    """Um track que só está sendo propagado continua vivo, mas não é relatado como presente."""
+    tracker = MultiObjectTracker(min_hits=2, max_age=15)
+    phone = (100, 100, 160, 200, 67)
+    for t in range(3):
+        tracker.update(_detections(phone), timestamp=float(t))
+    assert len(tracker.as_detections(NAMES)) == 1
+
+    tracker.update(_detections(), timestamp=3.0) # O celular saiu do quadro
+    assert len(tracker.tracks) == 1 # Ainda vivo (oclusão curta não troca o id)...
+    assert len(tracker.as_detections(NAMES)) == 0 # ...mas não é mais relatado
+    assert tracker.visible_tracks() == []
+
+    tracker.update(_detections(phone), timestamp=4.0) # Voltou: mesmo id, relatado de novo
+    reported = tracker.as_detections(NAMES)
+    assert reported.track_ids.tolist() == [tracker.tracks[0].track_id]
+
+
+def test_propagated_frames_between_detector_runs_keep_reporting():
+    """Com o detector a cada N frames, os frames só de propagação não escondem o objeto."""
+    tracker = MultiObjectTracker(min_hits=2)
+    person = (10, 10, 110, 310, 0)
+    tracker.update(_detections(person), timestamp=0.0)
+    tracker.update(_detections(person), timestamp=0.1)
+    for _ in range(3):
+        tracker.predict()
+        assert len(tracker.as_detections(NAMES)) == 1
+
+
+def test_report_max_misses_allows_a_short_gap():
+    tracker = MultiObjectTracker(min_hits=2, report_max_misses=1)
+    person = (10, 10, 110, 310, 0)
+    tracker.update(_detections(person), timestamp=0.0)
+    tracker.update(_detections(person), timestamp=0.1)
+    tracker.update(_detections(), timestamp=0.2)
+    assert len(tracker.visible_tracks()) == 1
+    tracker.update(_detections(), timestamp=0.3)
+    assert tracker.visible_tracks() == []
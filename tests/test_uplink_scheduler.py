@@ -0,0 +1,108 @@
+# tests/test_uplink_scheduler.py
+import asyncio
+
+from Architecture.uplink_scheduler import (
+    UplinkScheduler, POLICY_BLOCK, POLICY_DROP_NEW, POLICY_LATEST,
+    UPLINK_LANE_AUDIO, UPLINK_LANE_CONTROL, UPLINK_LANE_VIDEO
+)
+
+
+def _scheduler(audio_max: int = 4, control_max: int = 2, video_max: int = 1) -> UplinkScheduler:
+    return UplinkScheduler([
+        (UPLINK_LANE_AUDIO, audio_max, POLICY_BLOCK),
+        (UPLINK_LANE_CONTROL, control_max, POLICY_DROP_NEW),
+        (UPLINK_LANE_VIDEO, video_max, POLICY_LATEST),
+    ])
+
+
+def test_strict_priority_across_lanes():
+    async def _run():
+        scheduler = _scheduler(video_max=4)
+        scheduler.put_nowait(UPLINK_LANE_VIDEO, "frame-1")
+        scheduler.put_nowait(UPLINK_LANE_CONTROL, "texto")
+        scheduler.put_nowait(UPLINK_LANE_VIDEO, "frame-2")
+        await scheduler.put(UPLINK_LANE_AUDIO, "audio-1")
+        await scheduler.put(UPLINK_LANE_AUDIO, "audio-2")
+        return [(await scheduler.get()).payload for _ in range(5)]
+
+    assert asyncio.run(_run()) == ["audio-1", "audio-2", "texto", "frame-1", "frame-2"]
+
+
+def test_audio_lane_never_drops_and_keeps_order():
+    """Com a faixa de áudio cheia, o produtor espera em vez de descartar."""
+    async def _run():
+        scheduler = _scheduler(audio_max=2)
+        chunks = [f"chunk-{i}" for i in range(10)]
+
+        async def _producer():
+            for chunk in chunks:
+                await scheduler.put(UPLINK_LANE_AUDIO, chunk)
+
+        producer = asyncio.create_task(_producer())
+        received = []
+        while len(received) < len(chunks):
+            await asyncio.sleep(0) # O produtor enche a faixa antes de cada leitura
+            received.append((await scheduler.get()).payload)
+        await producer
+        return chunks, received, scheduler.lanes[UPLINK_LANE_AUDIO]
+
+    chunks, received, lane = asyncio.run(_run())
+    assert received == chunks
+    assert lane.dropped == 0
+    assert lane.max_depth == 2
+
+
+def test_video_lane_keeps_only_the_latest_frame():
+    async def _run():
+        scheduler = _scheduler(video_max=1)
+        for i in range(5):
+            assert scheduler.put_nowait(UPLINK_LANE_VIDEO, f"frame-{i}")
+        return scheduler, (await scheduler.get()).payload
+
+    scheduler, payload = asyncio.run(_run())
+    assert payload == "frame-4"
+    assert scheduler.lanes[UPLINK_LANE_VIDEO].dropped == 4
+    assert scheduler.depth() == 0
+
+
+def test_control_lane_refuses_new_items_when_full():
+    async def _run():
+        scheduler = _scheduler(control_max=2)
+        accepted = [scheduler.put_nowait(UPLINK_LANE_CONTROL, f"alerta-{i}") for i in range(3)]
+        return accepted, [(await scheduler.get()).payload for _ in range(2)]
+
+    accepted, payloads = asyncio.run(_run())
+    assert accepted == [True, True, False]
+    assert payloads == ["alerta-0", "alerta-1"]
+
+
+def test_get_waits_for_a_put():
+    async def _run():
+        scheduler = _scheduler()
+        getter = asyncio.create_task(scheduler.get())
+        await asyncio.sleep(0.01)
+        assert not getter.done()
+        scheduler.put_nowait(UPLINK_LANE_CONTROL, "texto")
+        return (await asyncio.wait_for(getter, timeout=1.0)).payload
+
+    assert asyncio.run(_run()) == "texto"
+
+
+def test_close_releases_blocked_producers_and_drains():
+    async def _run():
+        scheduler = _scheduler(audio_max=1)
+        await scheduler.put(UPLINK_LANE_AUDIO, "chunk-0")
+        blocked = asyncio.create_task(scheduler.put(UPLINK_LANE_AUDIO, "chunk-1"))
+        await asyncio.sleep(0.01)
+        assert not blocked.done()
+        scheduler.close()
+        accepted = await asyncio.wait_for(blocked, timeout=1.0)
+        first = await scheduler.get()
+        after = await asyncio.wait_for(scheduler.get(), timeout=1.0)
+        return accepted, first.payload, after, scheduler.put_nowait(UPLINK_LANE_VIDEO, "frame")
+
+    accepted, first, after, late_put = asyncio.run(_run())
+    assert accepted is False
+    assert first == "chunk-0" # O que já estava na fila ainda é entregue
+    assert after is None
+    assert late_put is False
@@ -0,0 +1,67 @@
+# tests/test_voice_activity.py
+import json
+import os
+
+import numpy as np
+import pytest
+
+from Architecture.voice_activity import EnergyZcrVad, SpeechGate, evaluate_wav
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures", "vad")
+with open(os.path.join(FIXTURES, "expected_segments.json"), encoding="utf-8") as _f:
+    EXPECTED_SEGMENTS = json.load(_f)
+HANGOVER_S = 0.5
+
+SAMPLE_RATE = 16000
+CHUNK = 1600 # 100 ms, como MIC_PACKET_MS
+
+
+def _noise_chunks(dbfs: float, seconds: float, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    samples = rng.normal(0.0, 32768.0 * 10.0 ** (dbfs / 20.0), int(seconds * SAMPLE_RATE))
+    samples = np.clip(samples, -32768, 32767).astype(np.int16)
+    return [samples[i:i + CHUNK].tobytes() for i in range(0, samples.size - CHUNK + 1, CHUNK)]
+
+
+def _silence_chunks(seconds: float):
+    return [bytes(CHUNK * 2)] * int(seconds * SAMPLE_RATE / CHUNK)
+
+
+def test_digital_silence_does_not_drag_noise_floor():
+    """Pacotes zerados (supressão de eco) não derrubam o piso: ruído da sala continua sendo silêncio."""
+    vad = EnergyZcrVad(SAMPLE_RATE)
+    for chunk in _noise_chunks(-44.0, 1.0):
+        vad.is_speech(chunk)
+    floor_before = vad.noise_floor_db
+    for chunk in _silence_chunks(3.0):
+        assert not vad.is_speech(chunk)
+    assert abs(vad.noise_floor_db - floor_before) < 1e-6
+    room = _noise_chunks(-40.0, 2.0, seed=1)
+    assert sum(vad.is_speech(chunk) for chunk in room) / len(room) < 0.1
+
+
+def test_gate_with_known_decision_skips_vad():
+    """Com `speech` informado, o portão não consulta nem adapta o VAD."""
+    gate = SpeechGate(EnergyZcrVad(SAMPLE_RATE), chunk_ms=100.0)
+    for chunk in _noise_chunks(-44.0, 1.0):
+        gate.process(chunk, now=0.0)
+    floor_before = gate.vad.noise_floor_db
+    for i, chunk in enumerate(_noise_chunks(-80.0, 2.0, seed=2)):
+        output = gate.process(chunk, now=1.0 + i * 0.1, speech=False)
+        assert not output.speech_started
+    assert gate.vad.noise_floor_db == floor_before
+
+
+@pytest.mark.parametrize("wav_name", sorted(EXPECTED_SEGMENTS))
+def test_segmentation_matches_fixture(wav_name):
+    """
+    Gravações de referência (geradas por fixtures/vad/make_fixtures.py): o portão abre
+    no início de cada fala e fecha depois da fala + hangover, sem falas extras.
+    """
+    result = evaluate_wav(os.path.join(FIXTURES, wav_name), SAMPLE_RATE, CHUNK, hangover_ms=HANGOVER_S * 1000.0)
+    detected = result["segments_s"]
+    expected = EXPECTED_SEGMENTS[wav_name]
+    assert len(detected) == len(expected), f"{wav_name}: detectado {detected}, esperado {expected}"
+    for (start, end), (exp_start, exp_end) in zip(detected, expected):
+        assert exp_start - 0.2 <= start <= exp_start + 0.3
+        assert exp_end <= end <= exp_end + HANGOVER_S + 0.3